@@ -1,18 +1,34 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from os.path import basename
+from os.path import basename, exists
 from tempfile import NamedTemporaryFile, mkstemp
 import subprocess
-from typing import BinaryIO
+from typing import BinaryIO, Callable
 
+from asura.common.compression import CompressionPolicy, BALANCED
 from asura.common.factories import ArchiveParser
 from asura.common.models.archive import FolderArchive, ZbbArchive
 from asura.common.models.chunks.formats import ResourceChunk
+from asura.texture.dds import is_dds
+from asura.texture.flip import flip_dds
 
 tex_conv_path = "depends/texconv.exe"
 
 
 def flip(data: bytes, ext: str = "dds", vert: bool = False) -> bytes:
+    ext = ext.lstrip(".")
+    if ext.lower() == "dds":
+        try:
+            return flip_dds(data, vert)
+        except NotImplementedError:
+            # Formats (or odd sizes) we can't flip without re-encoding are left to texconv
+            if not exists(tex_conv_path):
+                raise
+    return flip_texconv(data, ext, vert)
+
+
+def flip_texconv(data: bytes, ext: str = "dds", vert: bool = False) -> bytes:
     if ext[0] != ".":
         ext = "." + ext
     name = None
@@ -38,12 +54,50 @@ def flip(data: bytes, ext: str = "dds", vert: bool = False) -> bytes:
             pass
 
 
-def flip_archive(archive: FolderArchive):
-    for chunk in archive.chunks:
-        if isinstance(chunk, ResourceChunk):
-            if chunk.data[0:3] == "DDS".encode("UTF-8"):
-                flipped = flip(chunk.data)
-                chunk.data = flipped
+def flip_archive(archive: FolderArchive, vert: bool = False, workers: int = None):
+    """
+    Flips every DDS texture in a (loaded) archive, across a pool of worker processes.
+    :param archive: The archive; its chunks must be loaded.
+    :param vert: Flip vertically rather than horizontally.
+    :param workers: The number of worker processes, None will use one per core.
+    """
+    chunks = [chunk for chunk in archive.chunks if isinstance(chunk, ResourceChunk) and is_dds(chunk.data)]
+    if len(chunks) == 0:
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(flip, [chunk.data for chunk in chunks], ["dds"] * len(chunks), [vert] * len(chunks))
+        for chunk, flipped in zip(chunks, results):
+            chunk.data = flipped
+
+
+def flip_compressed_archive(path: str, out_path: str = None, vert: bool = False, workers: int = None,
+                            policy: CompressionPolicy = None, decompress_callback: Callable[[int, int], None] = None,
+                            compress_callback: Callable[[int, int], None] = None) -> ZbbArchive:
+    """
+    Flips every DDS texture in a compressed (Zbb) archive, then compresses it again.
+    :param path: The archive.
+    :param out_path: Where to write the flipped archive, None will overwrite the archive.
+    :param vert: Flip vertically rather than horizontally.
+    :param workers: The number of worker processes, None will use one per core.
+    :param policy: How the flipped archive is compressed (see CompressionPolicy.preset), None will use zlib's
+        default level.
+    :param decompress_callback: Called before each block is decompressed, with its index and the number of blocks.
+    :param compress_callback: Called before each block is compressed, with its index and the number of blocks.
+    :return: The written archive; see ZbbArchive.block_stats.
+    """
+    with BytesIO() as decomp:
+        with open(path, "rb") as comp:
+            comp_archive: ZbbArchive = ArchiveParser.parse(comp)
+            if not isinstance(comp_archive, ZbbArchive):
+                raise NotImplementedError(f"Not Supported ~ {comp_archive.type if comp_archive else None}")
+            comp_archive.decompress_to_stream(comp, decomp, callback=decompress_callback)
+        decomp.seek(0)
+        decomp_archive: FolderArchive = ArchiveParser.parse(decomp)
+        decomp_archive.load(decomp)
+
+    flip_archive(decomp_archive, vert, workers)
+    with open(out_path or path, "wb") as comp:
+        return ZbbArchive.compress(decomp_archive, comp, callback=compress_callback, policy=policy)
 
 
 if __name__ == "__main__":
@@ -63,19 +117,7 @@ if __name__ == "__main__":
     launcher_root = r"G:\Clients\Steam\Launcher"
     steam_root = r"C:\Program Files (x86)\Steam"
     path = fr"{launcher_root}\steamapps\common\Evil Genius 2\GUI\main.asr"
-    with BytesIO() as decomp:
-        with open(path, "rb") as comp:
-            comp_archive: ZbbArchive = ArchiveParser.parse(comp)
-            comp_archive.decompress_to_stream(comp, decomp, callback=decomp_callback)
-
-        decomp.seek(0)
-
-        decomp_archive: FolderArchive = ArchiveParser.parse(decomp)
-        # print(len(decomp_archive.chunks))
-        # exit()
-        decomp_archive.load(decomp)
-
-    flip_archive(decomp_archive)
-    with open(path, "wb") as comp:
-        ZbbArchive.compress(decomp_archive, comp, callback=comp_callback)
-        print(f"Saved to {path}")
+    # GUI archives are mostly BCn textures, which barely compress
+    flip_compressed_archive(path, policy=CompressionPolicy.preset(BALANCED), decompress_callback=decomp_callback,
+                            compress_callback=comp_callback)
+    print(f"Saved to {path}")
@@ -0,0 +1,8 @@
+__all__ = [
+    "AsyncArchive",
+    "AsyncChunk",
+    "open_archive",
+    "get_default_executor",
+]
+
+from asura.aio.archive import AsyncArchive, AsyncChunk, open_archive, get_default_executor
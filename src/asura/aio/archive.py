@@ -0,0 +1,170 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+from threading import Lock
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Optional, TypeVar
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.factories import ChunkUnpacker
+from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.models.archive import ChunkTable, open_folder
+from asura.common.models.chunks import BaseChunk, ChunkHeader
+
+# Blocking calls (file I/O and zlib) run on this many threads, unless an executor is given
+DEFAULT_MAX_WORKERS = 4
+
+T = TypeVar("T")
+
+_default_executor: Optional[Executor] = None
+_default_executor_lock = Lock()
+
+
+def get_default_executor() -> Executor:
+    """
+    Gets the executor shared by every archive opened without one; a thread pool of DEFAULT_MAX_WORKERS threads.
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(DEFAULT_MAX_WORKERS, thread_name_prefix="asura-aio")
+        return _default_executor
+
+
+async def _run(executor: Executor, func: Callable[..., T], *args) -> T:
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
+class AsyncChunk:
+    """
+    A chunk of an AsyncArchive; only its header is known until its body is read.
+    """
+
+    def __init__(self, archive: 'AsyncArchive', index: int, header: ChunkHeader, offset: int):
+        self.archive = archive
+        # Index of the chunk within the archive
+        self.index = index
+        self.header = header
+        # Position of the body in the (decompressed) archive
+        self.offset = offset
+
+    @property
+    def type(self) -> ChunkType:
+        return self.header.type
+
+    def __repr__(self) -> str:
+        return f"AsyncChunk(index={self.index}, header={self.header}, offset={self.offset})"
+
+    async def read_payload(self) -> bytes:
+        """
+        Reads the chunk's (unparsed) body.
+        """
+        return await self.archive.read_at(self.offset, self.header.chunk_size)
+
+    def _load(self) -> BaseChunk:
+        data = self.archive.read_at_blocking(self.offset, self.header.chunk_size)
+        result = ChunkReader.read_buffer(self.header, data)
+        result.header = self.header
+        return result
+
+    async def load(self) -> BaseChunk:
+        """
+        Reads and parses the chunk.
+        """
+        return await _run(self.archive.executor, self._load)
+
+    def _unpack(self, chunk_path: str, overwrite: bool, store) -> bool:
+        return ChunkUnpacker.unpack(self._load(), chunk_path, overwrite, store)
+
+    async def unpack(self, chunk_path: str, overwrite: bool = False, store=None) -> bool:
+        """
+        Reads, parses and unpacks the chunk; see ChunkUnpacker.
+        """
+        return await _run(self.archive.executor, self._unpack, chunk_path, overwrite, store)
+
+
+class AsyncArchive:
+    """
+    An archive whose blocking work (reading, decompressing and parsing) runs on an executor, keeping the event loop
+    free; any number of archives may be open, and read from, at once.
+
+    Compressed (Zbb) archives are decompressed to a temporary file when opened. Use open_archive to create one.
+    """
+
+    def __init__(self, path: str, type: ArchiveType, stream: BinaryIO, table: ChunkTable, executor: Executor,
+                 opened: ExitStack = None):
+        self.path = path
+        # The type of the archive on disk; chunks are read from the decompressed archive
+        self.type = type
+        self.table = table
+        self.executor = executor
+        self._stream = stream
+        # Closes the stream (see open_folder); None closes the stream itself
+        self._opened = opened
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    async def __aenter__(self) -> 'AsyncArchive':
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    async def close(self):
+        await _run(self.executor, self._stream.close if self._opened is None else self._opened.close)
+
+    def read_at_blocking(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            self._stream.seek(offset)
+            data = self._stream.read(size)
+        if len(data) != size:
+            raise ParsingError(offset + len(data))
+        return data
+
+    async def read_at(self, offset: int, size: int) -> bytes:
+        return await _run(self.executor, self.read_at_blocking, offset, size)
+
+    def chunk(self, index: int) -> AsyncChunk:
+        return AsyncChunk(self, index, self.table.header(index), int(self.table.offsets[index]))
+
+    async def iter_chunks(self, types: Iterable[ChunkType] = None) -> AsyncIterator[AsyncChunk]:
+        """
+        Iterates over the archive's chunks (the EOF chunk excluded), in order.
+
+        :param types: Only iterate over chunks of these types; None iterates over every chunk.
+        """
+        for index in self.table.select(types=types):
+            chunk = self.chunk(int(index))
+            if chunk.type == ChunkType.EOF:
+                continue
+            yield chunk
+            # Let other tasks run between chunks
+            await asyncio.sleep(0)
+
+
+def _open_archive(path: str) -> AsyncArchive:
+    with ExitStack() as stack:
+        type, stream = stack.enter_context(open_folder(path))
+        table = ChunkTable.read(stream)
+        # Kept open until the archive is closed
+        opened = stack.pop_all()
+    return AsyncArchive(path, type, stream, table, None, opened)
+
+
+async def open_archive(path: str, executor: Executor = None) -> AsyncArchive:
+    """
+    Opens an archive, reading its chunk headers (and decompressing it, if needed) on the executor.
+
+    :param path: The path to the archive (Folder or Zbb).
+    :param executor: Runs the archive's blocking calls; by default, a shared thread pool (see get_default_executor).
+    :return: The archive; close it (or use it as an async context manager) when done.
+    :raises NotImplementedError: raised when the file isn't a supported archive.
+    """
+    if executor is None:
+        executor = get_default_executor()
+    archive = await _run(executor, _open_archive, path)
+    archive.executor = executor
+    return archive
@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join, exists
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.aio import open_archive
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.factories import initialize_factories
+from asura.common.models.archive import ZbbArchive
+from asura.common.models.chunks.formats.rscf import ResourceChunk
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE
+
+
+def create_archives(root: str):
+    paths = []
+    for i in range(3):
+        path = join(root, f"{i}.asr")
+        write_archive(path, str(i))
+        paths.append(path)
+    packed = join(root, "packed.asr")
+    with open(paths[0], "rb") as stream:
+        with open(packed, "wb") as out:
+            ZbbArchive.compress_to_stream(stream, out)
+    paths.append(packed)
+    return paths
+
+
+async def read_names(path: str, executor=None):
+    async with await open_archive(path, executor) as archive:
+        names = []
+        async for chunk in archive.iter_chunks([ChunkType.RESOURCE]):
+            loaded: ResourceChunk = await chunk.load()
+            payload = await chunk.read_payload()
+            assert payload.endswith(loaded.data)
+            names.append((loaded.name, loaded.data))
+        return archive.type, names
+
+
+def test_many_archives_at_once():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        paths = create_archives(root)
+
+        async def main():
+            with ThreadPoolExecutor(2) as executor:
+                return await asyncio.gather(*(read_names(path, executor) for path in paths))
+
+        results = asyncio.run(main())
+    assert [type for type, _ in results] == [ArchiveType.Folder] * 3 + [ArchiveType.Zbb]
+    for i, (_, names) in enumerate(results):
+        unique = str(i if i < 3 else 0).encode()
+        assert names == [("textures\\shared.dds", TEXTURE), ("unique.dds", unique)]
+
+
+def test_unpack_chunk():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        path = create_archives(root)[0]
+
+        async def main():
+            async with await open_archive(path) as archive:
+                chunks = [chunk async for chunk in archive.iter_chunks()]
+                assert [chunk.type for chunk in chunks] == [ChunkType.RESOURCE, ChunkType.SOUND, ChunkType.RESOURCE]
+                return await chunks[2].unpack(join(root, "out", "Chunk 2"))
+
+        assert asyncio.run(main())
+        assert exists(join(root, "out", "Chunk 2.RSCF", "unique.dds"))
+
+
+def test_not_an_archive():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.txt")
+        with open(path, "wb") as stream:
+            stream.write(b"Not an archive")
+        with pytest.raises(ParsingError):
+            asyncio.run(open_archive(path))
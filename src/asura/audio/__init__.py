@@ -0,0 +1,24 @@
+__all__ = [
+    "WaveFormat",
+    "SoundCatalog",
+    "SoundClipEntry",
+    "build_sound_catalog",
+    "find_companions",
+    "AdpcmParams",
+    "PcmStats",
+    "iter_pcm",
+    "iter_riff_pcm",
+    "iter_entry_pcm",
+    "decode_riff",
+    "analyze_clips",
+    "decode_clips",
+    "create_adpcm_format",
+    "encode_wav",
+    "encode_directory",
+]
+
+from asura.audio.riff import WaveFormat
+from asura.audio.catalog import SoundCatalog, SoundClipEntry, build_sound_catalog, find_companions
+from asura.audio.adpcm import AdpcmParams, PcmStats, iter_pcm, iter_riff_pcm, iter_entry_pcm, decode_riff
+from asura.audio.adpcm import analyze_clips, decode_clips
+from asura.audio.encoder import create_adpcm_format, encode_wav, encode_directory
@@ -0,0 +1,371 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import log10
+from os import cpu_count
+from os.path import join
+from struct import Struct, error as StructError
+from typing import List, Tuple, Iterable, Optional
+
+import numpy as np
+
+from asura.audio.catalog import SoundClipEntry, stream_entry
+from asura.audio.riff import WaveFormat, WAVE_FORMAT_PCM, pack_wave_header
+from asura.common.error import ParsingError
+from asura.common.mio import PackIO
+
+# Scales the step size (delta) after each nibble, in 1/256ths
+ADAPTATION_TABLE = [230, 230, 230, 230, 307, 409, 512, 614, 768, 614, 512, 409, 307, 230, 230, 230]
+# The predictor coefficients every MS-ADPCM file is expected to start with, in 1/256ths
+DEFAULT_COEFFICIENTS = [(256, 0), (512, -256), (0, 0), (192, 64), (240, 0), (460, -208), (392, -232)]
+MIN_DELTA = 16
+# Keeps 'adaptation * delta' within 32 bits, as the reference decoder does
+MAX_DELTA = 0x7fffffff // 768
+# Blocks decoded per step; bounds the memory used while streaming
+DEFAULT_BATCH_BLOCKS = 256
+# Roughly -60 dBFS
+DEFAULT_SILENCE_THRESHOLD = 33
+
+# samples per block, coefficient count
+_EXTRA_LAYOUT = Struct("< H H")
+_COEFFICIENT_LAYOUT = Struct("< h h")
+
+_ADAPTATION = np.array(ADAPTATION_TABLE, dtype=np.int64)
+
+
+@dataclass
+class AdpcmParams:
+    num_channels: int = None
+    block_align: int = None
+    samples_per_block: int = None
+    coefficients: List[Tuple[int, int]] = None
+
+    @property
+    def header_size(self) -> int:
+        # Per channel; predictor (1 byte), delta, sample 1 and sample 2 (2 bytes each)
+        return 7 * self.num_channels
+
+    @classmethod
+    def from_format(cls, format: WaveFormat) -> 'AdpcmParams':
+        """
+        Reads the MS-ADPCM parameters stored in a RIFF's format chunk.
+
+        :raises NotImplementedError: raised when the format is not MS-ADPCM.
+        :raises ParsingError: raised when the format's extra params are truncated.
+        """
+        if not format.is_adpcm:
+            raise NotImplementedError(f"Not Supported ~ {format.audio_format}")
+        extra = format.extra_params or b""
+        if len(extra) < _EXTRA_LAYOUT.size:
+            raise ParsingError(len(extra))
+        samples_per_block, count = _EXTRA_LAYOUT.unpack_from(extra)
+        end = _EXTRA_LAYOUT.size + count * _COEFFICIENT_LAYOUT.size
+        if len(extra) < end:
+            raise ParsingError(len(extra))
+        coefficients = [_COEFFICIENT_LAYOUT.unpack_from(extra, offset)
+                        for offset in range(_EXTRA_LAYOUT.size, end, _COEFFICIENT_LAYOUT.size)]
+        return AdpcmParams(format.num_channels, format.block_align, samples_per_block, coefficients)
+
+    def block_samples(self, size: int) -> int:
+        """
+        The number of samples (per channel) in a block of the given size; only the last block may be short.
+        """
+        if size < self.header_size:
+            return 0
+        return min(self.samples_per_block, 2 + (size - self.header_size) * 2 // self.num_channels)
+
+    def count_samples(self, data_size: int) -> int:
+        full, remainder = divmod(data_size, self.block_align)
+        return full * self.samples_per_block + self.block_samples(remainder)
+
+
+def _decode_uniform(params: AdpcmParams, blocks: np.ndarray) -> np.ndarray:
+    # (n, size) uint8 blocks of the same size -> (n, samples, channels) int16
+    # Blocks are independent, so every block (and channel) is decoded at once; only the samples are sequential
+    channels = params.num_channels
+    header_size = params.header_size
+    count = params.block_samples(blocks.shape[1]) - 2
+
+    predictors = blocks[:, :channels].astype(np.intp)
+    if (predictors >= len(params.coefficients)).any():
+        raise ParsingError(int(np.argmax((predictors >= len(params.coefficients)).any(axis=1))) * params.block_align)
+    coefficients = np.array(params.coefficients, dtype=np.int64)
+    coef_1 = coefficients[predictors, 0]
+    coef_2 = coefficients[predictors, 1]
+    words = np.ascontiguousarray(blocks[:, channels:header_size]).view("<i2").astype(np.int64)
+    delta = words[:, :channels].copy()
+    sample_1 = words[:, channels:2 * channels].copy()
+    sample_2 = words[:, 2 * channels:3 * channels].copy()
+
+    # High nibble first; stereo blocks interleave the channels a nibble at a time
+    packed = blocks[:, header_size:]
+    nibbles = np.empty((blocks.shape[0], packed.shape[1] * 2), dtype=np.uint8)
+    nibbles[:, 0::2] = packed >> 4
+    nibbles[:, 1::2] = packed & 0xf
+    nibbles = nibbles[:, :count * channels].reshape(blocks.shape[0], count, channels)
+    signed = nibbles.astype(np.int64) - ((nibbles & 8).astype(np.int64) << 1)
+
+    samples = np.empty((blocks.shape[0], count + 2, channels), dtype=np.int16)
+    samples[:, 0] = sample_2
+    samples[:, 1] = sample_1
+    for i in range(count):
+        predicted = sample_1 * coef_1 + sample_2 * coef_2
+        # Divide by 256, rounding towards zero
+        predicted = (predicted + ((predicted >> 63) & 255)) >> 8
+        predicted += signed[:, i] * delta
+        np.clip(predicted, -0x8000, 0x7fff, out=predicted)
+        samples[:, i + 2] = predicted
+        sample_2 = sample_1
+        sample_1 = predicted
+        delta = (_ADAPTATION[nibbles[:, i]] * delta) >> 8
+        np.clip(delta, MIN_DELTA, MAX_DELTA, out=delta)
+    return samples
+
+
+def decode_blocks(params: AdpcmParams, data: bytes) -> np.ndarray:
+    """
+    Decodes MS-ADPCM blocks.
+
+    :param params: The stream's parameters.
+    :param data: Whole blocks; the last block may be short (as the last block of a stream often is).
+    :return: (samples, channels) int16 PCM.
+    """
+    data = np.frombuffer(data, dtype=np.uint8)
+    full = len(data) // params.block_align
+    parts = []
+    if full > 0:
+        blocks = data[:full * params.block_align].reshape(full, params.block_align)
+        parts.append(_decode_uniform(params, blocks).reshape(-1, params.num_channels))
+    remainder = data[full * params.block_align:]
+    if len(remainder) >= params.header_size:
+        parts.append(_decode_uniform(params, remainder.reshape(1, -1)).reshape(-1, params.num_channels))
+    if len(parts) == 1:
+        return parts[0]
+    elif len(parts) == 0:
+        return np.empty((0, params.num_channels), dtype=np.int16)
+    return np.concatenate(parts)
+
+
+def _rebatch(chunks: Iterable[bytes], size: int) -> Iterable[bytes]:
+    # Regroups arbitrarily sized chunks into 'size' byte batches (the last may be short), copying only when a batch
+    # spans chunks
+    pending = bytearray()
+    for chunk in chunks:
+        view = memoryview(chunk)
+        if pending:
+            taken = size - len(pending)
+            pending += view[:taken]
+            view = view[taken:]
+            if len(pending) < size:
+                continue
+            yield bytes(pending)
+            pending = bytearray()
+        while len(view) >= size:
+            yield view[:size]
+            view = view[size:]
+        pending += view
+    if pending:
+        yield bytes(pending)
+
+
+def iter_pcm(chunks: Iterable[bytes], format: WaveFormat,
+             batch_blocks: int = DEFAULT_BATCH_BLOCKS) -> Iterable[np.ndarray]:
+    """
+    Decodes the samples of a RIFF WAVE as they are read; at most 'batch_blocks' blocks are held in memory.
+
+    :param chunks: The samples (the data chunk's body), in chunks of any size.
+    :param format: The RIFF's format; MS-ADPCM or 16-bit PCM.
+    :param batch_blocks: The number of blocks to decode at a time.
+    :return: An iterable of (samples, channels) int16 PCM.
+    """
+    if format.audio_format == WAVE_FORMAT_PCM:
+        if format.bits_per_sample != 16:
+            raise NotImplementedError(f"Not Supported ~ {format.bits_per_sample}-bit PCM")
+        frame_size = 2 * format.num_channels
+        for batch in _rebatch(chunks, frame_size * 1024 * batch_blocks):
+            usable = len(batch) - len(batch) % frame_size
+            yield np.frombuffer(batch, dtype="<i2", count=usable // 2).reshape(-1, format.num_channels).copy()
+        return
+    params = AdpcmParams.from_format(format)
+    for batch in _rebatch(chunks, params.block_align * batch_blocks):
+        yield decode_blocks(params, batch)
+
+
+def iter_riff_pcm(data: bytes, batch_blocks: int = DEFAULT_BATCH_BLOCKS) -> Iterable[np.ndarray]:
+    """
+    Decodes an in-memory RIFF WAVE (i.e. a SoundClip's data), a batch of blocks at a time.
+
+    :raises ParsingError: raised when the data is not a RIFF WAVE, or has no data chunk.
+    """
+    format = WaveFormat.parse(data)
+    if format is None or format.data_offset is None:
+        raise ParsingError(0)
+    view = memoryview(data)[format.data_offset:format.data_offset + format.data_size]
+    return iter_pcm([view], format, batch_blocks)
+
+
+def iter_entry_pcm(entry: SoundClipEntry, batch_blocks: int = DEFAULT_BATCH_BLOCKS) -> Iterable[np.ndarray]:
+    """
+    Decodes a cataloged clip straight from its archive, a batch of blocks at a time.
+    """
+    format = entry.format
+    if format is None or format.data_offset is None:
+        raise ParsingError(0)
+    return iter_pcm(stream_entry(entry, start=format.data_offset, size=format.data_size), format, batch_blocks)
+
+
+def decode_riff(data: bytes) -> np.ndarray:
+    """
+    Decodes a whole in-memory RIFF WAVE.
+
+    :return: (samples, channels) int16 PCM.
+    """
+    parts = list(iter_riff_pcm(data))
+    return np.concatenate(parts) if parts else np.empty((0, 1), dtype=np.int16)
+
+
+def pcm_format(format: WaveFormat) -> WaveFormat:
+    # The 16-bit PCM equivalent of a format
+    block_align = 2 * format.num_channels
+    return WaveFormat(WAVE_FORMAT_PCM, format.num_channels, format.sample_rate, format.sample_rate * block_align,
+                      block_align, 16)
+
+
+def decode_entry(entry: SoundClipEntry, path: str) -> int:
+    """
+    Decodes a cataloged clip to a 16-bit PCM RIFF WAVE, without holding the whole clip in memory.
+
+    :return: The number of samples (per channel) written.
+    """
+    format = entry.format
+    if format is None or format.data_offset is None:
+        raise ParsingError(0)
+    if format.is_adpcm:
+        samples = AdpcmParams.from_format(format).count_samples(format.data_size)
+    else:
+        samples = format.data_size // format.block_align
+    output = pcm_format(format)
+    PackIO.make_parent_dirs(path)
+    with open(path, "wb") as out:
+        out.write(pack_wave_header(output, samples * output.block_align))
+        for pcm in iter_entry_pcm(entry):
+            out.write(pcm.astype("<i2").tobytes())
+    return samples
+
+
+@dataclass
+class PcmStats:
+    name: str = None
+    sample_rate: int = None
+    # Per channel
+    samples: int = None
+    # Largest absolute sample, 0 - 32768
+    peak: int = None
+    # Root mean square of every sample, 0 - 1
+    rms: float = None
+    # Fraction of samples quieter than the silence threshold
+    silence: float = None
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def rms_dbfs(self) -> float:
+        return 20 * log10(self.rms) if self.rms else float("-inf")
+
+
+def analyze_pcm(chunks: Iterable[np.ndarray], name: str = None, sample_rate: int = None,
+                silence_threshold: int = DEFAULT_SILENCE_THRESHOLD) -> PcmStats:
+    """
+    Measures the level and silence of a stream of PCM, a chunk at a time.
+
+    :param chunks: (samples, channels) int16 PCM.
+    :param silence_threshold: Samples (of every channel) below this absolute value are silent.
+    """
+    samples = 0
+    values = 0
+    peak = 0
+    square_sum = 0.0
+    silent = 0
+    for pcm in chunks:
+        magnitude = np.abs(pcm.astype(np.int32))
+        samples += pcm.shape[0]
+        values += pcm.size
+        if pcm.size:
+            peak = max(peak, int(magnitude.max()))
+        square_sum += float(np.square(pcm.astype(np.float64) / 32768).sum())
+        silent += int((magnitude < silence_threshold).all(axis=1).sum())
+    rms = (square_sum / values) ** 0.5 if values else 0.0
+    return PcmStats(name, sample_rate, samples, peak, rms, silent / samples if samples else 0.0)
+
+
+# Errors a bad clip can raise; they're reported back to the caller
+_CLIP_ERRORS = (ParsingError, NotImplementedError, ValueError, EOFError, StructError, OSError)
+
+
+def _analyze_job(entry: SoundClipEntry, silence_threshold: int) -> Tuple[Optional[PcmStats], Optional[str]]:
+    try:
+        stats = analyze_pcm(iter_entry_pcm(entry), entry.name, entry.format.sample_rate, silence_threshold)
+        return stats, None
+    except _CLIP_ERRORS as error:
+        return None, f"{entry.name}: {error!r}"
+
+
+def _decode_job(entry: SoundClipEntry, path: str) -> Optional[str]:
+    try:
+        decode_entry(entry, path)
+        return None
+    except _CLIP_ERRORS as error:
+        return f"{entry.name}: {error!r}"
+
+
+def get_clip_path(out_dir: str, name: str) -> str:
+    return join(out_dir, *name.replace("\\", "/").lstrip("/").split("/"))
+
+
+def analyze_clips(entries: Iterable[SoundClipEntry], workers: int = None,
+                  silence_threshold: int = DEFAULT_SILENCE_THRESHOLD) -> Tuple[List[PcmStats], List[str]]:
+    """
+    Measures many cataloged clips across a pool of worker processes.
+
+    Only the entries are sent to the workers; each worker streams its clip from the archive.
+
+    :param entries: The clips; sparse entries should be resolved first, see SoundCatalog.resolve.
+    :param workers: The number of worker processes, None will use one per core.
+    :return: The stats of each clip, and a description of each clip which failed.
+    """
+    entries = list(entries)
+    workers = workers or cpu_count() or 1
+    results = []
+    failed = []
+    with ProcessPoolExecutor(workers) as pool:
+        thresholds = [silence_threshold] * len(entries)
+        for stats, error in pool.map(_analyze_job, entries, thresholds, chunksize=16):
+            if error is None:
+                results.append(stats)
+            else:
+                failed.append(error)
+    return results, failed
+
+
+def decode_clips(entries: Iterable[SoundClipEntry], out_dir: str, workers: int = None) -> Tuple[int, List[str]]:
+    """
+    Decodes many cataloged clips to 16-bit PCM RIFF WAVEs across a pool of worker processes.
+
+    :param entries: The clips; sparse entries should be resolved first, see SoundCatalog.resolve.
+    :param out_dir: The directory to write the clips to; they are named after the clip's in-game path.
+    :param workers: The number of worker processes, None will use one per core.
+    :return: The number of clips written, and a description of each clip which failed.
+    """
+    entries = list(entries)
+    workers = workers or cpu_count() or 1
+    paths = [get_clip_path(out_dir, entry.name) for entry in entries]
+    written = 0
+    failed = []
+    with ProcessPoolExecutor(workers) as pool:
+        for error in pool.map(_decode_job, entries, paths, chunksize=16):
+            if error is None:
+                written += 1
+            else:
+                failed.append(error)
+    return written, failed
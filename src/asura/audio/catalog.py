@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from os import listdir
+from os.path import dirname, basename, join
+from typing import List, Dict, Optional, Iterable, BinaryIO, Union
+
+from asura.audio.riff import WaveFormat, RIFF_HEADER_SIZE
+from asura.common.config import KIBI_BYTE
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.mio import PackIO
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import SparseChunk
+from asura.common.models.chunks.formats.asts import SoundChunk
+from asura.packer.unpacker import UnpackOptions, cache_decompressed
+
+# Sparse sound chunks keep their clips in a companion archive; i.e. 'furniture_content.asr.pc.sounds'
+COMPANION_EXTS = [".sounds", ".streamsounds"]
+STREAM_BLOCK_SIZE = 64 * KIBI_BYTE
+
+
+@dataclass
+class SoundClipEntry:
+    name: str = None
+    # The archive the clip is read from; the decompressed cache of a Zbb archive
+    archive: str = None
+    # Index of the SoundChunk within the archive
+    chunk: int = None
+    is_sparse: bool = None
+    # Absolute position of the clip's data in the archive; None for sparse clips
+    offset: int = None
+    size: int = None
+    format: WaveFormat = None
+
+
+def find_companions(path: str) -> List[str]:
+    """
+    Finds the archives holding the data of an archive's sparse sound clips.
+
+    :param path: The path to the archive.
+    :return: The paths to the companion archives, if any.
+    """
+    root = dirname(path)
+    name = basename(path)
+    companions = []
+    for file in sorted(listdir(root or ".")):
+        if file != name and file.startswith(name) and any(file.endswith(ext) for ext in COMPANION_EXTS):
+            companions.append(join(root, file))
+    return companions
+
+
+def stream_entry(entry: SoundClipEntry, block_size: int = STREAM_BLOCK_SIZE, start: int = 0,
+                 size: int = None) -> Iterable[bytes]:
+    """
+    Reads (part of) a clip's bytes from its archive, a block at a time.
+
+    :param entry: The clip; it must hold its data, i.e. not be sparse.
+    :param block_size: The maximum size of each block.
+    :param start: Position to start reading from, relative to the start of the clip.
+    :param size: The number of bytes to read, None will read to the end of the clip.
+    :return: An iterable of the clip's bytes.
+    """
+    if entry.is_sparse:
+        raise ValueError(f"'{entry.name}' is sparse; its data lives in another archive.")
+    remaining = entry.size - start if size is None else min(size, entry.size - start)
+    with open(entry.archive, "rb") as stream:
+        stream.seek(entry.offset + start)
+        while remaining > 0:
+            block = stream.read(min(block_size, remaining))
+            if len(block) == 0:
+                raise EOFError(entry.name)
+            remaining -= len(block)
+            yield block
+
+
+class SoundCatalog:
+    """
+    A catalog of every sound clip in a set of archives, built from the clip metadata and RIFF headers alone.
+
+    Sparse clips are resolved by name to a clip with data from another cataloged archive (usually a companion archive).
+    Compressed (Zbb) archives are cataloged, and streamed, from their decompressed cache (see UnpackOptions).
+    """
+
+    def __init__(self):
+        self.archives: List[str] = []
+        self.entries: List[SoundClipEntry] = []
+        self._by_name: Dict[str, List[SoundClipEntry]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterable[SoundClipEntry]:
+        return iter(self.entries)
+
+    @property
+    def names(self) -> Iterable[str]:
+        return self._by_name.keys()
+
+    def add_archive(self, path: str, companions: bool = True, options: UnpackOptions = None) -> int:
+        """
+        Catalogs every clip in an archive.
+
+        :param path: The path to a Folder or Zbb archive.
+        :param companions: Also catalog the archive's companion archives; see find_companions.
+        :param options: Where Zbb archives are decompressed to; an existing cache of the same size is reused.
+        :return: The number of clips cataloged.
+        """
+        folder_path = cache_decompressed(path, options)
+        if folder_path in self.archives:
+            return 0
+        with open(folder_path, "rb") as stream:
+            added = self.add_stream(stream, folder_path)
+        if companions:
+            for companion in find_companions(path):
+                added += self.add_archive(companion, False, options)
+        return added
+
+    def add_stream(self, stream: BinaryIO, path: str) -> int:
+        type = ArchiveType.read(stream)
+        if type != ArchiveType.Folder:
+            raise NotImplementedError(f"Not Supported ~ {type}; see add_archive for compressed archives.")
+        archive = FolderArchive.read(stream, type)
+        self.archives.append(path)
+        added = 0
+        for i, chunk in enumerate(archive.chunks):
+            if not isinstance(chunk, SparseChunk) or chunk.header.type != ChunkType.SOUND:
+                continue
+            stream.seek(chunk.data_start)
+            _, spans = SoundChunk.scan(stream)
+            for span in spans:
+                format = None
+                if not span.is_sparse:
+                    stream.seek(span.offset)
+                    format = WaveFormat.parse(stream.read(min(span.size, RIFF_HEADER_SIZE)))
+                entry = SoundClipEntry(span.name, path, i, span.is_sparse, span.offset, span.size, format)
+                self.entries.append(entry)
+                self._by_name.setdefault(entry.name, []).append(entry)
+                added += 1
+        return added
+
+    def get(self, name: str) -> Optional[SoundClipEntry]:
+        """
+        Gets a clip by name, preferring a cataloged copy which holds the clip's data.
+
+        :param name: The name of the clip, as stored in the SoundChunk.
+        :return: The clip, or None if the name is not cataloged.
+        """
+        entries = self._by_name.get(name)
+        if not entries:
+            return None
+        for entry in entries:
+            if not entry.is_sparse:
+                return entry
+        return entries[0]
+
+    def resolve(self, clip: Union[str, SoundClipEntry]) -> SoundClipEntry:
+        name = clip.name if isinstance(clip, SoundClipEntry) else clip
+        entry = clip if isinstance(clip, SoundClipEntry) and not clip.is_sparse else self.get(name)
+        if entry is None:
+            raise KeyError(name)
+        if entry.is_sparse:
+            raise ValueError(f"'{name}' is sparse, and no cataloged archive holds its data.")
+        return entry
+
+    def stream(self, clip: Union[str, SoundClipEntry], block_size: int = STREAM_BLOCK_SIZE) -> Iterable[bytes]:
+        """
+        Reads a clip's bytes from its archive, a block at a time.
+
+        :param clip: The clip, or its name.
+        :param block_size: The maximum size of each block.
+        :return: An iterable of the clip's bytes.
+        """
+        return stream_entry(self.resolve(clip), block_size)
+
+    def read(self, clip: Union[str, SoundClipEntry]) -> bytes:
+        return b"".join(self.stream(clip))
+
+    def extract(self, clip: Union[str, SoundClipEntry], path: str) -> int:
+        """
+        Copies a clip's bytes to a file, without holding the whole clip in memory.
+
+        :param clip: The clip, or its name.
+        :param path: The file to write.
+        :return: The number of bytes written.
+        """
+        PackIO.make_parent_dirs(path)
+        written = 0
+        with open(path, "wb") as out:
+            for block in self.stream(clip):
+                written += out.write(block)
+        return written
+
+
+def build_sound_catalog(paths: Iterable[str], companions: bool = True, options: UnpackOptions = None) -> SoundCatalog:
+    catalog = SoundCatalog()
+    for path in paths:
+        catalog.add_archive(path, companions, options)
+    return catalog
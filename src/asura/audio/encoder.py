@@ -0,0 +1,184 @@
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, walk
+from os.path import join, relpath, splitext, abspath
+from struct import pack, error as StructError
+from typing import List, Tuple, Optional
+
+import numpy as np
+
+from asura.audio.adpcm import AdpcmParams, ADAPTATION_TABLE, DEFAULT_COEFFICIENTS, DEFAULT_BATCH_BLOCKS, MIN_DELTA, \
+    MAX_DELTA
+from asura.audio.riff import WaveFormat, WAVE_FORMAT_ADPCM, pack_wave_header
+from asura.common.error import ParsingError
+from asura.common.mio import PackIO
+
+# The block size ffmpeg's 'adpcm_ms' encoder uses; clips made with it were accepted by the game
+DEFAULT_BLOCK_ALIGN = 1024
+# Residuals used to pick each block's starting step size
+_DELTA_WINDOW = 8
+
+_ADAPTATION = np.array(ADAPTATION_TABLE, dtype=np.int64)
+_COEFFICIENTS = np.array(DEFAULT_COEFFICIENTS, dtype=np.int64)
+
+
+def _divide(dividend: np.ndarray, divisor) -> np.ndarray:
+    # Integer division rounding towards zero, as C does
+    return np.sign(dividend) * (np.abs(dividend) // divisor)
+
+
+def create_adpcm_format(num_channels: int, sample_rate: int, block_align: int = DEFAULT_BLOCK_ALIGN) -> WaveFormat:
+    """
+    Creates the format of an MS-ADPCM RIFF WAVE; with the standard coefficient table, as XAudio2 requires.
+
+    :param block_align: The size of each block, headers included.
+    """
+    if block_align < 7 * num_channels + num_channels:
+        raise ValueError(f"A block of {block_align} bytes cannot hold {num_channels} channel(s).")
+    samples_per_block = (block_align - 7 * num_channels) * 2 // num_channels + 2
+    extra_params = pack("< H H", samples_per_block, len(DEFAULT_COEFFICIENTS))
+    extra_params += b"".join(pack("< h h", *pair) for pair in DEFAULT_COEFFICIENTS)
+    byte_rate = sample_rate * block_align // samples_per_block
+    return WaveFormat(WAVE_FORMAT_ADPCM, num_channels, sample_rate, byte_rate, block_align, 4, extra_params)
+
+
+def _encode_uniform(params: AdpcmParams, pcm: np.ndarray) -> np.ndarray:
+    # (n, samples per block, channels) int64 -> (n, block align) uint8
+    # As with decoding, every block (and channel) is encoded at once; only the samples are sequential
+    count = params.samples_per_block - 2
+    channels = params.num_channels
+    first, second, rest = pcm[:, 0], pcm[:, 1], pcm[:, 2:]
+
+    # Pick the predictor which best fits each block's (unquantized) samples
+    costs = []
+    windows = []
+    for coef_1, coef_2 in DEFAULT_COEFFICIENTS:
+        predicted = _divide(pcm[:, 1:-1] * coef_1 + pcm[:, :-2] * coef_2, 256)
+        residuals = np.abs(rest - predicted)
+        costs.append(residuals.sum(axis=1))
+        windows.append(residuals[:, :_DELTA_WINDOW].mean(axis=1))
+    predictors = np.argmin(np.stack(costs), axis=0)
+    window = np.take_along_axis(np.stack(windows), predictors[None], axis=0)[0]
+    coef_1 = _COEFFICIENTS[predictors, 0]
+    coef_2 = _COEFFICIENTS[predictors, 1]
+    # Start with a step size that quantizes the opening residuals to roughly +-4
+    initial_delta = np.clip(window.astype(np.int64) // 4, MIN_DELTA, MAX_DELTA)
+
+    delta = initial_delta.copy()
+    sample_1 = second.copy()
+    sample_2 = first.copy()
+    codes = np.empty((pcm.shape[0], count, channels), dtype=np.uint8)
+    for i in range(count):
+        predicted = _divide(sample_1 * coef_1 + sample_2 * coef_2, 256)
+        error = rest[:, i] - predicted
+        # Round to the nearest step
+        bias = np.where(error >= 0, delta // 2, -(delta // 2))
+        nibble = np.clip(_divide(error + bias, delta), -8, 7)
+        predicted += nibble * delta
+        np.clip(predicted, -0x8000, 0x7fff, out=predicted)
+        sample_2 = sample_1
+        sample_1 = predicted
+        code = nibble & 0xf
+        codes[:, i] = code
+        delta = (_ADAPTATION[code] * delta) >> 8
+        np.clip(delta, MIN_DELTA, MAX_DELTA, out=delta)
+
+    header_size = params.header_size
+    blocks = np.zeros((pcm.shape[0], params.block_align), dtype=np.uint8)
+    blocks[:, :channels] = predictors
+    words = np.concatenate([initial_delta, second, first], axis=1).astype("<i2")
+    blocks[:, channels:header_size] = words.view(np.uint8).reshape(pcm.shape[0], -1)
+    codes = codes.reshape(pcm.shape[0], -1)
+    blocks[:, header_size:header_size + codes.shape[1] // 2] = (codes[:, 0::2] << 4) | codes[:, 1::2]
+    return blocks
+
+
+def encode_blocks(params: AdpcmParams, pcm: np.ndarray) -> bytes:
+    """
+    Encodes PCM as MS-ADPCM blocks.
+
+    :param params: The parameters to encode with; only the standard coefficient table is supported.
+    :param pcm: (samples, channels) int16 PCM; the last block is padded with silence.
+    :return: Whole blocks.
+    """
+    if params.coefficients != DEFAULT_COEFFICIENTS:
+        raise NotImplementedError("Not Supported ~ non-standard coefficients")
+    if pcm.shape[1] != params.num_channels:
+        raise ValueError(f"Expected {params.num_channels} channel(s), got {pcm.shape[1]}")
+    block_count = -(-pcm.shape[0] // params.samples_per_block)
+    padded = np.zeros((block_count * params.samples_per_block, params.num_channels), dtype=np.int64)
+    padded[:pcm.shape[0]] = pcm
+    padded = padded.reshape(block_count, params.samples_per_block, params.num_channels)
+    parts = [_encode_uniform(params, padded[start:start + DEFAULT_BATCH_BLOCKS]).tobytes()
+             for start in range(0, block_count, DEFAULT_BATCH_BLOCKS)]
+    return b"".join(parts)
+
+
+def encode_wav(data: bytes, block_align: int = DEFAULT_BLOCK_ALIGN) -> bytes:
+    """
+    Converts a 16-bit PCM RIFF WAVE to an MS-ADPCM RIFF WAVE, laid out as the game's clips are (fmt, fact, data).
+
+    :param data: The PCM RIFF WAVE.
+    :param block_align: The size of each block; i.e. to match the block size of the clip being replaced.
+    :return: The MS-ADPCM RIFF WAVE; usable as a SoundClip's data.
+    :raises ParsingError: raised when the data is not a RIFF WAVE.
+    :raises NotImplementedError: raised when the data is not 16-bit PCM.
+    """
+    format = WaveFormat.parse(data)
+    if format is None or format.data_offset is None:
+        raise ParsingError(0)
+    if not format.is_pcm or format.bits_per_sample != 16:
+        raise NotImplementedError(f"Not Supported ~ {format.audio_format} ({format.bits_per_sample}-bit)")
+    frames = format.data_size // (2 * format.num_channels)
+    pcm = np.frombuffer(data, dtype="<i2", count=frames * format.num_channels, offset=format.data_offset)
+    output = create_adpcm_format(format.num_channels, format.sample_rate, block_align)
+    blocks = encode_blocks(AdpcmParams.from_format(output), pcm.reshape(frames, format.num_channels))
+    return pack_wave_header(output, len(blocks), frames) + blocks
+
+
+def _encode_job(src: str, dst: str, block_align: int) -> Tuple[bool, Optional[str]]:
+    try:
+        data = PackIO.read_bytes(src)
+        format = WaveFormat.parse(data)
+        if format is not None and format.is_adpcm:
+            # Already encoded; copied as is
+            if abspath(src) != abspath(dst):
+                PackIO.write_bytes(dst, data, overwrite=True)
+            return False, None
+        PackIO.write_bytes(dst, encode_wav(data, block_align), overwrite=True)
+        return True, None
+    except (ParsingError, NotImplementedError, ValueError, StructError, OSError) as error:
+        return False, f"{src}: {error!r}"
+
+
+def encode_directory(in_dir: str, out_dir: str = None, block_align: int = DEFAULT_BLOCK_ALIGN,
+                     workers: int = None) -> Tuple[int, List[str]]:
+    """
+    Encodes every PCM '.wav' in a directory to MS-ADPCM, across a pool of worker processes.
+
+    To replace clips, write into an unpacked SoundChunk's directory; SoundChunk.repack will pick the encoded clips up
+    (each clip still needs its '.meta' file, as written by SoundClip.unpack).
+
+    :param in_dir: The directory to search for '.wav' files.
+    :param out_dir: The directory to write the encoded files to, keeping their relative paths; None will overwrite
+    the files in place.
+    :param block_align: The size of each block.
+    :param workers: The number of worker processes, None will use one per core.
+    :return: The number of files encoded, and a description of each file which failed. Files which are already
+    MS-ADPCM are not encoded again.
+    """
+    out_dir = out_dir or in_dir
+    sources = []
+    for root, _, files in walk(in_dir):
+        for file in files:
+            if splitext(file)[1].lower() == ".wav":
+                sources.append(join(root, file))
+    destinations = [join(out_dir, relpath(src, in_dir)) for src in sources]
+    workers = workers or cpu_count() or 1
+    written = 0
+    failed = []
+    with ProcessPoolExecutor(workers) as pool:
+        for encoded, error in pool.map(_encode_job, sources, destinations, [block_align] * len(sources), chunksize=4):
+            written += encoded
+            if error is not None:
+                failed.append(error)
+    return written, failed
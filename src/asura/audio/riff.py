@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from struct import Struct
+from typing import Optional
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_ADPCM = 0x0002
+
+# magic 'RIFF', payload size, magic 'WAVE'
+_RIFF_LAYOUT = Struct("< 4s I 4s")
+# magic, size
+_CHUNK_LAYOUT = Struct("< 4s I")
+# audio format, channels, sample rate, byte rate, block align, bits per sample
+_FMT_LAYOUT = Struct("< H H I I H H")
+
+# Enough to hold the RIFF, fmt (including MS-ADPCM's coefficient table), fact and data headers
+RIFF_HEADER_SIZE = 256
+
+
+@dataclass
+class WaveFormat:
+    audio_format: int = None
+    num_channels: int = None
+    sample_rate: int = None
+    byte_rate: int = None
+    block_align: int = None
+    bits_per_sample: int = None
+    # The format specific bytes following the extra size; for MS-ADPCM this holds the samples per block and coefficients
+    extra_params: bytes = None
+    # Position of the samples, relative to the start of the RIFF
+    data_offset: int = None
+    data_size: int = None
+
+    @property
+    def is_adpcm(self) -> bool:
+        return self.audio_format == WAVE_FORMAT_ADPCM
+
+    @property
+    def is_pcm(self) -> bool:
+        return self.audio_format == WAVE_FORMAT_PCM
+
+    @classmethod
+    def parse(cls, data: bytes) -> Optional['WaveFormat']:
+        """
+        Parses the format of a RIFF WAVE from its first bytes.
+
+        :param data: The start of the RIFF; RIFF_HEADER_SIZE bytes is usually enough.
+        :return: The format, or None if the data is not a RIFF WAVE, or its fmt chunk isn't within the given bytes. If the
+        data chunk was not found in the given bytes, data_offset and data_size will be None.
+        """
+        if len(data) < _RIFF_LAYOUT.size:
+            return None
+        riff, _, wave = _RIFF_LAYOUT.unpack_from(data)
+        if riff != b"RIFF" or wave != b"WAVE":
+            return None
+        result = None
+        offset = _RIFF_LAYOUT.size
+        while offset + _CHUNK_LAYOUT.size <= len(data):
+            magic, size = _CHUNK_LAYOUT.unpack_from(data, offset)
+            offset += _CHUNK_LAYOUT.size
+            if magic == b"fmt ":
+                if offset + _FMT_LAYOUT.size > len(data):
+                    # Truncated, or the fmt chunk runs past the given bytes
+                    return None
+                fields = _FMT_LAYOUT.unpack_from(data, offset)
+                extra_params = b""
+                if fields[0] != WAVE_FORMAT_PCM and size >= _FMT_LAYOUT.size + 2:
+                    start = offset + _FMT_LAYOUT.size + 2
+                    extra_params = bytes(data[start:offset + size])
+                result = WaveFormat(*fields, extra_params)
+            elif magic == b"data":
+                if result is not None:
+                    result.data_offset = offset
+                    result.data_size = size
+                break
+            # RIFF chunks are word (2 byte) aligned
+            offset += size + (size & 1)
+        return result
+
+
+def pack_wave_header(format: WaveFormat, data_size: int, sample_count: int = None) -> bytes:
+    """
+    Creates the headers of a RIFF WAVE, up to and including the data chunk's header.
+
+    :param format: The format; data_offset and data_size are ignored.
+    :param data_size: The size of the samples which will follow the header.
+    :param sample_count: The number of samples (per channel); written as a fact chunk, which compressed formats need.
+    :return: The header; the samples should be written directly after it.
+    """
+    fmt = _FMT_LAYOUT.pack(format.audio_format, format.num_channels, format.sample_rate, format.byte_rate,
+                           format.block_align, format.bits_per_sample)
+    if not format.is_pcm:
+        extra_params = format.extra_params or b""
+        fmt += Struct("< H").pack(len(extra_params)) + extra_params
+    chunks = _CHUNK_LAYOUT.pack(b"fmt ", len(fmt)) + fmt + (b"\0" if len(fmt) & 1 else b"")
+    if sample_count is not None:
+        chunks += _CHUNK_LAYOUT.pack(b"fact", 4) + Struct("< I").pack(sample_count)
+    chunks += _CHUNK_LAYOUT.pack(b"data", data_size)
+    # The RIFF size covers 'WAVE', every chunk header, and the samples (padded to a word)
+    riff_size = 4 + len(chunks) + data_size + (data_size & 1)
+    return _RIFF_LAYOUT.pack(b"RIFF", riff_size, b"WAVE") + chunks
@@ -0,0 +1,123 @@
+import random
+from os.path import join, exists
+from struct import pack
+from tempfile import TemporaryDirectory
+from typing import List
+
+import numpy as np
+
+from asura.audio import AdpcmParams, WaveFormat, build_sound_catalog, decode_riff, iter_riff_pcm, analyze_clips, \
+    decode_clips
+from asura.audio.adpcm import ADAPTATION_TABLE, DEFAULT_COEFFICIENTS, decode_blocks
+from asura.audio.riff import WAVE_FORMAT_ADPCM, pack_wave_header
+from asura.audio.tests.wav_helpers import write_archive, RESERVED, create_pcm_wav
+from asura.common.models.chunks.formats import SoundChunk, SoundClip
+
+BLOCK_ALIGN = 64
+
+
+def create_format(channels: int) -> WaveFormat:
+    samples_per_block = (BLOCK_ALIGN - 7 * channels) * 2 // channels + 2
+    extra = pack("< H H", samples_per_block, len(DEFAULT_COEFFICIENTS))
+    extra += b"".join(pack("< h h", *pair) for pair in DEFAULT_COEFFICIENTS)
+    return WaveFormat(WAVE_FORMAT_ADPCM, channels, 22050, 11025 * channels, BLOCK_ALIGN, 4, extra)
+
+
+def create_blocks(channels: int, count: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    blocks = bytearray()
+    for _ in range(count):
+        blocks += bytes(rng.randrange(7) for _ in range(channels))
+        for _ in range(3 * channels):
+            blocks += pack("< h", rng.randrange(-2000, 2000))
+        blocks += bytes(rng.randrange(256) for _ in range(BLOCK_ALIGN - 7 * channels))
+    return bytes(blocks)
+
+
+def reference_decode(channels: int, data: bytes) -> List[List[int]]:
+    # A sample at a time; follows the reference decoder
+    frames = []
+    for start in range(0, len(data), BLOCK_ALIGN):
+        block = data[start:start + BLOCK_ALIGN]
+        predictor = list(block[:channels])
+        words = [int.from_bytes(block[channels + 2 * i:channels + 2 * i + 2], "little", signed=True)
+                 for i in range(3 * channels)]
+        delta, sample_1, sample_2 = words[:channels], words[channels:2 * channels], words[2 * channels:]
+        frames.append(list(sample_2))
+        frames.append(list(sample_1))
+        nibbles = []
+        for byte in block[7 * channels:]:
+            nibbles += [byte >> 4, byte & 0xf]
+        for i in range(0, len(nibbles) - len(nibbles) % channels, channels):
+            frame = []
+            for c in range(channels):
+                nibble = nibbles[i + c]
+                coef_1, coef_2 = DEFAULT_COEFFICIENTS[predictor[c]]
+                predicted = int((sample_1[c] * coef_1 + sample_2[c] * coef_2) / 256)
+                predicted += (nibble - 16 if nibble & 8 else nibble) * delta[c]
+                predicted = max(-0x8000, min(0x7fff, predicted))
+                sample_2[c], sample_1[c] = sample_1[c], predicted
+                delta[c] = max(16, (ADAPTATION_TABLE[nibble] * delta[c]) >> 8)
+                frame.append(predicted)
+            frames.append(frame)
+    return frames
+
+
+def create_adpcm_wav(channels: int, data: bytes) -> bytes:
+    format = create_format(channels)
+    samples = AdpcmParams.from_format(format).count_samples(len(data))
+    return pack_wave_header(format, len(data), samples) + data
+
+
+def test_params():
+    params = AdpcmParams.from_format(create_format(2))
+    assert params.samples_per_block == 52
+    assert params.coefficients == DEFAULT_COEFFICIENTS
+    assert params.count_samples(BLOCK_ALIGN * 3 + 14 + 4) == 52 * 3 + 2 + 4
+
+
+def test_decode_matches_reference():
+    for channels in [1, 2]:
+        data = create_blocks(channels, 5, channels)
+        params = AdpcmParams.from_format(create_format(channels))
+        expected = np.array(reference_decode(channels, data), dtype=np.int16)
+        np.testing.assert_array_equal(decode_blocks(params, data), expected)
+        # The last block of a stream may be short
+        short = data[:-20]
+        np.testing.assert_array_equal(decode_blocks(params, short), reference_decode(channels, short))
+
+
+def test_stream_in_batches():
+    data = create_blocks(1, 9, 7)
+    wav = create_adpcm_wav(1, data)
+    assert WaveFormat.parse(wav).data_size == len(data)
+    batches = list(iter_riff_pcm(wav, batch_blocks=2))
+    assert len(batches) == 5
+    assert all(batch.shape[0] <= 2 * 116 for batch in batches)
+    np.testing.assert_array_equal(np.concatenate(batches), decode_riff(wav))
+
+
+def test_batch_analyze_and_decode():
+    quiet = create_pcm_wav(bytes(4000))
+    loud = create_adpcm_wav(2, create_blocks(2, 4, 3))
+    with TemporaryDirectory() as root:
+        path = join(root, "voice.asr")
+        write_archive(path, SoundChunk(is_sparse=False, clips=[
+            SoundClip("sounds\\quiet.wav", RESERVED, quiet),
+            SoundClip("sounds\\loud.wav", RESERVED, loud),
+        ]))
+        catalog = build_sound_catalog([path])
+        stats, failed = analyze_clips(catalog, workers=2)
+        assert failed == []
+        stats = {clip.name: clip for clip in stats}
+        assert stats["sounds\\quiet.wav"].samples == 2000
+        assert stats["sounds\\quiet.wav"].silence == 1.0
+        assert stats["sounds\\loud.wav"].samples == 4 * 52
+        assert stats["sounds\\loud.wav"].peak > 0
+
+        out_dir = join(root, "out")
+        written, failed = decode_clips(catalog, out_dir, workers=2)
+        assert (written, failed) == (2, [])
+        assert exists(join(out_dir, "sounds", "loud.wav"))
+        with open(join(out_dir, "sounds", "loud.wav"), "rb") as decoded:
+            np.testing.assert_array_equal(decode_riff(decoded.read()), decode_riff(loud))
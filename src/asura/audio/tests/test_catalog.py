@@ -0,0 +1,92 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.audio import SoundCatalog, build_sound_catalog, find_companions
+from asura.audio.tests.wav_helpers import RESERVED, create_pcm_wav, write_archive
+from asura.common.models.archive import ZbbArchive
+from asura.common.models.chunks.formats import SoundChunk, SoundClip
+from asura.packer.unpacker import UnpackOptions
+
+voice = create_pcm_wav(bytes(range(256)) * 300)
+music = create_pcm_wav(bytes(1000), 44100)
+
+
+def test_catalog_and_stream():
+    with TemporaryDirectory() as root:
+        path = join(root, "voice.asr")
+        write_archive(path, SoundChunk(is_sparse=False, clips=[
+            SoundClip("sounds\\voice.wav", RESERVED, voice),
+            SoundClip("sounds\\music.wav", RESERVED, music),
+        ]))
+        catalog = build_sound_catalog([path])
+        assert len(catalog) == 2
+
+        entry = catalog.get("sounds\\voice.wav")
+        assert entry.size == len(voice)
+        assert entry.format.sample_rate == 22050
+        assert entry.format.data_size == 256 * 300
+        assert catalog.get("sounds\\music.wav").format.sample_rate == 44100
+
+        assert catalog.read(entry) == voice
+        assert all(len(block) <= 1024 for block in catalog.stream(entry, 1024))
+        out_path = join(root, "out", "voice.wav")
+        assert catalog.extract("sounds\\music.wav", out_path) == len(music)
+        with open(out_path, "rb") as extracted:
+            assert extracted.read() == music
+
+
+def test_sparse_clips_resolve_to_companion():
+    with TemporaryDirectory() as root:
+        path = join(root, "level.asr")
+        companion = join(root, "level.asr.pc.sounds")
+        write_archive(path, SoundChunk(is_sparse=True, clips=[
+            SoundClip("voice.wav", RESERVED, None, len(voice)),
+        ]))
+        write_archive(companion, SoundChunk(is_sparse=False, clips=[
+            SoundClip("voice.wav", RESERVED, voice),
+        ]))
+        assert find_companions(path) == [companion]
+
+        catalog = SoundCatalog()
+        catalog.add_archive(path, companions=False)
+        try:
+            catalog.read("voice.wav")
+            raise AssertionError
+        except ValueError:
+            pass
+
+        catalog = build_sound_catalog([path])
+        assert catalog.get("voice.wav").archive == companion
+        assert catalog.read("voice.wav") == voice
+
+
+def test_truncated_clip():
+    with TemporaryDirectory() as root:
+        path = join(root, "voice.asr")
+        # The RIFF and WAVE magic, and the fmt chunk's header, but not its body
+        write_archive(path, SoundChunk(is_sparse=False, clips=[
+            SoundClip("sounds\\truncated.wav", RESERVED, voice[:22]),
+            SoundClip("sounds\\voice.wav", RESERVED, voice),
+        ]))
+        catalog = build_sound_catalog([path])
+        assert len(catalog) == 2
+        assert catalog.get("sounds\\truncated.wav").format is None
+        assert catalog.read("sounds\\truncated.wav") == voice[:22]
+        assert catalog.get("sounds\\voice.wav").format.sample_rate == 22050
+
+
+def test_compressed_bank():
+    with TemporaryDirectory() as root:
+        path = join(root, "voice.asr")
+        write_archive(path, SoundChunk(is_sparse=False, clips=[SoundClip("sounds\\voice.wav", RESERVED, voice)]))
+        zbb_path = join(root, "voice.zbb.asr")
+        with open(path, "rb") as in_stream, open(zbb_path, "wb") as out_stream:
+            ZbbArchive.compress_to_stream(in_stream, out_stream)
+        options = UnpackOptions(output_directory=join(root, "unpack"))
+        catalog = build_sound_catalog([zbb_path], options=options)
+        entry = catalog.get("sounds\\voice.wav")
+        assert entry.archive == options.create_decompressed_cache_path("voice.zbb.asr")
+        assert entry.format.sample_rate == 22050
+        assert catalog.read(entry) == voice
+        # Already cataloged
+        assert catalog.add_archive(zbb_path, options=options) == 0
@@ -0,0 +1,96 @@
+from os.path import join, exists
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from asura.audio import AdpcmParams, WaveFormat, create_adpcm_format, encode_wav, encode_directory, decode_riff
+from asura.audio.adpcm import decode_blocks
+from asura.audio.encoder import encode_blocks
+from asura.audio.tests.wav_helpers import create_pcm_wav, RESERVED
+from asura.common.enums import ChunkType
+from asura.common.mio import PackIO
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats import SoundChunk, SoundClip
+
+
+def create_tone(frames: int, channels: int) -> np.ndarray:
+    t = np.arange(frames)
+    tone = [8000 * np.sin(t * 0.05 * (c + 1)) + 2000 * np.sin(t * 0.31) for c in range(channels)]
+    return np.stack(tone, axis=1).astype(np.int16)
+
+
+def create_wav(pcm: np.ndarray, sample_rate: int = 22050) -> bytes:
+    channels = pcm.shape[1]
+    data = create_pcm_wav(pcm.astype("<i2").tobytes(), sample_rate)
+    # create_pcm_wav writes mono headers; patch in the channel count, byte rate and block align
+    data = bytearray(data)
+    data[22:24] = channels.to_bytes(2, "little")
+    data[28:32] = (sample_rate * 2 * channels).to_bytes(4, "little")
+    data[32:34] = (2 * channels).to_bytes(2, "little")
+    return bytes(data)
+
+
+def snr(expected: np.ndarray, actual: np.ndarray) -> float:
+    noise = np.square(expected.astype(np.float64) - actual).sum()
+    return 10 * np.log10(np.square(expected.astype(np.float64)).sum() / noise)
+
+
+def test_format():
+    format = create_adpcm_format(2, 44100, 1024)
+    params = AdpcmParams.from_format(format)
+    assert params.samples_per_block == 1012
+    assert format.block_align == 1024
+    assert format.bits_per_sample == 4
+
+
+def test_round_trip():
+    for channels in [1, 2]:
+        pcm = create_tone(5000, channels)
+        params = AdpcmParams.from_format(create_adpcm_format(channels, 22050, 256))
+        blocks = encode_blocks(params, pcm)
+        assert len(blocks) % 256 == 0
+        decoded = decode_blocks(params, blocks)[:len(pcm)]
+        assert snr(pcm, decoded) > 20
+
+
+def test_encode_wav():
+    pcm = create_tone(3000, 2)
+    encoded = encode_wav(create_wav(pcm), 512)
+    format = WaveFormat.parse(encoded)
+    assert format.is_adpcm
+    assert format.num_channels == 2
+    assert format.sample_rate == 22050
+    assert format.data_size % 512 == 0
+    assert encoded[format.data_offset - 20:format.data_offset - 12] == b"fact\x04\x00\x00\x00"
+    assert snr(pcm, decode_riff(encoded)[:len(pcm)]) > 20
+
+
+def test_encode_directory():
+    with TemporaryDirectory() as root:
+        in_dir = join(root, "pcm")
+        chunk_path = join(root, "unpacked", "Chunk 0")
+        pcm = create_tone(4000, 1)
+        original = SoundChunk(ChunkHeader(ChunkType.SOUND, 0, 0, bytes(4)), False, [
+            SoundClip("voice.wav", RESERVED, create_wav(pcm[:100])),
+        ])
+        original.unpack(chunk_path)
+        # Clips are unpacked alongside the chunk's info
+        chunk_path += f".{ChunkType.SOUND.value}"
+
+        PackIO.write_bytes(join(in_dir, "voice.wav"), create_wav(pcm))
+        PackIO.write_bytes(join(in_dir, "lines", "hello.wav"), create_wav(pcm[:1000]))
+        PackIO.write_bytes(join(in_dir, "broken.wav"), b"not a wav")
+        written, failed = encode_directory(in_dir, chunk_path, workers=2)
+        assert written == 2
+        assert len(failed) == 1 and "broken.wav" in failed[0]
+        assert exists(join(chunk_path, "lines", "hello.wav"))
+
+        # The encoded clip replaces the original when the chunk is repacked
+        repacked = SoundChunk.repack(chunk_path)
+        assert len(repacked.clips) == 1
+        assert repacked.clips[0].reserved_b == RESERVED
+        assert WaveFormat.parse(repacked.clips[0].data).is_adpcm
+        assert snr(pcm, decode_riff(repacked.clips[0].data)[:len(pcm)]) > 20
+
+        # Already encoded files are left alone
+        assert encode_directory(chunk_path, workers=1) == (0, [])
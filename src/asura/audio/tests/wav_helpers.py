@@ -0,0 +1,21 @@
+from struct import pack
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk
+from asura.common.models.chunks.formats import SoundChunk
+
+RESERVED = bytes([0xfe, 0xfd, 0xfc, 0xfb])
+
+
+def create_pcm_wav(samples: bytes, sample_rate: int = 22050) -> bytes:
+    fmt = pack("< H H I I H H", 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    body = b"WAVE" + b"fmt " + pack("< I", len(fmt)) + fmt + b"data" + pack("< I", len(samples)) + samples
+    return b"RIFF" + pack("< I", len(body)) + body
+
+
+def write_archive(path: str, chunk: SoundChunk):
+    chunk.header = ChunkHeader(ChunkType.SOUND, 0, 0, bytes(4))
+    archive = FolderArchive(ArchiveType.Folder, [chunk, EofChunk(ChunkHeader(ChunkType.EOF))])
+    with open(path, "wb") as stream:
+        archive.write(stream)
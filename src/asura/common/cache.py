@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+from asura.common.config import MEBI_BYTE
+
+DEFAULT_CACHE_SIZE = 64 * MEBI_BYTE
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class BlockCache:
+    """
+    A least recently used cache of loaded values (i.e. decompressed Zbb blocks), bounded by their total size; it can
+    be shared between archives, and threads.
+
+    Values larger than the cache are loaded, but not kept.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, sizeof: Callable[[Any], int] = len):
+        """
+        :param max_size: The total size of the values kept.
+        :param sizeof: Measures a value; by default its length (in bytes).
+        """
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.size = 0
+        self.stats = CacheStats()
+        self._values: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Gets a value, loading (and keeping) it if it isn't cached.
+
+        The value is loaded outside the cache's lock; threads missing the same key may both load it.
+
+        :param key: The value's key; i.e. (archive path, block index).
+        :param load: Loads the value.
+        :return: The value.
+        """
+        with self._lock:
+            if key in self._values:
+                self._values.move_to_end(key)
+                self.stats.hits += 1
+                return self._values[key]
+            self.stats.misses += 1
+        value = load()
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            previous = self._values.pop(key, None)
+            if previous is not None:
+                self.size -= self.sizeof(previous)
+            self._values[key] = value
+            self.size += size
+            while self.size > self.max_size:
+                _, evicted = self._values.popitem(last=False)
+                self.size -= self.sizeof(evicted)
+                self.stats.evictions += 1
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Removes every value whose key matches; i.e. the blocks of an archive which was closed.
+
+        :return: The number of values removed.
+        """
+        with self._lock:
+            keys = [key for key in self._values if predicate(key)]
+            for key in keys:
+                self.size -= self.sizeof(self._values.pop(key))
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self.size = 0
@@ -0,0 +1,112 @@
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from asura.common.config import MEBI_BYTE, KIBI_BYTE
+
+FAST = "fast"
+BALANCED = "balanced"
+MAX = "max"
+PRESETS = [FAST, BALANCED, MAX]
+
+STORED = 0
+DEFAULT_BLOCK_SIZE = 2 * MEBI_BYTE
+
+
+@dataclass
+class CompressionPolicy:
+    """
+    Picks the zlib level each Zbb block is compressed with.
+
+    A few slices of each block are trial compressed (at level 1) to estimate how well it compresses; blocks which
+    barely compress (i.e. BCn textures, or ADPCM audio) are written with a cheaper level, or stored, rather than spending
+    a full deflate on them. Stored blocks are still valid zlib streams; readers need not know about the policy.
+    """
+    # The level used for blocks which compress well; Z_DEFAULT_COMPRESSION is level 6
+    level: int = zlib.Z_DEFAULT_COMPRESSION
+    # The size of the blocks; the last block holds the remainder
+    block_size: int = DEFAULT_BLOCK_SIZE
+    # Blocks whose sample compresses to at least this ratio (compressed / original) are stored; None never stores
+    store_ratio: Optional[float] = None
+    # Blocks whose sample compresses to at least this ratio use level 1; None always uses 'level'
+    fast_ratio: Optional[float] = None
+    # The number of bytes sampled from each block, in 'sample_count' evenly spread slices
+    sample_size: int = 64 * KIBI_BYTE
+    sample_count: int = 4
+
+    @classmethod
+    def preset(cls, name: str, block_size: int = DEFAULT_BLOCK_SIZE) -> 'CompressionPolicy':
+        """
+        Gets a preset policy:
+            fast        Level 1; incompressible blocks are stored.
+            balanced    Level 6; poorly compressible blocks use level 1, and incompressible blocks are stored.
+            max         Level 9; only (nearly) random blocks are stored.
+
+        :raises NotImplementedError: raised when the preset doesn't exist.
+        """
+        if name == FAST:
+            return CompressionPolicy(1, block_size, store_ratio=0.95)
+        if name == BALANCED:
+            return CompressionPolicy(6, block_size, store_ratio=0.97, fast_ratio=0.85)
+        if name == MAX:
+            return CompressionPolicy(9, block_size, store_ratio=0.99)
+        raise NotImplementedError(f"Not Supported ~ {name}")
+
+    @property
+    def samples(self) -> bool:
+        return self.store_ratio is not None or self.fast_ratio is not None
+
+    def sample_ratio(self, data: bytes) -> float:
+        """
+        Estimates how well a block compresses; the ratio (compressed / original) of its sampled slices at level 1.
+        """
+        if len(data) <= self.sample_size:
+            slices = [data]
+        else:
+            slice_size = self.sample_size // self.sample_count
+            step = (len(data) - slice_size) // max(self.sample_count - 1, 1)
+            slices = [data[i * step:i * step + slice_size] for i in range(self.sample_count)]
+        size = sum(len(part) for part in slices)
+        if size == 0:
+            return 1.0
+        # zlib's header and checksum (6 bytes) aren't part of the estimate
+        compressed = sum(len(zlib.compress(part, 1)) - 6 for part in slices)
+        return compressed / size
+
+    def choose_level(self, data: bytes) -> Tuple[int, Optional[float]]:
+        """
+        Picks the level to compress a block with.
+
+        :return: The level, and the block's sampled ratio (None if the policy doesn't sample).
+        """
+        if not self.samples:
+            return self.level, None
+        ratio = self.sample_ratio(data)
+        if self.store_ratio is not None and ratio >= self.store_ratio:
+            return STORED, ratio
+        if self.fast_ratio is not None and ratio >= self.fast_ratio:
+            # Z_DEFAULT_COMPRESSION is -1
+            return 1 if self.level < 0 else min(self.level, 1), ratio
+        return self.level, ratio
+
+
+@dataclass
+class BlockStats:
+    size: int = None
+    compressed_size: int = None
+    level: int = None
+    # See CompressionPolicy.sample_ratio; None when the block wasn't sampled
+    sample_ratio: float = None
+    # Time spent sampling and compressing the block
+    seconds: float = None
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_size / self.size if self.size else 1.0
+
+    @property
+    def throughput(self) -> float:
+        """
+        The bytes compressed per second.
+        """
+        return self.size / self.seconds if self.seconds else float("inf")
@@ -238,6 +238,10 @@ class ChunkType(Enum):
                 return GenericChunkType(value)
             raise EnumDecodeError(cls, value, [e.value for e in cls])
 
+    @classmethod
+    def decode_from_str(cls, value: str) -> 'ChunkType':
+        return cls.get_enum_from_value(value)
+
     @classmethod
     def decode(cls, encoded: bytes) -> 'ChunkType':
         value = encoded.decode()
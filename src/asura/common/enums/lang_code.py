@@ -1,11 +1,10 @@
 import struct
 from enum import Enum
-from parser import ParserError
 from struct import Struct
 from typing import BinaryIO
 
 from .common import enum_value_to_enum
-from ..error import EnumDecodeError
+from ..error import EnumDecodeError, ParsingError
 
 _type_layout = Struct("< I")
 
@@ -48,7 +47,7 @@ class LangCode(Enum):
         try:
             return cls.decode(stream.read(_type_layout.size))
         except EnumDecodeError as e:
-            raise ParserError(start) from e
+            raise ParsingError(start) from e
 
     def write(self, stream: BinaryIO):
         return stream.write(self.encode())
@@ -3,10 +3,12 @@ __all__ = [
     "ChunkUnpacker",
     "ChunkRepacker",
     "ChunkReader",
+    "FormatRegistry",
     "initialized",
     "initialize_factories"
 ]
 
+from asura.common.factories.format_registry import FormatRegistry
 from asura.common.factories.chunk_packer import ChunkUnpacker, ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
 from asura.common.factories.archive_parser import ArchiveParser
@@ -1,10 +1,13 @@
 from os.path import splitext
-from typing import Dict, Callable
+from typing import Dict, Callable, Any
+
+from asura.common.factories.format_registry import FormatRegistry
 
 # from asura.common.enums import ChunkType
 # from asura.common.models.chunks import BaseChunk
 
-UnpackChunk = Callable[['BaseChunk', str, bool], bool]
+# chunk, path, overwrite, payload store (see PackIO.write_payload)
+UnpackChunk = Callable[['BaseChunk', str, bool, Any], bool]
 RepackChunk = Callable[[str], 'BaseChunk']
 
 
@@ -24,9 +27,15 @@ class ChunkUnpacker:
         return wrapper
 
     @classmethod
-    def unpack(cls, chunk: 'BaseChunk', chunk_path: str, overwrite: bool = False) -> bool:
-        unpacker = cls._map.get(chunk.header.type, cls._default)
-        return unpacker(chunk, chunk_path, overwrite)
+    def get(cls, type: 'ChunkType') -> UnpackChunk:
+        if type not in cls._map and FormatRegistry.load(type):
+            return cls.get(type)
+        return cls._map.get(type, cls._default)
+
+    @classmethod
+    def unpack(cls, chunk: 'BaseChunk', chunk_path: str, overwrite: bool = False, store=None) -> bool:
+        unpacker = cls.get(chunk.header.type)
+        return unpacker(chunk, chunk_path, overwrite, store)
 
 
 class ChunkRepacker:
@@ -43,9 +52,16 @@ class ChunkRepacker:
             return func
 
         return wrapper
+
+    @classmethod
+    def get(cls, type: 'ChunkType') -> RepackChunk:
+        if type not in cls._map and FormatRegistry.load(type):
+            return cls.get(type)
+        return cls._map.get(type, cls._default)
+
     @classmethod
     def repack(cls, chunk_type: 'ChunkType', path: str) -> 'BaseChunk':
-        repacker = cls._map.get(chunk_type, cls._default)
+        repacker = cls.get(chunk_type)
         return repacker(path)
 
     @classmethod
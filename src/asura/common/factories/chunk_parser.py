@@ -1,15 +1,21 @@
-from typing import Dict, Callable, BinaryIO
+from io import BytesIO
+from typing import Dict, Callable, BinaryIO, Optional
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO
+from asura.common.error import ParsingError
+from asura.common.factories.format_registry import FormatRegistry
+from asura.common.mio import AsuraIO, AsuraCursor, Buffer
 # from asura.common.models.chunks import ChunkHeader, BaseChunk
 
 ParseChunk = Callable[[BinaryIO, 'ChunkHeader'], 'BaseChunk']
+ParseChunkCursor = Callable[[AsuraCursor, 'ChunkHeader'], 'BaseChunk']
 
 
 class ChunkReader:
     _map: Dict[ChunkType, ParseChunk] = {}
     _default: ParseChunk = None
+    _cursor_map: Dict[ChunkType, ParseChunkCursor] = {}
+    _cursor_default: ParseChunkCursor = None
 
     # Decorator syntax which returns original function unmodified
     @classmethod
@@ -23,12 +29,71 @@ class ChunkReader:
 
         return wrapper
 
+    # Decorator syntax which returns original function unmodified
+    @classmethod
+    def register_cursor(cls, type: ChunkType = None) -> Callable[[ParseChunkCursor], ParseChunkCursor]:
+        def wrapper(func: ParseChunkCursor) -> ParseChunkCursor:
+            if type is None:
+                cls._cursor_default = func
+            else:
+                cls._cursor_map[type] = func
+            return func
+
+        return wrapper
+
+    @classmethod
+    def get(cls, type: ChunkType) -> ParseChunk:
+        if type not in cls._map and FormatRegistry.load(type):
+            return cls.get(type)
+        return cls._map.get(type, cls._default)
+
+    @classmethod
+    def get_cursor(cls, type: ChunkType) -> Optional[ParseChunkCursor]:
+        """
+        Gets the parser which reads a chunk type from an AsuraCursor.
+
+        :return: The parser, or None if the type can only be read from a stream.
+        """
+        cls.get(type)  # Loads the type's format
+        if type in cls._cursor_map:
+            return cls._cursor_map[type]
+        if type in cls._map:
+            return None
+        return cls._cursor_default
+
     @classmethod
     def read(cls, header: 'ChunkHeader', stream: BinaryIO, validate: bool = True) -> 'BaseChunk':
         with AsuraIO(stream) as temp:
             with temp.byte_counter() as counter:
-                parser = cls._map.get(header.type, cls._default)
+                parser = cls.get(header.type)
                 parsed = parser(stream, header)
                 if validate:
                     assert counter.length == header.chunk_size, (header.type, counter.length, header.chunk_size)
                 return parsed
+
+    @classmethod
+    def read_buffer(cls, header: 'ChunkHeader', buffer: Buffer, offset: int = 0, validate: bool = True) -> 'BaseChunk':
+        """
+        Reads a chunk's body from a buffer; i.e. the body read in a single call, or a mapped archive.
+
+        Chunk types without a cursor parser are read from a stream over a copy of the body.
+
+        :param header: The chunk's header.
+        :param buffer: The buffer holding the body.
+        :param offset: The position of the body in the buffer.
+        :param validate: Check that the whole body (and nothing more) was read.
+        :return: The chunk.
+        :raises ParsingError: raised when the body could not be read, or its size does not match the header.
+        """
+        end = offset + header.chunk_size
+        if end > len(buffer):
+            raise ParsingError(len(buffer))
+        parser = cls.get_cursor(header.type)
+        if parser is None:
+            with BytesIO(buffer[offset:end]) as stream:
+                return cls.read(header, stream, validate)
+        cursor = AsuraCursor(buffer, offset, end)
+        parsed = parser(cursor, header)
+        if validate and cursor.offset != end:
+            raise ParsingError(cursor.offset)
+        return parsed
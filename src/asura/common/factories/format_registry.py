@@ -0,0 +1,109 @@
+from importlib import import_module
+from threading import RLock
+from typing import Dict, Set, Any, Iterable
+
+# from asura.common.enums import ChunkType
+
+_FORMATS_PACKAGE = "asura.common.models.chunks.formats"
+# Third party formats register their module under this group; the entry point's name is the chunk type (i.e. 'RSCF')
+ENTRY_POINT_GROUP = "asura.formats"
+
+# Chunk type -> the module which registers the type's reader, unpacker and repacker
+BUILTIN_FORMATS: Dict[str, str] = {
+    "RSCF": f"{_FORMATS_PACKAGE}.rscf",
+    "RSFL": f"{_FORMATS_PACKAGE}.rsfl",
+    "FNFO": f"{_FORMATS_PACKAGE}.fnfo",
+    "HTXT": f"{_FORMATS_PACKAGE}.htxt",
+    "ASTS": f"{_FORMATS_PACKAGE}.asts",
+    "HSBB": f"{_FORMATS_PACKAGE}.hsbb",
+    "HSKE": f"{_FORMATS_PACKAGE}.hske",
+    "HSKL": f"{_FORMATS_PACKAGE}.hskl",
+    "HSND": f"{_FORMATS_PACKAGE}.hsnd",
+    "HMPT": f"{_FORMATS_PACKAGE}.hmpt",
+}
+
+
+def _find_entry_points() -> Iterable[Any]:
+    try:
+        from importlib import metadata
+    except ImportError:  # Python 3.7; use the backport if it's installed
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            return []
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+    return entry_points.get(ENTRY_POINT_GROUP, [])
+
+
+class FormatRegistry:
+    """
+    Maps each chunk type to the module implementing it; a module is only imported when its chunk type is first read,
+    unpacked or repacked.
+    """
+    _modules: Dict[str, str] = dict(BUILTIN_FORMATS)
+    # Chunk types which have been loaded (or have no module); each type is only loaded once
+    _attempted: Set[str] = set()
+    _entry_points: Dict[str, Any] = None
+    _lock = RLock()
+
+    @classmethod
+    def register(cls, type: 'ChunkType', module: str):
+        """
+        Registers (or replaces) the module implementing a chunk type.
+
+        :param type: The chunk type.
+        :param module: The module's full name, i.e. 'my_package.formats.abcd'.
+        """
+        with cls._lock:
+            cls._modules[type.value] = module
+            cls._attempted.discard(type.value)
+
+    @classmethod
+    def _get_entry_points(cls) -> Dict[str, Any]:
+        if cls._entry_points is None:
+            cls._entry_points = {entry_point.name: entry_point for entry_point in _find_entry_points()}
+        return cls._entry_points
+
+    @classmethod
+    def load(cls, type: 'ChunkType') -> bool:
+        """
+        Imports the module implementing a chunk type, if it hasn't been imported already.
+
+        Registered modules take precedence over entry points.
+
+        :param type: The chunk type.
+        :return: True if a module was imported by this call.
+        :raises ImportError: raised when the type's module fails to import; later calls try again.
+        """
+        if type is None or type.value in cls._attempted:
+            return False
+        with cls._lock:
+            if type.value in cls._attempted:
+                return False
+            # Only marked once the import succeeds; other threads wait on the lock rather than reading the chunk
+            #   before its reader is registered, and a failed import is raised again rather than falling back
+            module = cls._modules.get(type.value)
+            if module is not None:
+                import_module(module)
+                cls._attempted.add(type.value)
+                return True
+            entry_point = cls._get_entry_points().get(type.value)
+            if entry_point is not None:
+                entry_point.load()
+                cls._attempted.add(type.value)
+                return True
+            cls._attempted.add(type.value)
+        return False
+
+    @classmethod
+    def load_all(cls) -> int:
+        """
+        Imports every known format module, entry points included.
+
+        :return: The number of modules imported by this call.
+        """
+        from asura.common.enums import ChunkType
+        types = set(cls._modules) | set(cls._get_entry_points())
+        return sum(cls.load(ChunkType.get_enum_from_value(type)) for type in sorted(types))
@@ -0,0 +1,14 @@
+from typing import BinaryIO
+
+from asura.common.enums.chunk_type import GenericChunkType
+from asura.common.factories import ChunkReader
+from asura.common.models.chunks import ChunkHeader, RawChunk
+
+CUSTOM_TYPE = GenericChunkType("ZZZZ")
+
+
+class CustomChunk(RawChunk):
+    @staticmethod
+    @ChunkReader.register(CUSTOM_TYPE)
+    def read(stream: BinaryIO, header: ChunkHeader) -> 'CustomChunk':
+        return CustomChunk(header, stream.read(header.chunk_size))
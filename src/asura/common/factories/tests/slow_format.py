@@ -0,0 +1,17 @@
+import time
+from typing import BinaryIO
+
+from asura.common.enums.chunk_type import GenericChunkType
+from asura.common.factories import ChunkReader
+from asura.common.models.chunks import ChunkHeader, RawChunk
+
+SLOW_TYPE = GenericChunkType("ZZZY")
+# Other threads read the type while the module is still being imported
+time.sleep(0.2)
+
+
+class SlowChunk(RawChunk):
+    @staticmethod
+    @ChunkReader.register(SLOW_TYPE)
+    def read(stream: BinaryIO, header: ChunkHeader) -> 'SlowChunk':
+        return SlowChunk(header, stream.read(header.chunk_size))
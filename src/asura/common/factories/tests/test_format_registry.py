@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from os import environ
+from os.path import dirname
+
+import pytest
+
+import asura
+from asura.common.enums.chunk_type import GenericChunkType
+from asura.common.factories import ChunkReader, FormatRegistry
+from asura.common.models.chunks import ChunkHeader
+
+_FORMAT = "asura.common.models.chunks.formats.rscf"
+
+
+def run(code: str) -> str:
+    # A fresh interpreter, so nothing has been imported yet
+    env = dict(environ, PYTHONPATH=dirname(dirname(asura.__file__)))
+    result = subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.PIPE, env=env)
+    return result.stdout.decode().strip()
+
+
+def test_formats_import_on_demand():
+    code = f"""
+import sys
+from asura.common.factories import initialize_factories, ChunkRepacker
+from asura.common.enums import ChunkType
+initialize_factories()
+print('{_FORMAT}' in sys.modules)
+ChunkRepacker.get(ChunkType.RESOURCE)
+print('{_FORMAT}' in sys.modules)
+"""
+    assert run(code).split() == ["False", "True"]
+
+
+def test_package_exports_stay_importable():
+    code = "from asura.common.models.chunks.formats import ResourceChunk; print(ResourceChunk.__name__)"
+    assert run(code) == "ResourceChunk"
+
+
+def test_register_custom_format():
+    custom_type = GenericChunkType("ZZZZ")
+    FormatRegistry.register(custom_type, "asura.common.factories.tests.custom_format")
+    header = ChunkHeader(custom_type, 20, 0, bytes(4))
+    chunk = ChunkReader.read(header, BytesIO(b"data"))
+    assert type(chunk).__name__ == "CustomChunk"
+    assert chunk.data == b"data"
+
+
+def test_concurrent_reads_wait_for_the_import():
+    slow_type = GenericChunkType("ZZZY")
+    FormatRegistry.register(slow_type, "asura.common.factories.tests.slow_format")
+    header = ChunkHeader(slow_type, 20, 0, bytes(4))
+
+    def read(_) -> str:
+        return type(ChunkReader.read(header, BytesIO(b"data"))).__name__
+
+    with ThreadPoolExecutor(8) as executor:
+        assert set(executor.map(read, range(8))) == {"SlowChunk"}
+
+
+def test_failed_import_is_raised_again():
+    missing_type = GenericChunkType("ZZZX")
+    FormatRegistry.register(missing_type, "asura.common.factories.tests.missing_format")
+    header = ChunkHeader(missing_type, 20, 0, bytes(4))
+    for _ in range(2):
+        with pytest.raises(ImportError):
+            ChunkReader.read(header, BytesIO(b"data"))
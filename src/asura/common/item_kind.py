@@ -0,0 +1,5 @@
+# Kinds of named items an archive holds; the chunk the name was read from
+RESOURCE = "resource"
+SOUND = "sound"
+RESOURCE_LIST = "resource_list"
+HMPT = "hmpt"
@@ -1,15 +1,21 @@
 import dataclasses
 import json
+import os
 import zlib
 from contextlib import contextmanager
 from enum import Enum
-from os import stat, walk, makedirs
+from io import UnsupportedOperation
+from mmap import mmap, ACCESS_READ
+from os import stat, walk, makedirs, remove, fstat
 from os.path import join, splitext, dirname, exists, abspath
-from typing import List, BinaryIO, Iterable, Dict, Tuple
+from struct import Struct
+from threading import Lock
+from typing import List, BinaryIO, Iterable, Dict, Tuple, Iterator, Optional, Union
 
 from asura.common.config import MEBI_BYTE, INT64_SIZE, INT32_SIZE, INT16_SIZE, WORD_SIZE
 from asura.common.enums.chunk_type import GenericChunkType
 from asura.common.error import ParsingError
+from asura.common.records import RecordList
 
 
 def bytes_to_word_boundary(index: int, word_size: int) -> int:
@@ -383,12 +389,238 @@ class AsuraIO:
         return self.stream.write(encoded)
 
 
+_INT64_LAYOUT = Struct("< q")
+_UINT64_LAYOUT = Struct("< Q")
+_INT32_LAYOUT = Struct("< i")
+_UINT32_LAYOUT = Struct("< I")
+_INT16_LAYOUT = Struct("< h")
+_UINT16_LAYOUT = Struct("< H")
+
+Buffer = Union[bytes, bytearray, mmap]
+
+
+class AsuraCursor:
+    """
+    Reads the same values as AsuraIO, from a buffer (bytes, bytearray or an mmap) instead of a stream.
+
+    The cursor is only an offset into the buffer; fields are unpacked in place with precompiled structs, so reading a
+    field costs no stream call (or context manager). Reading past the end raises a ParsingError.
+    """
+    __slots__ = ("buffer", "offset", "end")
+
+    def __init__(self, buffer: Buffer, offset: int = 0, end: int = None):
+        """
+        :param buffer: The buffer to read from; other buffer types (i.e. memoryview) are copied to bytes.
+        :param offset: The position to start reading from.
+        :param end: The position reading stops at; None will use the end of the buffer.
+        """
+        if not hasattr(buffer, "find"):
+            buffer = bytes(buffer)
+        self.buffer = buffer
+        self.offset = offset
+        self.end = len(buffer) if end is None else end
+
+    @property
+    def remaining(self) -> int:
+        return self.end - self.offset
+
+    def _advance(self, size: int) -> int:
+        start = self.offset
+        if size < 0 or start + size > self.end:
+            raise ParsingError(start)
+        self.offset = start + size
+        return start
+
+    def _unpack(self, layout: Struct) -> int:
+        start = self._advance(layout.size)
+        return layout.unpack_from(self.buffer, start)[0]
+
+    def unpack(self, layout: Struct) -> tuple:
+        """
+        Unpacks a struct at the cursor.
+        :param layout: The struct to unpack.
+        :return: The unpacked values.
+        """
+        start = self._advance(layout.size)
+        return layout.unpack_from(self.buffer, start)
+
+    def skip(self, n: int):
+        self._advance(n)
+
+    def read(self, n: int = -1) -> bytes:
+        if n < 0:
+            n = self.remaining
+        start = self._advance(n)
+        return self.buffer[start:start + n]
+
+    def read_int64(self, signed: bool = None) -> int:
+        return self._unpack(_INT64_LAYOUT if signed else _UINT64_LAYOUT)
+
+    def read_int32(self, signed: bool = None) -> int:
+        return self._unpack(_INT32_LAYOUT if signed else _UINT32_LAYOUT)
+
+    def read_int16(self, signed: bool = None) -> int:
+        return self._unpack(_INT16_LAYOUT if signed else _UINT16_LAYOUT)
+
+    def read_bool(self, strict: bool = True) -> bool:
+        b = self.buffer[self._advance(1)]
+        if b == 0x00:
+            return False
+        elif not strict or b == 0x01:
+            return True
+        else:
+            raise ValueError("Unexpected byte for strict bool!", b)
+
+    def read_byte(self) -> bytes:
+        return self.read(1)
+
+    def read_word(self) -> bytes:
+        return self.read(WORD_SIZE)
+
+    def read_utf8(self, size: int = None, *, padded=False, strip_terminal=True, read_size=False) -> str:
+        origin = self.offset
+        if read_size and size is not None:
+            raise ValueError("Cannot use read_size and size!")
+        if read_size:
+            size = self.read_int32()
+
+        if size is None:
+            terminal = self.buffer.find(b"\x00", self.offset, self.end)
+            if terminal == -1:
+                raise ParsingError(self.end)
+            size = terminal + 1 - self.offset  # +1 to capture the terminal
+
+        padding = bytes_to_word_boundary(size, WORD_SIZE) if padded else 0
+        start = self._advance(size + padding)
+        value = self.buffer[start:start + size]
+        if strip_terminal:
+            value = value.rstrip(b"\x00")
+        try:
+            return value.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise ParsingError(origin) from e
+
+    def read_utf8_list(self, *, strip_terminal=True) -> List[str]:
+        size = self.read_int32()
+        value = self.read_utf8(size, strip_terminal=True)
+        split = value.split("\x00")
+        if not strip_terminal:
+            split = [p + "\x00" for p in split]
+        return split
+
+    def read_utf16(self, size: int = None, *, padded: bool = False, strip_terminal: bool = True,
+                   read_size: bool = False) -> str:
+        origin = self.offset
+        if read_size and size is not None:
+            raise ValueError("Cannot use read_size and size!")
+        if read_size:
+            size = self.read_int32()
+
+        if size is None:
+            # The terminal must be a whole (aligned) code unit
+            terminal = self.buffer.find(b"\x00\x00", self.offset, self.end)
+            while terminal != -1 and (terminal - self.offset) % 2 != 0:
+                terminal = self.buffer.find(b"\x00\x00", terminal + 1, self.end)
+            if terminal == -1:
+                raise ParsingError(self.end)
+            size = terminal + 2 - self.offset
+        else:
+            size *= 2
+
+        padding = bytes_to_word_boundary(size, WORD_SIZE) if padded else 0
+        start = self._advance(size + padding)
+        try:
+            decoded = str(self.buffer[start:start + size], "utf-16le")
+        except UnicodeDecodeError as e:
+            raise ParsingError(origin) from e
+        if strip_terminal:
+            decoded = decoded.rstrip("\x00")
+        return decoded
+
+
+@contextmanager
+def map_stream(stream: BinaryIO) -> Iterator[Optional[mmap]]:
+    """
+    Maps the file behind a stream (read only), allowing its chunks to be read with an AsuraCursor.
+
+    The map is closed when the context closes; anything read from it is copied out, so it is safe to keep.
+    :param stream: A file opened in binary mode.
+    :return: The map, or None if the stream isn't backed by a (non-empty) file.
+    """
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError, UnsupportedOperation):
+        yield None
+        return
+    if stream.writable():
+        # Buffered writes aren't visible to the map until they're flushed
+        stream.flush()
+    if fstat(fileno).st_size == 0:
+        yield None
+        return
+    with mmap(fileno, 0, access=ACCESS_READ) as mapped:
+        yield mapped
+
+
+class PositionalReader:
+    """
+    Reads byte ranges of a stream by position, without moving (or sharing) its seek position; many threads can read
+    the same archive at once.
+
+    Files are read with os.pread where it's available, and from a buffer (i.e. a mapped file, see map_stream) when
+    one is given; otherwise reads seek the stream under a lock, and are serialized.
+    """
+
+    def __init__(self, stream: BinaryIO, buffer: Buffer = None):
+        """
+        :param stream: The stream; its position is left alone, unless reads fall back to seeking.
+        :param buffer: The stream's contents; when given, ranges are sliced from it instead.
+        """
+        self.stream = stream
+        self.buffer = buffer
+        self._fileno = None
+        self._lock = Lock()
+        if buffer is None and hasattr(os, "pread"):
+            try:
+                self._fileno = stream.fileno()
+            except (AttributeError, OSError, UnsupportedOperation):
+                self._fileno = None
+            if self._fileno is not None and stream.writable():
+                # Buffered writes aren't visible to pread until they're flushed
+                stream.flush()
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """
+        Reads a byte range; fewer bytes are returned at the end of the stream.
+        """
+        if self.buffer is not None:
+            return bytes(self.buffer[offset:offset + size])
+        if self._fileno is not None:
+            parts = []
+            while size > 0:
+                data = os.pread(self._fileno, size, offset)
+                if not data:
+                    break
+                parts.append(data)
+                offset += len(data)
+                size -= len(data)
+            return b"".join(parts)
+        with self._lock:
+            previous = self.stream.tell()
+            self.stream.seek(offset)
+            data = self.stream.read(size)
+            self.stream.seek(previous)
+        return data
+
+
 class EnhancedJSONEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, GenericChunkType):
             return o.value
         elif dataclasses.is_dataclass(o):
             return dataclasses.asdict(o)
+        elif isinstance(o, RecordList):
+            return o.to_list()
         elif isinstance(o, Enum):
             return o.value
         elif isinstance(o, bytes):
@@ -454,11 +686,25 @@ class PackIO:
         # path = cls.safe_path(path)
         diff = not exists(path) or stat(path).st_size != len(data)
         if overwrite or diff:
+            if exists(path) and stat(path).st_nlink > 1:
+                # Hard linked (i.e. to a content store); writing in place would change every link
+                remove(path)
             with open(path, "wb") as data_file:
                 data_file.write(data)
             return True
         return False
 
+    @classmethod
+    def write_payload(cls, path: str, data: bytes, overwrite: bool = False, store=None) -> bool:
+        """
+        Writes a chunk's payload (i.e. a resource or sound clip).
+
+        :param store: Deduplicates the payload when given; see asura.packer.dedup.ContentStore.
+        """
+        if store is not None:
+            return store.write(path, data, overwrite)
+        return cls.write_bytes(path, data, overwrite)
+
     @classmethod
     def read_bytes(cls, path: str) -> bytes:
         # path = cls.safe_path(path)
@@ -542,6 +788,10 @@ class PackIO:
         return r"\\\\?\\" + abspath(path)
 
 
+RICHTEXT_HEAD = "\ue003"
+RICHTEXT_TAIL = "\ue004"
+
+
 def split_asura_richtext(text: str) -> List[str]:
     """
     Splits an common unicode 'richtext' string into it's raw and richtext parts.
@@ -549,8 +799,8 @@ def split_asura_richtext(text: str) -> List[str]:
     :return: A list of strings, each string is either a raw text, or a richtext string.
     """
     parts = []
-    richtext_head = "\ue003"
-    richtext_tail = "\ue004"
+    richtext_head = RICHTEXT_HEAD
+    richtext_tail = RICHTEXT_TAIL
     last_start = 0
     while last_start < len(text):
         try:
@@ -2,16 +2,21 @@
 __all__ = [
     'BaseArchive',
     'FolderArchive',
+    'ChunkTable',
+    'ChunkList',
     "ZbbArchive",
     "ZbbBlock",
+    "open_folder",
     "initialize_factories"
 ]
 
 from asura.common.models.archive.base import BaseArchive
 
+from asura.common.models.archive.table import ChunkTable, ChunkList
 from asura.common.models.archive.folder import FolderArchive
 
 from asura.common.models.archive.zbb import ZbbArchive, ZbbBlock
+from asura.common.models.archive.opener import open_folder
 
 def initialize_factories():
     # This function does nothing;
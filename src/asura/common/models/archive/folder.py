@@ -1,29 +1,27 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, BinaryIO, Iterable
+from typing import List, BinaryIO, Iterable, Iterator, Optional, Tuple
 
 from asura.common.enums import ChunkType, ArchiveType
+from asura.common.error import ParsingError
+from asura.common.mio import Buffer, PositionalReader
 from asura.common.models.archive import BaseArchive
-from asura.common.models.chunks import BaseChunk, ChunkHeader, SparseChunk, EofChunk
+from asura.common.models.archive.table import ChunkTable, ChunkList
+from asura.common.models.chunks import BaseChunk, SparseChunk
+from asura.common.models.chunks.unparsed import parse_chunk
 from asura.common.factories import ArchiveParser
 
 
+# The number of chunks read ahead of the chunk being yielded by iter_parallel; bounds the memory held by parsed chunks
+DEFAULT_PARSE_WINDOW = 32
+
+
 @dataclass
 class FolderArchive(BaseArchive):
+    # Archives which were read hold a ChunkList; chunks are only created when accessed
     chunks: List[BaseChunk]
 
-    @staticmethod
-    def _read_chunk(stream: BinaryIO, sparse: bool = True) -> BaseChunk:
-        start = stream.tell()
-        header = ChunkHeader.read(stream)
-        # Always return EOF
-        if header.type == ChunkType.EOF:
-            return EofChunk(header)
-        result = SparseChunk(header, stream.tell())
-        if not sparse:
-            result = result.load(stream)
-        stream.seek(start + header.length, 0)
-        return result
-
     @staticmethod
     @ArchiveParser.register(ArchiveType.Folder)
     def read(stream: BinaryIO, type: ArchiveType = None, sparse: bool = True) -> 'FolderArchive':
@@ -31,49 +29,165 @@ class FolderArchive(BaseArchive):
             type = ArchiveType.read(stream)
         if type != ArchiveType.Folder:
             raise NotImplementedError(f"Not Supported ~ {type}")
-        result = FolderArchive(type, [])
-        while True:
-            chunk = FolderArchive._read_chunk(stream, sparse)
-            result.chunks.append(chunk)
-            if chunk.header.type == ChunkType.EOF:
-                break
+        result = FolderArchive.from_table(ChunkTable.read(stream))
+        if not sparse:
+            end = stream.tell()
+            result.load(stream)
+            stream.seek(end)
         return result
 
+    @staticmethod
+    def from_table(table: ChunkTable) -> 'FolderArchive':
+        """
+        Creates a sparse archive from a chunk table (see ChunkTable.read); chunks are created as they're accessed.
+        """
+        return FolderArchive(ArchiveType.Folder, ChunkList(table))
+
+    def table(self) -> ChunkTable:
+        """
+        Gets the chunk headers as a table; allowing chunks to be filtered or summarized without a loop over them.
+        """
+        if isinstance(self.chunks, ChunkList) and self.chunks.table is not None:
+            return self.chunks.table
+        return ChunkTable.from_chunks(self.chunks)
+
+    def _unloaded(self, filters: Optional[Iterable[ChunkType]]) -> Iterable[int]:
+        # The indices of the SparseChunks to load
+        if isinstance(self.chunks, ChunkList):
+            return self.chunks.unloaded(filters).tolist()
+        if filters is not None:
+            filters = set(filters)
+        return [i for i, chunk in enumerate(self.chunks)
+                if isinstance(chunk, SparseChunk) and (filters is None or chunk.header.type in filters)]
+
+    def _peek(self, index: int) -> BaseChunk:
+        # Gets a chunk without keeping it; see ChunkList.peek
+        return self.chunks.peek(index) if isinstance(self.chunks, ChunkList) else self.chunks[index]
+
     def write(self, stream: BinaryIO) -> int:
         written = 0
         written += self.type.write(stream)
         for chunk in self.chunks:
-            chunk_size = 0
-            chunk_size += chunk.header.write(stream)
-            if chunk.header.type != ChunkType.EOF:
-                chunk_size += chunk.write(stream)
-                chunk.header.overwrite_length(stream, chunk_size)
-            written += chunk_size
+            written += self.write_chunk(stream, chunk)
         return written
 
-    def load_chunk_by_chunk(self, stream: BinaryIO, filters: List[ChunkType] = None) -> Iterable[BaseChunk]:
-        for chunk in self.chunks:
-            loaded = False
-            if filters is None or chunk.header.type in filters:
-                if isinstance(chunk, SparseChunk):
-                    loaded = True
-                    yield chunk.load(stream)
-            if not loaded:
+    @staticmethod
+    def write_chunk(stream: BinaryIO, chunk: BaseChunk) -> int:
+        """
+        Writes a chunk (header included), fixing the length in its header; allows writing an archive a chunk at a time.
+        """
+        chunk_size = 0
+        chunk_size += chunk.header.write(stream)
+        if chunk.header.type != ChunkType.EOF:
+            chunk_size += chunk.write(stream)
+            chunk.header.overwrite_length(stream, chunk_size)
+        return chunk_size
+
+    def load_chunk_by_chunk(self, stream: BinaryIO, filters: List[ChunkType] = None,
+                            buffer: Buffer = None) -> Iterable[BaseChunk]:
+        """
+        Loads unread chunks one at a time, without keeping them.
+        :param stream: A IO-like object, File/BinaryIO
+        :param filters: A list of chunk types to load, None will load all chunks.
+        :param buffer: The archive's contents (i.e. the stream mapped by map_stream); when given, chunks are read from it in place instead of the stream.
+        """
+        selected = set(self._unloaded(filters))
+        for i in range(len(self.chunks)):
+            chunk = self._peek(i)
+            if i in selected:
+                yield chunk.load(stream) if buffer is None else chunk.load_from_buffer(buffer)
+            else:
                 yield chunk
 
-    def load(self, stream: BinaryIO, filters: List[ChunkType] = None) -> bool:
+    def load(self, stream: BinaryIO, filters: List[ChunkType] = None, buffer: Buffer = None) -> bool:
         """
         Loads all unread chunks. This is required before writing, editing or reading the chunk contents. This does not affect the chunk header.
         :param stream: A IO-like object, File/BinaryIO
         :param filters: A list of chunk types to load, None will load all chunks. To force no chunks to be loaded, use [] instead
+        :param buffer: The archive's contents (i.e. the stream mapped by map_stream); when given, chunks are read from it in place instead of the stream.
         :return True if any chunks were loaded
         """
         loaded = False
         if filters is not None and len(filters) == 0:
             return loaded
-        for i, chunk in enumerate(self.chunks):
-            if filters is None or chunk.header.type in filters:
-                if isinstance(chunk, SparseChunk):
-                    self.chunks[i] = chunk.load(stream)
-                    loaded = True
+        for i in self._unloaded(filters):
+            chunk = self._peek(i)
+            self.chunks[i] = chunk.load(stream) if buffer is None else chunk.load_from_buffer(buffer)
+            loaded = True
+        return loaded
+
+    def iter_parallel(self, stream: BinaryIO, filters: List[ChunkType] = None, buffer: Buffer = None,
+                      executor: Executor = None, max_workers: int = None,
+                      window: int = DEFAULT_PARSE_WINDOW) -> Iterator[BaseChunk]:
+        """
+        Loads unread chunks like load_chunk_by_chunk, but parses them concurrently; chunks are still yielded in order.
+
+        Bodies are read by position (see PositionalReader), so the stream's position isn't shared between chunks.
+        :param stream: A IO-like object, File/BinaryIO
+        :param filters: A list of chunk types to load, None will load all chunks.
+        :param buffer: The archive's contents (i.e. the stream mapped by map_stream); when given, chunks are read from it in place instead of the stream.
+        :param executor: Parses the chunks; by default, a thread pool of max_workers threads, which is shut down when iterating stops. With a process pool, bodies are read in this thread, and parsed in the pool's processes.
+        :param max_workers: The size of the default thread pool; None uses ThreadPoolExecutor's default.
+        :param window: The number of chunks read (and parsed) ahead of the chunk being yielded.
+        """
+        for _, chunk in self._iter_parallel(stream, filters, buffer, executor, max_workers, window):
+            yield chunk
+
+    def _iter_parallel(self, stream: BinaryIO, filters: Optional[List[ChunkType]], buffer: Optional[Buffer],
+                       executor: Optional[Executor], max_workers: Optional[int],
+                       window: int) -> Iterator[Tuple[bool, BaseChunk]]:
+        # Yields each chunk, and whether it was loaded
+        selected = set(self._unloaded(filters))
+        owned = executor is None
+        if owned:
+            executor = ThreadPoolExecutor(max_workers, thread_name_prefix="asura-parse")
+        processes = isinstance(executor, ProcessPoolExecutor)
+        reader = PositionalReader(stream, buffer)
+        pending = deque()
+        try:
+            for i in range(len(self.chunks)):
+                chunk = self._peek(i)
+                if i in selected:
+                    if processes:
+                        data = reader.read_at(chunk.data_start, chunk.header.chunk_size)
+                        if len(data) != chunk.header.chunk_size:
+                            raise ParsingError(chunk.data_start + len(data))
+                        pending.append(executor.submit(parse_chunk, chunk.header, data, chunk.data_start))
+                    elif buffer is not None:
+                        pending.append(executor.submit(chunk.load_from_buffer, buffer))
+                    else:
+                        pending.append(executor.submit(chunk.load_at, reader))
+                else:
+                    pending.append(chunk)
+                # Unread chunks are yielded as soon as the chunks before them are
+                while pending and (len(pending) > window or not isinstance(pending[0], Future)):
+                    yield self._pop_result(pending)
+            while pending:
+                yield self._pop_result(pending)
+        finally:
+            for item in pending:
+                if isinstance(item, Future):
+                    item.cancel()
+            if owned:
+                executor.shutdown(wait=True)
+
+    @staticmethod
+    def _pop_result(pending: deque) -> Tuple[bool, BaseChunk]:
+        item = pending.popleft()
+        return (True, item.result()) if isinstance(item, Future) else (False, item)
+
+    def load_parallel(self, stream: BinaryIO, filters: List[ChunkType] = None, buffer: Buffer = None,
+                      executor: Executor = None, max_workers: int = None) -> bool:
+        """
+        Loads all unread chunks like load, but parses them concurrently; see iter_parallel.
+        :return True if any chunks were loaded
+        """
+        if filters is not None and len(filters) == 0:
+            return False
+        loaded = False
+        for i, (was_loaded, chunk) in enumerate(self._iter_parallel(stream, filters, buffer, executor, max_workers,
+                                                                    DEFAULT_PARSE_WINDOW)):
+            if was_loaded:
+                self.chunks[i] = chunk
+                loaded = True
         return loaded
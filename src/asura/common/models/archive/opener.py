@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from tempfile import TemporaryFile
+from typing import BinaryIO, Iterator, Tuple
+
+from asura.common.enums import ArchiveType
+from asura.common.models.archive.zbb import ZbbArchive
+
+
+@contextmanager
+def open_folder(path: str) -> Iterator[Tuple[ArchiveType, BinaryIO]]:
+    """
+    Opens a Folder or Zbb archive for reading its folder archive; Zbb archives are decompressed to a temporary file,
+    which is removed on exit.
+
+    :param path: The path to the archive.
+    :return: The type of the archive on disk, and the (decompressed) folder archive, positioned after its archive type.
+    :raises ParsingError: raised when the file doesn't start with an archive type, or a Zbb block is truncated.
+    :raises NotImplementedError: raised when the file isn't a Folder archive, or a Zbb archive holding one.
+    """
+    stream = open(path, "rb")
+    try:
+        type = ArchiveType.read(stream)
+        if type == ArchiveType.Zbb:
+            archive = ZbbArchive.read(stream, type)
+            decompressed = TemporaryFile()
+            try:
+                archive.decompress_to_stream(stream, decompressed)
+            except BaseException:
+                decompressed.close()
+                raise
+            # The compressed archive isn't needed once decompressed
+            stream.close()
+            stream = decompressed
+            stream.seek(0)
+            if ArchiveType.read(stream) != ArchiveType.Folder:
+                raise NotImplementedError(f"Not Supported ~ {path}")
+        elif type != ArchiveType.Folder:
+            raise NotImplementedError(f"Not Supported ~ {type}")
+        yield type, stream
+    finally:
+        stream.close()
@@ -0,0 +1,368 @@
+from collections.abc import MutableSequence
+from dataclasses import dataclass
+from struct import Struct
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from asura.common.enums import ChunkType
+from asura.common.error import ParsingError
+from asura.common.mio import Buffer, map_stream
+from asura.common.models.chunks import BaseChunk, ChunkHeader, SparseChunk, EofChunk
+
+# Type, length, version, reserved; the type and reserved word are kept as raw (little endian) integers
+_HEADER_LAYOUT = Struct("< I I I I")
+_EOF_CODE = int.from_bytes(ChunkType.EOF.encode(), "little")
+_ARCHIVE_TYPE_SIZE = 8
+# Chunk type code -> Chunk type; shared by every table
+_TYPES: Dict[int, ChunkType] = {}
+
+Indices = Union[np.ndarray, Sequence[int]]
+
+
+def type_code(type: ChunkType) -> int:
+    """
+    Gets the code a chunk type is stored as; its 4 bytes read as a little endian integer.
+    """
+    return int.from_bytes(type.encode(), "little")
+
+
+def type_from_code(code: int) -> ChunkType:
+    type = _TYPES.get(code)
+    if type is None:
+        type = _TYPES[code] = ChunkType.decode(int(code).to_bytes(4, "little"))
+    return type
+
+
+@dataclass(eq=False)
+class ChunkTable:
+    """
+    The chunk headers of an archive, kept as columns rather than objects; chunks are only created when accessed.
+
+    Rows are in archive order, and match FolderArchive.chunks (the EOF chunk included).
+    """
+    # The position of each chunk's body (after the header); -1 for the EOF chunk, or chunks which weren't read sparse
+    offsets: np.ndarray
+    # Header lengths (the size of the chunk, header included); 0 for the EOF chunk
+    lengths: np.ndarray
+    versions: np.ndarray
+    reserved: np.ndarray
+    type_codes: np.ndarray
+
+    @classmethod
+    def _from_rows(cls, rows: List[int]) -> 'ChunkTable':
+        # Rows are flattened as offset, type, length, version, reserved
+        columns = np.array(rows, dtype=np.int64).reshape(-1, 5)
+        return cls(columns[:, 0].copy(),
+                   columns[:, 2].astype(np.uint32),
+                   columns[:, 3].astype(np.uint32),
+                   columns[:, 4].astype(np.uint32),
+                   columns[:, 1].astype(np.uint32))
+
+    @classmethod
+    def _scan(cls, buffer: Buffer, offset: int) -> Tuple['ChunkTable', int]:
+        rows = []
+        size = len(buffer)
+        unpack_from = _HEADER_LAYOUT.unpack_from
+        while True:
+            if offset + 4 > size:
+                raise ParsingError(size)
+            if buffer[offset:offset + 4] == b"\0\0\0\0":
+                rows.extend((-1, _EOF_CODE, 0, 0, 0))
+                return cls._from_rows(rows), offset + 4
+            if offset + _HEADER_LAYOUT.size > size:
+                raise ParsingError(size)
+            code, length, version, reserved = unpack_from(buffer, offset)
+            if length < _HEADER_LAYOUT.size:
+                raise ParsingError(offset + 4)
+            rows.extend((offset + _HEADER_LAYOUT.size, code, length, version, reserved))
+            offset += length
+
+    @classmethod
+    def read_buffer(cls, buffer: Buffer, offset: int = _ARCHIVE_TYPE_SIZE) -> 'ChunkTable':
+        """
+        Reads the chunk headers of a folder archive held in a buffer, i.e. a mapped file (see map_stream).
+
+        :param buffer: The archive.
+        :param offset: The position of the first chunk; by default, just after the archive type.
+        :return: The table.
+        :raises ParsingError: raised when the archive ends before its EOF chunk.
+        """
+        return cls._scan(buffer, offset)[0]
+
+    @classmethod
+    def read(cls, stream: BinaryIO) -> 'ChunkTable':
+        """
+        Reads the chunk headers of a folder archive, starting from the stream's position (after the archive type).
+
+        Files are mapped; other streams are read a header at a time. The stream is left after the EOF chunk.
+
+        :param stream: The archive.
+        :return: The table.
+        :raises ParsingError: raised when the archive ends before its EOF chunk.
+        """
+        start = stream.tell()
+        with map_stream(stream) as mapped:
+            if mapped is not None:
+                table, end = cls._scan(mapped, start)
+                stream.seek(end)
+                return table
+        rows = []
+        offset = start
+        while True:
+            stream.seek(offset)
+            header = stream.read(_HEADER_LAYOUT.size)
+            if header[:4] == b"\0\0\0\0":
+                rows.extend((-1, _EOF_CODE, 0, 0, 0))
+                stream.seek(offset + 4)
+                break
+            if len(header) != _HEADER_LAYOUT.size:
+                raise ParsingError(offset + len(header))
+            code, length, version, reserved = _HEADER_LAYOUT.unpack(header)
+            if length < _HEADER_LAYOUT.size:
+                raise ParsingError(offset + 4)
+            rows.extend((offset + _HEADER_LAYOUT.size, code, length, version, reserved))
+            offset += length
+        return cls._from_rows(rows)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[BaseChunk]) -> 'ChunkTable':
+        """
+        Creates a table from chunks; i.e. FolderArchive.chunks.
+
+        Only sparse chunks know their offset; other chunks are given an offset of -1.
+        """
+        rows = []
+        for chunk in chunks:
+            header = chunk.header
+            offset = chunk.data_start if isinstance(chunk, SparseChunk) else -1
+            if header.type == ChunkType.EOF:
+                rows.extend((offset, _EOF_CODE, 0, 0, 0))
+            else:
+                reserved = int.from_bytes(header.reserved, "little")
+                rows.extend((offset, type_code(header.type), header.length, header.version, reserved))
+        return cls._from_rows(rows)
+
+    @classmethod
+    def concatenate(cls, tables: Iterable['ChunkTable']) -> 'ChunkTable':
+        """
+        Joins tables; i.e. to gather stats over many archives. Offsets are kept, so they're only meaningful per archive.
+        """
+        tables = list(tables)
+        if len(tables) == 0:
+            return cls._from_rows([])
+        columns = zip(*(table._columns() for table in tables))
+        return cls(*(np.concatenate(column) for column in columns))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChunkTable):
+            return NotImplemented
+        return all(np.array_equal(a, b) for a, b in zip(self._columns(), other._columns()))
+
+    def _columns(self) -> List[np.ndarray]:
+        return [self.offsets, self.lengths, self.versions, self.reserved, self.type_codes]
+
+    @property
+    def chunk_sizes(self) -> np.ndarray:
+        """
+        The size of each chunk's body; see ChunkHeader.chunk_size.
+        """
+        sizes = self.lengths.astype(np.int64) - _HEADER_LAYOUT.size
+        return np.maximum(sizes, 0)
+
+    @property
+    def types(self) -> List[ChunkType]:
+        """
+        The distinct chunk types in the table.
+        """
+        return [type_from_code(code) for code in np.unique(self.type_codes)]
+
+    def type_mask(self, types: Iterable[ChunkType]) -> np.ndarray:
+        codes = np.array([type_code(type) for type in types], dtype=np.uint32)
+        return np.isin(self.type_codes, codes)
+
+    def select(self, types: Iterable[ChunkType] = None, min_size: int = None, max_size: int = None,
+               start: int = None, end: int = None) -> np.ndarray:
+        """
+        Finds the rows matching every given filter.
+
+        :param types: Chunk types to keep; None keeps every type.
+        :param min_size: The smallest body size to keep (inclusive).
+        :param max_size: The largest body size to keep (inclusive).
+        :param start: The first body offset to keep (inclusive).
+        :param end: The last body offset to keep (exclusive).
+        :return: The indices of the matching rows, in archive order.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if types is not None:
+            mask &= self.type_mask(types)
+        if min_size is not None or max_size is not None:
+            sizes = self.chunk_sizes
+            if min_size is not None:
+                mask &= sizes >= min_size
+            if max_size is not None:
+                mask &= sizes <= max_size
+        if start is not None:
+            mask &= self.offsets >= start
+        if end is not None:
+            mask &= self.offsets < end
+        return np.flatnonzero(mask)
+
+    def subset(self, indices: Indices) -> 'ChunkTable':
+        indices = np.asarray(indices, dtype=np.intp)
+        return ChunkTable(*(column[indices] for column in self._columns()))
+
+    def _group(self, weights: Optional[np.ndarray]) -> Dict[ChunkType, int]:
+        codes, inverse = np.unique(self.type_codes, return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=weights, minlength=len(codes))
+        return {type_from_code(code): int(total) for code, total in zip(codes, totals)}
+
+    def bytes_per_type(self) -> Dict[ChunkType, int]:
+        """
+        Sums the body sizes of each chunk type.
+        """
+        return self._group(self.chunk_sizes)
+
+    def count_per_type(self) -> Dict[ChunkType, int]:
+        return self._group(None)
+
+    def header(self, index: int) -> ChunkHeader:
+        type = type_from_code(self.type_codes[index])
+        if type == ChunkType.EOF:
+            return ChunkHeader(type)
+        reserved = int(self.reserved[index]).to_bytes(4, "little")
+        return ChunkHeader(type, int(self.lengths[index]), int(self.versions[index]), reserved)
+
+    def chunk(self, index: int) -> BaseChunk:
+        """
+        Creates a chunk from a row; a SparseChunk which can then be loaded, or an EofChunk.
+        """
+        header = self.header(index)
+        if header.type == ChunkType.EOF:
+            return EofChunk(header)
+        return SparseChunk(header, int(self.offsets[index]))
+
+    def chunks(self, indices: Indices = None) -> Iterator[BaseChunk]:
+        """
+        Creates the chunks of the given rows (all rows if None), one at a time.
+        """
+        if indices is None:
+            indices = range(len(self))
+        for index in indices:
+            yield self.chunk(index)
+
+
+class ChunkList(MutableSequence):
+    """
+    The chunks of a folder archive, backed by its ChunkTable; a chunk is only created when it's accessed, and then
+    kept, so loading it in place (i.e. chunks[i] = chunk.load(stream)) works like it would on a list.
+
+    Chunks still to be loaded are found from the table (see unloaded), without creating every chunk. Inserting or
+    removing chunks creates every chunk, and the table is dropped.
+    """
+    __slots__ = ("_table", "_created", "_replaced", "_list")
+
+    def __init__(self, table: ChunkTable):
+        # None once chunks were inserted or removed; the list is then the whole archive
+        self._table: Optional[ChunkTable] = table
+        # Row -> the chunk created for it, or set in its place
+        self._created: Dict[int, BaseChunk] = {}
+        # Rows whose chunk was set, rather than created from the table
+        self._replaced = False
+        self._list: Optional[List[BaseChunk]] = None
+
+    @property
+    def table(self) -> Optional[ChunkTable]:
+        """
+        The table the chunks were created from; None once a chunk was set, inserted or removed.
+        """
+        return None if self._replaced or self._list is not None else self._table
+
+    def _row(self, index: int) -> int:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("chunk index out of range")
+        return index
+
+    def peek(self, index: int) -> BaseChunk:
+        """
+        Gets a chunk like chunks[index], but doesn't keep a chunk it had to create.
+        """
+        if self._list is not None:
+            return self._list[index]
+        index = self._row(index)
+        chunk = self._created.get(index)
+        return self._table.chunk(index) if chunk is None else chunk
+
+    def unloaded(self, types: Iterable[ChunkType] = None) -> np.ndarray:
+        """
+        Finds the chunks still to be loaded (SparseChunks), optionally of some types.
+
+        :param types: Chunk types to keep; None keeps every type.
+        :return: Their indices, in archive order.
+        """
+        types = None if types is None else set(types)
+
+        def wanted(chunk: BaseChunk) -> bool:
+            return isinstance(chunk, SparseChunk) and (types is None or chunk.header.type in types)
+
+        if self._list is not None:
+            return np.array([i for i, chunk in enumerate(self._list) if wanted(chunk)], dtype=np.intp)
+        # Only sparse rows have an offset; the EOF chunk doesn't
+        rows = self._table.select(types=types, start=0)
+        if self._created:
+            kept = [row for row, chunk in self._created.items() if wanted(chunk)]
+            dropped = [row for row, chunk in self._created.items() if not wanted(chunk)]
+            rows = np.union1d(np.setdiff1d(rows, dropped), np.array(kept, dtype=np.intp))
+        return rows.astype(np.intp)
+
+    def _detach(self) -> List[BaseChunk]:
+        if self._list is None:
+            self._list = list(self)
+            self._table = None
+            self._created = {}
+        return self._list
+
+    def __len__(self) -> int:
+        return len(self._table) if self._list is None else len(self._list)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[BaseChunk, List[BaseChunk]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if self._list is not None:
+            return self._list[index]
+        index = self._row(index)
+        chunk = self._created.get(index)
+        if chunk is None:
+            chunk = self._created[index] = self._table.chunk(index)
+        return chunk
+
+    def __setitem__(self, index: Union[int, slice], value):
+        if isinstance(index, slice) or self._list is not None:
+            self._detach()[index] = value
+            return
+        self._created[self._row(index)] = value
+        self._replaced = True
+
+    def __delitem__(self, index: Union[int, slice]):
+        del self._detach()[index]
+
+    def insert(self, index: int, value: BaseChunk):
+        self._detach().insert(index, value)
+
+    def __iter__(self) -> Iterator[BaseChunk]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (list, ChunkList)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
@@ -0,0 +1,44 @@
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.models.archive import ChunkTable, FolderArchive, ZbbArchive, open_folder
+from asura.common.models.chunks import ChunkHeader, EofChunk, RawChunk
+
+
+def test_open_folder():
+    chunks = [RawChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), bytes(100)),
+              EofChunk(ChunkHeader(ChunkType.EOF))]
+    with BytesIO() as stream:
+        FolderArchive(ArchiveType.Folder, chunks).write(stream)
+        data = stream.getvalue()
+    with TemporaryDirectory() as root:
+        folder = join(root, "archive.asr")
+        with open(folder, "wb") as stream:
+            stream.write(data)
+        packed = join(root, "archive.zbb")
+        with open(packed, "wb") as stream:
+            ZbbArchive.compress_to_stream(BytesIO(data), stream)
+        for path, expected in [(folder, ArchiveType.Folder), (packed, ArchiveType.Zbb)]:
+            with open_folder(path) as (type, stream):
+                assert type == expected
+                assert stream.tell() == 8
+                assert len(ChunkTable.read(stream)) == 2
+            assert stream.closed
+
+        other = join(root, "archive.cmp")
+        with open(other, "wb") as stream:
+            stream.write(ArchiveType.Compressed.encode() + bytes(8))
+        with pytest.raises(NotImplementedError):
+            with open_folder(other):
+                pass
+        text = join(root, "text.txt")
+        with open(text, "wb") as stream:
+            stream.write(b"Not an archive")
+        with pytest.raises(ParsingError):
+            with open_folder(text):
+                pass
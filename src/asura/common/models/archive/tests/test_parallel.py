@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from os import walk
+from os.path import join, relpath
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.factories import initialize_factories
+from asura.common.mio import PositionalReader, map_stream
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import ChunkHeader, SparseChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.packer.tests.archive_helpers import write_archive
+from asura.packer.unpacker import UnpackOptions, unpack_directory
+
+RESOURCES = [ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, f"textures\\{i}.dds",
+                           data=bytes([i]) * (i * 100)) for i in range(1, 21)]
+
+
+def read_archive(path: str) -> FolderArchive:
+    with open(path, "rb") as stream:
+        return FolderArchive.read(stream, ArchiveType.read(stream))
+
+
+def test_positional_reader():
+    data = bytes(range(256))
+    # Streams without a file are read under a lock
+    stream = BytesIO(data)
+    stream.seek(7)
+    reader = PositionalReader(stream)
+    assert reader.read_at(10, 5) == data[10:15]
+    assert reader.read_at(250, 10) == data[250:]
+    assert stream.tell() == 7
+    assert PositionalReader(BytesIO(), data).read_at(3, 2) == data[3:5]
+    with TemporaryDirectory() as root:
+        path = join(root, "data.bin")
+        with open(path, "wb") as stream:
+            stream.write(data)
+        with open(path, "rb") as stream:
+            assert PositionalReader(stream).read_at(100, 3) == data[100:103]
+            assert stream.tell() == 0
+
+
+def test_iter_parallel():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        path = join(root, "furniture.asr")
+        write_archive(path, "furniture", RESOURCES)
+        archive = read_archive(path)
+        with open(path, "rb") as stream:
+            expected = list(archive.load_chunk_by_chunk(stream))
+            assert list(archive.iter_parallel(stream, max_workers=4, window=2)) == expected
+            with map_stream(stream) as mapped:
+                assert list(archive.iter_parallel(stream, buffer=mapped)) == expected
+            # Filtered chunks stay sparse, and in place
+            chunks = list(archive.iter_parallel(stream, [ChunkType.SOUND]))
+            assert [type(chunk) for chunk in chunks[:3]] == [SparseChunk, type(expected[1]), SparseChunk]
+            assert chunks[-1] == expected[-1]
+            # Chunks parsed in other processes
+            with ProcessPoolExecutor(2) as executor:
+                assert archive.load_parallel(stream, executor=executor)
+        assert archive.chunks == expected
+
+
+def test_unpack_parallel():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        write_archive(join(game_dir, "furniture.asr"), "furniture", RESOURCES)
+        outputs = []
+        for i, workers in enumerate([None, 4]):
+            options = UnpackOptions(output_directory=join(root, f"unpack {i}"), parse_workers=workers)
+            unpack_directory(game_dir, options)
+            files = {}
+            for directory, _, names in walk(options.create_path()):
+                for name in names:
+                    with open(join(directory, name), "rb") as file:
+                        files[relpath(join(directory, name), options.create_path())] = file.read()
+            outputs.append(files)
+        assert len(outputs[0]) > len(RESOURCES)
+        assert outputs[0] == outputs[1]
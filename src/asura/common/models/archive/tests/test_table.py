@@ -0,0 +1,109 @@
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.models.archive import ChunkTable, ChunkList, FolderArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk, RawChunk, SparseChunk
+
+XRAW = ChunkType.get_enum_from_value("XRAW")
+
+
+def create_archive() -> bytes:
+    chunks = [
+        RawChunk(ChunkHeader(XRAW, 0, 1, bytes(4)), bytes(10)),
+        RawChunk(ChunkHeader(ChunkType.RESOURCE, 0, 2, b"\1\2\3\4"), bytes(100)),
+        RawChunk(ChunkHeader(XRAW, 0, 3, bytes(4)), bytes(30)),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ]
+    with BytesIO() as stream:
+        FolderArchive(ArchiveType.Folder, chunks).write(stream)
+        return stream.getvalue()
+
+
+def read_both(data: bytes):
+    with BytesIO(data) as stream:
+        archive = FolderArchive.read(stream)
+        stream.seek(8)
+        table = ChunkTable.read(stream)
+        assert stream.tell() == len(data)
+    return archive, table
+
+
+def test_table_matches_archive():
+    archive, table = read_both(create_archive())
+    assert len(table) == len(archive.chunks)
+    assert list(table.chunks()) == archive.chunks
+    assert table == archive.table()
+    assert FolderArchive.from_table(table) == archive
+    assert table == ChunkTable.read_buffer(create_archive())
+
+
+def test_mapped_table():
+    data = create_archive()
+    with TemporaryDirectory() as root:
+        path = join(root, "archive.asr")
+        with open(path, "wb") as file:
+            file.write(data)
+        with open(path, "rb") as stream:
+            ArchiveType.read(stream)
+            mapped = ChunkTable.read(stream)
+            assert stream.tell() == len(data)
+    assert mapped == read_both(data)[1]
+
+
+def test_select_and_stats():
+    _, table = read_both(create_archive())
+    assert table.select(types=[XRAW]).tolist() == [0, 2]
+    assert table.select(min_size=20).tolist() == [1, 2]
+    assert table.select(types=[XRAW], max_size=20).tolist() == [0]
+    assert table.select(start=int(table.offsets[1])).tolist() == [1, 2]
+    assert table.select(start=0, end=int(table.offsets[1])).tolist() == [0]
+    assert table.bytes_per_type() == {ChunkType.EOF: 0, XRAW: 40, ChunkType.RESOURCE: 100}
+    assert table.count_per_type() == {ChunkType.EOF: 1, XRAW: 2, ChunkType.RESOURCE: 1}
+    chunk = table.subset(table.select(types=[ChunkType.RESOURCE])).chunk(0)
+    assert isinstance(chunk, SparseChunk)
+    assert chunk.header == ChunkHeader(ChunkType.RESOURCE, 116, 2, b"\1\2\3\4")
+    both = ChunkTable.concatenate([table, table])
+    assert both.bytes_per_type()[XRAW] == 80
+
+
+def test_truncated_table():
+    data = create_archive()
+    with pytest.raises(ParsingError):
+        ChunkTable.read_buffer(data[:-4])
+    with BytesIO(data[:-4]) as stream:
+        stream.seek(8)
+        with pytest.raises(ParsingError):
+            ChunkTable.read(stream)
+
+
+def test_chunks_are_created_on_access():
+    data = create_archive()
+    with BytesIO(data) as stream:
+        archive = FolderArchive.read(stream)
+        chunks = archive.chunks
+        assert isinstance(chunks, ChunkList)
+        assert archive.table() is chunks.table
+        assert chunks.unloaded().tolist() == [0, 1, 2]
+        assert chunks.unloaded([XRAW]).tolist() == [0, 2]
+        # Peeking doesn't keep the chunk; indexing does
+        assert chunks.peek(1) is not chunks.peek(1)
+        assert chunks[-1] is chunks[3]
+
+        assert archive.load(stream, [XRAW])
+        assert isinstance(chunks[2], RawChunk) and chunks[2].data == bytes(30)
+        assert isinstance(chunks[1], SparseChunk)
+        assert chunks.unloaded().tolist() == [1]
+        # Loaded chunks aren't described by the table any more
+        assert chunks.table is None
+        assert archive.table().offsets.tolist()[:2] == [-1, 50]
+
+        chunks.insert(0, RawChunk(ChunkHeader(XRAW, 0, 4, bytes(4)), bytes(5)))
+        del chunks[1]
+        assert [chunk.header.version for chunk in chunks[:3]] == [4, 2, 3]
+        assert chunks.unloaded().tolist() == [1]
+        assert len(chunks) == 4
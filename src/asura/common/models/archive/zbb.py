@@ -1,9 +1,16 @@
 # Compressed archives are pretty big; because of that ZbbArchive is mostly for reading meta information, or constructing the underlying archive
-from dataclasses import dataclass
+import zlib
+from bisect import bisect_right
+from dataclasses import dataclass, field
 from io import BytesIO
-from typing import BinaryIO, List, Callable
+from itertools import accumulate
+from time import perf_counter
+from typing import BinaryIO, List, Callable, Hashable
 
+from asura.common.cache import BlockCache
+from asura.common.compression import CompressionPolicy, BlockStats
 from asura.common.enums import ArchiveType
+from asura.common.error import ParsingError
 from asura.common.mio import AsuraIO, ZLibIO
 from asura.common.models.archive import BaseArchive
 from asura.common.factories import ArchiveParser
@@ -14,6 +21,8 @@ class ZbbBlock:
     size: int = None
     compressed_size: int = None
     _start: int = None
+    # Set on blocks which were compressed (not read)
+    stats: BlockStats = field(default=None, compare=False, repr=False)
 
     @classmethod
     def read(cls, stream: BinaryIO) -> 'ZbbBlock':
@@ -49,16 +58,44 @@ class ZbbBlock:
                 in_stream.seek(self._start)
                 with ZLibIO(in_stream) as decompressor:
                     decompressed_size = decompressor.decompress(out_stream, self.compressed_size)
-                    assert self.size == decompressed_size
+                    if decompressed_size != self.size:
+                        # Truncated, or corrupt
+                        raise ParsingError(self._start + self.compressed_size)
                     return decompressed_size
 
+    def decompress(self, in_stream: BinaryIO) -> bytes:
+        """
+        Decompresses the block on its own; each block is an independent zlib stream.
+        """
+        in_stream.seek(self._start)
+        decompressor = zlib.decompressobj(wbits=ZLibIO.BLOCK_4)
+        data = decompressor.decompress(in_stream.read(self.compressed_size)) + decompressor.flush()
+        if len(data) != self.size:
+            raise ParsingError(self._start + self.compressed_size)
+        return data
+
     @classmethod
-    def compress_to_stream(cls, in_stream: BinaryIO, out_stream: BinaryIO, size: int) -> 'ZbbBlock':
+    def compress_to_stream(cls, in_stream: BinaryIO, out_stream: BinaryIO, size: int,
+                           policy: CompressionPolicy = None) -> 'ZbbBlock':
+        """
+        Compresses a block as an independent zlib stream.
+
+        :param policy: Picks the block's level; by default, zlib's default level.
+        :raises ParsingError: raised when the stream ends before the block does.
+        """
+        start = in_stream.tell()
+        data = in_stream.read(size)
+        if len(data) != size:
+            raise ParsingError(start + len(data))
+        started = perf_counter()
+        level, sample_ratio = (policy or CompressionPolicy()).choose_level(data)
         block = ZbbBlock.write_start(out_stream, size)
-        with ZLibIO(out_stream) as compressor:
-            compressed_size, _ = compressor.compress_block(in_stream, size, True)
-            block.write_stop(out_stream)
-            assert compressed_size == block.compressed_size, (compressed_size, block.compressed_size)
+        compressor = zlib.compressobj(level, wbits=ZLibIO.BLOCK_4)
+        compressed_size = out_stream.write(compressor.compress(data))
+        compressed_size += out_stream.write(compressor.flush())
+        block.write_stop(out_stream)
+        assert compressed_size == block.compressed_size, (compressed_size, block.compressed_size)
+        block.stats = BlockStats(size, compressed_size, level, sample_ratio, perf_counter() - started)
         return block
 
 
@@ -113,6 +150,44 @@ class ZbbArchive(BaseArchive):
                     decompressed_size_total += chunk.decompress_to_stream(in_stream, out_stream)
                 assert decompressed_size_total == self.size, (decompressed_size_total, self.size)
 
+    def block_offsets(self) -> List[int]:
+        """
+        Gets the position of each block in the decompressed archive.
+        """
+        offsets = getattr(self, "_offsets", None)
+        if offsets is None or len(offsets) != len(self.blocks):
+            offsets = self._offsets = [0] + list(accumulate(block.size for block in self.blocks))[:-1]
+        return offsets
+
+    def read_range(self, in_stream: BinaryIO, offset: int, size: int, cache: BlockCache = None,
+                   key: Hashable = None) -> bytes:
+        """
+        Reads part of the decompressed archive, only decompressing the blocks it overlaps.
+
+        :param in_stream: The compressed archive's stream.
+        :param offset: The position to read from, in the decompressed archive.
+        :param size: The number of bytes to read; fewer are returned at the end of the archive.
+        :param cache: Keeps decompressed blocks; blocks are cached as (key, block index).
+        :param key: Identifies the archive in the cache, i.e. its path; required when the cache is shared.
+        :return: The decompressed bytes.
+        """
+        offsets = self.block_offsets()
+        end = min(offset + size, self.size)
+        parts = []
+        index = max(bisect_right(offsets, offset) - 1, 0)
+        with AsuraIO(in_stream) as t:
+            with t.bookmark():
+                while index < len(self.blocks) and offsets[index] < end:
+                    block_start = offsets[index]
+                    block = self.blocks[index]
+                    if cache is None:
+                        data = block.decompress(in_stream)
+                    else:
+                        data = cache.get((key, index), lambda: block.decompress(in_stream))
+                    parts.append(data[max(offset - block_start, 0):end - block_start])
+                    index += 1
+        return b"".join(parts)
+
     def decompress(self, in_stream: BinaryIO) -> 'BaseArchive':
         from asura.common.factories import ArchiveParser
         with BytesIO() as temp_stream:
@@ -120,19 +195,37 @@ class ZbbArchive(BaseArchive):
             temp_stream.seek(0)
             return ArchiveParser.parse(temp_stream, sparse=False)
 
+    @property
+    def block_stats(self) -> List[BlockStats]:
+        """
+        Gets the size, ratio and throughput of each block; only set on archives which were compressed (not read).
+        """
+        return [block.stats for block in self.blocks]
+
     @staticmethod
     def compress_to_stream(in_stream: BinaryIO, out_stream: BinaryIO, *,
-                           callback: Callable[[int, int], None] = None) -> 'ZbbArchive':
+                           callback: Callable[[int, int], None] = None,
+                           policy: CompressionPolicy = None) -> 'ZbbArchive':
+        """
+        Compresses the rest of a stream into a Zbb archive.
+
+        :param callback: Called before each block is compressed, with the block's index and the number of blocks.
+        :param policy: The block size, and how each block's level is picked (see CompressionPolicy.preset); by
+            default, 2 MiB blocks at zlib's default level.
+        :return: The archive; see block_stats.
+        """
+        if policy is None:
+            policy = CompressionPolicy()
         with AsuraIO(in_stream) as reader:
             size = reader.get_length_remaining()
 
         archive = ZbbArchive.write_start(out_stream, size)
         compressed_size = 0
-        blocks = ZLibIO.block_count(size)
-        for i, block_size in enumerate(ZLibIO.block_iterator(size)):
+        blocks = ZLibIO.block_count(size, policy.block_size)
+        for i, block_size in enumerate(ZLibIO.block_iterator(size, policy.block_size)):
             if callback:
                 callback(i, blocks)
-            block = ZbbBlock.compress_to_stream(in_stream, out_stream, block_size)
+            block = ZbbBlock.compress_to_stream(in_stream, out_stream, block_size, policy)
             compressed_size += block.compressed_size + 8 # 8 bytes for block header
             archive.blocks.append(block)
         archive.write_stop(out_stream)
@@ -142,8 +235,9 @@ class ZbbArchive(BaseArchive):
 
     @classmethod
     def compress(cls, archive: 'BaseArchive', out_stream: BinaryIO, *,
-                 callback: Callable[[int, int], None] = None) -> 'ZbbArchive':
+                 callback: Callable[[int, int], None] = None,
+                 policy: CompressionPolicy = None) -> 'ZbbArchive':
         with BytesIO() as temp_stream:
             archive.write(temp_stream)
             temp_stream.seek(0)
-            return cls.compress_to_stream(temp_stream, out_stream, callback=callback)
+            return cls.compress_to_stream(temp_stream, out_stream, callback=callback, policy=policy)
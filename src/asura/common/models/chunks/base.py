@@ -2,8 +2,11 @@ from dataclasses import dataclass
 from typing import BinaryIO
 
 from asura.common.models.chunks import ChunkHeader
+from asura.common.models.slots import slotted
 
 
+# Slotted so that SparseChunk (of which there are many) can be; subclasses without slots are unaffected
+@slotted
 @dataclass
 class BaseChunk:
     header: ChunkHeader = None
@@ -11,5 +14,5 @@ class BaseChunk:
     def write(self, stream: BinaryIO) -> int:
         raise NotImplementedError(f"Write Is Not Implemented!\n\t{self}")
 
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         raise NotImplementedError(f"Unpack Is Not Implemented!\n\t{self}")
@@ -18,7 +18,7 @@ class EofChunk(BaseChunk):
         return file.write(ChunkType.EOF.encode())
 
     @ChunkUnpacker.register(ChunkType.EOF)
-    def unpack(self, chunk_path: str, overwrite=False) -> bool:
+    def unpack(self, chunk_path: str, overwrite=False, store=None) -> bool:
         return True
 
     @staticmethod
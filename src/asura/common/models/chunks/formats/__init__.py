@@ -1,36 +1,56 @@
 __all__ = [
     "FontInfoChunk",
-    "HTextChunk", "HString",
+    "HTextChunk", "HString", "HStringSpan", "HTextLayout",
 
-    "ResourceChunk",
+    "ResourceChunk", "ResourceSpan",
     "ResourceListChunk",    "ResourceDescription",
 
-    "SoundChunk",    "SoundClip",
+    "SoundChunk",    "SoundClip", "SoundClipSpan",
     "HsbbChunk",
     "HskeChunk",
-    "HsndChunk",
     "HsklChunk",
+    "HsndChunk",
     "HsknChunk",
     "HmptChunk","HmptBlock",
     "initialize_factories"
 ]
 
-from asura.common.models.chunks.formats.hmpt import HmptBlock, HmptChunk
-from asura.common.models.chunks.formats.hsbb import HsbbChunk
-from asura.common.models.chunks.formats.fnfo import FontInfoChunk
-from asura.common.models.chunks.formats.hske import HskeChunk
-from asura.common.models.chunks.formats.hskl import HsklChunk
-from asura.common.models.chunks.formats.hskn import HsknChunk
-from asura.common.models.chunks.formats.hsnd import HsndChunk
-from asura.common.models.chunks.formats.htxt import HString, HTextChunk
-from asura.common.models.chunks.formats.rscf import ResourceChunk
-from asura.common.models.chunks.formats.rsfl import ResourceListChunk, ResourceDescription
-from asura.common.models.chunks.formats.asts import SoundChunk, SoundClip
+from importlib import import_module
+
+# Format modules are imported on first use (see FormatRegistry), so importing the package stays cheap
+# name -> module
+_EXPORTS = {
+    "HmptBlock": "hmpt", "HmptChunk": "hmpt",
+    "HsbbChunk": "hsbb",
+    "FontInfoChunk": "fnfo",
+    "HskeChunk": "hske",
+    "HsklChunk": "hskl",
+    "HsknChunk": "hskn",
+    "HsndChunk": "hsnd",
+    "HString": "htxt", "HTextChunk": "htxt", "HStringSpan": "htxt", "HTextLayout": "htxt",
+    "ResourceChunk": "rscf", "ResourceSpan": "rscf",
+    "ResourceListChunk": "rsfl", "ResourceDescription": "rsfl",
+    "SoundChunk": "asts", "SoundClip": "asts", "SoundClipSpan": "asts",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 def initialize_factories():
     # This function does nothing;
     # it's just a function which our parser can call to initialize the factory
     # It can be used to ensure that child folders also initialize their factories
 
-    # The factory is initialized during import
-    pass
\ No newline at end of file
+    # Formats are registered on demand; see FormatRegistry.load_all to import every format up front
+    pass
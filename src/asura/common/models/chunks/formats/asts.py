@@ -1,18 +1,21 @@
 from dataclasses import dataclass
 from os.path import join, basename
-from typing import List, BinaryIO
+from sys import intern
+from typing import List, BinaryIO, Tuple
 
 # THESE FILES APPEAR TO BE MS-ADPCM
 # WAVE FORMAT CODES AREN'T PROPRIETARY, THEIR STANDARDIZED
 # BUT ITS STILL IMPOSSIBLE TO GOOGLE THEM
 # https://www.codeproject.com/Questions/143294/WAV-file-compression-format-codes
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import AsuraIO, PackIO, AsuraCursor
 from asura.common.models.chunks import ChunkHeader, BaseChunk
+from asura.common.models.slots import slotted
 from asura.common.factories.chunk_packer import ChunkRepacker, ChunkUnpacker
 from asura.common.factories.chunk_parser import ChunkReader
 
 
+@slotted
 @dataclass
 class SoundClip:
     name: str = None
@@ -32,13 +35,21 @@ class SoundClip:
     @classmethod
     def read_meta(cls, stream: BinaryIO) -> 'SoundClip':
         with AsuraIO(stream) as reader:
-            name = reader.read_utf8(padded=True)
+            name = intern(reader.read_utf8(padded=True))
             is_sparse = reader.read_bool()
             size = reader.read_int32()
             word = reader.read_word()
 
         return SoundClip(name, word, None, size, is_sparse)
 
+    @classmethod
+    def read_meta_cursor(cls, cursor: AsuraCursor) -> 'SoundClip':
+        name = intern(cursor.read_utf8(padded=True))
+        is_sparse = cursor.read_bool()
+        size = cursor.read_int32()
+        word = cursor.read_word()
+        return SoundClip(name, word, None, size, is_sparse)
+
     def read_data(self, stream: BinaryIO):
         self.data = stream.read(self._size_from_meta)
 
@@ -54,7 +65,7 @@ class SoundClip:
     def write_data(self, stream: BinaryIO) -> int:
         return 0 if self.is_sparse else stream.write(self.data)
 
-    def unpack(self, chunk_path: str, overwrite=False) -> bool:
+    def unpack(self, chunk_path: str, overwrite=False, store=None) -> bool:
         full_path = join(chunk_path, basename(self.name.lstrip("\\/")))
         meta = {
             "name": self.name,
@@ -65,17 +76,27 @@ class SoundClip:
         unpacked = False
         unpacked |= PackIO.write_meta(full_path, meta, overwrite)
         if not self.is_sparse:
-            unpacked |= PackIO.write_bytes(full_path, data, overwrite)
+            unpacked |= PackIO.write_payload(full_path, data, overwrite, store)
         return unpacked
 
     @classmethod
     def repack(cls, chunk_path: str, clip_path: str) -> 'SoundClip':
         meta = PackIO.read_meta(clip_path)
+        meta['reserved_b'] = bytes.fromhex(meta['reserved_b'])
         data = PackIO.read_bytes(clip_path)
 
         return SoundClip(data=data, **meta)
 
 
+@dataclass
+class SoundClipSpan:
+    name: str = None
+    is_sparse: bool = None
+    # Absolute position of the clip's data in the stream; None for sparse clips, whose data lives elsewhere
+    offset: int = None
+    size: int = None
+
+
 @dataclass
 class SoundChunk(BaseChunk):
     is_sparse: bool = None
@@ -98,6 +119,40 @@ class SoundChunk(BaseChunk):
 
         return SoundChunk(header, is_sparse, clips)
 
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.SOUND)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        size = cursor.read_int32()
+        is_sparse = cursor.read_bool()
+        clips = [SoundClip.read_meta_cursor(cursor) for _ in range(size)]
+        if not is_sparse:
+            for clip in clips:
+                clip.data = cursor.read(clip._size_from_meta)
+        return SoundChunk(header, is_sparse, clips)
+
+    @staticmethod
+    def scan(stream: BinaryIO) -> Tuple[bool, List[SoundClipSpan]]:
+        """
+        Finds where each clip's data is, without reading the data.
+
+        The stream is left at the end of the chunk.
+
+        :param stream: The stream, at the start of the chunk's body.
+        :return: Whether the chunk is sparse, and the clips' spans.
+        """
+        with AsuraIO(stream) as reader:
+            size = reader.read_int32()
+            is_sparse = reader.read_bool()
+            clips = [SoundClip.read_meta(stream) for _ in range(size)]
+        spans = []
+        offset = stream.tell()
+        for clip in clips:
+            spans.append(SoundClipSpan(clip.name, is_sparse, None if is_sparse else offset, clip.size))
+            if not is_sparse:
+                offset += clip.size
+        stream.seek(offset)
+        return is_sparse, spans
+
     def write(self, stream: BinaryIO) -> int:
         with AsuraIO(stream) as writer:
             with writer.byte_counter() as written:
@@ -111,7 +166,7 @@ class SoundChunk(BaseChunk):
         return written.length
 
     @ChunkUnpacker.register(ChunkType.SOUND)
-    def unpack(self, chunk_path: str, overwrite=False) -> bool:
+    def unpack(self, chunk_path: str, overwrite=False, store=None) -> bool:
         path = chunk_path + f".{self.header.type.value}"
         meta = {
             'header': self.header,
@@ -122,7 +177,7 @@ class SoundChunk(BaseChunk):
         unpacked |= PackIO.write_meta(path, meta, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
         for clip in self.clips:
-            unpacked |= clip.unpack(chunk_path, overwrite)
+            unpacked |= clip.unpack(path, overwrite, store)
         return unpacked
 
     @staticmethod
@@ -2,11 +2,12 @@ from dataclasses import dataclass
 from typing import BinaryIO
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
 from asura.common.factories import ChunkUnpacker
 from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.schema import Schema, Word
 
 
 @dataclass
@@ -14,23 +15,24 @@ class FontInfoChunk(BaseChunk):
     reserved: bytes = None
     data: bytes = None
 
+    def byte_size(self) -> int:
+        return FONT_INFO_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.FONT_INFO)
     def read(stream: BinaryIO, header: ChunkHeader = None) -> 'FontInfoChunk':
-        with AsuraIO(stream) as reader:
-            reserved = reader.read_word()
-            data = reader.read_word()
-            return FontInfoChunk(header, reserved, data)
+        return FONT_INFO_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.FONT_INFO)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None) -> 'FontInfoChunk':
+        return FONT_INFO_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_word(self.reserved)
-                writer.write_word(self.data)
-        return written.length
+        return FONT_INFO_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.FONT_INFO)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = {'reserved':self.reserved, 'data':self.data}
@@ -39,8 +41,12 @@ class FontInfoChunk(BaseChunk):
     @staticmethod
     @ChunkRepacker.register(ChunkType.FONT_INFO)
     def repack(chunk_path: str) -> 'FontInfoChunk':
-        meta, data = PackIO.read_meta_and_bytes(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta)
+        return FONT_INFO_SCHEMA.from_dict(data, header=header)
+
 
-        header = ChunkHeader.repack_from_dict(meta['header'])
-        del meta['header']
-        return FontInfoChunk(header, data=data, **meta)
+FONT_INFO_SCHEMA = Schema(FontInfoChunk, [
+    Word("reserved"),
+    Word("data"),
+])
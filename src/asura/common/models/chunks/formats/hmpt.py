@@ -2,12 +2,16 @@ from dataclasses import dataclass
 from typing import List, BinaryIO
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
+from asura.common.models.slots import slotted
 from asura.common.factories import ChunkUnpacker
+from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.schema import Schema, Bytes, Utf8, Count, Array
 
 
+@slotted
 @dataclass
 class HmptBlock:
     name: str
@@ -16,17 +20,14 @@ class HmptBlock:
 
     @classmethod
     def read(cls, stream: BinaryIO) -> 'HmptBlock':
-        with AsuraIO(stream) as reader:
-            data = reader.read(cls.DATA_SIZE)
-            name = reader.read_utf8(padded=True)
-        return HmptBlock(name, data)
+        return HMPT_BLOCK_SCHEMA.read(stream)
+
+    @classmethod
+    def read_cursor(cls, cursor: AsuraCursor) -> 'HmptBlock':
+        return HMPT_BLOCK_SCHEMA.read_cursor(cursor)
 
     def write(self, stream: BinaryIO) -> 'int':
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as counter:
-                writer.safe_write(self.data, self.DATA_SIZE)
-                writer.write_utf8(self.name, padded=True)
-            return counter.length
+        return HMPT_BLOCK_SCHEMA.write(stream, self)
 
 
 @dataclass
@@ -38,35 +39,43 @@ class HmptChunk(BaseChunk):
     def size(self):
         return len(self.blocks)
 
+    def byte_size(self) -> int:
+        return HMPT_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.HMPT)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            size = reader.read_int32()
-            name = reader.read_utf8(padded=True)
-            blocks = [HmptBlock.read(stream) for _ in range(size)]
-        return HmptChunk(header, name, blocks)
+        return HMPT_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.HMPT)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return HMPT_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_int32(self.size)
-                writer.write_utf8(self.name,padded=True)
-                for block in self.blocks:
-                    block.write(stream)
-        return written.length
+        return HMPT_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.HMPT)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = {'size': self.size, 'name': self.name, 'blocks': self.blocks}
         return PackIO.write_meta_and_json(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
-    # @classmethod
-    # def repack(cls, chunk_path: str) -> 'ResourceListChunk':
-    #     meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-    #     descriptions = [ResourceDescription(**desc) for desc in data]
-    #     header = ChunkHeader.repack_from_dict(meta)
-    #
-    #     return ResourceListChunk(header, descriptions=descriptions)
+    @staticmethod
+    @ChunkRepacker.register(ChunkType.HMPT)
+    def repack(chunk_path: str) -> 'HmptChunk':
+        meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta)
+        return HMPT_SCHEMA.from_dict(data, header=header)
+
+
+HMPT_BLOCK_SCHEMA = Schema(HmptBlock, [
+    Bytes("data", HmptBlock.DATA_SIZE),
+    Utf8("name", padded=True, interned=True),
+])
+HMPT_SCHEMA = Schema(HmptChunk, [
+    Count("size", of="blocks"),
+    Utf8("name", padded=True),
+    Array("blocks", HMPT_BLOCK_SCHEMA, count="size"),
+])
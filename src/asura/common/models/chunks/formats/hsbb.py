@@ -1,12 +1,19 @@
 from dataclasses import dataclass
 from typing import List, BinaryIO
 
+import numpy as np
+
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
+from asura.common.models.slots import slotted
 from asura.common.factories import ChunkUnpacker, ChunkReader
+from asura.common.factories.chunk_packer import ChunkRepacker
+from asura.common.records import as_records
+from asura.common.schema import Schema, Bytes, Int32, Utf8, Count, Array
 
 
+@slotted
 @dataclass
 class HsbbDesc:
     data: bytes = None
@@ -14,17 +21,10 @@ class HsbbDesc:
 
     @staticmethod
     def read(stream: BinaryIO):
-        with AsuraIO(stream) as reader:
-            data = reader.read(24)
-            one = reader.read_int32()
-        return HsbbDesc(data, one)
+        return HSBB_DESC_SCHEMA.read(stream)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write(self.data)
-                writer.write_int32(self.one)
-        return written.length
+        return HSBB_DESC_SCHEMA.write(stream, self)
 
 
 @dataclass
@@ -36,35 +36,51 @@ class HsbbChunk(BaseChunk):
     def size(self):
         return len(self.descriptions)
 
+    @property
+    def descriptions_array(self) -> np.ndarray:
+        """
+        The descriptions as a structured array ('data' and 'one' fields); a view of the chunk when it was read.
+        """
+        return as_records(HSBB_DESC_SCHEMA, self.descriptions).array
+
+    def byte_size(self) -> int:
+        return HSBB_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.HSBB)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            name = reader.read_utf8(padded=True)
-            size = reader.read_int32()
-            descriptions = [HsbbDesc.read(stream) for _ in range(size)]
-        return HsbbChunk(header, name, descriptions)
+        return HSBB_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.HSBB)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return HSBB_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_utf8(self.name, padded=True)
-                writer.write_int32(self.size)
-                for desc in self.descriptions:
-                    desc.write(stream)
-        return written.length
+        return HSBB_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.HSBB)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = {'header': self.header, 'name': self.name}
         data = self.descriptions
         return PackIO.write_meta_and_json(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
-    # @classmethod
-    # def repack(cls, chunk_path: str) -> 'ResourceListChunk':
-    #     meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-    #     descriptions = [ResourceDescription(**desc) for desc in data]
-    #     header = ChunkHeader.repack_from_dict(meta)
-    #
-    #     return ResourceListChunk(header, descriptions=descriptions)
+    @staticmethod
+    @ChunkRepacker.register(ChunkType.HSBB)
+    def repack(chunk_path: str) -> 'HsbbChunk':
+        meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta['header'])
+        descriptions = [HSBB_DESC_SCHEMA.from_dict(desc) for desc in data]
+        return HsbbChunk(header, meta['name'], descriptions)
+
+
+HSBB_DESC_SCHEMA = Schema(HsbbDesc, [
+    Bytes("data", 24),
+    Int32("one"),
+])
+HSBB_SCHEMA = Schema(HsbbChunk, [
+    Utf8("name", padded=True),
+    Count("size", of="descriptions"),
+    Array("descriptions", HSBB_DESC_SCHEMA, count="size", records=True),
+])
@@ -1,41 +1,50 @@
 from dataclasses import dataclass
-from typing import List, BinaryIO
+from typing import BinaryIO
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
 from asura.common.factories import ChunkUnpacker
+from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.schema import Schema, Word
 
 
 @dataclass
 class HskeChunk(BaseChunk):
     word: bytes = None
 
+    def byte_size(self) -> int:
+        return HSKE_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.HSKE)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            word = reader.read_word()
-        return HskeChunk(header, word)
+        return HSKE_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.HSKE)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return HSKE_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_word(self.word)
-        return written.length
+        return HSKE_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.HSKE)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = self.word
         return PackIO.write_meta_and_bytes(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
-    # @classmethod
-    # def repack(cls, chunk_path: str) -> 'ResourceListChunk':
-    #     meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-    #     descriptions = [ResourceDescription(**desc) for desc in data]
-    #     header = ChunkHeader.repack_from_dict(meta)
-    #
-    #     return ResourceListChunk(header, descriptions=descriptions)
+    @staticmethod
+    @ChunkRepacker.register(ChunkType.HSKE)
+    def repack(chunk_path: str) -> 'HskeChunk':
+        meta, data = PackIO.read_meta_and_bytes(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta)
+        return HskeChunk(header, data)
+
+
+HSKE_SCHEMA = Schema(HskeChunk, [
+    Word("word"),
+])
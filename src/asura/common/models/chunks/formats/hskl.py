@@ -1,11 +1,13 @@
 from dataclasses import dataclass
-from typing import List, BinaryIO
+from typing import BinaryIO
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
 from asura.common.factories import ChunkUnpacker
+from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.schema import Schema, Int32, Word, Utf8
 
 
 @dataclass
@@ -15,27 +17,24 @@ class HsklChunk(BaseChunk):
     zero: int = None
     word: bytes = None
 
+    def byte_size(self) -> int:
+        return HSKL_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.HSKL)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            parent_name = reader.read_utf8(padded=True)
-            child_name = reader.read_utf8(padded=True)
-            zero = reader.read_int32()
-            word = reader.read_word()
-        return HsklChunk(header, parent_name, child_name, zero, word)
+        return HSKL_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.HSKL)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return HSKL_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_utf8(self.parent_name, padded=True)
-                writer.write_utf8(self.child_name, padded=True)
-                writer.write_int32(self.zero)
-                writer.write_word(self.word)
-        return written.length
+        return HSKL_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.HSKL)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = {
@@ -46,10 +45,17 @@ class HsklChunk(BaseChunk):
         }
         return PackIO.write_meta_and_json(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
-    # @classmethod
-    # def repack(cls, chunk_path: str) -> 'ResourceListChunk':
-    #     meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-    #     descriptions = [ResourceDescription(**desc) for desc in data]
-    #     header = ChunkHeader.repack_from_dict(meta)
-    #
-    #     return ResourceListChunk(header, descriptions=descriptions)
+    @staticmethod
+    @ChunkRepacker.register(ChunkType.HSKL)
+    def repack(chunk_path: str) -> 'HsklChunk':
+        meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta)
+        return HSKL_SCHEMA.from_dict(data, header=header)
+
+
+HSKL_SCHEMA = Schema(HsklChunk, [
+    Utf8("parent_name", padded=True),
+    Utf8("child_name", padded=True),
+    Int32("zero"),
+    Word("word"),
+])
@@ -6,6 +6,8 @@ from asura.common.mio import AsuraIO, PackIO
 from asura.common.models.chunks import BaseChunk, ChunkHeader, RawChunk
 from asura.common.factories import ChunkUnpacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.records import read_records
+from asura.common.schema import Schema, Int32
 
 
 @dataclass
@@ -21,10 +23,10 @@ class HsknBlockHeader:
 
     @staticmethod
     def read(stream: BinaryIO) -> 'HsknBlockHeader':
-        cls = HsknBlockHeader
-        with AsuraIO(stream) as reader:
-            read = [reader.read_int32() for _ in range(cls.HEADER_SIZE)]
-            return HsknBlockHeader(*read)
+        return HSKN_BLOCK_HEADER_SCHEMA.read(stream)
+
+
+HSKN_BLOCK_HEADER_SCHEMA = Schema(HsknBlockHeader, [Int32(name) for name in "abcdefg"])
 
 
 # WOW THIS IS COMPLICATED
@@ -156,8 +158,10 @@ class HsknChunk(BaseChunk):
                 # print("Blocks (Word A)", hex(counter.length))
                 blocks = [HsknBlock.read_word_a(stream) for _ in range(size)]
                 # print("Blocks (Header)", hex(counter.length))
-                for block in blocks:
-                    block.read_pre_header(stream)
+                # The headers are consecutive; read them as one array
+                headers = read_records(HSKN_BLOCK_HEADER_SCHEMA, stream, size)
+                for block, block_header in zip(blocks, headers):
+                    block.header = block_header
                 # print("Byte", hex(counter.length))
                 byte_a = reader.read_byte()
                 # print("Blocks (Data)", hex(counter.length))
@@ -190,14 +194,14 @@ class HsknChunk(BaseChunk):
                          variants, v_word_b)
 
     # @ChunkUnpacker.register(ChunkType.HSKN)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         if self.header.reserved[0] == 0xcd:
             print("\t\t\t\t0xcd HSKN chunks are not yet supported! Using raw chunk instead!") # Aside
-            return RawChunk.unpack(self, chunk_path, overwrite)
+            return RawChunk.unpack(self, chunk_path, overwrite, store)
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
-        data = vars(self)
-        del data['header']
+        data = dict(vars(self))
+        data.pop('header', None)
         return PackIO.write_meta_and_json(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
     # @classmethod
@@ -1,13 +1,20 @@
 from dataclasses import dataclass
 from typing import List, BinaryIO
 
+import numpy as np
+
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
+from asura.common.models.slots import slotted
 from asura.common.factories import ChunkUnpacker
+from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.records import as_records
+from asura.common.schema import Schema, Bytes, Utf8, Count, Array
 
 
+@slotted
 @dataclass
 class HsndBlock:
     BLOCK_SIZE = 16 * 4
@@ -15,14 +22,11 @@ class HsndBlock:
 
     @staticmethod
     def read(stream: BinaryIO) -> 'HsndBlock':
-        data = stream.read(HsndBlock.BLOCK_SIZE)
-        return HsndBlock(data)
+        return HSND_BLOCK_SCHEMA.read(stream)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as counter:
-                writer.safe_write(self.data, self.BLOCK_SIZE)
-            return counter.length
+        return HSND_BLOCK_SCHEMA.write(stream, self)
+
 
 @dataclass
 class HsndChunk(BaseChunk):
@@ -32,36 +36,49 @@ class HsndChunk(BaseChunk):
     def size(self):
         return len(self.data)
 
+    @property
+    def data_array(self) -> np.ndarray:
+        """
+        The blocks as a structured array (one 64 byte 'data' field per block); a view of the chunk when it was read.
+        """
+        return as_records(HSND_BLOCK_SCHEMA, self.data).array
+
+    def byte_size(self) -> int:
+        return HSND_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.HSND)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            # with reader.byte_counter() as counter:
-            size = reader.read_int32()
-            name = reader.read_utf8(padded=True)
-            data = [HsndBlock.read(stream) for _ in range(size)]
-        return HsndChunk(header, name, data)
+        return HSND_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.HSND)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return HSND_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_int32(self.size())
-                writer.write_utf8(self.name, padded=True)
-                for block in self.data:
-                    block.write(stream)
-        return written.length
+        return HSND_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.HSND)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = {'name': self.name, 'data': self.data}
         return PackIO.write_meta_and_json(path, meta, data, overwrite, ext=PackIO.CHUNK_INFO_EXT)
 
-    # @classmethod
-    # def repack(cls, chunk_path: str) -> 'ResourceListChunk':
-    #     meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-    #     descriptions = [ResourceDescription(**desc) for desc in data]
-    #     header = ChunkHeader.repack_from_dict(meta)
-    #
-    #     return ResourceListChunk(header, descriptions=descriptions)
+    @staticmethod
+    @ChunkRepacker.register(ChunkType.HSND)
+    def repack(chunk_path: str) -> 'HsndChunk':
+        meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
+        header = ChunkHeader.repack_from_dict(meta)
+        return HSND_SCHEMA.from_dict(data, header=header)
+
+
+HSND_BLOCK_SCHEMA = Schema(HsndBlock, [
+    Bytes("data", HsndBlock.BLOCK_SIZE),
+])
+HSND_SCHEMA = Schema(HsndChunk, [
+    Count("size", of="data"),
+    Utf8("name", padded=True),
+    Array("data", HSND_BLOCK_SCHEMA, count="size", records=True),
+])
@@ -1,24 +1,67 @@
-from dataclasses import dataclass
-from typing import List, BinaryIO
+from dataclasses import dataclass, field
+from io import BytesIO
+from struct import Struct, error as struct_error
+from sys import intern
+from typing import List, BinaryIO, Tuple
 
 from asura.common.enums import LangCode, ChunkType
-from asura.common.mio import AsuraIO, split_asura_richtext, PackIO
+from asura.common.error import ParsingError, EnumDecodeError
+from asura.common.mio import AsuraIO, AsuraCursor, split_asura_richtext, PackIO
 from asura.common.models.chunks import ChunkHeader, BaseChunk, RawChunk
+from asura.common.models.slots import slotted
 from asura.common.factories.chunk_packer import ChunkRepacker, ChunkUnpacker
 from asura.common.factories.chunk_parser import ChunkReader
 
+# unknown, size (in utf-16 code units, including the terminal)
+_PART_LAYOUT = Struct("< I I")
+_LANGUAGE_SIZE = 4
 
+
+@slotted(extra=("_raw_text",))
 @dataclass
 class HString:
     key: str = None
-    text: List[str] = None
+    # Left unset by from_raw_text, which lets __getattr__ split the text on demand
+    text: List[str] = field(default_factory=list)
     # I Still don't know what this is; but I know it's not a unique identifier;
     #   22177 Unique out of 22284 Strings
     unknown: int = None
 
+    @classmethod
+    def from_raw_text(cls, raw_text: str, unknown: int = None, key: str = None) -> 'HString':
+        """
+        Creates an HString which only splits its richtext when 'text' is first accessed.
+
+        :param raw_text: The unsplit text, without the terminal.
+        :param unknown: The unknown int32 stored before the text.
+        :param key: The key of the string.
+        :return: The HString.
+        """
+        # Skip __init__; 'text' is left unset so that __getattr__ can split it on demand
+        value = cls.__new__(cls)
+        value.key = key
+        value.unknown = unknown
+        value._raw_text = raw_text
+        return value
+
+    def __getattr__(self, name: str):
+        # Only called when normal lookup fails; i.e. 'text' of a string created by from_raw_text
+        if name == "text":
+            try:
+                raw_text = object.__getattribute__(self, "_raw_text")
+            except AttributeError:
+                raise AttributeError(name) from None
+            self.text = split_asura_richtext(raw_text)
+            return self.text
+        raise AttributeError(name)
+
     @property
     def raw_text(self) -> str:
-        return "".join(self.text)
+        try:
+            text = object.__getattribute__(self, "text")
+        except AttributeError:
+            return self._raw_text
+        return "".join(text)
 
     @property
     def size(self) -> int:
@@ -39,9 +82,72 @@ class HString:
             written += writer.write_utf16(self.raw_text, enforce_terminal=True, write_size=True)
         return written
 
+    @classmethod
+    def unpack_table(cls, data: bytes, count: int, offset: int = 0) -> Tuple[List['HString'], int]:
+        """
+        Decodes a table of strings from a buffer, without splitting their richtext.
+
+        :param data: The buffer holding the table.
+        :param count: The number of strings in the table.
+        :param offset: The offset of the table in the buffer.
+        :return: The strings read, and the offset of the end of the table.
+        """
+        view = memoryview(data)
+        unpack_part = _PART_LAYOUT.unpack_from
+        part_size = _PART_LAYOUT.size
+        parts = []
+        for _ in range(count):
+            try:
+                unknown, size = unpack_part(view, offset)
+            except struct_error as error:
+                raise ParsingError(offset) from error
+            offset += part_size
+            end = offset + size * 2
+            raw_text = str(view[offset:end], "utf-16le").rstrip("\x00")
+            parts.append(cls.from_raw_text(raw_text, unknown))
+            offset = end
+        if offset > len(view):
+            raise ParsingError(len(view))
+        return parts, offset
+
+    @staticmethod
+    def pack_table(parts: List['HString']) -> bytearray:
+        """
+        Encodes a table of strings into a single buffer; the layout matches HString.write.
+
+        :param parts: The strings to encode.
+        :return: The encoded table.
+        """
+        pack_part = _PART_LAYOUT.pack
+        buffer = bytearray()
+        for part in parts:
+            raw_text = part.raw_text
+            if len(raw_text) == 0 or raw_text[-1] != "\x00":
+                raw_text += "\x00"
+            encoded = raw_text.encode("utf-16le")
+            buffer += pack_part(part.unknown, len(encoded) // 2)
+            buffer += encoded
+        return buffer
+
 
 CURRENT_HTEXT_VERSION = 4
 
+
+@dataclass
+class HStringSpan:
+    key: str = None
+    # Absolute position of the string in the stream; this includes the unknown and size prefixes
+    offset: int = None
+    # The byte length of the string; also including the prefixes
+    length: int = None
+
+
+@dataclass
+class HTextLayout:
+    key: str = None
+    language: LangCode = None
+    spans: List[HStringSpan] = None
+
 @dataclass
 class HTextChunk(BaseChunk):
 
@@ -66,36 +172,108 @@ class HTextChunk(BaseChunk):
                 print("!! HTEXT READ AS RAW !!")
                 return RawChunk.read(stream, header)
 
+        start = stream.tell()
+        # The whole body is read once and decoded from the buffer;
+        #   without a header we don't know the size, so we take the rest of the stream and seek back afterwards
+        data = stream.read(header.chunk_size if header is not None else -1)
+        try:
+            chunk, read = HTextChunk.decode(data, header)
+        except ParsingError as error:
+            raise ParsingError(start + error.index) from error.__cause__
+        stream.seek(start + read)
+        return chunk
+
+    @staticmethod
+    def scan(stream: BinaryIO) -> HTextLayout:
+        """
+        Finds where each string of an HTextChunk is, without reading the strings.
+
+        The stream is left at the end of the chunk.
+
+        :param stream: The stream, at the start of the chunk's body.
+        :return: The chunk's key, language and string spans.
+        """
         with AsuraIO(stream) as reader:
             size = reader.read_int32()
-            unknown_word = reader.read_word()
-            parts_size = reader.read_int32()
+            _ = reader.read_word()
+            _ = reader.read_int32()
             language = LangCode.read(stream)
-            parts = [HString.read(stream) for _ in range(size)]
+            spans = []
+            part_size = _PART_LAYOUT.size
+            for _ in range(size):
+                offset = stream.tell()
+                _, text_size = _PART_LAYOUT.unpack(reader.read(part_size))
+                stream.seek(text_size * 2, 1)
+                spans.append(HStringSpan(None, offset, part_size + text_size * 2))
             key = reader.read_utf8(padded=True)
             part_keys = reader.read_utf8_list()
-            for i, part in enumerate(parts):
-                part.key = part_keys[i]
+            for i, span in enumerate(spans):
+                span.key = part_keys[i]
+        return HTextLayout(key, language, spans)
 
+    @staticmethod
+    def decode(data: bytes, header: ChunkHeader = None) -> Tuple['HTextChunk', int]:
+        """
+        Decodes an HTextChunk's body from a buffer.
+
+        :param data: The buffer, starting at the chunk's body.
+        :param header: The chunk's header.
+        :return: The chunk, and the number of bytes read from the buffer.
+        """
+        cursor = AsuraCursor(data)
+        return HTextChunk._read_body(cursor, header), cursor.offset
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.H_TEXT)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None) -> 'HTextChunk':
+        if header is not None:
+            if header.version != CURRENT_HTEXT_VERSION:
+                print("!! HTEXT READ AS RAW !!")
+                return RawChunk.read_cursor(cursor, header)
+        return HTextChunk._read_body(cursor, header)
+
+    @staticmethod
+    def _read_body(cursor: AsuraCursor, header: ChunkHeader = None) -> 'HTextChunk':
+        size = cursor.read_int32()
+        unknown_word = cursor.read_word()
+        parts_size = cursor.read_int32()
+        try:
+            language = LangCode.decode(cursor.read(_LANGUAGE_SIZE))
+        except EnumDecodeError as error:
+            raise ParsingError(cursor.offset - _LANGUAGE_SIZE) from error
+        # The table is decoded in place
+        parts, cursor.offset = HString.unpack_table(cursor.buffer, size, cursor.offset)
+        if cursor.offset > cursor.end:
+            raise ParsingError(cursor.end)
+        key = cursor.read_utf8(padded=True)
+        part_keys = cursor.read_utf8_list()
+        for i, part in enumerate(parts):
+            # The same keys are used by every language
+            part.key = intern(part_keys[i])
         return HTextChunk(header, key, parts, unknown_word, parts_size, language)
 
-    def write(self, stream: BinaryIO, header: ChunkHeader = None) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
+    def encode(self) -> bytes:
+        """
+        Encodes the chunk's body into a single buffer.
+
+        :return: The encoded body.
+        """
+        with BytesIO() as stream:
+            with AsuraIO(stream) as writer:
                 writer.write_int32(self.size)
                 writer.write_word(self.word_a)
                 writer.write_int32(self.data_byte_length)
                 self.language.write(stream)
-                keys = []
-                for part in self.parts:
-                    part.write(stream)
-                    keys.append(part.key)
+                writer.write(HString.pack_table(self.parts))
                 writer.write_utf8(self.key, padded=True)
-                writer.write_utf8_list(keys)
-        return written.length
+                writer.write_utf8_list([part.key for part in self.parts])
+            return stream.getvalue()
+
+    def write(self, stream: BinaryIO, header: ChunkHeader = None) -> int:
+        return stream.write(self.encode())
 
     @ChunkUnpacker.register(ChunkType.H_TEXT)
-    def unpack(self, chunk_path: str, overwrite=False) -> bool:
+    def unpack(self, chunk_path: str, overwrite=False, store=None) -> bool:
         path = chunk_path + f".{self.header.type.value}"
         meta = {
             'header': self.header,
@@ -111,7 +289,7 @@ class HTextChunk(BaseChunk):
     @ChunkRepacker.register(ChunkType.H_TEXT)
     def repack(chunk_path: str) -> 'HTextChunk':
         meta, data = PackIO.read_meta_and_json(chunk_path, ext=PackIO.CHUNK_INFO_EXT)
-        parts = [HTextField(**d) for d in data]
+        parts = [HString(**d) for d in data]
 
         header = ChunkHeader.repack_from_dict(meta['header'])
         del meta['header']
@@ -1,13 +1,23 @@
 from dataclasses import dataclass
 from os.path import join, basename
+from struct import Struct
+from sys import intern
 from typing import BinaryIO, List
 
+import numpy as np
+
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import AsuraIO, PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
 from asura.common.factories import ChunkUnpacker
 from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.records import as_records
+from asura.common.schema import Schema, Int32, Array
+
+
+# id, sub_id, size
+_HEADER_LAYOUT = Struct("< 3I")
 
 
 @dataclass
@@ -21,23 +31,14 @@ class ResourceBlob:
 
     @staticmethod
     def read_meta(stream: BinaryIO) -> 'ResourceBlob':
-        with AsuraIO(stream) as reader:
-            a = reader.read_int32()
-            zero_a = reader.read_int32()
-            b = reader.read_int32()
-            zero_b = reader.read_int32()
-            one = reader.read_int32()
-            return ResourceBlob(a, zero_a, b, zero_b, one)
+        return RESOURCE_BLOB_SCHEMA.read(stream)
+
+    @staticmethod
+    def read_meta_cursor(cursor: AsuraCursor) -> 'ResourceBlob':
+        return RESOURCE_BLOB_SCHEMA.read_cursor(cursor)
 
     def write_meta(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as counter:
-                writer.write_int32(self.reserved_zero_a)
-                writer.write_int32(self.a)
-                writer.write_int32(self.reserved_zero_b)
-                writer.write_int32(self.b)
-                writer.write_int32(self.reserved_zero_a)
-            return counter.length
+        return RESOURCE_BLOB_SCHEMA.write(stream, self)
 
 
 @dataclass
@@ -48,15 +49,36 @@ class Resource:
     reserved_c: int = None
     blobs: List['ResourceBlob'] = None
 
+    @property
+    def blobs_array(self) -> np.ndarray:
+        """
+        The blob table as a structured array (one field per int); a view of the chunk when it was read.
+        """
+        return as_records(RESOURCE_BLOB_SCHEMA, self.blobs).array
+
     @staticmethod
     def read(stream: BinaryIO) -> 'Resource':
-        with AsuraIO(stream) as reader:
-            count = reader.read_int32()
-            a = reader.read_int32()
-            b = reader.read_int32()
-            c = reader.read_int32()
-            bolbs = [ResourceBlob.read_meta(stream) for _ in range(count)]
-            return Resource(count, a, b, c, bolbs)
+        return RESOURCE_SCHEMA.read(stream)
+
+    @staticmethod
+    def read_cursor(cursor: AsuraCursor) -> 'Resource':
+        return RESOURCE_SCHEMA.read_cursor(cursor)
+
+
+RESOURCE_BLOB_SCHEMA = Schema(ResourceBlob, [
+    Int32("a"),
+    Int32("reserved_zero_a"),
+    Int32("b"),
+    Int32("reserved_zero_b"),
+    Int32("reserved_one"),
+])
+RESOURCE_SCHEMA = Schema(Resource, [
+    Int32("count"),
+    Int32("reserved_a"),
+    Int32("reserved_b"),
+    Int32("reserved_c"),
+    Array("blobs", RESOURCE_BLOB_SCHEMA, count="count", records=True),
+])
 
 
 RAW_FILE_ID = 0
@@ -66,6 +88,18 @@ DEBUG_FILE = 6
 SOUND_FILE = 3
 
 
+@dataclass
+class ResourceSpan:
+    id: int = None
+    sub_id: int = None
+    name: str = None
+    # Absolute position of the resource's data in the stream
+    offset: int = None
+    size: int = None
+    # The first bytes of the data; see ResourceChunk.scan
+    prefix: bytes = None
+
+
 @dataclass
 class ResourceChunk(BaseChunk):
     id: int = None
@@ -92,7 +126,7 @@ class ResourceChunk(BaseChunk):
                 id = reader.read_int32()
                 sub_id = reader.read_int32()
                 size = reader.read_int32()
-                name = reader.read_utf8(padded=True)
+                name = intern(reader.read_utf8(padded=True))
 
                 if id == RAW_FILE_ID and sub_id == RESOURCE_SUB_ID:
                     start = reader.stream.tell()
@@ -109,6 +143,45 @@ class ResourceChunk(BaseChunk):
             assert read.length == header.chunk_size, (read.length, header.length)
         return ResourceChunk(header, id, sub_id, name, size, data, resource)
 
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.RESOURCE)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader) -> 'ResourceChunk':
+        id, sub_id, size = cursor.unpack(_HEADER_LAYOUT)
+        name = intern(cursor.read_utf8(padded=True))
+        if id == RAW_FILE_ID and sub_id == RESOURCE_SUB_ID:
+            start = cursor.offset
+            resource = Resource.read_cursor(cursor)
+            data = cursor.read(size - (cursor.offset - start))
+        elif id in [RAW_FILE_ID, DDS_FILE, DEBUG_FILE, SOUND_FILE]:
+            data = cursor.read(size)
+            resource = None
+        else:
+            raise Exception
+        return ResourceChunk(header, id, sub_id, name, size, data, resource)
+
+    @staticmethod
+    def scan(stream: BinaryIO, header: ChunkHeader, peek: int = 0) -> ResourceSpan:
+        """
+        Reads a resource's id, name and size, and (at most) the first 'peek' bytes of its data, without reading the rest.
+
+        The stream is left at the end of the chunk.
+
+        :param stream: The stream, at the start of the chunk's body.
+        :param header: The chunk's header.
+        :param peek: The number of bytes of data to read.
+        :return: The resource's span.
+        """
+        with AsuraIO(stream) as reader:
+            start = stream.tell()
+            id = reader.read_int32()
+            sub_id = reader.read_int32()
+            size = reader.read_int32()
+            name = reader.read_utf8(padded=True)
+            offset = stream.tell()
+            prefix = reader.read(min(peek, size)) if peek > 0 else b""
+        stream.seek(start + header.chunk_size)
+        return ResourceSpan(id, sub_id, name, offset, size, prefix)
+
     def write(self, stream: BinaryIO) -> int:
         with AsuraIO(stream) as writer:
             with writer.byte_counter() as written:
@@ -120,7 +193,7 @@ class ResourceChunk(BaseChunk):
         return written.length
 
     @ChunkUnpacker.register(ChunkType.RESOURCE)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = {
             'header': self.header,
@@ -131,7 +204,7 @@ class ResourceChunk(BaseChunk):
         data = self.data
         written: bool = False
         written |= PackIO.write_meta(path, meta, overwrite, ext=PackIO.CHUNK_INFO_EXT)
-        written |= PackIO.write_bytes(join(path, basename(self.name)), data, overwrite)
+        written |= PackIO.write_payload(join(path, basename(self.name)), data, overwrite, store)
         return written
 
     @staticmethod
@@ -142,5 +215,4 @@ class ResourceChunk(BaseChunk):
         data = PackIO.read_bytes(data_path)
 
         header = ChunkHeader.repack_from_dict(meta['header'])
-        del meta['header']
-        return ResourceChunk(header, data=data, **meta)
+        return ResourceChunk(header, meta['file_type_id_maybe'], meta['file_id_maybe'], meta['name'], data=data)
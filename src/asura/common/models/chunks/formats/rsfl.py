@@ -2,13 +2,16 @@ from dataclasses import dataclass
 from typing import List, BinaryIO
 
 from asura.common.enums import ChunkType
-from asura.common.mio import AsuraIO, PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
+from asura.common.models.slots import slotted
 from asura.common.factories import ChunkUnpacker
 from asura.common.factories.chunk_packer import ChunkRepacker
 from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.schema import Schema, Int32, Utf8, Count, Array
 
 
+@slotted
 @dataclass
 class ResourceDescription:
     name: str = None
@@ -18,21 +21,14 @@ class ResourceDescription:
 
     @staticmethod
     def read(stream: BinaryIO) -> 'ResourceDescription':
-        with AsuraIO(stream) as reader:
-            name = reader.read_utf8(padded=True)
-            read_a = reader.read_int32()
-            read_b = reader.read_int32()
-            read_c = reader.read_int32()
-            return ResourceDescription(name, read_a, read_b, read_c)
+        return RESOURCE_DESCRIPTION_SCHEMA.read(stream)
+
+    @staticmethod
+    def read_cursor(cursor: AsuraCursor) -> 'ResourceDescription':
+        return RESOURCE_DESCRIPTION_SCHEMA.read_cursor(cursor)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_utf8(self.name, padded=True)
-                writer.write_int32(self.reserved_a)
-                writer.write_int32(self.reserved_b)
-                writer.write_int32(self.reserved_c)
-            return written.length
+        return RESOURCE_DESCRIPTION_SCHEMA.write(stream, self)
 
 
 @dataclass
@@ -43,24 +39,24 @@ class ResourceListChunk(BaseChunk):
     def size(self):
         return len(self.descriptions)
 
+    def byte_size(self) -> int:
+        return RESOURCE_LIST_SCHEMA.size(self)
+
     @staticmethod
     @ChunkReader.register(ChunkType.RESOURCE_LIST)
     def read(stream: BinaryIO, header: ChunkHeader = None):
-        with AsuraIO(stream) as reader:
-            size = reader.read_int32()
-            descriptions = [ResourceDescription.read(stream) for _ in range(size)]
-        return ResourceListChunk(header, descriptions)
+        return RESOURCE_LIST_SCHEMA.read(stream, header=header)
+
+    @staticmethod
+    @ChunkReader.register_cursor(ChunkType.RESOURCE_LIST)
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader = None):
+        return RESOURCE_LIST_SCHEMA.read_cursor(cursor, header=header)
 
     def write(self, stream: BinaryIO) -> int:
-        with AsuraIO(stream) as writer:
-            with writer.byte_counter() as written:
-                writer.write_int32(self.size)
-                for desc in self.descriptions:
-                    desc.write(stream)
-        return written.length
+        return RESOURCE_LIST_SCHEMA.write(stream, self)
 
     @ChunkUnpacker.register(ChunkType.RESOURCE_LIST)
-    def unpack(self, chunk_path: str, overwrite=False):
+    def unpack(self, chunk_path: str, overwrite=False, store=None):
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = self.descriptions
@@ -74,3 +70,15 @@ class ResourceListChunk(BaseChunk):
         header = ChunkHeader.repack_from_dict(meta)
 
         return ResourceListChunk(header, descriptions=descriptions)
+
+
+RESOURCE_DESCRIPTION_SCHEMA = Schema(ResourceDescription, [
+    Utf8("name", padded=True, interned=True),
+    Int32("reserved_a"),
+    Int32("reserved_b"),
+    Int32("reserved_c"),
+])
+RESOURCE_LIST_SCHEMA = Schema(ResourceListChunk, [
+    Count("size", of="descriptions"),
+    Array("descriptions", RESOURCE_DESCRIPTION_SCHEMA, count="size"),
+])
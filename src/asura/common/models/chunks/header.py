@@ -4,8 +4,10 @@ from typing import BinaryIO, Dict
 
 from asura.common.enums import ChunkType
 from asura.common.mio import AsuraIO
+from asura.common.models.slots import slotted
 
 
+@slotted
 @dataclass
 class ChunkHeader:
     type: ChunkType = None
@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import BinaryIO
 
-from asura.common.mio import PackIO
+from asura.common.mio import PackIO, AsuraCursor
 from asura.common.models.chunks import BaseChunk, ChunkHeader
 from asura.common.factories import ChunkUnpacker, ChunkRepacker, ChunkReader
 
@@ -23,11 +23,16 @@ class RawChunk(BaseChunk):
         data = file.read(header.chunk_size)
         return RawChunk(header, data)
 
+    @staticmethod
+    @ChunkReader.register_cursor()
+    def read_cursor(cursor: AsuraCursor, header: ChunkHeader) -> 'RawChunk':
+        return RawChunk(header, cursor.read(header.chunk_size))
+
     def write(self, file: BinaryIO) -> int:
         return file.write(self.data)
 
     @ChunkUnpacker.register()
-    def unpack(self, chunk_path: str, overwrite=False) -> bool:
+    def unpack(self, chunk_path: str, overwrite=False, store=None) -> bool:
         path = chunk_path + f".{self.header.type.value}"
         meta = self.header
         data = self.data
@@ -0,0 +1,84 @@
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType, LangCode
+from asura.common.error import ParsingError
+from asura.common.mio import map_stream
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk, RawChunk, SparseChunk
+from asura.common.models.chunks.formats import ResourceChunk, SoundChunk, SoundClip, ResourceListChunk, \
+    ResourceDescription, HTextChunk, HString
+from asura.common.models.chunks.formats.rscf import DDS_FILE
+from asura.common.models.chunks.formats.hmpt import HmptChunk, HmptBlock
+
+
+def create_archive() -> bytes:
+    chunks = [
+        ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, "textures\\a.dds",
+                      data=bytes(range(100))),
+        SoundChunk(ChunkHeader(ChunkType.SOUND, 0, 0, bytes(4)), False, [SoundClip("a.wav", bytes(4), b"RIFF")]),
+        ResourceListChunk(ChunkHeader(ChunkType.RESOURCE_LIST, 0, 0, bytes(4)),
+                          [ResourceDescription("list", 1, 2, 3), ResourceDescription("entries", 4, 5, 6)]),
+        HmptChunk(ChunkHeader(ChunkType.HMPT, 0, 0, bytes(4)), "points", [HmptBlock("point", bytes(52))]),
+        HTextChunk(ChunkHeader(ChunkType.H_TEXT, 0, 4, bytes(4)), "TEXT", [HString("key", ["Text."], 3)],
+                   bytes(4), 14, LangCode.ENGLISH),
+        RawChunk(ChunkHeader(ChunkType.get_enum_from_value("XRAW"), 0, 0, bytes(4)), b"raw data"),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ]
+    with BytesIO() as stream:
+        FolderArchive(ArchiveType.Folder, chunks).write(stream)
+        return stream.getvalue()
+
+
+def read_archive(stream) -> FolderArchive:
+    stream.seek(0)
+    return FolderArchive.read(stream)
+
+
+def test_buffered_load_matches_stream_load():
+    data = create_archive()
+    with BytesIO(data) as stream:
+        archive = read_archive(stream)
+        streamed = [chunk.load(stream, buffered=False) for chunk in archive.chunks[:-1]]
+        buffered = [chunk.load(stream) for chunk in archive.chunks[:-1]]
+        from_buffer = [chunk.load_from_buffer(data) for chunk in archive.chunks[:-1]]
+    assert buffered == streamed
+    assert from_buffer == streamed
+    assert [type(chunk) for chunk in streamed] == [ResourceChunk, SoundChunk, ResourceListChunk, HmptChunk,
+                                                   HTextChunk, RawChunk]
+
+
+def test_mapped_load():
+    data = create_archive()
+    with TemporaryDirectory() as root:
+        path = join(root, "archive.asr")
+        with open(path, "wb") as file:
+            file.write(data)
+        with open(path, "rb") as stream:
+            archive = read_archive(stream)
+            with map_stream(stream) as mapped:
+                assert mapped is not None
+                loaded = list(archive.load_chunk_by_chunk(stream, buffer=mapped))
+    with BytesIO(data) as stream:
+        archive = read_archive(stream)
+        archive.load(stream)
+    assert loaded == archive.chunks
+    with BytesIO(data) as stream:
+        with map_stream(stream) as mapped:
+            assert mapped is None
+
+
+def test_size_mismatch():
+    data = create_archive()
+    with BytesIO(data) as stream:
+        archive = read_archive(stream)
+    chunk: SparseChunk = archive.chunks[2]
+    # Claim one more word than the resource list holds
+    header = ChunkHeader(chunk.header.type, chunk.header.length + 4, chunk.header.version, chunk.header.reserved)
+    try:
+        SparseChunk(header, chunk.data_start).load_from_buffer(data)
+    except ParsingError as error:
+        assert error.index == chunk.data_start + chunk.header.chunk_size
+    else:
+        assert False, "Size mismatch was not detected"
@@ -1,7 +1,10 @@
 from io import BytesIO
 from typing import BinaryIO, Union
 
+import pytest
+
 from asura.common.enums import LangCode
+from asura.common.mio import AsuraIO
 from asura.common.models.chunks.formats import HString, HTextChunk
 
 LITTLE = "little"
@@ -115,3 +118,44 @@ def test_clip_write_readback():
         read = HString.read(writer)
 
     assert_htext(read, htext_from_raw)
+
+
+richtext_chunk = HTextChunk(
+    key="RICH",
+    parts=[
+        HString("plain", ["Plain text."], 1),
+        HString("rich", ["Press ", "\ue003button\ue004", " to continue."], 2),
+        HString("empty", [], 3),
+    ],
+    word_a=b"\xff\xfe\xfd\xfc",
+    data_byte_length=0,
+    language=LangCode.FRENCH)
+
+
+def test_chunk_bulk_write_matches_per_string_write():
+    with BytesIO() as writer:
+        with AsuraIO(writer) as legacy:
+            legacy.write_int32(richtext_chunk.size)
+            legacy.write_word(richtext_chunk.word_a)
+            legacy.write_int32(richtext_chunk.data_byte_length)
+            richtext_chunk.language.write(writer)
+            for part in richtext_chunk.parts:
+                part.write(writer)
+            legacy.write_utf8(richtext_chunk.key, padded=True)
+            legacy.write_utf8_list([part.key for part in richtext_chunk.parts])
+        assert richtext_chunk.encode() == writer.getvalue()
+
+
+def test_chunk_bulk_read_splits_lazily():
+    with BytesIO(richtext_chunk.encode() + b"TRAILING") as reader:
+        chunk = HTextChunk.read(reader)
+        # Only the chunk should have been consumed
+        assert reader.read() == b"TRAILING"
+    assert_htext_chunk(chunk, richtext_chunk)
+    rich = chunk.parts[1]
+    with pytest.raises(AttributeError):
+        object.__getattribute__(rich, "text")  # Not split until first accessed
+    assert rich.raw_text == "Press \ue003button\ue004 to continue."
+    assert rich.text == richtext_chunk.parts[1].text
+    rich.text = ["Changed"]
+    assert rich.raw_text == "Changed"
@@ -2,18 +2,36 @@ from dataclasses import dataclass
 from typing import BinaryIO
 
 from asura.common.error import ParsingError
+from asura.common.mio import Buffer, PositionalReader
 from asura.common.models.chunks import BaseChunk
+from asura.common.models.slots import slotted
 
 
+@slotted
 @dataclass
 class SparseChunk(BaseChunk):
     data_start: int = None
 
-    def load(self, stream: BinaryIO) -> BaseChunk:
+    def load(self, stream: BinaryIO, buffered: bool = True) -> BaseChunk:
+        """
+        Reads the chunk's body.
+
+        :param stream: The stream the chunk was read from.
+        :param buffered: Read the body in a single call and parse it from the buffer; otherwise it's parsed from the
+        stream, a field at a time.
+        :return: The parsed chunk.
+        """
         from asura.common.factories.chunk_parser import ChunkReader
 
         prev_pos = stream.tell()
         stream.seek(self.data_start)
+        if buffered:
+            data = stream.read(self.header.chunk_size)
+            stream.seek(prev_pos)
+            if len(data) != self.header.chunk_size:
+                raise ParsingError(self.data_start + len(data))
+            return parse_chunk(self.header, data, self.data_start)
+
         result = ChunkReader.read(self.header, stream)
         if result is not None:
             current = stream.tell()
@@ -29,3 +47,47 @@ class SparseChunk(BaseChunk):
         stream.seek(prev_pos)
         return result
 
+    def load_from_buffer(self, buffer: Buffer) -> BaseChunk:
+        """
+        Reads the chunk's body from a buffer holding the whole archive; i.e. a mapped file (see map_stream).
+
+        :param buffer: The archive's buffer; the chunk's body is read in place.
+        :return: The parsed chunk.
+        """
+        from asura.common.factories.chunk_parser import ChunkReader
+
+        result = ChunkReader.read_buffer(self.header, buffer, self.data_start)
+        result.header = self.header
+        return result
+
+    def load_at(self, reader: PositionalReader) -> BaseChunk:
+        """
+        Reads the chunk's body by position; unlike load, the stream's position isn't used, so chunks of the same
+        archive can be loaded by many threads at once.
+
+        :param reader: Reads the archive the chunk was read from.
+        :return: The parsed chunk.
+        """
+        data = reader.read_at(self.data_start, self.header.chunk_size)
+        if len(data) != self.header.chunk_size:
+            raise ParsingError(self.data_start + len(data))
+        return parse_chunk(self.header, data, self.data_start)
+
+
+def parse_chunk(header: 'ChunkHeader', data: bytes, data_start: int = 0) -> BaseChunk:
+    """
+    Parses a chunk's body, read in a single call; a module level function, so it can be run in another process.
+
+    :param header: The chunk's header.
+    :param data: The chunk's body.
+    :param data_start: The position of the body in its archive; used to report parsing errors.
+    :return: The parsed chunk.
+    """
+    from asura.common.factories.chunk_parser import ChunkReader
+
+    try:
+        result = ChunkReader.read_buffer(header, data)
+    except ParsingError as error:
+        raise ParsingError(data_start + error.index) from error.__cause__
+    result.header = header
+    return result
@@ -0,0 +1,35 @@
+from dataclasses import fields
+from typing import Type, Tuple, Callable, Union
+
+
+def slotted(cls: Type = None, *, extra: Tuple[str, ...] = ()) -> Union[Type, Callable[[Type], Type]]:
+    """
+    Rebuilds a dataclass with __slots__, dropping the per-instance __dict__; dataclass(slots=True) needs Python 3.10.
+
+    Apply it above @dataclass. Fields already slotted by a base class are skipped; a base class without slots still
+    gives instances a __dict__. Methods of the class must not use the zero argument form of super().
+
+    :param cls: The dataclass.
+    :param extra: Slots for attributes which aren't fields.
+    :return: The slotted class.
+    """
+
+    def wrapper(cls: Type) -> Type:
+        if "__slots__" in cls.__dict__:
+            raise TypeError(f"{cls.__name__} already specifies __slots__")
+        inherited = set()
+        for base in cls.__mro__[1:-1]:
+            inherited.update(base.__dict__.get("__slots__", ()))
+        slots = tuple(field.name for field in fields(cls) if field.name not in inherited) + tuple(extra)
+        namespace = dict(cls.__dict__)
+        for name in slots:
+            # Defaults are kept by the generated __init__; the class attributes would shadow the slots
+            namespace.pop(name, None)
+        namespace.pop("__dict__", None)
+        namespace.pop("__weakref__", None)
+        namespace["__slots__"] = slots
+        slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+        slotted_cls.__qualname__ = cls.__qualname__
+        return slotted_cls
+
+    return wrapper if cls is None else wrapper(cls)
@@ -0,0 +1,211 @@
+from collections.abc import MutableSequence
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+from asura.common.error import ParsingError
+
+# Struct code -> NumPy type; records are little endian, and packed (as they are in the archive)
+_DTYPE_CODES = {
+    "q": "<i8", "Q": "<u8",
+    "i": "<i4", "I": "<u4",
+    "h": "<i2", "H": "<u2",
+    "B": "u1",
+}
+# Schema -> dtype
+_DTYPES: Dict['Schema', np.dtype] = {}
+
+
+def record_dtype(schema: 'Schema') -> np.dtype:
+    """
+    Gets the structured dtype of a fixed size schema; bytes fields become arrays of uint8.
+
+    :param schema: The schema.
+    :return: The dtype; its fields are the schema's fields.
+    :raises ValueError: raised when the schema's records vary in size.
+    """
+    dtype = _DTYPES.get(schema)
+    if dtype is not None:
+        return dtype
+    if schema.fixed_size is None:
+        raise ValueError(f"{schema.cls.__name__} records vary in size")
+    fields = []
+    for field in schema.fields:
+        if field.code.endswith("s"):
+            fields.append((field.name, np.uint8, (int(field.code[:-1]),)))
+        else:
+            fields.append((field.name, _DTYPE_CODES[field.code]))
+    dtype = _DTYPES[schema] = np.dtype(fields)
+    return dtype
+
+
+def view_records(schema: 'Schema', buffer: Any, count: int, offset: int = 0) -> np.ndarray:
+    """
+    Views consecutive records in a buffer as a structured array, without copying them.
+
+    The array keeps the buffer alive, and is read only if the buffer is (i.e. bytes).
+
+    :param schema: The (fixed size) schema of the records.
+    :param buffer: The buffer.
+    :param count: The number of records.
+    :param offset: The position of the first record.
+    :return: The array.
+    :raises ParsingError: raised when the buffer ends before the records do.
+    """
+    dtype = record_dtype(schema)
+    if count < 0 or offset + dtype.itemsize * count > len(buffer):
+        raise ParsingError(len(buffer))
+    return np.frombuffer(buffer, dtype, count, offset)
+
+
+def read_records(schema: 'Schema', stream: BinaryIO, count: int) -> 'RecordList':
+    """
+    Reads consecutive records from a stream in a single read.
+
+    :raises ParsingError: raised when the stream ends before the records do.
+    """
+    start = stream.tell()
+    size = record_dtype(schema).itemsize * count
+    data = stream.read(size)
+    if len(data) != size:
+        raise ParsingError(start + len(data))
+    return RecordList(schema, view_records(schema, data, count))
+
+
+def as_records(schema: 'Schema', values: Iterable[Any]) -> 'RecordList':
+    """
+    Gets records as a RecordList; a list of models is packed into one.
+    """
+    if isinstance(values, RecordList):
+        return values
+    return RecordList.from_records(schema, values)
+
+
+class RecordList(MutableSequence):
+    """
+    A list of fixed size records, backed by a structured array; records are only created when they are accessed.
+
+    Records handed out (by indexing or iteration) may be edited, i.e. records[0].one = 7; they're written back to the
+    array once, when it's next used (see array and tobytes), and the list then forgets them. Edits made after that, to
+    a record taken before it, aren't written. The array may be a read only view of the chunk it was read from, in which
+    case it's copied before the first edit is written back. Inserting or removing records creates every record, and the
+    array is rebuilt from them.
+
+    Compares equal to a list of the same records; lists which weren't accessed are written straight from the array.
+    """
+    __slots__ = ("schema", "_array", "_records", "_dirty")
+
+    def __init__(self, schema: 'Schema', array: np.ndarray):
+        self.schema = schema
+        # None once records were inserted or removed; the records are then the whole list
+        self._array: Optional[np.ndarray] = array
+        # The records handed out since the last write back (None where a record hasn't been), or None when none have
+        self._records: Optional[List[Any]] = None
+        # Records were handed out, or set, since the array was last written
+        self._dirty = False
+
+    @classmethod
+    def from_records(cls, schema: 'Schema', records: Iterable[Any]) -> 'RecordList':
+        data = bytearray(b"".join(schema.pack(record) for record in records))
+        return cls(schema, np.frombuffer(data, record_dtype(schema)))
+
+    @property
+    def array(self) -> np.ndarray:
+        """
+        The records as a structured array; a view of the chunk they were read from, unless they were edited.
+        """
+        if not self._dirty:
+            return self._array
+        schema = self.schema
+        if self._array is None:
+            data = bytearray(b"".join(schema.pack(record) for record in self._records))
+            self._array = np.frombuffer(data, record_dtype(schema))
+        else:
+            array = self._array
+            for index, record in enumerate(self._records):
+                if record is None:
+                    continue
+                data = schema.pack(record)
+                if data == array[index].tobytes():
+                    continue
+                if not array.flags.writeable:
+                    array = self._array = array.copy()
+                array[index] = np.frombuffer(data, array.dtype)[0]
+        self._records = None
+        self._dirty = False
+        return self._array
+
+    def tobytes(self) -> bytes:
+        return self.array.tobytes()
+
+    def to_list(self) -> List[Any]:
+        """
+        Creates every record, without handing them out; editing them doesn't edit the list.
+        """
+        return self.schema.unpack_many(self.tobytes())
+
+    def _create_all(self) -> List[Any]:
+        # Creates (and hands out) every record not yet handed out
+        self._dirty = True
+        if self._array is None:
+            return self._records
+        if self._records is None:
+            self._records = self.schema.unpack_many(self._array.tobytes())
+            return self._records
+        records = self._records
+        if any(record is None for record in records):
+            created = self.schema.unpack_many(self._array.tobytes())
+            for index, record in enumerate(records):
+                if record is None:
+                    records[index] = created[index]
+        return records
+
+    def _detach(self) -> List[Any]:
+        # The records become the whole list; the array is rebuilt from them when next used
+        records = self._create_all()
+        self._array = None
+        return records
+
+    def __len__(self) -> int:
+        return len(self._records) if self._array is None else len(self._array)
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return RecordList(self.schema, self.array[index])
+        if self._array is None:
+            return self._records[index]
+        if self._records is None:
+            self._records = [None] * len(self._array)
+        record = self._records[index]
+        if record is None:
+            record = self._records[index] = self.schema.unpack_many(self._array[index].tobytes())[0]
+        self._dirty = True
+        return record
+
+    def __setitem__(self, index: Union[int, slice], value: Any):
+        if isinstance(index, slice):
+            self._detach()[index] = value
+            return
+        if self._array is not None and self._records is None:
+            self._records = [None] * len(self._array)
+        self._records[index] = value
+        self._dirty = True
+
+    def __delitem__(self, index: Union[int, slice]):
+        del self._detach()[index]
+
+    def insert(self, index: int, value: Any):
+        self._detach().insert(index, value)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._create_all())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RecordList):
+            return self.schema is other.schema and self.tobytes() == other.tobytes()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_list())
@@ -0,0 +1,449 @@
+from struct import Struct
+from sys import intern
+from typing import List, BinaryIO, Dict, Any, Callable, Optional, Type
+
+from asura.common.config import WORD_SIZE
+from asura.common.error import ParsingError
+from asura.common.mio import AsuraIO, AsuraCursor, bytes_to_word_boundary
+from asura.common.records import RecordList, view_records, read_records
+
+
+class Field:
+    """
+    A field of a schema.
+
+    Fixed size fields have a struct code, and are packed together with their neighbours; variable sized fields
+    implement the read, pack and size methods instead.
+    """
+    # The struct code of a fixed size field; None for variable sized fields
+    code: str = None
+    # Fields which aren't stored on the model (i.e. a count) are only kept while reading
+    stored: bool = True
+    # The name of an earlier field whose value is passed to read; i.e. the count of an array
+    depends: str = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get(self, value: Any) -> Any:
+        return getattr(value, self.name)
+
+    # Fixed size fields
+    def decode(self, value: Any) -> Any:
+        return value
+
+    def encode(self, value: Any) -> Any:
+        return value
+
+    # Converts a value read from an unpacked json file (see Schema.from_dict)
+    def from_json(self, value: Any) -> Any:
+        return value
+
+    # Variable sized fields
+    def read(self, stream: BinaryIO, dependency: Any) -> Any:
+        raise NotImplementedError
+
+    def read_cursor(self, cursor: AsuraCursor, dependency: Any) -> Any:
+        raise NotImplementedError
+
+    def pack(self, value: Any, parts: List[bytes]):
+        raise NotImplementedError
+
+    def size(self, value: Any) -> int:
+        raise NotImplementedError
+
+
+class Int64(Field):
+    def __init__(self, name: str, signed: bool = False):
+        super().__init__(name)
+        self.code = "q" if signed else "Q"
+
+
+class Int32(Field):
+    def __init__(self, name: str, signed: bool = False):
+        super().__init__(name)
+        self.code = "i" if signed else "I"
+
+
+class Int16(Field):
+    def __init__(self, name: str, signed: bool = False):
+        super().__init__(name)
+        self.code = "h" if signed else "H"
+
+
+class Bool(Field):
+    code = "B"
+
+    def decode(self, value: int) -> bool:
+        if value > 0x01:
+            raise ValueError("Unexpected byte for strict bool!", value)
+        return value == 0x01
+
+    def encode(self, value: bool) -> int:
+        return 0x01 if value else 0x00
+
+
+class Bytes(Field):
+    def __init__(self, name: str, size: int):
+        super().__init__(name)
+        self.length = size
+        self.code = f"{size}s"
+
+    def encode(self, value: bytes) -> bytes:
+        # struct would silently pad (or truncate) the value
+        if len(value) != self.length:
+            raise ValueError(f"'{self.name}' must be {self.length} bytes, got {len(value)}")
+        return value
+
+    def from_json(self, value: Any) -> bytes:
+        return bytes.fromhex(value) if isinstance(value, str) else value
+
+
+class Word(Bytes):
+    def __init__(self, name: str):
+        super().__init__(name, WORD_SIZE)
+
+
+class Count(Int32):
+    """
+    The int32 size of an array; written as the length of the array, and not stored on the model.
+    """
+    stored = False
+
+    def __init__(self, name: str, of: str):
+        super().__init__(name)
+        self.of = of
+
+    def get(self, value: Any) -> int:
+        return len(getattr(value, self.of))
+
+
+class Utf8(Field):
+    """
+    A null terminated UTF-8 string; optionally padded to the word boundary.
+    """
+
+    def __init__(self, name: str, padded: bool = False, interned: bool = False):
+        """
+        :param interned: Intern the strings read; for names which repeat across chunks and archives (i.e. paths).
+        """
+        super().__init__(name)
+        self.padded = padded
+        self.interned = interned
+
+    def read(self, stream: BinaryIO, dependency: Any) -> str:
+        value = AsuraIO(stream).read_utf8(padded=self.padded)
+        return intern(value) if self.interned else value
+
+    def read_cursor(self, cursor: AsuraCursor, dependency: Any) -> str:
+        value = cursor.read_utf8(padded=self.padded)
+        return intern(value) if self.interned else value
+
+    def _encode(self, value: str) -> bytes:
+        if len(value) == 0 or value[-1] != "\x00":
+            value += "\x00"
+        encoded = value.encode()
+        if self.padded:
+            encoded += bytes(bytes_to_word_boundary(len(encoded), WORD_SIZE))
+        return encoded
+
+    def pack(self, value: str, parts: List[bytes]):
+        parts.append(self._encode(value))
+
+    def size(self, value: str) -> int:
+        return len(self._encode(value))
+
+
+class Record(Field):
+    """
+    A nested record.
+    """
+
+    def __init__(self, name: str, schema: 'Schema'):
+        super().__init__(name)
+        self.schema = schema
+
+    def read(self, stream: BinaryIO, dependency: Any) -> Any:
+        return self.schema.read(stream)
+
+    def read_cursor(self, cursor: AsuraCursor, dependency: Any) -> Any:
+        return self.schema.read_cursor(cursor)
+
+    def pack(self, value: Any, parts: List[bytes]):
+        self.schema.pack_into(value, parts)
+
+    def size(self, value: Any) -> int:
+        return self.schema.size(value)
+
+    def from_json(self, value: Dict) -> Any:
+        return self.schema.from_dict(value)
+
+
+class Array(Field):
+    """
+    An array of records; its length is given by an earlier field (typically a Count).
+
+    Arrays of fixed size records are read (and written) with a single struct call; with records=True they're kept as
+    a RecordList, a structured array viewing the bytes read, instead of a list of models.
+    """
+
+    def __init__(self, name: str, schema: 'Schema', count: str, records: bool = False):
+        super().__init__(name)
+        self.schema = schema
+        self.depends = count
+        if records and schema.fixed_size is None:
+            raise ValueError(f"'{name}' can't be kept as records; {schema.cls.__name__} varies in size")
+        self.records = records
+
+    def read(self, stream: BinaryIO, count: int) -> List[Any]:
+        schema = self.schema
+        if schema.fixed_size is not None:
+            if self.records:
+                return read_records(schema, stream, count)
+            return schema.unpack_many(_read_exact(stream, schema.fixed_size * count))
+        return [schema.read(stream) for _ in range(count)]
+
+    def read_cursor(self, cursor: AsuraCursor, count: int) -> List[Any]:
+        schema = self.schema
+        if schema.fixed_size is not None:
+            size = schema.fixed_size * count
+            if not self.records:
+                return schema.unpack_many(cursor.read(size))
+            if isinstance(cursor.buffer, bytes):
+                # Immutable, so the records can view the buffer in place
+                start = cursor.offset
+                cursor.skip(size)
+                return RecordList(schema, view_records(schema, cursor.buffer, count, start))
+            # Other buffers (i.e. a mapped file) may change or close; the records are copied out
+            return RecordList(schema, view_records(schema, cursor.read(size), count))
+        read = schema.read_cursor
+        return [read(cursor) for _ in range(count)]
+
+    def pack(self, value: List[Any], parts: List[bytes]):
+        if isinstance(value, RecordList):
+            parts.append(value.tobytes())
+            return
+        pack_into = self.schema.pack_into
+        for item in value:
+            pack_into(item, parts)
+
+    def size(self, value: List[Any]) -> int:
+        schema = self.schema
+        if schema.fixed_size is not None:
+            return schema.fixed_size * len(value)
+        return sum(schema.size(item) for item in value)
+
+    def from_json(self, value: List[Dict]) -> List[Any]:
+        return [self.schema.from_dict(item) for item in value]
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    start = stream.tell()
+    data = stream.read(size)
+    if len(data) != size:
+        raise ParsingError(start + len(data))
+    return data
+
+
+def _create_layout(fields: List[Field]) -> Struct:
+    return Struct("<" + "".join(field.code for field in fields))
+
+
+class _Compiler:
+    # Writes the source of a schema's functions; values are kept in locals, and each run of fixed fields is one struct
+    def __init__(self, schema: 'Schema'):
+        self.schema = schema
+        self.env: Dict[str, Any] = {"_cls": schema.cls, "_read_exact": _read_exact}
+        # Runs of fixed fields (as lists) and variable fields
+        self.steps: List[Any] = []
+        fixed: List[Field] = []
+        for field in schema.fields:
+            if field.code is not None:
+                fixed.append(field)
+                continue
+            if fixed:
+                self.steps.append(fixed)
+                fixed = []
+            self.steps.append(field)
+        if fixed:
+            self.steps.append(fixed)
+
+    @staticmethod
+    def local(field: Field) -> str:
+        return f"f_{field.name}"
+
+    def bind(self, name: str, value: Any) -> str:
+        self.env[name] = value
+        return name
+
+    def construct(self) -> str:
+        # Extra keywords (i.e. a chunk's header) are passed as is
+        kwargs = "".join(f"{field.name}={self.local(field)}, " for field in self.schema.stored)
+        return f"_cls({kwargs}**extra)"
+
+    def decode(self, lines: List[str], fields: List[Field], prefix: str):
+        # Only fields which convert their values pay for it
+        for k, field in enumerate(fields):
+            if type(field).decode is not Field.decode:
+                decode = self.bind(f"_decode_{prefix}_{k}", field.decode)
+                lines.append(f"    {self.local(field)} = {decode}({self.local(field)})")
+
+    def reader(self, cursor: bool) -> List[str]:
+        lines = ["def read(source, extra):"]
+        for i, step in enumerate(self.steps):
+            if isinstance(step, list):
+                layout = self.bind(f"_layout_{i}", _create_layout(step))
+                size = self.env[layout].size
+                targets = "".join(f"{self.local(field)}, " for field in step)
+                if cursor:
+                    lines.append(f"    {targets}= {layout}.unpack_from(source.buffer, source._advance({size}))")
+                else:
+                    lines.append(f"    {targets}= {layout}.unpack(_read_exact(source, {size}))")
+                self.decode(lines, step, str(i))
+            else:
+                field = self.bind(f"_field_{i}", step)
+                method = "read_cursor" if cursor else "read"
+                dependency = "None" if step.depends is None else f"f_{step.depends}"
+                lines.append(f"    {self.local(step)} = {field}.{method}(source, {dependency})")
+        lines.append(f"    return {self.construct()}")
+        return lines
+
+    def value(self, field: Field, prefix: str) -> str:
+        if type(field).get is Field.get:
+            value = f"value.{field.name}"
+        else:
+            value = f"{self.bind(f'_get_{prefix}', field.get)}(value)"
+        if type(field).encode is not Field.encode:
+            value = f"{self.bind(f'_encode_{prefix}', field.encode)}({value})"
+        return value
+
+    def packer(self) -> List[str]:
+        lines = ["def pack_into(value, parts):"]
+        for i, step in enumerate(self.steps):
+            if isinstance(step, list):
+                layout = self.bind(f"_layout_{i}", _create_layout(step))
+                values = ", ".join(self.value(field, f"{i}_{k}") for k, field in enumerate(step))
+                lines.append(f"    parts.append({layout}.pack({values}))")
+            else:
+                field = self.bind(f"_field_{i}", step)
+                lines.append(f"    {field}.pack({self.value(step, str(i))}, parts)")
+        return lines
+
+    def from_raw(self) -> List[str]:
+        # Fixed size records only; creates a record from its unpacked values
+        fields = self.steps[0]
+        lines = [f"def from_raw({', '.join(self.local(field) for field in fields)}):", "    extra = {}"]
+        self.decode(lines, fields, "raw")
+        lines.append(f"    return {self.construct()}")
+        return lines
+
+    def compile(self, lines: List[str]) -> Callable:
+        name = lines[0][len("def "):lines[0].index("(")]
+        code = compile("\n".join(lines), f"<schema {self.schema.cls.__name__}.{name}>", "exec")
+        namespace = dict(self.env)
+        exec(code, namespace)
+        return namespace[name]
+
+
+class Schema:
+    """
+    Declares the binary layout of a model, as a list of fields.
+
+    Each schema is compiled once, when it's created, into specialized functions; consecutive fixed size fields share
+    a struct, so reading or writing a model makes one struct (or stream) call per run of fixed fields. Sizes are
+    calculated without writing.
+    """
+
+    def __init__(self, cls: Type, fields: List[Field]):
+        """
+        :param cls: The model; it's constructed with the stored fields as keywords.
+        :param fields: The fields, in the order they are serialized.
+        """
+        self.cls = cls
+        self.fields = fields
+        self.stored = [field for field in fields if field.stored]
+        self._variable = [field for field in fields if field.code is None]
+        self._fixed_bytes = _create_layout([field for field in fields if field.code is not None]).size
+        # The size of every record; None when records vary in size
+        self.fixed_size: Optional[int] = None if self._variable else self._fixed_bytes
+
+        compiler = _Compiler(self)
+        self._read = compiler.compile(compiler.reader(cursor=False))
+        self._read_cursor = compiler.compile(compiler.reader(cursor=True))
+        self.pack_into: Callable[[Any, List[bytes]], None] = compiler.compile(compiler.packer())
+        if self.fixed_size is not None and len(fields) > 0:
+            self._layout = _create_layout(fields)
+            self._from_raw = compiler.compile(compiler.from_raw())
+
+    def read(self, stream: BinaryIO, **extra) -> Any:
+        """
+        Reads a model from a stream.
+
+        :param stream: The stream.
+        :param extra: Keywords passed to the model, which aren't part of the layout; i.e. a chunk's header.
+        :return: The model.
+        :raises ParsingError: raised when the stream ends before the model does.
+        """
+        return self._read(stream, extra)
+
+    def read_cursor(self, cursor: AsuraCursor, **extra) -> Any:
+        """
+        Reads a model from a cursor.
+
+        :param cursor: The cursor.
+        :param extra: Keywords passed to the model, which aren't part of the layout; i.e. a chunk's header.
+        :return: The model.
+        :raises ParsingError: raised when the cursor ends before the model does.
+        """
+        return self._read_cursor(cursor, extra)
+
+    def unpack_many(self, data: bytes) -> List[Any]:
+        """
+        Reads consecutive records from a buffer; only for fixed size records.
+        """
+        from_raw = self._from_raw
+        return [from_raw(*raw) for raw in self._layout.iter_unpack(data)]
+
+    def pack(self, value: Any) -> bytes:
+        """
+        Serializes a model.
+
+        :param value: The model.
+        :return: The serialized model.
+        """
+        parts: List[bytes] = []
+        self.pack_into(value, parts)
+        return b"".join(parts)
+
+    def write(self, stream: BinaryIO, value: Any) -> int:
+        """
+        Writes a model to a stream, in a single write.
+
+        :param stream: The stream.
+        :param value: The model.
+        :return: The number of bytes written.
+        """
+        return stream.write(self.pack(value))
+
+    def size(self, value: Any) -> int:
+        """
+        Calculates the serialized size of a model, without serializing it.
+
+        :param value: The model.
+        :return: The size in bytes.
+        """
+        size = self._fixed_bytes
+        for field in self._variable:
+            size += field.size(field.get(value))
+        return size
+
+    def from_dict(self, values: Dict[str, Any], **extra) -> Any:
+        """
+        Creates a model from its unpacked json; i.e. to repack a chunk.
+
+        :param values: The model's fields; keys which aren't stored fields are ignored.
+        :param extra: Keywords passed to the model, which aren't part of the layout; i.e. a chunk's header.
+        :return: The model.
+        """
+        kwargs = {field.name: field.from_json(values[field.name]) for field in self.stored}
+        return self.cls(**extra, **kwargs)
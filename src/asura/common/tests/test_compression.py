@@ -0,0 +1,54 @@
+import random
+from io import BytesIO
+
+import pytest
+
+from asura.common.compression import CompressionPolicy, STORED, BALANCED, FAST, MAX, PRESETS
+from asura.common.enums import ArchiveType
+from asura.common.models.archive import ZbbArchive
+
+BLOCK_SIZE = 64 * 1024
+
+
+def noise(size: int, seed: int, alphabet: int = 256) -> bytes:
+    generator = random.Random(seed)
+    return bytes(generator.randrange(alphabet) for _ in range(size))
+
+
+def test_choose_level():
+    policy = CompressionPolicy.preset(BALANCED)
+    assert policy.choose_level(noise(BLOCK_SIZE, 0))[0] == STORED
+    level, ratio = policy.choose_level(bytes(range(256)) * 256)
+    assert level == 6 and ratio < 0.1
+    # Half entropy data compresses, but poorly
+    policy = CompressionPolicy(9, fast_ratio=0.5)
+    assert policy.choose_level(noise(BLOCK_SIZE, 1, 128))[0] == 1
+    # The default policy doesn't sample
+    assert CompressionPolicy().choose_level(noise(BLOCK_SIZE, 2)) == (-1, None)
+    for name in PRESETS:
+        assert CompressionPolicy.preset(name, BLOCK_SIZE).block_size == BLOCK_SIZE
+    with pytest.raises(NotImplementedError):
+        CompressionPolicy.preset("slow")
+
+
+@pytest.mark.parametrize("name", [FAST, BALANCED, MAX])
+def test_compress_to_stream(name: str):
+    data = noise(BLOCK_SIZE, 3) + bytes(range(256)) * 512 + noise(BLOCK_SIZE // 2, 4)
+    policy = CompressionPolicy.preset(name, BLOCK_SIZE)
+    with BytesIO() as packed:
+        archive = ZbbArchive.compress_to_stream(BytesIO(data), packed, policy=policy)
+        assert len(archive.blocks) == 4
+        stats = archive.block_stats
+        assert [block.size for block in stats] == [BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE // 2]
+        # Noise is stored (a little larger than the original), the pattern is compressed
+        assert stats[0].level == STORED and stats[0].ratio > 1
+        assert stats[1].level != STORED and stats[1].ratio < 0.1
+        assert all(block.throughput > 0 for block in stats)
+
+        packed.seek(0)
+        read = ZbbArchive.read(packed, ArchiveType.read(packed))
+        assert [block.size for block in read.blocks] == [block.size for block in archive.blocks]
+        assert read.read_range(packed, BLOCK_SIZE - 10, 20) == data[BLOCK_SIZE - 10:BLOCK_SIZE + 10]
+        with BytesIO() as unpacked:
+            read.decompress_to_stream(packed, unpacked)
+            assert unpacked.getvalue() == data
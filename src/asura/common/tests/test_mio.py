@@ -2,7 +2,8 @@ from io import BytesIO
 from typing import Iterable
 
 from asura.common.config import WORD_SIZE
-from asura.common.mio import AsuraIO, bytes_to_word_boundary
+from asura.common.error import ParsingError
+from asura.common.mio import AsuraIO, AsuraCursor, bytes_to_word_boundary
 
 tf = [True, False]
 
@@ -151,3 +152,49 @@ def test_write_utf16():
 
     for args in zip(tf, tf):
         do_test(strings, *args)
+
+
+def test_cursor_matches_stream():
+    buffer = bytearray()
+    for value in strings:
+        with BytesIO() as stream:
+            with AsuraIO(stream) as writer:
+                writer.write_int32(len(value), signed=True)
+                writer.write_utf8(value, padded=True)
+                writer.write_bool(True)
+                writer.write_utf16(value, write_size=True)
+                writer.write_int16(7)
+                writer.write_utf8_list(value.split(" "))
+            buffer += stream.getvalue()
+    data = bytes(buffer)
+
+    cursor = AsuraCursor(data)
+    with BytesIO(data) as stream:
+        with AsuraIO(stream) as reader:
+            for _ in strings:
+                assert cursor.read_int32(signed=True) == reader.read_int32(signed=True)
+                assert cursor.read_utf8(padded=True) == reader.read_utf8(padded=True)
+                assert cursor.read_bool() == reader.read_bool()
+                assert cursor.read_utf16(read_size=True) == reader.read_utf16(read_size=True)
+                assert cursor.read_int16() == reader.read_int16()
+                assert cursor.read_utf8_list() == reader.read_utf8_list()
+                assert cursor.offset == stream.tell()
+    assert cursor.remaining == 0
+
+
+def test_cursor_bounds():
+    cursor = AsuraCursor(b"\x01\x00\x00\x00abc", end=6)
+    assert cursor.read_int32() == 1
+    try:
+        cursor.read_int32()
+    except ParsingError as error:
+        assert error.index == 4
+    else:
+        assert False, "Read past the end of the cursor"
+    # Unterminated strings stop at the end, not at the end of the buffer
+    try:
+        cursor.read_utf8()
+    except ParsingError as error:
+        assert error.index == 6
+    else:
+        assert False, "Read past the end of the cursor"
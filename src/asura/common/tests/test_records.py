@@ -0,0 +1,105 @@
+import json
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+from asura.common.enums import ChunkType
+from asura.common.error import ParsingError
+from asura.common.mio import AsuraCursor, EnhancedJSONEncoder
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.hsbb import HsbbChunk, HsbbDesc, HSBB_DESC_SCHEMA
+from asura.common.records import RecordList, record_dtype, view_records
+
+
+def create_chunk() -> HsbbChunk:
+    descriptions = [HsbbDesc(bytes(range(i, i + 24)), i) for i in range(3)]
+    return HsbbChunk(ChunkHeader(ChunkType.HSBB, 0, 0, bytes(4)), "boxes", descriptions)
+
+
+def test_dtype():
+    dtype = record_dtype(HSBB_DESC_SCHEMA)
+    assert dtype.names == ("data", "one")
+    assert dtype.itemsize == HSBB_DESC_SCHEMA.fixed_size == 28
+
+
+def test_read_as_records():
+    chunk = create_chunk()
+    body = HSBB_DESC_SCHEMA.pack(chunk.descriptions[0])
+    with BytesIO() as stream:
+        chunk.write(stream)
+        data = stream.getvalue()
+    from_stream = HsbbChunk.read(BytesIO(data), chunk.header)
+    from_cursor = HsbbChunk.read_cursor(AsuraCursor(data), chunk.header)
+    for read in [from_stream, from_cursor]:
+        assert isinstance(read.descriptions, RecordList)
+        assert read == chunk
+        assert read.descriptions[1] == chunk.descriptions[1]
+        assert read.descriptions_array["one"].tolist() == [0, 1, 2]
+        assert read.descriptions_array["data"][2, 0] == 2
+    # Bytes are immutable, so the cursor's records view them in place
+    assert np.shares_memory(from_cursor.descriptions_array, np.frombuffer(data, np.uint8))
+    assert chunk.descriptions_array.tobytes()[:28] == body
+    with BytesIO() as stream:
+        from_cursor.write(stream)
+        assert stream.getvalue() == data
+
+
+def test_records_unpack_as_json():
+    chunk = create_chunk()
+    with BytesIO() as stream:
+        chunk.write(stream)
+        read = HsbbChunk.read(BytesIO(stream.getvalue()), chunk.header)
+    assert json.dumps(read.descriptions, cls=EnhancedJSONEncoder) == \
+           json.dumps(chunk.descriptions, cls=EnhancedJSONEncoder)
+
+
+def test_view_out_of_bounds():
+    with pytest.raises(ParsingError):
+        view_records(HSBB_DESC_SCHEMA, bytes(50), 2)
+
+
+def test_edited_records_are_written():
+    chunk = create_chunk()
+    with BytesIO() as stream:
+        chunk.write(stream)
+        data = stream.getvalue()
+    read = HsbbChunk.read_cursor(AsuraCursor(data), chunk.header)
+    read.descriptions[0].one = 7
+    read.descriptions[1] = HsbbDesc(bytes(24), 8)
+    assert read.descriptions[0].one == 7
+    assert read.descriptions_array["one"].tolist() == [7, 8, 2]
+    # The chunk it was read from is untouched
+    assert HsbbChunk.read_cursor(AsuraCursor(data), chunk.header) == chunk
+
+    read.descriptions.append(HsbbDesc(bytes(24), 9))
+    del read.descriptions[2]
+    for description in read.descriptions:
+        description.one += 1
+    with BytesIO() as stream:
+        read.write(stream)
+        written = HsbbChunk.read(BytesIO(stream.getvalue()), chunk.header)
+    assert [description.one for description in written.descriptions] == [8, 9, 10]
+    assert written.descriptions[1].data == bytes(24)
+
+
+def test_records_are_written_back_once(monkeypatch):
+    chunk = create_chunk()
+    with BytesIO() as stream:
+        chunk.write(stream)
+        data = stream.getvalue()
+    read = HsbbChunk.read_cursor(AsuraCursor(data), chunk.header)
+    records = read.descriptions
+    taken = list(records)
+    taken[0].one = 7
+    assert records.array["one"].tolist() == [7, 1, 2]
+    # Written back; later uses are straight from the array
+    packed = []
+    monkeypatch.setattr(HSBB_DESC_SCHEMA, "pack", lambda record: packed.append(record))
+    assert records.tobytes() == records.array.tobytes()
+    assert records == [HsbbDesc(description.data, description.one) for description in taken]
+    assert json.loads(json.dumps(records, cls=EnhancedJSONEncoder))[0]["one"] == 7
+    assert packed == []
+    # A record taken before the write back is forgotten by the list
+    taken[1].one = 8
+    assert records[1].one == 1
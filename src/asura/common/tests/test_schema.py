@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from io import BytesIO
+from os.path import join
+from tempfile import TemporaryDirectory
+from typing import List
+
+from asura.common.enums import ChunkType
+from asura.common.error import ParsingError
+from asura.common.mio import AsuraIO, AsuraCursor
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats import HmptChunk, HmptBlock, HsbbChunk, HsklChunk, HsndChunk, FontInfoChunk, \
+    HskeChunk, ResourceListChunk, ResourceDescription
+from asura.common.models.chunks.formats.hsbb import HsbbDesc
+from asura.common.models.chunks.formats.hsnd import HsndBlock
+from asura.common.schema import Schema, Int16, Bool, Word, Utf8, Count, Array, Record
+
+
+@dataclass
+class Point:
+    x: int = None
+    y: int = None
+
+
+@dataclass
+class Shape:
+    name: str = None
+    closed: bool = None
+    origin: Point = None
+    points: List[Point] = None
+    tag: bytes = None
+
+
+POINT_SCHEMA = Schema(Point, [Int16("x", signed=True), Int16("y", signed=True)])
+SHAPE_SCHEMA = Schema(Shape, [
+    Utf8("name", padded=True),
+    Bool("closed"),
+    Record("origin", POINT_SCHEMA),
+    Count("count", of="points"),
+    Array("points", POINT_SCHEMA, count="count"),
+    Word("tag"),
+])
+
+
+def test_schema_matches_asura_io():
+    shape = Shape("triangle", True, Point(-1, 2), [Point(0, 0), Point(5, -5), Point(10, 0)], b"abcd")
+    with BytesIO() as stream:
+        with AsuraIO(stream) as writer:
+            writer.write_utf8(shape.name, padded=True)
+            writer.write_bool(shape.closed)
+            writer.write_int16(-1, signed=True)
+            writer.write_int16(2, signed=True)
+            writer.write_int32(3)
+            for point in shape.points:
+                writer.write_int16(point.x, signed=True)
+                writer.write_int16(point.y, signed=True)
+            writer.write_word(shape.tag)
+        expected = stream.getvalue()
+
+    packed = SHAPE_SCHEMA.pack(shape)
+    assert packed == expected
+    assert SHAPE_SCHEMA.size(shape) == len(expected)
+    assert POINT_SCHEMA.fixed_size == 4 and SHAPE_SCHEMA.fixed_size is None
+    with BytesIO(packed) as stream:
+        assert SHAPE_SCHEMA.read(stream) == shape
+    cursor = AsuraCursor(packed)
+    assert SHAPE_SCHEMA.read_cursor(cursor) == shape
+    assert cursor.remaining == 0
+
+    try:
+        with BytesIO(packed[:-1]) as stream:
+            SHAPE_SCHEMA.read(stream)
+    except ParsingError as error:
+        assert error.index == len(packed) - 1
+    else:
+        assert False, "Short read was not detected"
+
+
+def create_chunks():
+    def header(type: ChunkType) -> ChunkHeader:
+        return ChunkHeader(type, 0, 1, bytes(4))
+
+    return [
+        HmptChunk(header(ChunkType.HMPT), "points", [HmptBlock("a", bytes(range(52))), HmptBlock("bb", bytes(52))]),
+        HsndChunk(header(ChunkType.HSND), "sound", [HsndBlock(bytes(range(64)))]),
+        HsbbChunk(header(ChunkType.HSBB), "box", [HsbbDesc(bytes(range(24)), 1), HsbbDesc(bytes(24), 1)]),
+        HsklChunk(header(ChunkType.HSKL), "parent", "child", 0, b"word"),
+        HskeChunk(header(ChunkType.HSKE), b"skel"),
+        FontInfoChunk(header(ChunkType.FONT_INFO), b"rsvd", b"data"),
+        ResourceListChunk(header(ChunkType.RESOURCE_LIST), [ResourceDescription("a.dds", 1, 2, 3)]),
+    ]
+
+
+def test_formats_round_trip():
+    with TemporaryDirectory() as root:
+        for i, chunk in enumerate(create_chunks()):
+            with BytesIO() as stream:
+                written = chunk.write(stream)
+                data = stream.getvalue()
+            assert written == len(data) == chunk.byte_size()
+            with BytesIO(data) as stream:
+                assert type(chunk).read(stream, chunk.header) == chunk
+            assert type(chunk).read_cursor(AsuraCursor(data), chunk.header) == chunk
+
+            chunk_path = join(root, f"Chunk {i}")
+            assert chunk.unpack(chunk_path)
+            repacked = type(chunk).repack(chunk_path + f".{chunk.header.type.value}")
+            assert repacked == chunk
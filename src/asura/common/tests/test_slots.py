@@ -0,0 +1,40 @@
+import pickle
+from dataclasses import dataclass
+
+import pytest
+
+from asura.common.enums import ChunkType
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.unparsed import SparseChunk
+from asura.common.models.slots import slotted
+
+
+@slotted
+@dataclass
+class Point:
+    x: int
+    y: int = 0
+
+
+def test_slotted_has_no_dict():
+    point = Point(1)
+    assert Point.__slots__ == ("x", "y")
+    assert point == Point(1, 0)
+    with pytest.raises(AttributeError):
+        point.z = 2
+
+
+def test_slotted_sparse_chunk():
+    header = ChunkHeader(ChunkType.HSND, 32, 1, bytes(4))
+    chunk = SparseChunk(header, data_start=16)
+    assert not hasattr(chunk, "__dict__")
+    assert pickle.loads(pickle.dumps(chunk)) == chunk
+
+
+def test_slotted_rejects_explicit_slots():
+    with pytest.raises(TypeError):
+        @slotted
+        @dataclass
+        class Explicit:
+            __slots__ = ("x",)
+            x: int
@@ -0,0 +1,10 @@
+__all__ = [
+    "KeyIndex",
+    "build_key_index",
+    "SearchIndex",
+    "SearchHit",
+    "build_search_index",
+]
+
+from asura.localization.key_index import KeyIndex, build_key_index
+from asura.localization.search_index import SearchIndex, SearchHit, build_search_index
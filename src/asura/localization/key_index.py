@@ -0,0 +1,144 @@
+from typing import Dict, List, Tuple, BinaryIO, Optional, Iterable
+
+from asura.common.enums import ArchiveType, ChunkType, LangCode
+from asura.common.mio import PackIO
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import SparseChunk
+from asura.common.models.chunks.formats.htxt import HString, HTextChunk, CURRENT_HTEXT_VERSION
+from asura.packer.unpacker import UnpackOptions, cache_decompressed
+
+# archive index, offset, length
+KeyLocation = Tuple[int, int, int]
+
+CURRENT_KEY_INDEX_VERSION = 1
+
+
+class KeyIndex:
+    """
+    Maps (key, language) to where the string lives in an archive, so a single string can be read without parsing
+    its HTextChunk.
+
+    Compressed (Zbb) archives are indexed from their decompressed cache (see UnpackOptions), which lookups then read.
+    """
+
+    def __init__(self):
+        self.archives: List[str] = []
+        self.locations: Dict[LangCode, Dict[str, KeyLocation]] = {}
+        self._streams: Dict[int, BinaryIO] = {}
+
+    def __enter__(self) -> 'KeyIndex':
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        for stream in self._streams.values():
+            stream.close()
+        self._streams.clear()
+
+    @property
+    def languages(self) -> List[LangCode]:
+        return list(self.locations.keys())
+
+    def keys(self, lang: LangCode) -> Iterable[str]:
+        return self.locations.get(lang, {}).keys()
+
+    def _get_archive_index(self, path: str) -> int:
+        try:
+            return self.archives.index(path)
+        except ValueError:
+            self.archives.append(path)
+            return len(self.archives) - 1
+
+    def add_archive(self, path: str, options: UnpackOptions = None) -> int:
+        """
+        Indexes every HTextChunk in an archive.
+
+        :param path: The path to a Folder or Zbb archive.
+        :param options: Where Zbb archives are decompressed to; an existing cache of the same size is reused.
+        :return: The number of strings indexed.
+        """
+        path = cache_decompressed(path, options)
+        with open(path, "rb") as stream:
+            return self.add_stream(stream, path)
+
+    def add_stream(self, stream: BinaryIO, path: str) -> int:
+        """
+        Indexes every HTextChunk in an archive stream.
+
+        :param stream: The archive's stream, at the start of the archive.
+        :param path: The path lookups will read the strings from.
+        :return: The number of strings indexed.
+        """
+        type = ArchiveType.read(stream)
+        if type != ArchiveType.Folder:
+            raise NotImplementedError(f"Not Supported ~ {type}; see add_archive for compressed archives.")
+        archive = FolderArchive.read(stream, type)
+        archive_index = self._get_archive_index(path)
+        indexed = 0
+        for chunk in archive.chunks:
+            if not isinstance(chunk, SparseChunk) or chunk.header.type != ChunkType.H_TEXT:
+                continue
+            if chunk.header.version != CURRENT_HTEXT_VERSION:
+                continue
+            stream.seek(chunk.data_start)
+            layout = HTextChunk.scan(stream)
+            locations = self.locations.setdefault(layout.language, {})
+            for span in layout.spans:
+                locations[span.key] = (archive_index, span.offset, span.length)
+            indexed += len(layout.spans)
+        return indexed
+
+    def locate(self, key: str, lang: LangCode) -> Optional[KeyLocation]:
+        return self.locations.get(lang, {}).get(key)
+
+    def _get_stream(self, archive_index: int) -> BinaryIO:
+        stream = self._streams.get(archive_index)
+        if stream is None:
+            stream = self._streams[archive_index] = open(self.archives[archive_index], "rb")
+        return stream
+
+    def lookup(self, key: str, lang: LangCode) -> Optional[HString]:
+        """
+        Reads a single string from its archive.
+
+        :param key: The key of the string.
+        :param lang: The language of the string.
+        :return: The string, or None if the key is not indexed for that language.
+        """
+        location = self.locate(key, lang)
+        if location is None:
+            return None
+        archive_index, offset, length = location
+        stream = self._get_stream(archive_index)
+        stream.seek(offset)
+        (part,), _ = HString.unpack_table(stream.read(length), 1)
+        part.key = key
+        return part
+
+    def save(self, path: str, overwrite: bool = True) -> bool:
+        meta = {
+            'version': CURRENT_KEY_INDEX_VERSION,
+            'archives': self.archives,
+            'locations': {lang.value: locations for lang, locations in self.locations.items()},
+        }
+        return PackIO.write_json(path, meta, overwrite)
+
+    @classmethod
+    def load(cls, path: str) -> 'KeyIndex':
+        meta = PackIO.read_json(path)
+        if meta['version'] != CURRENT_KEY_INDEX_VERSION:
+            raise ValueError(f"Unsupported key index version ~ {meta['version']}")
+        index = KeyIndex()
+        index.archives = meta['archives']
+        for lang, locations in meta['locations'].items():
+            index.locations[LangCode(int(lang))] = {key: tuple(location) for key, location in locations.items()}
+        return index
+
+
+def build_key_index(paths: Iterable[str], options: UnpackOptions = None) -> KeyIndex:
+    index = KeyIndex()
+    for path in paths:
+        index.add_archive(path, options)
+    return index
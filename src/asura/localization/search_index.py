@@ -0,0 +1,222 @@
+import re
+from dataclasses import dataclass
+from os import stat
+from typing import Dict, List, Set, Optional, Iterable, BinaryIO
+
+from asura.common.enums import ArchiveType, ChunkType, LangCode
+from asura.common.mio import PackIO, split_asura_richtext, RICHTEXT_HEAD
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import SparseChunk
+from asura.common.models.chunks.formats.htxt import HTextChunk, CURRENT_HTEXT_VERSION
+from asura.packer.unpacker import UnpackOptions, cache_decompressed
+
+CURRENT_SEARCH_INDEX_VERSION = 1
+# Removed documents are compacted away once they make up this share of the documents
+COMPACT_RATIO = 0.5
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def strip_asura_richtext(text: str) -> str:
+    """
+    Removes the richtext markup from an common unicode 'richtext' string.
+    :param text: The text to strip.
+    :return: The raw text parts, joined.
+    """
+    return "".join(part for part in split_asura_richtext(text) if not part.startswith(RICHTEXT_HEAD))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.casefold())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+@dataclass
+class SearchHit:
+    key: str = None
+    language: LangCode = None
+    archive: str = None
+    # Index of the HTextChunk within the archive
+    chunk: int = None
+    # Position of the HTextChunk's body within the (decompressed) archive
+    offset: int = None
+    text: str = None
+
+
+@dataclass
+class _IndexedArchive:
+    size: int = None
+    mtime: int = None
+    documents: List[int] = None
+
+
+class SearchIndex:
+    """
+    An inverted index over the (markup-free) text of every HString in a set of archives.
+
+    Archives are indexed independently; updating an archive only re-reads that archive, and only if its size or
+    modification time changed. Compressed (Zbb) archives are read from their decompressed cache (see UnpackOptions).
+    """
+
+    def __init__(self):
+        self.archives: Dict[str, _IndexedArchive] = {}
+        self.documents: List[Optional[SearchHit]] = []
+        self.postings: Dict[str, Set[int]] = {}
+        # Documents removed (None) since the last compaction
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return sum(len(archive.documents) for archive in self.archives.values())
+
+    def _add_document(self, hit: SearchHit) -> int:
+        document = len(self.documents)
+        self.documents.append(hit)
+        for token in set(tokenize(hit.text)):
+            self.postings.setdefault(token, set()).add(document)
+        return document
+
+    def remove_archive(self, path: str) -> bool:
+        archive = self.archives.pop(path, None)
+        if archive is None:
+            return False
+        for document in archive.documents:
+            hit = self.documents[document]
+            self.documents[document] = None
+            for token in set(tokenize(hit.text)):
+                postings = self.postings[token]
+                postings.discard(document)
+                if len(postings) == 0:
+                    del self.postings[token]
+        self._removed += len(archive.documents)
+        if self._removed > len(self.documents) * COMPACT_RATIO:
+            self.compact()
+        return True
+
+    def compact(self):
+        """
+        Drops removed documents, renumbering the rest; index order is kept.
+        """
+        renumbered: Dict[int, int] = {}
+        documents = []
+        for document, hit in enumerate(self.documents):
+            if hit is not None:
+                renumbered[document] = len(documents)
+                documents.append(hit)
+        self.documents = documents
+        for archive in self.archives.values():
+            archive.documents = [renumbered[document] for document in archive.documents]
+        self.postings = {token: {renumbered[document] for document in postings}
+                         for token, postings in self.postings.items()}
+        self._removed = 0
+
+    def update_archive(self, path: str, force: bool = False, options: UnpackOptions = None) -> bool:
+        """
+        Indexes an archive, replacing any previous entries for it.
+
+        :param path: The path to a Folder or Zbb archive.
+        :param force: Re-index the archive even if it appears unchanged.
+        :param options: Where Zbb archives are decompressed to; an existing cache of the same size is reused.
+        :return: True if the archive was (re)indexed.
+        """
+        info = stat(path)
+        previous = self.archives.get(path)
+        if not force and previous is not None and previous.size == info.st_size and previous.mtime == info.st_mtime_ns:
+            return False
+        with open(cache_decompressed(path, options), "rb") as stream:
+            hits = list(self._read_hits(stream, path))
+        self.remove_archive(path)
+        documents = [self._add_document(hit) for hit in hits]
+        self.archives[path] = _IndexedArchive(info.st_size, info.st_mtime_ns, documents)
+        return True
+
+    @staticmethod
+    def _read_hits(stream: BinaryIO, path: str) -> Iterable[SearchHit]:
+        type = ArchiveType.read(stream)
+        if type != ArchiveType.Folder:
+            raise NotImplementedError(f"Not Supported ~ {type}")
+        archive = FolderArchive.read(stream, type)
+        for i, chunk in enumerate(archive.chunks):
+            if not isinstance(chunk, SparseChunk) or chunk.header.type != ChunkType.H_TEXT:
+                continue
+            if chunk.header.version != CURRENT_HTEXT_VERSION:
+                continue
+            loaded: HTextChunk = chunk.load(stream)
+            for part in loaded.parts:
+                text = strip_asura_richtext(part.raw_text)
+                yield SearchHit(part.key, loaded.language, path, i, chunk.data_start, text)
+
+    def search(self, query: str, language: LangCode = None, limit: int = None) -> List[SearchHit]:
+        """
+        Finds every string containing the query as a phrase; case and punctuation are ignored.
+
+        :param query: The phrase to search for.
+        :param language: Only return strings of this language, None will return all languages.
+        :param limit: The maximum number of hits to return, None will return all hits.
+        :return: The matching strings, in index order.
+        """
+        tokens = tokenize(query)
+        if len(tokens) == 0:
+            return []
+        postings = []
+        for token in set(tokens):
+            documents = self.postings.get(token)
+            if documents is None:
+                return []
+            postings.append(documents)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for documents in postings[1:]:
+            candidates &= documents
+        phrase = " ".join(tokens)
+        hits = []
+        for document in sorted(candidates):
+            hit = self.documents[document]
+            if language is not None and hit.language != language:
+                continue
+            # Tokens only tell us the words are present; the phrase has to be checked against the text
+            if len(tokens) > 1 and f" {phrase} " not in f" {_normalize(hit.text)} ":
+                continue
+            hits.append(hit)
+            if limit is not None and len(hits) >= limit:
+                break
+        return hits
+
+    def save(self, path: str, overwrite: bool = True) -> bool:
+        # Postings are rebuilt on load; only the archives and their strings are stored
+        archives = {}
+        for archive_path, archive in self.archives.items():
+            hits = [self.documents[document] for document in archive.documents]
+            archives[archive_path] = {
+                'size': archive.size,
+                'mtime': archive.mtime,
+                'strings': [(hit.key, hit.language, hit.chunk, hit.offset, hit.text) for hit in hits],
+            }
+        meta = {
+            'version': CURRENT_SEARCH_INDEX_VERSION,
+            'archives': archives,
+        }
+        return PackIO.write_json(path, meta, overwrite)
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        meta = PackIO.read_json(path)
+        if meta['version'] != CURRENT_SEARCH_INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version ~ {meta['version']}")
+        index = SearchIndex()
+        for archive_path, archive in meta['archives'].items():
+            documents = []
+            for key, language, chunk, offset, text in archive['strings']:
+                hit = SearchHit(key, LangCode(language), archive_path, chunk, offset, text)
+                documents.append(index._add_document(hit))
+            index.archives[archive_path] = _IndexedArchive(archive['size'], archive['mtime'], documents)
+        return index
+
+
+def build_search_index(paths: Iterable[str], index: SearchIndex = None, options: UnpackOptions = None) -> SearchIndex:
+    index = index or SearchIndex()
+    for path in paths:
+        index.update_archive(path, options=options)
+    return index
@@ -0,0 +1,12 @@
+from asura.common.enums import ChunkType, LangCode
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats import HString, HTextChunk
+
+english = {"greeting": "Hello", "farewell": "Goodbye, \ue003b\ue004minion\ue003/b\ue004"}
+french = {"greeting": "Bonjour", "farewell": "Au revoir"}
+
+
+def create_htext_chunk(language: LangCode, texts: dict) -> HTextChunk:
+    header = ChunkHeader(ChunkType.H_TEXT, 0, 4, bytes(4))
+    parts = [HString(key, [text], i) for i, (key, text) in enumerate(texts.items())]
+    return HTextChunk(header, "TEXT", parts, bytes(4), 0, language)
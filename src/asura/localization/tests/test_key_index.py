@@ -0,0 +1,58 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType, LangCode
+from asura.common.models.archive import FolderArchive, ZbbArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk
+from asura.localization import KeyIndex, build_key_index
+from asura.localization.tests.htext_helpers import create_htext_chunk, english, french
+from asura.packer.unpacker import UnpackOptions
+
+
+def write_archive(path: str):
+    archive = FolderArchive(ArchiveType.Folder, [
+        create_htext_chunk(LangCode.ENGLISH, english),
+        create_htext_chunk(LangCode.FRENCH, french),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ])
+    with open(path, "wb") as stream:
+        archive.write(stream)
+
+
+def test_lookup():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path)
+        with build_key_index([path]) as index:
+            for lang, texts in [(LangCode.ENGLISH, english), (LangCode.FRENCH, french)]:
+                for key, text in texts.items():
+                    part = index.lookup(key, lang)
+                    assert part.key == key
+                    assert part.raw_text == text
+            assert index.lookup("missing", LangCode.ENGLISH) is None
+            assert index.lookup("greeting", LangCode.GERMAN) is None
+
+
+def test_save_load():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path)
+        index_path = join(root, "keys.json")
+        with build_key_index([path]) as index:
+            index.save(index_path)
+        with KeyIndex.load(index_path) as index:
+            assert set(index.languages) == {LangCode.ENGLISH, LangCode.FRENCH}
+            assert index.lookup("farewell", LangCode.FRENCH).raw_text == french["farewell"]
+
+
+def test_compressed_archive():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path)
+        zbb_path = join(root, "text.zbb.asr")
+        with open(path, "rb") as in_stream, open(zbb_path, "wb") as out_stream:
+            ZbbArchive.compress_to_stream(in_stream, out_stream)
+        options = UnpackOptions(output_directory=join(root, "unpack"))
+        with build_key_index([zbb_path], options) as index:
+            assert index.archives == [options.create_decompressed_cache_path("text.zbb.asr")]
+            assert index.lookup("farewell", LangCode.ENGLISH).raw_text == english["farewell"]
@@ -0,0 +1,100 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType, LangCode
+from asura.common.models.archive import FolderArchive, ZbbArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk
+from asura.common.models.chunks.formats import HString, HTextChunk
+from asura.localization import SearchIndex, build_search_index
+from asura.packer.unpacker import UnpackOptions
+
+
+def create_htext_chunk(language: LangCode, texts: dict) -> HTextChunk:
+    header = ChunkHeader(ChunkType.H_TEXT, 0, 4, bytes(4))
+    parts = [HString(key, text, i) for i, (key, text) in enumerate(texts.items())]
+    return HTextChunk(header, "TEXT", parts, bytes(4), 0, language)
+
+
+def write_archive(path: str, english: dict, french: dict):
+    archive = FolderArchive(ArchiveType.Folder, [
+        create_htext_chunk(LangCode.ENGLISH, english),
+        create_htext_chunk(LangCode.FRENCH, french),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ])
+    with open(path, "wb") as stream:
+        archive.write(stream)
+
+
+english = {
+    "build": ["Build the ", "\ue003b\ue004", "Evil Lair"],
+    "lair": ["Your lair is evil."],
+}
+french = {
+    "build": ["Construire le repaire"],
+}
+
+
+def test_search():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path, english, french)
+        index = build_search_index([path])
+
+        hits = index.search("evil lair")
+        assert [(hit.key, hit.language) for hit in hits] == [("build", LangCode.ENGLISH)]
+        assert hits[0].text == "Build the Evil Lair"
+        assert hits[0].archive == path
+        assert hits[0].chunk == 0
+
+        assert {hit.key for hit in index.search("EVIL")} == {"build", "lair"}
+        assert index.search("b") == []  # markup is not indexed
+        assert [hit.key for hit in index.search("repaire", LangCode.FRENCH)] == ["build"]
+        assert index.search("repaire", LangCode.ENGLISH) == []
+
+
+def test_update_and_save():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path, english, french)
+        index = build_search_index([path])
+        assert not index.update_archive(path)
+
+        write_archive(path, {"lair": ["A new lair."]}, {})
+        assert index.update_archive(path, force=True)
+        assert index.search("evil") == []
+        assert [hit.key for hit in index.search("new lair")] == ["lair"]
+
+        index_path = join(root, "search.json")
+        index.save(index_path)
+        loaded = SearchIndex.load(index_path)
+        assert len(loaded) == len(index) == 1
+        assert loaded.search("new lair") == index.search("new lair")
+
+
+def test_updates_compact_removed_documents():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        index = SearchIndex()
+        for i in range(10):
+            write_archive(path, english, {"build": [f"Construire le repaire {i}"]})
+            index.update_archive(path, force=True)
+        assert len(index) == 3
+        assert len(index.documents) <= 2 * len(index)
+        assert [hit.text for hit in index.search("repaire")] == ["Construire le repaire 9"]
+        assert {hit.key for hit in index.search("evil")} == {"build", "lair"}
+
+
+def test_compressed_archive():
+    with TemporaryDirectory() as root:
+        path = join(root, "text.asr")
+        write_archive(path, english, french)
+        zbb_path = join(root, "text.zbb.asr")
+        with open(path, "rb") as in_stream, open(zbb_path, "wb") as out_stream:
+            ZbbArchive.compress_to_stream(in_stream, out_stream)
+        options = UnpackOptions(output_directory=join(root, "unpack"))
+        index = build_search_index([zbb_path], options=options)
+        hits = index.search("evil lair")
+        assert [(hit.key, hit.archive) for hit in hits] == [("build", zbb_path)]
+        # Offsets are in the decompressed archive
+        assert hits[0].offset == build_search_index([path]).search("evil lair")[0].offset
+        assert not index.update_archive(zbb_path, options=options)
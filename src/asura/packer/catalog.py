@@ -0,0 +1,382 @@
+import sqlite3
+import zlib
+from dataclasses import dataclass
+from os import stat
+from os.path import commonpath, normpath
+from typing import List, Optional, BinaryIO, Dict, Iterable, Tuple
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.factories import ArchiveParser
+from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.item_kind import RESOURCE, SOUND, RESOURCE_LIST, HMPT
+from asura.common.models.archive import ZbbArchive, ChunkTable, open_folder
+from asura.common.models.chunks import BaseChunk, ChunkHeader
+from asura.common.models.chunks.formats.asts import SoundChunk
+from asura.common.models.chunks.formats.hmpt import HmptChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk
+from asura.common.models.chunks.formats.rsfl import ResourceListChunk
+from asura.packer.unpacker import walk_directory
+
+CURRENT_CATALOG_VERSION = 1
+
+_CATALOGED_TYPES = [ChunkType.RESOURCE, ChunkType.SOUND, ChunkType.RESOURCE_LIST, ChunkType.HMPT]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    -- NULL for files which aren't (supported) archives; they're kept so a refresh can skip them
+    type TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    archive INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    reserved BLOB NOT NULL,
+    -- Position of the body in the (decompressed) archive
+    offset INTEGER NOT NULL,
+    -- The header's length; the size of the chunk, header included
+    length INTEGER NOT NULL,
+    PRIMARY KEY (archive, chunk)
+);
+CREATE INDEX IF NOT EXISTS chunks_type ON chunks (type);
+CREATE TABLE IF NOT EXISTS items (
+    archive INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    -- Position of the item's data in the (decompressed) archive; NULL if the chunk doesn't hold it
+    offset INTEGER,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS items_name ON items (name);
+"""
+
+
+def _is_within(path: str, directory: str) -> bool:
+    # Compares whole path components; '/x/game2.asr' isn't within '/x/gam'
+    try:
+        return commonpath([path, directory]) == normpath(directory)
+    except ValueError:  # One path is relative and the other absolute, or they're on different drives
+        return False
+
+
+@dataclass
+class CatalogChunk:
+    archive: str = None
+    # Index of the chunk within the archive
+    chunk: int = None
+    type: ChunkType = None
+    version: int = None
+    reserved: bytes = None
+    offset: int = None
+    length: int = None
+
+    @property
+    def header(self) -> ChunkHeader:
+        return ChunkHeader(self.type, self.length, self.version, self.reserved)
+
+
+@dataclass
+class CatalogItem:
+    archive: str = None
+    # Index of the chunk holding the item
+    chunk: int = None
+    kind: str = None
+    name: str = None
+    offset: int = None
+    size: int = None
+
+    @property
+    def has_data(self) -> bool:
+        return self.offset is not None
+
+
+@dataclass
+class RefreshStats:
+    # Files (re)scanned; new or changed since the last refresh
+    scanned: int = 0
+    # Files skipped, as their size and modification time were unchanged
+    unchanged: int = 0
+    # Files which no longer exist
+    removed: int = 0
+
+
+class AssetCatalog:
+    """
+    A SQLite catalog of every chunk in an install, and the names of the resources, sound clips, resource lists and
+    hmpt chunks they hold; lookups are queries, and items are read straight from their recorded offsets.
+
+    Compressed (Zbb) archives are cataloged by their decompressed offsets; reading from them only decompresses the
+    blocks an item overlaps. Files are only rescanned when their size or modification time changes.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        :param path: The database file; created if it doesn't exist. By default, the catalog is kept in memory.
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            with self.connection:
+                self.connection.execute("INSERT INTO meta VALUES ('version', ?)", (CURRENT_CATALOG_VERSION,))
+        elif row[0] != CURRENT_CATALOG_VERSION:
+            self.connection.close()
+            raise ValueError(f"Unsupported catalog version ~ {row[0]}")
+        # path -> the compressed archive's block table
+        self._compressed: Dict[str, ZbbArchive] = {}
+
+    def __enter__(self) -> 'AssetCatalog':
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    @property
+    def archives(self) -> List[str]:
+        rows = self.connection.execute("SELECT path FROM archives WHERE type IS NOT NULL ORDER BY path")
+        return [path for path, in rows]
+
+    def refresh(self, search_dir: str, force: bool = False) -> RefreshStats:
+        """
+        Catalogs every archive in a directory (see walk_directory); unchanged files are skipped, and files which no
+        longer exist are removed.
+
+        :param search_dir: The directory, i.e. the game's install.
+        :param force: Rescan every file, even if it's unchanged.
+        :return: The number of files scanned, skipped and removed.
+        """
+        stats = RefreshStats()
+        found = set()
+        for path, name in walk_directory(search_dir):
+            found.add(path)
+            if self.add_archive(path, name, force):
+                stats.scanned += 1
+            else:
+                stats.unchanged += 1
+        rows = self.connection.execute("SELECT path FROM archives").fetchall()
+        for path, in rows:
+            if path not in found and _is_within(path, search_dir):
+                self.remove_archive(path)
+                stats.removed += 1
+        return stats
+
+    def remove_archive(self, path: str) -> bool:
+        row = self.connection.execute("SELECT id FROM archives WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return False
+        with self.connection:
+            self._delete(row[0])
+        self._compressed.pop(path, None)
+        return True
+
+    def _delete(self, archive_id: int):
+        self.connection.execute("DELETE FROM items WHERE archive = ?", (archive_id,))
+        self.connection.execute("DELETE FROM chunks WHERE archive = ?", (archive_id,))
+        self.connection.execute("DELETE FROM archives WHERE id = ?", (archive_id,))
+
+    def add_archive(self, path: str, name: str = None, force: bool = False) -> bool:
+        """
+        Catalogs a file, replacing anything previously cataloged for it; files which aren't archives are recorded
+        (without chunks) so they can be skipped later.
+
+        :param path: The path to the file.
+        :param name: The name to record; by default, the path.
+        :param force: Rescan the file even if its size and modification time haven't changed.
+        :return: True if the file was scanned; False if it was unchanged.
+        """
+        info = stat(path)
+        row = self.connection.execute("SELECT id, size, mtime_ns FROM archives WHERE path = ?", (path,)).fetchone()
+        if not force and row is not None and row[1:] == (info.st_size, info.st_mtime_ns):
+            return False
+        self._compressed.pop(path, None)
+        with self.connection:
+            if row is not None:
+                self._delete(row[0])
+            cursor = self.connection.execute(
+                "INSERT INTO archives (path, name, type, size, mtime_ns) VALUES (?, ?, NULL, ?, ?)",
+                (path, name or path, info.st_size, info.st_mtime_ns))
+            archive_id = cursor.lastrowid
+            try:
+                self._add_file(path, archive_id)
+            except (ParsingError, zlib.error, NotImplementedError) as e:
+                # Truncated, corrupt, or a Zbb archive which doesn't hold a folder archive; kept without chunks, like a
+                # file which isn't an archive
+                print(path, e)
+                self.connection.execute("DELETE FROM items WHERE archive = ?", (archive_id,))
+                self.connection.execute("DELETE FROM chunks WHERE archive = ?", (archive_id,))
+                self.connection.execute("UPDATE archives SET type = NULL WHERE id = ?", (archive_id,))
+        return True
+
+    def _add_file(self, path: str, archive_id: int):
+        with open(path, "rb") as stream:
+            try:
+                type = ArchiveType.read(stream)
+            except ParsingError:
+                return
+        if type not in [ArchiveType.Folder, ArchiveType.Zbb]:
+            return
+        with open_folder(path) as (type, stream):
+            self._add_stream(stream, archive_id, type)
+
+    def _add_stream(self, stream: BinaryIO, archive_id: int, archive_type: ArchiveType):
+        # The stream is after the (folder) archive's type
+        table = ChunkTable.read(stream)
+        self.connection.execute("UPDATE archives SET type = ? WHERE id = ?", (archive_type.value, archive_id))
+        rows = []
+        for i in range(len(table) - 1):  # The EOF chunk isn't cataloged
+            header = table.header(i)
+            rows.append((archive_id, i, header.type.value, header.version, header.reserved,
+                         int(table.offsets[i]), header.length))
+        self.connection.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        items = []
+        for i in table.select(types=_CATALOGED_TYPES):
+            chunk = table.chunk(i)
+            stream.seek(chunk.data_start)
+            try:
+                for kind, name, offset, size in self._scan(stream, chunk.header):
+                    items.append((archive_id, int(i), kind, name, offset, size))
+            except (ParsingError, ValueError, UnicodeDecodeError) as e:
+                print(f"Skipping chunk {i} ~ {e}")
+        self.connection.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)", items)
+
+    @staticmethod
+    def _scan(stream: BinaryIO, header: ChunkHeader) -> Iterable[Tuple[str, str, Optional[int], Optional[int]]]:
+        start = stream.tell()
+        if header.type == ChunkType.RESOURCE:
+            span = ResourceChunk.scan(stream, header)
+            yield RESOURCE, span.name, span.offset, span.size
+        elif header.type == ChunkType.SOUND:
+            _, spans = SoundChunk.scan(stream)
+            for span in spans:
+                yield SOUND, span.name, span.offset, span.size
+        elif header.type == ChunkType.RESOURCE_LIST:
+            chunk: ResourceListChunk = ChunkReader.read_buffer(header, stream.read(header.chunk_size))
+            for description in chunk.descriptions:
+                yield RESOURCE_LIST, description.name, None, None
+        elif header.type == ChunkType.HMPT:
+            chunk: HmptChunk = ChunkReader.read_buffer(header, stream.read(header.chunk_size))
+            yield HMPT, chunk.name, start, header.chunk_size
+
+    def _items(self, where: str, args: tuple) -> List[CatalogItem]:
+        rows = self.connection.execute(
+            "SELECT archives.path, items.chunk, items.kind, items.name, items.offset, items.size "
+            "FROM items JOIN archives ON items.archive = archives.id "
+            f"WHERE {where} ORDER BY archives.path, items.chunk", args)
+        return [CatalogItem(*row) for row in rows]
+
+    def find(self, name: str, kind: str = None) -> List[CatalogItem]:
+        """
+        Finds every cataloged item with a name.
+
+        :param name: The item's name, as stored in its chunk; i.e. a resource's in-game path.
+        :param kind: Only find items of a kind (i.e. 'sound'); None finds every kind.
+        """
+        if kind is None:
+            return self._items("items.name = ?", (name,))
+        return self._items("items.name = ? AND items.kind = ?", (name, kind))
+
+    def search(self, text: str, kind: str = None) -> List[CatalogItem]:
+        """
+        Finds every cataloged item whose name contains some text, case insensitive.
+        """
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        if kind is None:
+            return self._items("items.name LIKE ? ESCAPE '\\'", (pattern,))
+        return self._items("items.name LIKE ? ESCAPE '\\' AND items.kind = ?", (pattern, kind))
+
+    def get(self, name: str, kind: str = None) -> Optional[CatalogItem]:
+        """
+        Gets an item by name, preferring a cataloged copy which holds the item's data.
+        """
+        items = self.find(name, kind)
+        for item in items:
+            if item.has_data:
+                return item
+        return items[0] if items else None
+
+    def chunks(self, archive: str = None, type: ChunkType = None) -> List[CatalogChunk]:
+        """
+        Lists cataloged chunks.
+
+        :param archive: Only list the chunks of an archive (by path).
+        :param type: Only list chunks of a type.
+        """
+        where, args = [], []
+        if archive is not None:
+            where.append("archives.path = ?")
+            args.append(archive)
+        if type is not None:
+            where.append("chunks.type = ?")
+            args.append(type.value)
+        rows = self.connection.execute(
+            "SELECT archives.path, chunks.chunk, chunks.type, chunks.version, chunks.reserved, chunks.offset, "
+            "chunks.length FROM chunks JOIN archives ON chunks.archive = archives.id "
+            f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY archives.path, chunks.chunk", args)
+        return [CatalogChunk(path, i, ChunkType.get_enum_from_value(type), version, reserved, offset, length)
+                for path, i, type, version, reserved, offset, length in rows]
+
+    def read(self, archive: str, offset: int, size: int) -> bytes:
+        """
+        Reads bytes from a cataloged archive; offsets in compressed archives are in the decompressed archive.
+        """
+        with open(archive, "rb") as stream:
+            compressed = self._get_compressed(archive, stream)
+            if compressed is not None:
+                return compressed.read_range(stream, offset, size)
+            stream.seek(offset)
+            return stream.read(size)
+
+    def _get_compressed(self, path: str, stream: BinaryIO) -> Optional[ZbbArchive]:
+        row = self.connection.execute("SELECT type FROM archives WHERE path = ?", (path,)).fetchone()
+        if row is None or row[0] is None:
+            raise KeyError(path)
+        if ArchiveType(row[0]) != ArchiveType.Zbb:
+            return None
+        archive = self._compressed.get(path)
+        if archive is None:
+            archive = self._compressed[path] = ArchiveParser.parse(stream)
+        return archive
+
+    def extract(self, item: CatalogItem) -> bytes:
+        """
+        Reads an item's data straight from its archive.
+
+        :param item: The item; see find or get.
+        :return: The item's data.
+        :raises ValueError: raised when the item's chunk doesn't hold its data (i.e. a sparse sound clip).
+        """
+        if not item.has_data:
+            raise ValueError(f"'{item.name}' has no data in '{item.archive}'")
+        return self.read(item.archive, item.offset, item.size)
+
+    def read_chunk(self, chunk: CatalogChunk) -> BaseChunk:
+        """
+        Reads and parses a cataloged chunk, from its recorded offset.
+        """
+        header = chunk.header
+        result = ChunkReader.read_buffer(header, self.read(chunk.archive, chunk.offset, header.chunk_size))
+        result.header = header
+        return result
+
+
+def build_asset_catalog(search_dir: str, path: str = ":memory:") -> AssetCatalog:
+    catalog = AssetCatalog(path)
+    catalog.refresh(search_dir)
+    return catalog
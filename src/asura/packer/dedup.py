@@ -0,0 +1,169 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass
+from hashlib import blake2b
+from os import link, remove, replace, stat, getpid
+from os.path import join, exists
+from shutil import copyfile
+from threading import BoundedSemaphore, Lock, Event, get_ident
+from typing import List, Dict
+
+from asura.common.mio import PackIO
+
+# The directory (relative to the store) holding the payloads
+OBJECTS_DIR = "objects"
+HARDLINK = "hardlink"
+REFLINK = "reflink"
+COPY = "copy"
+LINK_MODES = [HARDLINK, REFLINK, COPY]
+# Payloads waiting to be hashed and written; bounds the memory held by the store
+DEFAULT_MAX_PENDING = 64
+# linux/fs.h; clones (shares the extents of) a whole file
+_FICLONE = 0x40049409
+
+
+@dataclass
+class StoreStats:
+    # Payloads written through the store
+    payloads: int = 0
+    # Payloads which were new to the store
+    unique: int = 0
+    payload_bytes: int = 0
+    stored_bytes: int = 0
+    # Payloads which could not be linked, and were copied instead
+    copies: int = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.payload_bytes - self.stored_bytes
+
+
+def hash_payload(data: bytes) -> str:
+    return blake2b(data, digest_size=20).hexdigest()
+
+
+def _reflink(src: str, dst: str):
+    import fcntl
+    with open(src, "rb") as src_file:
+        with open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+
+
+class ContentStore:
+    """
+    Stores each unique payload once, by its hash, and links the unpacked (per-chunk) paths to it.
+
+    Payloads are hashed and written on worker threads; call close (or use the store as a context manager) to wait for
+    them. Unpacks write through the store they're given (see UnpackOptions.payload_store); a store belongs to one
+    process.
+
+    Hard links share their data with the store; replace a linked file rather than editing it in place. Reflinks
+    (copy on write clones) don't have this caveat, but are only supported by some file systems (i.e. Btrfs, XFS);
+    either falls back to copying when linking fails.
+    """
+
+    def __init__(self, root: str, link_mode: str = HARDLINK, workers: int = None,
+                 max_pending: int = DEFAULT_MAX_PENDING):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Unknown link mode '{link_mode}'; expected one of {', '.join(LINK_MODES)}")
+        self.root = root
+        self.link_mode = link_mode
+        self.stats = StoreStats()
+        self._executor = ThreadPoolExecutor(workers)
+        self._pending = BoundedSemaphore(max_pending)
+        self._lock = Lock()
+        self._errors: List[BaseException] = []
+        # digest -> set once the payload is in the store
+        self._objects: Dict[str, Event] = {}
+
+    def get_object_path(self, digest: str) -> str:
+        return join(self.root, OBJECTS_DIR, digest[:2], digest[2:])
+
+    def write(self, path: str, data: bytes, overwrite: bool = False) -> bool:
+        """
+        Queues a payload to be stored and linked to a path.
+
+        :param path: The (unpacked) path of the payload.
+        :param data: The payload.
+        :param overwrite: Replace the path even if it already exists, and is the same size.
+        :return: True if the payload will be written, mirroring PackIO.write_bytes.
+        """
+        if not overwrite and exists(path) and stat(path).st_size == len(data):
+            return False
+        self._pending.acquire()
+        future = self._executor.submit(self._store, path, data)
+        future.add_done_callback(self._on_done)
+        return True
+
+    def _on_done(self, future: Future):
+        self._pending.release()
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self._errors.append(error)
+
+    def _store(self, path: str, data: bytes):
+        digest = hash_payload(data)
+        object_path = self.get_object_path(digest)
+        with self._lock:
+            stored = self._objects.get(digest)
+            is_owner = stored is None
+            if is_owner:
+                stored = self._objects[digest] = Event()
+        is_new = False
+        if is_owner:
+            try:
+                is_new = not exists(object_path)
+                if is_new:
+                    # Written under a temporary name first, so the store never holds a partial payload
+                    temp_path = f"{object_path}.{getpid()}.{get_ident()}.tmp"
+                    PackIO.write_bytes(temp_path, data, overwrite=True)
+                    replace(temp_path, object_path)
+            finally:
+                stored.set()
+        else:
+            # Another thread is storing the same payload
+            stored.wait()
+        copied = self._link(object_path, path)
+        with self._lock:
+            self.stats.payloads += 1
+            self.stats.payload_bytes += len(data)
+            if is_new:
+                self.stats.unique += 1
+                self.stats.stored_bytes += len(data)
+            if copied:
+                self.stats.copies += 1
+
+    def _link(self, object_path: str, path: str) -> bool:
+        # Returns True if the payload had to be copied
+        PackIO.make_parent_dirs(path)
+        if exists(path):
+            # Never write into an existing file; it may be linked to the store
+            remove(path)
+        try:
+            if self.link_mode == HARDLINK:
+                link(object_path, path)
+                return False
+            elif self.link_mode == REFLINK:
+                _reflink(object_path, path)
+                return False
+        except (OSError, ImportError):
+            if exists(path):
+                remove(path)
+        copyfile(object_path, path)
+        return self.link_mode != COPY
+
+    def close(self):
+        """
+        Waits for every queued payload to be written.
+
+        :raises Exception: raised when a payload failed to be written; the first error is re-raised.
+        """
+        self._executor.shutdown(wait=True)
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self) -> 'ContentStore':
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,302 @@
+import json
+import struct
+from dataclasses import dataclass, field, asdict
+from hashlib import blake2b
+from io import BytesIO
+from os import getpid, remove, replace
+from os.path import exists
+from tempfile import TemporaryFile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from asura.common.compression import CompressionPolicy
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError, EnumDecodeError
+from asura.common.mio import PackIO
+from asura.common.models.archive import ZbbArchive, ChunkTable, open_folder
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.htxt import HTextChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk
+from asura.packer.dedup import hash_payload
+
+PATCH_MAGIC = b"AsuraDlt"
+CURRENT_PATCH_VERSION = 2
+# Operations, in target order;
+#   (COPY, first base chunk, chunk count) copies consecutive chunks from the base archive
+#   (DATA, position in the patch, size) copies chunks stored in the patch
+COPY = 0
+DATA = 1
+_COPY_SIZE = 1024 * 1024
+_HEADER_SIZE = 16
+# Manifest position (uint64); the last 8 bytes of a patch
+_TRAILER = struct.Struct("<Q")
+
+Operation = Tuple[int, int, int]
+
+
+@dataclass
+class DeltaStats:
+    # Target chunks copied from the base archive (unchanged, possibly moved)
+    copied: int = 0
+    # Target chunks with no counterpart in the base archive
+    inserted: int = 0
+    # Target chunks whose body changed; matched to a base chunk by type and name
+    replaced: int = 0
+    # Base chunks not in the target archive
+    removed: int = 0
+    # Bytes of chunk data stored in the patch
+    payload_size: int = 0
+
+
+@dataclass
+class ArchivePatch:
+    # Identifies the base archive; the number of chunks, and a hash of their headers
+    base_chunks: int = None
+    base_hash: str = None
+    # The target archive is written as this type (Folder or Zbb)
+    target_type: ArchiveType = None
+    # The size and hash of the (decompressed) target archive
+    target_size: int = None
+    target_hash: str = None
+    operations: List[Operation] = field(default_factory=list)
+    # Base chunk -> the hash of its bytes (header included), for every chunk copied; version 1 patches have none
+    copied_hashes: Dict[int, str] = field(default_factory=dict)
+    stats: DeltaStats = field(default_factory=DeltaStats)
+
+    def write_manifest(self, stream: BinaryIO) -> int:
+        meta = {
+            'version': CURRENT_PATCH_VERSION,
+            'base_chunks': self.base_chunks,
+            'base_hash': self.base_hash,
+            'target_type': self.target_type.name,
+            'target_size': self.target_size,
+            'target_hash': self.target_hash,
+            'operations': self.operations,
+            'copied_hashes': self.copied_hashes,
+            'stats': asdict(self.stats),
+        }
+        start = stream.tell()
+        written = stream.write(json.dumps(meta).encode())
+        return written + stream.write(_TRAILER.pack(start))
+
+    @classmethod
+    def read(cls, stream: BinaryIO) -> 'ArchivePatch':
+        """
+        Reads a patch's manifest; the chunk data stays in the stream.
+
+        :raises ParsingError: raised when the stream isn't a patch.
+        :raises ValueError: raised when the patch's version isn't supported.
+        """
+        start = stream.tell()
+        if stream.read(len(PATCH_MAGIC)) != PATCH_MAGIC:
+            raise ParsingError(start)
+        end = stream.seek(-_TRAILER.size, 2)
+        (manifest_start,) = _TRAILER.unpack(stream.read(_TRAILER.size))
+        stream.seek(manifest_start)
+        meta = json.loads(stream.read(end - manifest_start).decode())
+        if not 1 <= meta['version'] <= CURRENT_PATCH_VERSION:
+            raise ValueError(f"Unsupported patch version ~ {meta['version']}")
+        copied_hashes = {int(index): digest for index, digest in meta.get('copied_hashes', {}).items()}
+        return ArchivePatch(meta['base_chunks'], meta['base_hash'], ArchiveType[meta['target_type']],
+                            meta['target_size'], meta['target_hash'],
+                            [tuple(operation) for operation in meta['operations']], copied_hashes,
+                            DeltaStats(**meta['stats']))
+
+
+@dataclass
+class _ChunkInfo:
+    type: ChunkType
+    # See _chunk_name; None for chunks which can't be matched by name
+    name: Optional[str]
+    hash: str
+    # The chunk's bytes (header included)
+    data: bytes
+
+
+def _table_hash(table: ChunkTable) -> str:
+    hasher = blake2b(digest_size=20)
+    for column in [table.type_codes, table.lengths, table.versions, table.reserved]:
+        hasher.update(column.tobytes())
+    return hasher.hexdigest()
+
+
+def _chunk_name(type: ChunkType, data: bytes) -> Optional[str]:
+    # Resources are named by their path, and strings by their key and language
+    stream = BytesIO(data)
+    try:
+        header = ChunkHeader.read(stream)
+        if type == ChunkType.RESOURCE:
+            return ResourceChunk.scan(stream, header).name.lower()
+        if type == ChunkType.H_TEXT:
+            layout = HTextChunk.scan(stream)
+            return f"{layout.key}:{layout.language.name}"
+    except (ParsingError, EnumDecodeError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def _read_chunks(stream: BinaryIO, table: ChunkTable) -> Iterator[_ChunkInfo]:
+    for i in range(len(table) - 1):  # The EOF chunk is always written last
+        type = table.header(i).type
+        stream.seek(int(table.offsets[i]) - _HEADER_SIZE)
+        data = stream.read(int(table.lengths[i]))
+        yield _ChunkInfo(type, _chunk_name(type, data), hash_payload(data), data)
+
+
+def _copy_range(in_stream: BinaryIO, offset: int, size: int, write):
+    in_stream.seek(offset)
+    while size > 0:
+        data = in_stream.read(min(size, _COPY_SIZE))
+        if not data:
+            raise ParsingError(in_stream.tell())
+        write(data)
+        size -= len(data)
+
+
+def _append(operations: List[Operation], kind: int, start: int, size: int):
+    # Consecutive copies (of consecutive chunks or data) become one operation
+    if operations:
+        last_kind, last_start, last_size = operations[-1]
+        if last_kind == kind and last_start + last_size == start:
+            operations[-1] = (kind, last_start, last_size + size)
+            return
+    operations.append((kind, start, size))
+
+
+def create_patch(base_path: str, target_path: str, patch_path: str) -> ArchivePatch:
+    """
+    Creates a patch which turns the base archive into the target archive.
+
+    Chunks are matched by their contents (header included); target chunks found anywhere in the base archive are
+    copied from it, the rest are stored in the patch. Changed chunks are told apart from new ones by type and name
+    (a resource's path, or a string table's key and language).
+
+    :param base_path: The archive the patch applies to (Folder or Zbb).
+    :param target_path: The archive the patch creates (Folder or Zbb); it's written as the same type.
+    :param patch_path: Where to write the patch.
+    :return: The patch's manifest.
+    :raises NotImplementedError: raised when either file isn't a supported archive.
+    """
+    patch = ArchivePatch()
+    stats = patch.stats
+    base_hashes: Dict[str, int] = {}
+    base_names: Dict[Tuple[ChunkType, str], List[int]] = {}
+    with open_folder(base_path) as (_, base):
+        table = ChunkTable.read(base)
+        patch.base_chunks = len(table)
+        patch.base_hash = _table_hash(table)
+        for i, chunk in enumerate(_read_chunks(base, table)):
+            base_hashes.setdefault(chunk.hash, i)
+            if chunk.name is not None:
+                base_names.setdefault((chunk.type, chunk.name), []).append(i)
+
+    used: Set[int] = set()
+    PackIO.make_parent_dirs(patch_path)
+    with open(patch_path, "wb") as patch_stream:
+        patch_stream.write(PATCH_MAGIC)
+        with open_folder(target_path) as (target_type, target):
+            patch.target_type = target_type
+            target_hasher = blake2b(digest_size=20)
+            target_hasher.update(ArchiveType.Folder.encode())
+            target_size = len(ArchiveType.Folder.encode())
+            table = ChunkTable.read(target)
+            for chunk in _read_chunks(target, table):
+                target_hasher.update(chunk.data)
+                target_size += len(chunk.data)
+                index = base_hashes.get(chunk.hash)
+                if index is not None:
+                    used.add(index)
+                    patch.copied_hashes[index] = chunk.hash
+                    stats.copied += 1
+                    _append(patch.operations, COPY, index, 1)
+                    continue
+                matches = base_names.get((chunk.type, chunk.name)) if chunk.name is not None else None
+                if matches:
+                    used.update(matches)
+                    stats.replaced += 1
+                else:
+                    stats.inserted += 1
+                _append(patch.operations, DATA, patch_stream.tell(), len(chunk.data))
+                patch_stream.write(chunk.data)
+                stats.payload_size += len(chunk.data)
+            target_hasher.update(ChunkType.EOF.encode())
+            patch.target_size = target_size + len(ChunkType.EOF.encode())
+            patch.target_hash = target_hasher.hexdigest()
+        stats.removed = patch.base_chunks - 1 - len(used)
+        patch.write_manifest(patch_stream)
+    return patch
+
+
+def apply_patch(base_path: str, patch_path: str, out_path: str, policy: CompressionPolicy = None) -> ArchivePatch:
+    """
+    Applies a patch; the base archive is streamed (in order, for unmoved chunks) into the target archive, which is
+    compressed if the target was a Zbb archive.
+
+    The archive is written to a temporary file next to out_path, and only replaces out_path once it matches the
+    target; a failed patch leaves out_path as it was.
+
+    :param base_path: The archive the patch was created from.
+    :param patch_path: The patch.
+    :param out_path: Where to write the target archive; this must not be the base archive.
+    :param policy: How a Zbb target archive is compressed (see CompressionPolicy.preset); by default, 2 MiB blocks at
+        zlib's default level, like the game's archives.
+    :return: The patch's manifest.
+    :raises ValueError: raised when the patch was created from a different base archive (its layout, or a copied
+        chunk, differs), or the archive it creates doesn't match the target archive.
+    """
+    PackIO.make_parent_dirs(out_path)
+    temp_path = f"{out_path}.{getpid()}.tmp"
+    try:
+        with open(patch_path, "rb") as patch_stream:
+            patch = ArchivePatch.read(patch_stream)
+            with open_folder(base_path) as (_, base):
+                table = ChunkTable.read(base)
+                if len(table) != patch.base_chunks or _table_hash(table) != patch.base_hash:
+                    raise ValueError(f"Patch doesn't apply to ~ {base_path}")
+                with open(temp_path, "wb") as out_stream:
+                    if patch.target_type == ArchiveType.Zbb:
+                        with TemporaryFile() as folder:
+                            target_hash = _write_target(patch, table, base, patch_stream, folder)
+                            folder.seek(0)
+                            ZbbArchive.compress_to_stream(folder, out_stream, policy=policy)
+                    else:
+                        target_hash = _write_target(patch, table, base, patch_stream, out_stream)
+        if target_hash != patch.target_hash:
+            raise ValueError(f"Patched archive doesn't match the target ~ {out_path}")
+        replace(temp_path, out_path)
+    finally:
+        if exists(temp_path):
+            remove(temp_path)
+    return patch
+
+
+def _copy_chunk(base: BinaryIO, table: ChunkTable, index: int, expected: Optional[str], write):
+    hasher = blake2b(digest_size=20)  # See hash_payload
+
+    def write_chunk(data: bytes):
+        hasher.update(data)
+        write(data)
+
+    _copy_range(base, int(table.offsets[index]) - _HEADER_SIZE, int(table.lengths[index]), write_chunk)
+    if expected is not None and hasher.hexdigest() != expected:
+        raise ValueError(f"Base chunk {index} doesn't match the patch")
+
+
+def _write_target(patch: ArchivePatch, table: ChunkTable, base: BinaryIO, patch_stream: BinaryIO,
+                  out_stream: BinaryIO) -> str:
+    hasher = blake2b(digest_size=20)
+
+    def write(data: bytes):
+        hasher.update(data)
+        out_stream.write(data)
+
+    write(ArchiveType.Folder.encode())
+    for kind, start, size in patch.operations:
+        if kind == COPY:
+            for index in range(start, start + size):
+                _copy_chunk(base, table, index, patch.copied_hashes.get(index), write)
+        elif kind == DATA:
+            _copy_range(patch_stream, start, size, write)
+        else:
+            raise NotImplementedError(f"Not Supported ~ {kind}")
+    write(ChunkType.EOF.encode())
+    return hasher.hexdigest()
@@ -0,0 +1,189 @@
+import json
+import os
+from dataclasses import dataclass, asdict, field
+from os import walk
+from os.path import exists, join
+from typing import BinaryIO, Dict, List, Optional
+
+from asura.common.mio import PackIO
+
+CURRENT_JOURNAL_VERSION = 1
+# Job kinds; a journal only holds the records of one kind
+UNPACK = "unpack"
+REPACK = "repack"
+# Chunks finished between checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 64
+
+
+def file_fingerprint(path: str) -> List[int]:
+    """
+    Identifies a version of an archive without reading it; its size and modification time.
+    """
+    info = os.stat(path)
+    return [info.st_size, info.st_mtime_ns]
+
+
+def directory_fingerprint(path: str) -> List[int]:
+    """
+    Identifies a version of an unpacked archive without reading it; the number of files, their total size, and the
+    latest modification time.
+    """
+    count = size = modified = 0
+    for root, _, files in walk(path):
+        for file in files:
+            info = os.stat(join(root, file))
+            count += 1
+            size += info.st_size
+            modified = max(modified, info.st_mtime_ns)
+    return [count, size, modified]
+
+
+@dataclass
+class Checkpoint:
+    # The archive's name, relative to the job's directory
+    archive: str = None
+    # See file_fingerprint and directory_fingerprint; a checkpoint doesn't apply to a changed source
+    fingerprint: List[int] = field(default_factory=list)
+    # Chunks finished, in order; resuming starts after them
+    chunks: int = 0
+    # Chunks unpacked or repacked, and chunks seen; they're counted as if the archive was never interrupted
+    written: int = 0
+    total: int = 0
+    # Repacking; the size of the output archive after 'chunks' chunks
+    offset: int = None
+    complete: bool = False
+    # Unpacking; files which aren't archives are recorded (complete) so they aren't parsed again
+    is_archive: bool = True
+    success: bool = None
+
+
+class ArchiveJob:
+    """
+    Tracks the progress of one archive of a job, and checkpoints it to the journal; it can be sent to a worker process.
+    """
+
+    def __init__(self, path: str, kind: str, checkpoint: Checkpoint, interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        self.path = path
+        self.kind = kind
+        self.checkpoint = checkpoint
+        self.interval = interval
+        self._unrecorded = 0
+
+    @property
+    def start(self) -> int:
+        """
+        The index of the first unfinished chunk.
+        """
+        return self.checkpoint.chunks
+
+    def restart(self):
+        """
+        Discards the archive's progress; i.e. when its partial output is missing.
+        """
+        self.checkpoint = Checkpoint(self.checkpoint.archive, self.checkpoint.fingerprint)
+
+    def chunk_done(self, written: bool, stream: BinaryIO = None):
+        """
+        Marks the next chunk finished; every 'interval' chunks, a checkpoint is recorded.
+
+        :param written: The chunk was unpacked (or repacked), rather than skipped.
+        :param stream: The output archive, when repacking; it's synced before its size is recorded.
+        """
+        self.checkpoint.chunks += 1
+        self.checkpoint.total += 1
+        if written:
+            self.checkpoint.written += 1
+        self._unrecorded += 1
+        if self._unrecorded >= self.interval:
+            self._record(stream)
+
+    def finish(self, success: bool = True, is_archive: bool = True, stream: BinaryIO = None):
+        self.checkpoint.complete = True
+        self.checkpoint.success = success
+        self.checkpoint.is_archive = is_archive
+        self._record(stream)
+
+    def _record(self, stream: BinaryIO = None):
+        if stream is not None:
+            stream.flush()
+            os.fsync(stream.fileno())
+            self.checkpoint.offset = stream.tell()
+        JobJournal.append(self.path, self.kind, self.checkpoint)
+        self._unrecorded = 0
+
+
+class JobJournal:
+    """
+    Records the progress of an unpack or repack job; the archives finished, and how far into the others the job got.
+
+    The journal is a file of JSON lines, only ever appended to (a line per checkpoint), so an interrupted job leaves at
+    worst a partial last line, which is ignored. The latest checkpoint of each archive wins; checkpoints whose source
+    fingerprint no longer matches are ignored, and the archive is redone.
+    """
+
+    def __init__(self, path: str, kind: str, resume: bool = True, interval: int = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        :param path: The journal's path.
+        :param kind: UNPACK or REPACK.
+        :param resume: Load the journal's checkpoints; otherwise the journal is cleared, and the job starts over.
+        :param interval: Chunks finished between checkpoints.
+        """
+        self.path = path
+        self.kind = kind
+        self.interval = interval
+        self.checkpoints: Dict[str, Checkpoint] = {}
+        PackIO.make_parent_dirs(path)
+        if resume and exists(path):
+            self._load()
+        else:
+            with open(path, "wb"):
+                pass
+
+    def _load(self):
+        line = b""
+        with open(self.path, "rb") as stream:
+            for line in stream:
+                try:
+                    meta = json.loads(line)
+                except ValueError:
+                    # The last line may have been cut off
+                    continue
+                if meta.get('version') != CURRENT_JOURNAL_VERSION or meta.get('kind') != self.kind:
+                    continue
+                checkpoint = Checkpoint(**meta['checkpoint'])
+                self.checkpoints[checkpoint.archive] = checkpoint
+        if line and not line.endswith(b"\n"):
+            # End the cut off line, so the next checkpoint isn't appended to it
+            with open(self.path, "ab") as stream:
+                stream.write(b"\n")
+
+    @staticmethod
+    def append(path: str, kind: str, checkpoint: Checkpoint):
+        """
+        Appends a checkpoint to a journal; each checkpoint is a single (synced) write, so processes can share a journal.
+        """
+        meta = {'version': CURRENT_JOURNAL_VERSION, 'kind': kind, 'checkpoint': asdict(checkpoint)}
+        line = (json.dumps(meta) + "\n").encode()
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def get(self, archive: str, fingerprint: List[int]) -> Optional[Checkpoint]:
+        """
+        Gets an archive's latest checkpoint, if its source hasn't changed since.
+        """
+        checkpoint = self.checkpoints.get(archive)
+        if checkpoint is None or list(checkpoint.fingerprint) != list(fingerprint):
+            return None
+        return checkpoint
+
+    def job(self, archive: str, fingerprint: List[int]) -> ArchiveJob:
+        """
+        Starts (or resumes) an archive.
+        """
+        checkpoint = self.get(archive, fingerprint)
+        checkpoint = Checkpoint(archive, list(fingerprint)) if checkpoint is None else Checkpoint(**asdict(checkpoint))
+        return ArchiveJob(self.path, self.kind, checkpoint, self.interval)
@@ -1,12 +1,17 @@
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
 from dataclasses import dataclass
-from os.path import exists, join, basename
-from typing import Tuple
+from os import scandir, cpu_count
+from os.path import exists, join, basename, getsize
+from typing import Tuple, List, Deque, Callable
 
-from asura.common.enums import ArchiveType
+from asura.common.enums import ArchiveType, ChunkType
 from asura.common.mio import PackIO
 from asura.common.models.archive import FolderArchive
-from asura.common.models.chunks import BaseChunk
-from asura.common.factories import ChunkUnpacker, ChunkRepacker, initialize_factories
+from asura.common.models.chunks import BaseChunk, ChunkHeader, EofChunk
+from asura.common.factories import ChunkRepacker, initialize_factories
+from asura.packer.journal import ArchiveJob, JobJournal, REPACK, DEFAULT_CHECKPOINT_INTERVAL, directory_fingerprint
 
 # The default root
 DEFAULT_ROOT_DIR = "repack"
@@ -15,6 +20,9 @@ DECOMPRESSED_DIR = "decompressed"
 # The path relative to the archive, containing chunk information
 DUMP_DIR = "archives"
 
+# 'Chunk {i}.{type}', as named by the unpacker
+_CHUNK_NAME = re.compile(r"^Chunk (\d+)\.")
+
 
 def repack_chunk(chunk_path: str) -> 'BaseChunk':
     return ChunkRepacker.repack_from_ext(chunk_path)
@@ -24,38 +32,161 @@ def repack_chunk(chunk_path: str) -> 'BaseChunk':
 class RepackOptions:
     overwrite_chunks: bool = False
     strict_archive: bool = False
-
-
-def repack_archive(archive_path: str, out_path: str, options: RepackOptions = None):
+    # Threads deserializing each archive's chunks, None will use one per core
+    chunk_workers: int = None
+    # Processes repacking archives, None will use one per core; 1 repacks archives in this process
+    archive_workers: int = None
+    # Records the progress of repack_directory (see JobJournal); None keeps no journal
+    journal_path: str = None
+    # Skip the archives (and chunks) the journal records as finished; otherwise the journal is cleared
+    resume: bool = False
+    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL
+
+
+def discover_chunks(archive_path: str) -> List[str]:
+    """
+    Lists the unpacked chunks of an archive, in the order they were unpacked.
+
+    :param archive_path: The archive's unpacked directory.
+    :return: The path of each chunk (without the chunk info extension); ordered by their 'Chunk {i}' index, chunks
+    without an index follow, by name.
+    """
+    ext = PackIO.CHUNK_INFO_EXT
+    found = []
+    with scandir(archive_path) as entries:
+        for entry in entries:
+            if not entry.name.endswith(ext) or not entry.is_file():
+                continue
+            name = entry.name[:-len(ext)]
+            match = _CHUNK_NAME.match(name)
+            index = int(match.group(1)) if match else None
+            found.append((index is None, index or 0, name))
+    found.sort()
+    return [join(archive_path, name) for _, _, name in found]
+
+
+def repack_archive(archive_path: str, out_path: str, options: RepackOptions = None, job: ArchiveJob = None) -> int:
+    """
+    Repacks an unpacked archive; chunks are deserialized across a pool of threads, and written in order as they finish.
+
+    :param archive_path: The archive's unpacked directory.
+    :param out_path: The path to write the archive to.
+    :param job: Checkpoints the written chunks; when resuming, the output is cut back to the last checkpoint, and
+        repacking continues from there.
+    :return: The number of chunks written, EOF excluded.
+    """
     options = options or RepackOptions()
-    chunks = []
-    for chunk_path in PackIO.walk_chunks(archive_path):
-        chunk = ChunkUnpacker.repack_from_ext(chunk_path)
-        chunks.append(chunk)
-
-    archive = FolderArchive(ArchiveType.Folder, chunks)
+    chunk_paths = discover_chunks(archive_path)
+    workers = options.chunk_workers or cpu_count() or 1
+    start = 0
+    if job is not None and job.start > 0:
+        offset = job.checkpoint.offset
+        if offset is not None and exists(out_path) and getsize(out_path) >= offset:
+            start = job.start
+        else:
+            job.restart()
+    written = job.checkpoint.written if start > 0 else 0
     PackIO.make_parent_dirs(out_path)
-    with open(out_path, "wb") as f:
-        archive.write(f)
+    with open(out_path, "r+b" if start > 0 else "wb") as stream:
+        if start > 0:
+            # Chunks written after the checkpoint are written again
+            stream.truncate(job.checkpoint.offset)
+            stream.seek(job.checkpoint.offset)
+        else:
+            ArchiveType.Folder.write(stream)
+        with ThreadPoolExecutor(workers) as pool:
+            pending: Deque[Future] = deque()
+            for chunk_path in chunk_paths[start:]:
+                pending.append(pool.submit(repack_chunk, chunk_path))
+                # Bound the number of chunks held in memory; the oldest must be written first regardless
+                if len(pending) >= workers * 2:
+                    written += _write_repacked(stream, pending.popleft().result(), job)
+            while pending:
+                written += _write_repacked(stream, pending.popleft().result(), job)
+        FolderArchive.write_chunk(stream, EofChunk(ChunkHeader(ChunkType.EOF)))
+        if job is not None:
+            job.finish(stream=stream)
+    return written
+
+
+def _write_repacked(stream, chunk: BaseChunk, job: ArchiveJob = None) -> int:
+    # The EOF is written once, after every other chunk
+    written = chunk.header.type != ChunkType.EOF
+    if written:
+        FolderArchive.write_chunk(stream, chunk)
+    if job is not None:
+        job.chunk_done(written, stream)
+    return int(written)
+
+
+def _repack_archive_job(archive_path: str, out_path: str, options: RepackOptions, job: ArchiveJob = None) -> int:
+    # Worker processes may not have imported the chunk formats yet
+    initialize_factories()
+    return repack_archive(archive_path, out_path, options, job)
 
 
 def repack_directory(search_dir: str, out_dir: str = None, repack_name: str = None,
                      options: RepackOptions = None) -> Tuple[
-    int, int, int, int]:  # Archive_Unpacked, Archive Total, Chunks Unpacked, Chunks Total
+    int, int, int, int]:  # Archive_Repacked, Archive Total, Chunks Repacked, Chunks Total
+    options = options or RepackOptions()
     out_dir = out_dir or DEFAULT_ROOT_DIR
     if repack_name is not None:
         out_dir = join(out_dir or DEFAULT_ROOT_DIR, repack_name)
     print(f"Repacking '{search_dir}'")
-    unpacked_archives = 0
+    repacked_archives = 0
     total_archives = 0
-    unpacked_chunks = 0
+    repacked_chunks = 0
     total_chunks = 0
+    jobs = []
+    # Archives the journal records as finished; (name, chunks written, chunks found)
+    finished = []
+    journal = None
+    if options.journal_path is not None:
+        journal = JobJournal(options.journal_path, REPACK, options.resume, options.checkpoint_interval)
     for archive_path in PackIO.walk_archives(search_dir):
         name = archive_path.replace(search_dir, "").lstrip("\\/")
+        out_path = join(out_dir, name)
+        job = None
+        if journal is not None:
+            job = journal.job(name, directory_fingerprint(archive_path))
+            checkpoint = job.checkpoint
+            if checkpoint.complete:
+                if exists(out_path) and getsize(out_path) == checkpoint.offset:
+                    finished.append((name, checkpoint.written, checkpoint.total))
+                    continue
+                job.restart()
+        jobs.append((name, archive_path, out_path, job))
+
+    def collect(name: str, chunks: int, get_result: Callable[[], int]):
+        nonlocal repacked_archives, total_archives, repacked_chunks, total_chunks
+        total_archives += 1
+        total_chunks += chunks
+        try:
+            repacked = get_result()
+        except Exception as error:
+            if options.strict_archive:
+                raise
+            print(f"\t...\\{name} failed; {error!r}")
+            return
         print(f"\t...\\{name}")
-        repack_archive(archive_path, join(out_dir, name), options)
-
-    return unpacked_archives, total_archives, unpacked_chunks, total_chunks
+        repacked_archives += 1
+        repacked_chunks += repacked
+
+    for name, written, chunks in finished:
+        collect(name + " (finished)", chunks, lambda: written)
+    workers = options.archive_workers or cpu_count() or 1
+    if workers == 1:
+        for name, archive_path, out_path, job in jobs:
+            collect(name, len(discover_chunks(archive_path)),
+                    lambda: _repack_archive_job(archive_path, out_path, options, job))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [(name, len(discover_chunks(archive_path)),
+                        pool.submit(_repack_archive_job, archive_path, out_path, options, job))
+                       for name, archive_path, out_path, job in jobs]
+            for name, chunks, future in futures:
+                collect(name, chunks, future.result)
+    return repacked_archives, total_archives, repacked_chunks, total_chunks
 
 
 #
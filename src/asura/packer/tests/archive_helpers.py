@@ -0,0 +1,26 @@
+from typing import List
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.mio import PackIO
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import BaseChunk, ChunkHeader, EofChunk
+from asura.common.models.chunks.formats import ResourceChunk, SoundChunk, SoundClip
+from asura.common.models.chunks.formats.rscf import DDS_FILE
+
+TEXTURE = bytes(range(256)) * 64
+CLIP = b"RIFF" + bytes(1000)
+
+
+def write_archive(path: str, name: str, extra: List[BaseChunk] = None):
+    # A shared texture and clip, a texture unique to the archive, then any extra chunks
+    chunks = [
+        ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, "textures\\shared.dds",
+                      data=TEXTURE),
+        SoundChunk(ChunkHeader(ChunkType.SOUND, 0, 0, bytes(4)), False, [SoundClip("shared.wav", bytes(4), CLIP)]),
+        ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, "unique.dds", data=name.encode()),
+        *(extra or []),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ]
+    PackIO.make_parent_dirs(path)
+    with open(path, "wb") as stream:
+        FolderArchive(ArchiveType.Folder, chunks).write(stream)
@@ -0,0 +1,110 @@
+from os import remove, utime, stat
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ChunkType
+from asura.common.factories import initialize_factories
+from asura.common.item_kind import RESOURCE, SOUND, RESOURCE_LIST, HMPT
+from asura.common.mio import PackIO
+from asura.common.models.archive import ZbbArchive
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.hmpt import HmptChunk, HmptBlock
+from asura.common.models.chunks.formats.rsfl import ResourceListChunk, ResourceDescription
+from asura.packer.catalog import AssetCatalog
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE, CLIP
+
+EXTRA = [
+    ResourceListChunk(ChunkHeader(ChunkType.RESOURCE_LIST, 0, 0, bytes(4)), [ResourceDescription("listed", 1, 2, 3)]),
+    HmptChunk(ChunkHeader(ChunkType.HMPT, 0, 0, bytes(4)), "points", [HmptBlock("point", bytes(52))]),
+]
+
+
+def create_game(root: str) -> str:
+    game_dir = join(root, "game")
+    write_archive(join(game_dir, "a.asr"), "a", EXTRA)
+    write_archive(join(root, "b.asr"), "b")
+    PackIO.make_parent_dirs(join(game_dir, "packed", "b.asr"))
+    with open(join(root, "b.asr"), "rb") as stream:
+        with open(join(game_dir, "packed", "b.asr"), "wb") as out:
+            ZbbArchive.compress_to_stream(stream, out)
+    with open(join(game_dir, "readme.txt"), "wb") as stream:
+        stream.write(b"not an archive")
+    return game_dir
+
+
+def test_catalog_and_extract():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = create_game(root)
+        with AssetCatalog() as catalog:
+            stats = catalog.refresh(game_dir)
+            assert stats.scanned == 3
+            assert catalog.archives == [join(game_dir, "a.asr"), join(game_dir, "packed", "b.asr")]
+            textures = catalog.find("textures\\shared.dds")
+            assert len(textures) == 2
+            for item in textures:
+                assert item.kind == RESOURCE
+                assert catalog.extract(item) == TEXTURE
+            assert catalog.extract(catalog.get("shared.wav", SOUND)) == CLIP
+            assert [catalog.extract(item) for item in catalog.find("unique.dds")] == [b"a", b"b"]
+            assert catalog.find("listed")[0].kind == RESOURCE_LIST
+            assert not catalog.find("listed")[0].has_data
+            assert [item.name for item in catalog.search("UNIQ")] == ["unique.dds", "unique.dds"]
+
+            hmpt, = catalog.chunks(type=ChunkType.HMPT)
+            assert catalog.find("points", HMPT)[0].chunk == hmpt.chunk
+            read = catalog.read_chunk(hmpt)
+            assert (read.name, read.blocks) == (EXTRA[1].name, EXTRA[1].blocks)
+            packed = catalog.chunks(join(game_dir, "packed", "b.asr"))
+            assert [chunk.type for chunk in packed] == [ChunkType.RESOURCE, ChunkType.SOUND, ChunkType.RESOURCE]
+            assert catalog.read_chunk(packed[2]).data == b"b"
+
+
+def test_incremental_refresh():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = create_game(root)
+        path = join(root, "catalog.db")
+        with AssetCatalog(path) as catalog:
+            catalog.refresh(game_dir)
+        with AssetCatalog(path) as catalog:
+            stats = catalog.refresh(game_dir)
+            assert (stats.scanned, stats.unchanged, stats.removed) == (0, 3, 0)
+
+            archive = join(game_dir, "a.asr")
+            write_archive(archive, "changed")
+            info = stat(archive)
+            utime(archive, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+            remove(join(game_dir, "packed", "b.asr"))
+            stats = catalog.refresh(game_dir)
+            assert (stats.scanned, stats.unchanged, stats.removed) == (1, 1, 1)
+            assert catalog.archives == [archive]
+            assert catalog.find("listed") == []
+            assert catalog.extract(catalog.get("unique.dds")) == b"changed"
+
+
+def test_corrupt_archives_are_skipped():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = create_game(root)
+        for name in ["a.asr", join("packed", "b.asr")]:
+            path = join(game_dir, name)
+            data = PackIO.read_bytes(path)
+            PackIO.write_bytes(join(game_dir, "broken", name), data[:len(data) // 2])
+        with AssetCatalog() as catalog:
+            stats = catalog.refresh(game_dir)
+            assert stats.scanned == 5
+            assert catalog.archives == [join(game_dir, "a.asr"), join(game_dir, "packed", "b.asr")]
+            assert len(catalog.find("textures\\shared.dds")) == 2
+
+
+def test_refresh_only_removes_within_the_directory():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        write_archive(join(root, "gam", "a.asr"), "a")
+        write_archive(join(root, "game2.asr"), "b")
+        with AssetCatalog() as catalog:
+            catalog.add_archive(join(root, "game2.asr"))
+            stats = catalog.refresh(join(root, "gam"))
+            assert (stats.scanned, stats.removed) == (1, 0)
+            assert catalog.archives == [join(root, "gam", "a.asr"), join(root, "game2.asr")]
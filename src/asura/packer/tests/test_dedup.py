@@ -0,0 +1,68 @@
+from os import stat, listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.factories import initialize_factories
+from asura.common.mio import PackIO
+from asura.common.models.chunks.formats import ResourceChunk, SoundChunk
+from asura.common.models.chunks.formats.rscf import DDS_FILE
+from asura.packer.dedup import ContentStore, OBJECTS_DIR, COPY
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE, CLIP
+from asura.packer.unpacker import UnpackOptions, unpack_directory, CONTENT_STORE_DIR
+
+def test_deduplicated_unpack():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        write_archive(join(game_dir, "furniture.asr"), "furniture")
+        write_archive(join(game_dir, "furniture_content.asr"), "furniture_content")
+        options = UnpackOptions(output_directory=join(root, "unpack"), deduplicate=True)
+        unpack_directory(game_dir, options)
+        assert options.payload_store is None
+
+        objects_dir = join(options.create_content_store_path(), OBJECTS_DIR)
+        stored = sum(len(listdir(join(objects_dir, fan_out))) for fan_out in listdir(objects_dir))
+        # The shared texture and clip are stored once; each archive's unique texture once each
+        assert stored == 4
+
+        texture_path = join(options.create_path("furniture.asr"), "Chunk 0.RSCF", "textures\\shared.dds")
+        other_path = join(options.create_path("furniture_content.asr"), "Chunk 0.RSCF", "textures\\shared.dds")
+        assert stat(texture_path).st_ino == stat(other_path).st_ino
+
+        # Repacking reads the linked paths like any other file
+        chunk = ResourceChunk.repack(join(options.create_path("furniture.asr"), "Chunk 0.RSCF"))
+        assert chunk.data == TEXTURE and chunk.id == DDS_FILE
+        sound = SoundChunk.repack(join(options.create_path("furniture_content.asr"), "Chunk 1.ASTS"))
+        assert sound.clips[0].data == CLIP
+
+        # Writing over a linked path must not change the store (or the other links)
+        PackIO.write_bytes(texture_path, b"edited", overwrite=True)
+        assert PackIO.read_bytes(other_path) == TEXTURE
+
+
+def test_store_copy_mode():
+    with TemporaryDirectory() as root:
+        with ContentStore(join(root, CONTENT_STORE_DIR), COPY) as store:
+            for i in range(3):
+                assert store.write(join(root, f"{i}.bin"), TEXTURE)
+        assert store.stats.payloads == 3
+        assert store.stats.unique == 1
+        assert store.stats.saved_bytes == 2 * len(TEXTURE)
+        assert stat(join(root, "0.bin")).st_nlink == 1
+
+
+def test_store_belongs_to_its_unpack():
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        write_archive(join(game_dir, "furniture.asr"), "furniture")
+        write_archive(join(game_dir, "furniture_content.asr"), "furniture_content")
+        shared = UnpackOptions(output_directory=join(root, "shared"), deduplicate=True)
+        with ContentStore(shared.create_content_store_path()) as store:
+            shared.payload_store = store
+            unpack_directory(game_dir, shared)
+            # Unpacking without the store, while it's open, writes plain files
+            plain = UnpackOptions(output_directory=join(root, "plain"))
+            unpack_directory(game_dir, plain)
+        assert store.stats.payloads == 6
+        texture_path = join(plain.create_path("furniture.asr"), "Chunk 0.RSCF", "textures\\shared.dds")
+        assert stat(texture_path).st_nlink == 1
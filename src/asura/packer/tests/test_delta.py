@@ -0,0 +1,110 @@
+from os import listdir
+from os.path import join, getsize
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.common.compression import CompressionPolicy, FAST
+from asura.common.enums import ChunkType
+from asura.common.factories import ArchiveParser, initialize_factories
+from asura.common.mio import PackIO
+from asura.common.models.archive import ZbbArchive
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.packer.delta import create_patch, apply_patch, ArchivePatch, DeltaStats, COPY, DATA
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE
+
+
+def create_resource(name: str, data: bytes) -> ResourceChunk:
+    return ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, name, data=data)
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, "rb") as stream:
+        return stream.read()
+
+
+def compress(path: str, packed: str):
+    with open(path, "rb") as stream:
+        with open(packed, "wb") as out:
+            ZbbArchive.compress_to_stream(stream, out)
+
+
+def test_create_apply():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        base = join(root, "base.asr")
+        target = join(root, "target.asr")
+        write_archive(base, "base", [create_resource("removed.dds", bytes(1000))])
+        write_archive(target, "target", [create_resource("added.dds", b"new")])
+
+        patch_path = join(root, "update.patch")
+        patch = create_patch(base, target, patch_path)
+        # The shared texture and clip are copied; unique.dds changed, removed.dds was replaced by added.dds
+        assert patch.stats == DeltaStats(copied=2, inserted=1, replaced=1, removed=1,
+                                         payload_size=patch.stats.payload_size)
+        assert [kind for kind, _, _ in patch.operations] == [COPY, DATA]
+        assert getsize(patch_path) < getsize(target)
+        with open(patch_path, "rb") as stream:
+            assert ArchivePatch.read(stream) == patch
+
+        out = join(root, "out", "target.asr")
+        apply_patch(base, patch_path, out)
+        assert read_bytes(out) == read_bytes(target)
+
+        # The base archive must match the one the patch was created from
+        with pytest.raises(ValueError):
+            apply_patch(target, patch_path, join(root, "wrong.asr"))
+
+
+def test_compressed():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        base = join(root, "base.asr")
+        target = join(root, "target.asr")
+        write_archive(base, "base")
+        write_archive(target, "target")
+        packed_base = join(root, "base.zbb")
+        packed_target = join(root, "target.zbb")
+        compress(base, packed_base)
+        compress(target, packed_target)
+
+        patch_path = join(root, "update.patch")
+        patch = create_patch(packed_base, packed_target, patch_path)
+        assert (patch.stats.copied, patch.stats.replaced) == (2, 1)
+
+        out = join(root, "out.zbb")
+        apply_patch(packed_base, patch_path, out)
+        assert read_bytes(out) == read_bytes(packed_target)
+
+        # The target is compressed again with the given policy
+        apply_patch(packed_base, patch_path, out, CompressionPolicy.preset(FAST, block_size=4096))
+        with open(out, "rb") as stream:
+            assert len(ArchiveParser.parse(stream).blocks) > 1
+        with open(out, "rb") as stream, open(join(root, "out.asr"), "wb") as folder:
+            ArchiveParser.parse(stream).decompress_to_stream(stream, folder)
+        assert read_bytes(join(root, "out.asr")) == read_bytes(target)
+
+
+def test_changed_base_body():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        base = join(root, "base.asr")
+        target = join(root, "target.asr")
+        write_archive(base, "base")
+        write_archive(target, "target")
+        patch_path = join(root, "update.patch")
+        create_patch(base, target, patch_path)
+
+        # Same layout, but the shared texture's body changed
+        data = bytearray(read_bytes(base))
+        data[data.index(TEXTURE) + 100] ^= 0xff
+        changed = join(root, "changed.asr")
+        with open(changed, "wb") as stream:
+            stream.write(data)
+        out = join(root, "out", "target.asr")
+        PackIO.write_bytes(out, b"previous")
+        with pytest.raises(ValueError):
+            apply_patch(changed, patch_path, out)
+        assert read_bytes(out) == b"previous"
+        assert listdir(join(root, "out")) == ["target.asr"]
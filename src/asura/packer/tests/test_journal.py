@@ -0,0 +1,132 @@
+from os import walk
+from os.path import join, relpath
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.common.enums import ChunkType
+from asura.common.factories import initialize_factories
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.packer import repacker, unpacker
+from asura.packer.journal import JobJournal, Checkpoint, UNPACK
+from asura.packer.repacker import RepackOptions, repack_directory
+from asura.packer.tests.archive_helpers import write_archive
+from asura.packer.unpacker import UnpackOptions, unpack_directory
+
+EXTRA = [ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, f"extra_{i}.dds",
+                       data=bytes([i]) * (100 + i)) for i in range(7)]
+
+
+class Preempted(Exception):
+    pass
+
+
+def interrupt_after(monkeypatch, module, name: str, calls: int) -> list:
+    # Replaces a function with one which fails after a number of calls; returns the list of calls made
+    original = getattr(module, name)
+    made = []
+
+    def wrapper(*args, **kwargs):
+        if len(made) >= calls:
+            raise Preempted()
+        made.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, wrapper)
+    return made
+
+
+def read_tree(path: str) -> dict:
+    files = {}
+    for root, _, names in walk(path):
+        for name in names:
+            with open(join(root, name), "rb") as file:
+                files[relpath(join(root, name), path)] = file.read()
+    return files
+
+
+def test_journal_load():
+    with TemporaryDirectory() as root:
+        path = join(root, "jobs", "unpack.journal")
+        journal = JobJournal(path, UNPACK)
+        job = journal.job("a.asr", [1, 2])
+        job.chunk_done(True)
+        job.finish()
+        # An interrupted write leaves a partial line
+        with open(path, "ab") as stream:
+            stream.write(b'{"version": 1, "kind": "unp')
+        journal = JobJournal(path, UNPACK)
+        assert journal.get("a.asr", [1, 2]) == Checkpoint("a.asr", [1, 2], 1, 1, 1, None, True, True, True)
+        # The source changed
+        assert journal.get("a.asr", [1, 3]) is None
+        journal.job("b.asr", [4]).finish()
+        journal = JobJournal(path, UNPACK)
+        assert set(journal.checkpoints) == {"a.asr", "b.asr"}
+        assert JobJournal(path, UNPACK, resume=False).checkpoints == {}
+
+
+def test_resume_unpack(monkeypatch):
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        write_archive(join(game_dir, "a.asr"), "a", EXTRA)
+        # Chunks unpacked after the last checkpoint are unpacked again; overwriting counts them as unpacked both times
+        expected_options = UnpackOptions(output_directory=join(root, "expected"), overwrite_chunks=True)
+        expected = unpack_directory(game_dir, expected_options)
+
+        options = UnpackOptions(output_directory=join(root, "unpack"), overwrite_chunks=True,
+                                journal_path=join(root, "unpack.journal"), checkpoint_interval=2)
+        interrupt_after(monkeypatch, unpacker, "unpack_chunk", 5)
+        with pytest.raises(Preempted):
+            unpack_directory(game_dir, options)
+        monkeypatch.undo()
+
+        options.resume = True
+        calls = interrupt_after(monkeypatch, unpacker, "unpack_chunk", 100)
+        assert unpack_directory(game_dir, options) == expected
+        # 5 chunks were unpacked, but only 4 checkpointed; the 5th is unpacked again
+        assert [args[1] for args in calls][0] == join("a.asr", "Chunk 4")
+        assert len(calls) == len(EXTRA) + 4 - 4
+        assert read_tree(options.create_path()) == read_tree(expected_options.create_path())
+
+        # Finished archives aren't read again
+        calls.clear()
+        assert unpack_directory(game_dir, options) == expected
+        assert calls == []
+        # Unless they changed
+        write_archive(join(game_dir, "a.asr"), "changed", EXTRA)
+        unpack_directory(game_dir, options)
+        assert len(calls) == len(EXTRA) + 4
+
+
+def test_resume_repack(monkeypatch):
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        write_archive(join(game_dir, "a.asr"), "a", EXTRA)
+        unpack_options = UnpackOptions(output_directory=join(root, "unpack"))
+        unpack_directory(game_dir, unpack_options)
+        expected_dir = join(root, "expected")
+        expected = repack_directory(unpack_options.create_path(), expected_dir,
+                                    options=RepackOptions(chunk_workers=1, archive_workers=1))
+
+        out_dir = join(root, "repack")
+        options = RepackOptions(chunk_workers=1, archive_workers=1, journal_path=join(root, "repack.journal"),
+                                checkpoint_interval=3)
+        interrupt_after(monkeypatch, repacker, "repack_chunk", 7)
+        # The failed archive is reported, and left unfinished
+        assert repack_directory(unpack_options.create_path(), out_dir, options=options)[0] == 0
+        monkeypatch.undo()
+
+        options.resume = True
+        calls = interrupt_after(monkeypatch, repacker, "repack_chunk", 100)
+        assert repack_directory(unpack_options.create_path(), out_dir, options=options) == expected
+        assert len(calls) == len(EXTRA) + 3 - 6
+        with open(join(out_dir, "a.asr"), "rb") as stream:
+            with open(join(expected_dir, "a.asr"), "rb") as expected_stream:
+                assert stream.read() == expected_stream.read()
+
+        calls.clear()
+        assert repack_directory(unpack_options.create_path(), out_dir, options=options) == expected
+        assert calls == []
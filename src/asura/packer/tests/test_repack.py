@@ -0,0 +1,49 @@
+from os import remove
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.factories import initialize_factories
+from asura.common.mio import PackIO
+from asura.common.models.chunks import ChunkHeader
+from asura.common.enums import ChunkType
+from asura.common.models.chunks.formats import ResourceChunk
+from asura.common.models.chunks.formats.rscf import DDS_FILE
+from asura.packer.repacker import RepackOptions, discover_chunks, repack_directory
+from asura.packer.tests.archive_helpers import write_archive
+from asura.packer.unpacker import UnpackOptions, unpack_directory
+
+
+def test_discover_chunks_in_index_order():
+    with TemporaryDirectory() as root:
+        for name in ["Chunk 10.RSCF", "Chunk 2.ASTS", "Chunk 1.RSCF", "notes", "Chunk 0.HTXT"]:
+            PackIO.write_meta(join(root, name), {}, ext=PackIO.CHUNK_INFO_EXT)
+        PackIO.write_bytes(join(root, "Chunk 3.RSCF", "data.dds"), b"")
+        names = [path[len(root) + 1:] for path in discover_chunks(root)]
+        assert names == ["Chunk 0.HTXT", "Chunk 1.RSCF", "Chunk 2.ASTS", "Chunk 10.RSCF", "notes"]
+
+
+def test_round_trip():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        game_dir = join(root, "game")
+        # Enough chunks that 'Chunk 10' sorts before 'Chunk 2' by name
+        extra = [ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, f"extra_{i}.dds",
+                               data=bytes([i]) * (100 + i)) for i in range(12)]
+        for name in ["a.asr", "b.asr"]:
+            write_archive(join(game_dir, name), name, extra)
+        unpack_options = UnpackOptions(output_directory=join(root, "unpack"))
+        unpack_directory(game_dir, unpack_options)
+
+        for workers in [1, 2]:
+            out_dir = join(root, f"repack_{workers}")
+            options = RepackOptions(chunk_workers=workers, archive_workers=workers)
+            result = repack_directory(unpack_options.create_path(), out_dir, options=options)
+            assert result == (2, 2, 15 * 2, 15 * 2)
+            for name in ["a.asr", "b.asr"]:
+                assert PackIO.read_bytes(join(out_dir, name)) == PackIO.read_bytes(join(game_dir, name))
+
+        # A broken archive isn't repacked, but its chunks still count towards the total
+        remove(join(unpack_options.create_path("b.asr"), "Chunk 3.RSCF", "extra_0.dds"))
+        result = repack_directory(unpack_options.create_path(), join(root, "broken"),
+                                  options=RepackOptions(archive_workers=1))
+        assert result == (1, 2, 15, 15 * 2)
@@ -1,14 +1,18 @@
-from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from os import stat, walk
 from os.path import exists, join, basename
-from typing import List, BinaryIO, Tuple
+from typing import List, BinaryIO, Tuple, Iterable
 
 from asura.common.enums import ChunkType, ArchiveType
 from asura.common.error import ParsingError
-from asura.common.mio import PackIO
+from asura.common.mio import PackIO, map_stream
 from asura.common.models.archive import BaseArchive, FolderArchive, ZbbArchive
 from asura.common.models.chunks import BaseChunk
 from asura.common.factories import ChunkUnpacker, ArchiveParser, initialize_factories
+from asura.packer.dedup import ContentStore, HARDLINK
+from asura.packer.journal import ArchiveJob, JobJournal, UNPACK, DEFAULT_CHECKPOINT_INTERVAL, file_fingerprint
 
 # The default root
 DEFAULT_ROOT_DIR = "unpack"
@@ -16,6 +20,8 @@ DEFAULT_ROOT_DIR = "unpack"
 DECOMPRESSED_DIR = "decompressed"
 # The path relative to the archive, containing chunk information
 DUMP_DIR = "archives"
+# The path relative to root, containing deduplicated payloads
+CONTENT_STORE_DIR = "content"
 
 
 @dataclass
@@ -37,6 +43,9 @@ class UnpackOptions:
         else:
             return join(self.get_named_output_directory(), DECOMPRESSED_DIR, name)
 
+    def create_content_store_path(self) -> str:
+        return join(self.get_named_output_directory(), CONTENT_STORE_DIR)
+
     def create_path(self, name: str = None) -> str:
         if name is None:
             return join(self.get_named_output_directory(), DUMP_DIR)
@@ -56,6 +65,29 @@ class UnpackOptions:
     overwrite_chunks: bool = False
     strict_archive: bool = False
 
+    # Store each unique resource / sound clip once, and link the unpacked paths to it
+    deduplicate: bool = False
+    # One of 'hardlink', 'reflink' or 'copy'; see ContentStore
+    link_mode: str = HARDLINK
+    # The store payloads are written through; set by content_store, or given to share a store between unpacks
+    payload_store: ContentStore = field(default=None, repr=False, compare=False)
+
+    # Parse each archive's chunks on this many workers (see FolderArchive.iter_parallel); None parses them in turn
+    parse_workers: int = None
+    # Parse on processes rather than threads; parsing is mostly Python, and threads share a single core
+    parse_processes: bool = False
+
+    # Records the progress of unpack_directory (see JobJournal); None keeps no journal
+    journal_path: str = None
+    # Skip the archives (and chunks) the journal records as finished; otherwise the journal is cleared
+    resume: bool = False
+    checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL
+
+    def create_parse_executor(self) -> Executor:
+        if self.parse_processes:
+            return ProcessPoolExecutor(self.parse_workers)
+        return ThreadPoolExecutor(self.parse_workers, thread_name_prefix="asura-parse")
+
     def get_print_str_parts(self) -> List[str]:
         def list_opts(n, l: List):
             if l is None:
@@ -80,16 +112,66 @@ class UnpackOptions:
             bool_opts("use_cached_decompressed", self.use_cached_decompressed),
             bool_opts("unpack_decompressed", self.unpack_decompressed),
             bool_opts("overwrite_chunks", self.overwrite_chunks),
-            bool_opts("strict_archive", self.strict_archive)
+            bool_opts("strict_archive", self.strict_archive),
+            bool_opts("deduplicate", self.deduplicate),
+            f"parse_workers: {self.parse_workers}" if self.parse_workers is not None else None,
+            bool_opts("parse_processes", self.parse_processes) if self.parse_workers is not None else None,
+            f"journal_path: {self.journal_path}" if self.journal_path is not None else None,
+            bool_opts("resume", self.resume) if self.journal_path is not None else None,
         ]
         return [s for s in parts if s is not None]
 
 
+def cache_decompressed(path: str, options: UnpackOptions = None) -> str:
+    """
+    Gets the path an archive's folder archive can be read from; Zbb archives are decompressed to their cache (see
+    UnpackOptions.create_decompressed_cache_path), and an existing cache of the same size is reused.
+
+    :param path: The path to the archive.
+    :param options: Where Zbb archives are decompressed to.
+    :return: The cache's path for Zbb archives; otherwise the path itself.
+    """
+    with open(path, "rb") as stream:
+        try:
+            type = ArchiveType.read(stream)
+        except ParsingError:
+            return path
+        if type != ArchiveType.Zbb:
+            return path
+        archive = ZbbArchive.read(stream, type)
+        options = options or UnpackOptions()
+        cache_path = options.create_decompressed_cache_path(basename(path))
+        cached = exists(cache_path) and stat(cache_path).st_size == archive.size
+        if not (cached and options.use_cached_decompressed):
+            PackIO.make_parent_dirs(cache_path)
+            with open(cache_path, "wb") as out_stream:
+                archive.decompress_to_stream(stream, out_stream)
+    return cache_path
+
+
+@contextmanager
+def content_store(options: UnpackOptions = None):
+    """
+    Opens a content store for the duration of an unpack, if the options ask for deduplication (and don't hold a
+    store already); waits for the store's writes to finish on exit.
+
+    :return: The options to unpack with; a copy holding the store, when one was opened.
+    """
+    options = options or UnpackOptions()
+    if not options.deduplicate or options.payload_store is not None:
+        yield options
+        return
+    with ContentStore(options.create_content_store_path(), options.link_mode) as store:
+        yield replace(options, payload_store=store)
+    stats = store.stats
+    print(f"\tDeduplicated {stats.payloads} payloads to {stats.unique}; saved {stats.saved_bytes} bytes")
+
+
 def unpack_chunk(chunk: BaseChunk, chunk_name: str, options: UnpackOptions = None) -> bool:
     options = options or UnpackOptions()
     chunk_path = options.create_path(chunk_name)
     print(f"\t\t\t{chunk_path}")
-    return ChunkUnpacker.unpack(chunk, chunk_path, options.overwrite_chunks)
+    return ChunkUnpacker.unpack(chunk, chunk_path, options.overwrite_chunks, options.payload_store)
 
 
 def write_meta(name: str, options: UnpackOptions = None):
@@ -101,7 +183,13 @@ def write_meta(name: str, options: UnpackOptions = None):
 
 
 def unpack_archive(archive: BaseArchive, archive_name: str, stream: BinaryIO = None,
-                   options: UnpackOptions = None) -> Tuple[bool, int, int]:
+                   options: UnpackOptions = None, job: ArchiveJob = None) -> Tuple[bool, int, int]:
+    """
+    Unpacks an archive's chunks; compressed archives are decompressed (or read from the decompressed cache) first.
+
+    :param job: Checkpoints the unpacked chunks; chunks it records as finished are skipped without being read.
+    :return: Whether the archive was unpacked, the number of chunks unpacked, and the number of chunks.
+    """
     options = options or UnpackOptions()
     if archive is None:
         return False, -1, -1
@@ -119,13 +207,34 @@ def unpack_archive(archive: BaseArchive, archive_name: str, stream: BinaryIO = N
         # Avoid loading chunks into memory for large archives
         written = 0
         total = 0
+        start = 0
+        if job is not None:
+            start, written, total = job.start, job.checkpoint.written, job.checkpoint.total
+        # Finished chunks aren't read again
+        remaining = archive if start == 0 else FolderArchive(archive.type, archive.chunks[start:])
         try:
-            write_meta(archive_name)
-            for i, chunk in enumerate(archive.load_chunk_by_chunk(stream, options.included_chunks)):
-                chunk_path = join(archive_name, f"Chunk {i}")
-                if unpack_chunk(chunk, chunk_path, options):
-                    written += 1
-                total += 1
+            write_meta(archive_name, options)
+            # Chunks are read in place from the mapped file when possible
+            with map_stream(stream) as mapped:
+                if options.parse_workers is None:
+                    chunks = remaining.load_chunk_by_chunk(stream, options.included_chunks, mapped)
+                else:
+                    executor = options.create_parse_executor()
+                    chunks = remaining.iter_parallel(stream, options.included_chunks, mapped, executor)
+                try:
+                    for i, chunk in enumerate(chunks, start):
+                        chunk_path = join(archive_name, f"Chunk {i}")
+                        unpacked = unpack_chunk(chunk, chunk_path, options)
+                        if unpacked:
+                            written += 1
+                        total += 1
+                        if job is not None:
+                            job.chunk_done(unpacked)
+                finally:
+                    # Workers may still be reading the map
+                    chunks.close()
+                    if options.parse_workers is not None:
+                        executor.shutdown(wait=True)
             return True, written, total
         except ParsingError as e:
             print(archive_name, e)
@@ -135,7 +244,7 @@ def unpack_archive(archive: BaseArchive, archive_name: str, stream: BinaryIO = N
         if exists(cache_path) and stat(cache_path).st_size == archive.size and options.use_cached_decompressed:
             if options.unpack_decompressed:
                 with open(cache_path, "rb") as cached:
-                    is_archive, success, unpacked, total = unpack_stream(cached, archive_name, options)
+                    is_archive, success, unpacked, total = unpack_stream(cached, archive_name, options, job)
                     if is_archive:
                         return success, unpacked, total
                     else:
@@ -148,7 +257,7 @@ def unpack_archive(archive: BaseArchive, archive_name: str, stream: BinaryIO = N
                 archive.decompress_to_stream(stream, cached)
                 if options.unpack_decompressed:
                     cached.seek(0)
-                    is_archive, success, unpacked, total = unpack_stream(cached, archive_name, options)
+                    is_archive, success, unpacked, total = unpack_stream(cached, archive_name, options, job)
                     if is_archive:
                         return success, unpacked, total
                     else:
@@ -156,12 +265,20 @@ def unpack_archive(archive: BaseArchive, archive_name: str, stream: BinaryIO = N
         else:
             if options.unpack_decompressed:
                 decompressed_archive = archive.decompress(stream)
-                return unpack_archive(decompressed_archive, archive_name, stream, options)
+                return unpack_archive(decompressed_archive, archive_name, stream, options, job)
 
     return False, -1, -1
 
 
-def unpack_stream(stream: BinaryIO, stream_name: str, options: UnpackOptions = None) -> Tuple[bool, bool, int, int]:
+def unpack_stream(stream: BinaryIO, stream_name: str, options: UnpackOptions = None,
+                  job: ArchiveJob = None) -> Tuple[bool, bool, int, int]:
+    options = options or UnpackOptions()
+    with content_store(options) as options:
+        return _unpack_stream(stream, stream_name, options, job)
+
+
+def _unpack_stream(stream: BinaryIO, stream_name: str, options: UnpackOptions,
+                   job: ArchiveJob = None) -> Tuple[bool, bool, int, int]:
     try:
         archive = ArchiveParser.parse(stream)
     except ParsingError:
@@ -169,35 +286,67 @@ def unpack_stream(stream: BinaryIO, stream_name: str, options: UnpackOptions = N
             return False, False, -1, -1
         else:
             raise
-    success, unpacked, total = unpack_archive(archive, stream_name, stream, options)
+    success, unpacked, total = unpack_archive(archive, stream_name, stream, options, job)
     return True, success, unpacked, total
 
 
-def unpack_file(path: str, file_name: str, options: UnpackOptions = None) -> \
+def unpack_file(path: str, file_name: str, options: UnpackOptions = None, job: ArchiveJob = None) -> \
         Tuple[bool, bool, int, int]:
     with open(path, "rb") as stream:
-        return unpack_stream(stream, file_name, options)
+        return unpack_stream(stream, file_name, options, job)
 
 
 def unpack_directory(search_dir: str, options: UnpackOptions = None) -> Tuple[
     int, int, int, int]:  # Archive_Unpacked, Archive Total, Chunks Unpacked, Chunks Total
+    options = options or UnpackOptions()
+    with content_store(options) as options:
+        return _unpack_directory(search_dir, options)
+
+
+def walk_directory(search_dir: str) -> Iterable[Tuple[str, str]]:
+    """
+    Finds every file in a directory (and its subdirectories); any of them may be an archive.
+
+    :param search_dir: The directory.
+    :return: The path of each file, and its name relative to the directory.
+    """
+    for root, _, files in walk(search_dir):
+        for file in files:
+            file_path = join(root, file)
+            yield file_path, file_path.replace(search_dir, "").lstrip("\\/")
+
+
+def _unpack_directory(search_dir: str, options: UnpackOptions) -> Tuple[int, int, int, int]:
     print(f"Unpacking '{search_dir}'")
     unpacked_archives = 0
     total_archives = 0
     unpacked_chunks = 0
     total_chunks = 0
-    for root, _, files in walk(search_dir):
-        for file in files:
-            file_path = join(root, file)
-            name = file_path.replace(search_dir, "").lstrip("\\/")
+    journal = None
+    if options.journal_path is not None:
+        journal = JobJournal(options.journal_path, UNPACK, options.resume, options.checkpoint_interval)
+    for file_path, name in walk_directory(search_dir):
+        if journal is None:
             print(f"\t...\\{name}")
             is_archive, success, unpacked, total = unpack_file(file_path, name, options=options)
-            if is_archive:
-                total_archives += 1
-                if success:
-                    unpacked_archives += 1
-                    unpacked_chunks += unpacked
-                    total_chunks += total_chunks
+        else:
+            job = journal.job(name, file_fingerprint(file_path))
+            checkpoint = job.checkpoint
+            if checkpoint.complete:
+                # Finished before the job was interrupted; the file isn't read again
+                print(f"\t...\\{name} (finished)")
+                is_archive, success = checkpoint.is_archive, checkpoint.success
+                unpacked, total = checkpoint.written, checkpoint.total
+            else:
+                print(f"\t...\\{name}" + (f" (resuming at chunk {job.start})" if job.start else ""))
+                is_archive, success, unpacked, total = unpack_file(file_path, name, options=options, job=job)
+                job.finish(success, is_archive)
+        if is_archive:
+            total_archives += 1
+            if success:
+                unpacked_archives += 1
+                unpacked_chunks += unpacked
+                total_chunks += total_chunks
     return unpacked_archives, total_archives, unpacked_chunks, total_chunks
 
 
@@ -0,0 +1,18 @@
+__all__ = [
+    "DdsHeader",
+    "DdsLevel",
+    "flip_dds",
+    "decode_dds",
+    "decode_level",
+    "make_thumbnail",
+    "generate_thumbnails",
+    "TextureIndex",
+    "TextureRecord",
+    "build_texture_index",
+]
+
+from asura.texture.dds import DdsHeader, DdsLevel
+from asura.texture.flip import flip_dds
+from asura.texture.bcn import decode_dds, decode_level
+from asura.texture.thumbnails import make_thumbnail, generate_thumbnails
+from asura.texture.index import TextureIndex, TextureRecord, build_texture_index
@@ -0,0 +1,177 @@
+import numpy as np
+
+from asura.texture.dds import DdsHeader, DdsLevel
+
+# Formats decode_level can decode
+DECODABLE_FORMATS = ["BC1", "BC2", "BC3", "BC4", "BC5", "B8G8R8A8", "B8G8R8X8", "R8G8B8A8", "R8G8B8X8", "B8G8R8", "R8",
+                     "A8"]
+
+
+def _read_uint(blocks: np.ndarray, start: int, size: int) -> np.ndarray:
+    padded = np.zeros((blocks.shape[0], 8), dtype=np.uint8)
+    padded[:, :size] = blocks[:, start:start + size]
+    return padded.view("<u8")[:, 0]
+
+
+def _unpack_indices(values: np.ndarray, bits: int) -> np.ndarray:
+    # (n,) packed indices -> (n, 16) indices, row major
+    shifts = np.arange(16, dtype=np.uint64) * np.uint64(bits)
+    return ((values[:, None] >> shifts) & np.uint64((1 << bits) - 1)).astype(np.intp)
+
+
+def _expand_565(colors: np.ndarray) -> np.ndarray:
+    # (n,) RGB565 -> (n, 3) RGB888
+    colors = colors.astype(np.uint32)
+    r = (colors >> 11) & 0x1f
+    g = (colors >> 5) & 0x3f
+    b = colors & 0x1f
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1)
+
+
+def decode_color_blocks(blocks: np.ndarray, start: int = 0, punch_through: bool = True) -> np.ndarray:
+    """
+    Decodes BC1 style color blocks.
+
+    :param blocks: (n, block size) uint8 blocks.
+    :param start: Position of the color block within each block.
+    :param punch_through: Whether blocks with color0 <= color1 use 1-bit alpha (only BC1 does).
+    :return: (n, 16, 4) uint8 RGBA pixels.
+    """
+    c0 = blocks[:, start].astype(np.uint16) | (blocks[:, start + 1].astype(np.uint16) << 8)
+    c1 = blocks[:, start + 2].astype(np.uint16) | (blocks[:, start + 3].astype(np.uint16) << 8)
+    rgb0 = _expand_565(c0)
+    rgb1 = _expand_565(c1)
+    four_color = (c0 > c1) | (not punch_through)
+    four = four_color[:, None]
+    palette = np.empty((blocks.shape[0], 4, 4), dtype=np.uint32)
+    palette[:, 0, :3] = rgb0
+    palette[:, 1, :3] = rgb1
+    palette[:, 2, :3] = np.where(four, (2 * rgb0 + rgb1) // 3, (rgb0 + rgb1) // 2)
+    palette[:, 3, :3] = np.where(four, (rgb0 + 2 * rgb1) // 3, 0)
+    palette[:, :, 3] = 255
+    palette[:, 3, 3] = np.where(four_color, 255, 0)
+    indices = _unpack_indices(_read_uint(blocks, start + 4, 4), 2)
+    pixels = np.take_along_axis(palette, indices[:, :, None], axis=1)
+    return pixels.astype(np.uint8)
+
+
+def decode_alpha_blocks(blocks: np.ndarray, start: int = 0) -> np.ndarray:
+    """
+    Decodes BC3/BC4 style interpolated alpha (single channel) blocks.
+
+    :param blocks: (n, block size) uint8 blocks.
+    :param start: Position of the alpha block within each block.
+    :return: (n, 16) uint8 values.
+    """
+    a0 = blocks[:, start].astype(np.uint32)
+    a1 = blocks[:, start + 1].astype(np.uint32)
+    eight = (a0 > a1)[:, None]
+    steps = np.arange(1, 7, dtype=np.uint32)
+    palette = np.empty((blocks.shape[0], 8), dtype=np.uint32)
+    palette[:, 0] = a0
+    palette[:, 1] = a1
+    # 8 value mode interpolates 6 values, 6 value mode interpolates 4 and adds 0 and 255
+    eight_values = ((7 - steps) * a0[:, None] + steps * a1[:, None]) // 7
+    six_values = ((5 - steps[:4]) * a0[:, None] + steps[:4] * a1[:, None]) // 5
+    six_values = np.concatenate([six_values, np.zeros_like(a0)[:, None], np.full_like(a0, 255)[:, None]], axis=1)
+    palette[:, 2:] = np.where(eight, eight_values, six_values)
+    indices = _unpack_indices(_read_uint(blocks, start + 2, 6), 3)
+    return np.take_along_axis(palette, indices, axis=1).astype(np.uint8)
+
+
+def decode_explicit_alpha_blocks(blocks: np.ndarray, start: int = 0) -> np.ndarray:
+    # BC2 style; 16 4-bit alphas
+    values = _unpack_indices(_read_uint(blocks, start, 8), 4)
+    return (values * 17).astype(np.uint8)
+
+
+def decode_blocks(format: str, blocks: np.ndarray) -> np.ndarray:
+    """
+    Decodes block compressed data.
+
+    :param format: One of BC1, BC2, BC3, BC4 or BC5.
+    :param blocks: (n, block size) uint8 blocks.
+    :return: (n, 16, 4) uint8 RGBA pixels.
+    """
+    if format == "BC1":
+        return decode_color_blocks(blocks)
+    elif format == "BC2":
+        pixels = decode_color_blocks(blocks, 8, False)
+        pixels[:, :, 3] = decode_explicit_alpha_blocks(blocks)
+        return pixels
+    elif format == "BC3":
+        pixels = decode_color_blocks(blocks, 8, False)
+        pixels[:, :, 3] = decode_alpha_blocks(blocks)
+        return pixels
+    elif format == "BC4":
+        pixels = np.empty((blocks.shape[0], 16, 4), dtype=np.uint8)
+        pixels[:, :, :3] = decode_alpha_blocks(blocks)[:, :, None]
+        pixels[:, :, 3] = 255
+        return pixels
+    elif format == "BC5":
+        # Two channel normal maps; the blue (z) channel is reconstructed
+        pixels = np.empty((blocks.shape[0], 16, 4), dtype=np.uint8)
+        pixels[:, :, 0] = decode_alpha_blocks(blocks, 0)
+        pixels[:, :, 1] = decode_alpha_blocks(blocks, 8)
+        xy = pixels[:, :, :2].astype(np.float32) / 127.5 - 1
+        z = np.sqrt(np.clip(1 - (xy ** 2).sum(axis=-1), 0, 1))
+        pixels[:, :, 2] = np.round((z + 1) * 127.5).astype(np.uint8)
+        pixels[:, :, 3] = 255
+        return pixels
+    raise NotImplementedError(f"Not Supported ~ {format}")
+
+
+def _decode_pixels(format: str, data: np.ndarray, width: int, height: int) -> np.ndarray:
+    if format in ["B8G8R8A8", "B8G8R8X8", "R8G8B8A8", "R8G8B8X8"]:
+        pixels = data.reshape(height, width, 4).copy()
+        if format[0] == "B":
+            pixels[:, :, :3] = pixels[:, :, 2::-1]
+        if format.endswith("X8"):
+            pixels[:, :, 3] = 255
+        return pixels
+    elif format == "B8G8R8":
+        pixels = np.full((height, width, 4), 255, dtype=np.uint8)
+        pixels[:, :, :3] = data.reshape(height, width, 3)[:, :, ::-1]
+        return pixels
+    elif format in ["R8", "A8"]:
+        pixels = np.full((height, width, 4), 255, dtype=np.uint8)
+        channels = slice(3, 4) if format == "A8" else slice(0, 3)
+        pixels[:, :, channels] = data.reshape(height, width, 1)
+        return pixels
+    raise NotImplementedError(f"Not Supported ~ {format}")
+
+
+def decode_level(header: DdsHeader, level: DdsLevel, data: bytes) -> np.ndarray:
+    """
+    Decodes the first depth slice of a single mip level.
+
+    :param header: The DDS's header.
+    :param level: The level to decode.
+    :param data: The level's data (level.size bytes), not the whole DDS.
+    :return: (height, width, 4) uint8 RGBA pixels.
+    """
+    data = np.frombuffer(data, dtype=np.uint8, count=level.slice_size)
+    if not header.is_block_compressed:
+        return _decode_pixels(header.format, data, level.width, level.height)
+    block_rows = max(1, (level.height + 3) // 4)
+    block_columns = max(1, (level.width + 3) // 4)
+    pixels = decode_blocks(header.format, data.reshape(-1, header.block_size))
+    pixels = pixels.reshape(block_rows, block_columns, 4, 4, 4).transpose(0, 2, 1, 3, 4)
+    pixels = pixels.reshape(block_rows * 4, block_columns * 4, 4)
+    return np.ascontiguousarray(pixels[:level.height, :level.width])
+
+
+def decode_dds(data: bytes, mip: int = 0, surface: int = 0) -> np.ndarray:
+    """
+    Decodes a single mip level of a DDS.
+
+    :param data: The DDS, header included.
+    :param mip: The mip level to decode.
+    :param surface: The cubemap face or array slice to decode.
+    :return: (height, width, 4) uint8 RGBA pixels.
+    """
+    header = DdsHeader.parse(data)
+    for level in header.levels():
+        if level.mip == mip and level.surface == surface:
+            return decode_level(header, level, data[level.offset:level.offset + level.size])
+    raise IndexError(f"DDS has no mip {mip} on surface {surface}.")
@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+from struct import Struct
+from typing import Optional, Iterable
+
+from asura.common.error import ParsingError
+
+DDS_MAGIC = b"DDS "
+DX10_FOURCC = "DX10"
+
+# magic, size, flags, height, width, pitch/linear size, depth, mip count, 11 reserved words
+_HEADER_LAYOUT = Struct("< 4s I I I I I I I 44x")
+# pixel format; size, flags, fourcc, bit count, r/g/b/a masks
+_PIXEL_FORMAT_LAYOUT = Struct("< I I 4s I I I I I")
+# caps, caps2, caps3, caps4, reserved
+_CAPS_LAYOUT = Struct("< I I I I 4x")
+# dxgi format, resource dimension, misc flags, array size, misc flags 2
+_DX10_LAYOUT = Struct("< I I I I I")
+
+DDS_HEADER_SIZE = _HEADER_LAYOUT.size + _PIXEL_FORMAT_LAYOUT.size + _CAPS_LAYOUT.size  # 128
+DDS_DX10_HEADER_SIZE = DDS_HEADER_SIZE + _DX10_LAYOUT.size  # 148
+
+DDPF_ALPHA = 0x2
+DDPF_FOURCC = 0x4
+DDPF_RGB = 0x40
+DDPF_LUMINANCE = 0x20000
+
+DDSCAPS2_CUBEMAP = 0x200
+DDSCAPS2_VOLUME = 0x200000
+DDS_RESOURCE_MISC_TEXTURECUBE = 0x4
+
+# Bytes per 4x4 block
+BLOCK_SIZES = {
+    "BC1": 8,
+    "BC2": 16,
+    "BC3": 16,
+    "BC4": 8,
+    "BC5": 16,
+    "BC6H": 16,
+    "BC7": 16,
+}
+
+_FOURCC_FORMATS = {
+    "DXT1": "BC1",
+    "DXT2": "BC2",
+    "DXT3": "BC2",
+    "DXT4": "BC3",
+    "DXT5": "BC3",
+    "ATI1": "BC4",
+    "BC4U": "BC4",
+    "BC4S": "BC4",
+    "ATI2": "BC5",
+    "BC5U": "BC5",
+    "BC5S": "BC5",
+}
+
+# Legacy D3DFMT values stored in the fourcc; format, bytes per pixel
+_D3D_FORMATS = {
+    113: ("R16G16B16A16_FLOAT", 8),
+    116: ("R32G32B32A32_FLOAT", 16),
+}
+
+# format, bytes per pixel (0 for block compressed formats)
+_DXGI_FORMATS = {
+    2: ("R32G32B32A32_FLOAT", 16),
+    10: ("R16G16B16A16_FLOAT", 8),
+    24: ("R10G10B10A2", 4),
+    28: ("R8G8B8A8", 4),
+    29: ("R8G8B8A8", 4),
+    49: ("R8G8", 2),
+    61: ("R8", 1),
+    65: ("A8", 1),
+    71: ("BC1", 0),
+    72: ("BC1", 0),
+    74: ("BC2", 0),
+    75: ("BC2", 0),
+    77: ("BC3", 0),
+    78: ("BC3", 0),
+    80: ("BC4", 0),
+    81: ("BC4", 0),
+    83: ("BC5", 0),
+    84: ("BC5", 0),
+    85: ("B5G6R5", 2),
+    86: ("B5G5R5A1", 2),
+    87: ("B8G8R8A8", 4),
+    88: ("B8G8R8X8", 4),
+    91: ("B8G8R8A8", 4),
+    93: ("B8G8R8X8", 4),
+    95: ("BC6H", 0),
+    96: ("BC6H", 0),
+    98: ("BC7", 0),
+    99: ("BC7", 0),
+    115: ("B4G4R4A4", 2),
+}
+
+
+@dataclass
+class DdsLevel:
+    # Index of the surface (cubemap face / array slice) this level belongs to
+    surface: int = None
+    mip: int = None
+    # Position of the level's data, relative to the start of the DDS (header included)
+    offset: int = None
+    width: int = None
+    height: int = None
+    depth: int = None
+    # Size of the whole level; depth slices included
+    size: int = None
+
+    @property
+    def slice_size(self) -> int:
+        return self.size // self.depth
+
+
+@dataclass
+class DdsHeader:
+    width: int = None
+    height: int = None
+    depth: int = None
+    mip_count: int = None
+    format: str = None
+    # Bytes per pixel; None for block compressed formats
+    bytes_per_pixel: int = None
+    is_cubemap: bool = False
+    is_volume: bool = False
+    array_size: int = 1
+    # 128, or 148 with the DX10 extension
+    header_size: int = DDS_HEADER_SIZE
+    fourcc: str = None
+    dxgi_format: int = None
+
+    @property
+    def is_block_compressed(self) -> bool:
+        return self.format in BLOCK_SIZES
+
+    @property
+    def block_size(self) -> Optional[int]:
+        return BLOCK_SIZES.get(self.format)
+
+    @property
+    def surface_count(self) -> int:
+        return self.array_size * (6 if self.is_cubemap else 1)
+
+    @classmethod
+    def parse(cls, data: bytes) -> 'DdsHeader':
+        """
+        Parses a DDS header.
+
+        :param data: The start of the DDS; at most DDS_DX10_HEADER_SIZE bytes are needed.
+        :return: The header.
+        :raises ParsingError: raised when the data is not a DDS, or is truncated.
+        """
+        if len(data) < DDS_HEADER_SIZE:
+            raise ParsingError(len(data))
+        magic, size, _, height, width, _, depth, mip_count = _HEADER_LAYOUT.unpack_from(data, 0)
+        if magic != DDS_MAGIC or size != DDS_HEADER_SIZE - 4:
+            raise ParsingError(0)
+        _, pf_flags, fourcc, bit_count, r_mask, g_mask, b_mask, a_mask = _PIXEL_FORMAT_LAYOUT.unpack_from(
+            data, _HEADER_LAYOUT.size)
+        _, caps2, _, _ = _CAPS_LAYOUT.unpack_from(data, _HEADER_LAYOUT.size + _PIXEL_FORMAT_LAYOUT.size)
+
+        result = DdsHeader(width, height, max(1, depth), max(1, mip_count))
+        result.is_cubemap = bool(caps2 & DDSCAPS2_CUBEMAP)
+        result.is_volume = bool(caps2 & DDSCAPS2_VOLUME)
+        if not result.is_volume:
+            result.depth = 1
+
+        if pf_flags & DDPF_FOURCC:
+            result.fourcc = fourcc.decode("ascii", errors="replace")
+            if result.fourcc == DX10_FOURCC:
+                if len(data) < DDS_DX10_HEADER_SIZE:
+                    raise ParsingError(len(data))
+                dxgi_format, _, misc_flags, array_size, _ = _DX10_LAYOUT.unpack_from(data, DDS_HEADER_SIZE)
+                result.header_size = DDS_DX10_HEADER_SIZE
+                result.dxgi_format = dxgi_format
+                result.array_size = max(1, array_size)
+                result.is_cubemap = bool(misc_flags & DDS_RESOURCE_MISC_TEXTURECUBE)
+                result.format, bytes_per_pixel = _DXGI_FORMATS.get(dxgi_format, (f"DXGI_{dxgi_format}", None))
+                result.bytes_per_pixel = bytes_per_pixel or None
+            elif result.fourcc in _FOURCC_FORMATS:
+                result.format = _FOURCC_FORMATS[result.fourcc]
+            else:
+                (d3d_format,) = Struct("< I").unpack(fourcc)
+                result.format, result.bytes_per_pixel = _D3D_FORMATS.get(d3d_format, (result.fourcc, None))
+        elif pf_flags & (DDPF_RGB | DDPF_LUMINANCE | DDPF_ALPHA):
+            result.bytes_per_pixel = bit_count // 8
+            result.format = _get_uncompressed_format(bit_count, r_mask, g_mask, b_mask, a_mask)
+        return result
+
+    def level_size(self, width: int, height: int) -> int:
+        if self.is_block_compressed:
+            return max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * self.block_size
+        elif self.bytes_per_pixel is not None:
+            return width * height * self.bytes_per_pixel
+        raise NotImplementedError(f"Not Supported ~ {self.format}")
+
+    def levels(self) -> Iterable[DdsLevel]:
+        """
+        Lists the position and dimensions of every surface's mip levels, in the order they are stored.
+
+        :raises NotImplementedError: raised when the size of the format is not known.
+        """
+        offset = self.header_size
+        for surface in range(self.surface_count):
+            for mip in range(self.mip_count):
+                width = max(1, self.width >> mip)
+                height = max(1, self.height >> mip)
+                depth = max(1, self.depth >> mip)
+                size = self.level_size(width, height) * depth
+                yield DdsLevel(surface, mip, offset, width, height, depth, size)
+                offset += size
+
+    @property
+    def payload_size(self) -> int:
+        """
+        The size of every level of every surface; this is also the size of the texture in (GPU) memory.
+        """
+        return sum(level.size for level in self.levels())
+
+
+def _get_uncompressed_format(bit_count: int, r_mask: int, g_mask: int, b_mask: int, a_mask: int) -> str:
+    if bit_count == 32 and (r_mask, g_mask, b_mask) == (0xff0000, 0xff00, 0xff):
+        return "B8G8R8A8" if a_mask else "B8G8R8X8"
+    elif bit_count == 32 and (r_mask, g_mask, b_mask) == (0xff, 0xff00, 0xff0000):
+        return "R8G8B8A8" if a_mask else "R8G8B8X8"
+    elif bit_count == 24:
+        return "B8G8R8"
+    elif bit_count == 8:
+        return "A8" if a_mask and not r_mask else "R8"
+    return f"RGB{bit_count}"
+
+
+def is_dds(data: bytes) -> bool:
+    return data[0:4] == DDS_MAGIC
@@ -0,0 +1,121 @@
+from typing import List
+
+import numpy as np
+
+from asura.texture.dds import DdsHeader, DdsLevel
+
+# Formats whose 4x4 blocks we know how to rearrange
+FLIPPABLE_BLOCK_FORMATS = ["BC1", "BC2", "BC3", "BC4", "BC5"]
+
+_IDENTITY = [0, 1, 2, 3]
+
+
+def _get_permutation(size: int, flip: bool) -> List[int]:
+    # The pixels of a block which lie inside the texture; textures smaller than a block only use the first rows/columns
+    if not flip:
+        return _IDENTITY
+    used = min(size, 4)
+    return list(reversed(range(used))) + _IDENTITY[used:]
+
+
+def _permute_indices(values: np.ndarray, bits: int, rows: List[int], columns: List[int]) -> np.ndarray:
+    # Each block packs 16 indices, row major, 'bits' bits each; move index (rows[r], columns[c]) to (r, c)
+    mask = np.uint64((1 << bits) - 1)
+    result = np.zeros_like(values)
+    for r in range(4):
+        for c in range(4):
+            src = np.uint64(bits * (rows[r] * 4 + columns[c]))
+            dst = np.uint64(bits * (r * 4 + c))
+            result |= ((values >> src) & mask) << dst
+    return result
+
+
+def _read_field(blocks: np.ndarray, start: int, size: int) -> np.ndarray:
+    padded = np.zeros((blocks.shape[0], 8), dtype=np.uint8)
+    padded[:, :size] = blocks[:, start:start + size]
+    return padded.view("<u8")[:, 0]
+
+
+def _write_field(blocks: np.ndarray, start: int, size: int, values: np.ndarray):
+    blocks[:, start:start + size] = values.astype("<u8").reshape(-1, 1).view(np.uint8)[:, :size]
+
+
+def _permute_color_block(blocks: np.ndarray, start: int, rows: List[int], columns: List[int]):
+    # BC1 style; 2 colors (4 bytes) and 16 2-bit indices
+    values = _read_field(blocks, start + 4, 4)
+    _write_field(blocks, start + 4, 4, _permute_indices(values, 2, rows, columns))
+
+
+def _permute_alpha_block(blocks: np.ndarray, start: int, rows: List[int], columns: List[int]):
+    # BC3/BC4 style; 2 alphas (2 bytes) and 16 3-bit indices
+    values = _read_field(blocks, start + 2, 6)
+    _write_field(blocks, start + 2, 6, _permute_indices(values, 3, rows, columns))
+
+
+def _permute_explicit_alpha_block(blocks: np.ndarray, start: int, rows: List[int], columns: List[int]):
+    # BC2 style; 16 4-bit alphas
+    values = _read_field(blocks, start, 8)
+    _write_field(blocks, start, 8, _permute_indices(values, 4, rows, columns))
+
+
+_BLOCK_PERMUTERS = {
+    "BC1": [(_permute_color_block, 0)],
+    "BC2": [(_permute_explicit_alpha_block, 0), (_permute_color_block, 8)],
+    "BC3": [(_permute_alpha_block, 0), (_permute_color_block, 8)],
+    "BC4": [(_permute_alpha_block, 0)],
+    "BC5": [(_permute_alpha_block, 0), (_permute_alpha_block, 8)],
+}
+
+
+def _flip_block_level(header: DdsHeader, level: DdsLevel, data: np.ndarray, vert: bool) -> np.ndarray:
+    if level.height > 4 and level.height % 4 != 0 and vert:
+        raise NotImplementedError(f"Cannot flip a {level.width}x{level.height} level without re-encoding it.")
+    if level.width > 4 and level.width % 4 != 0 and not vert:
+        raise NotImplementedError(f"Cannot flip a {level.width}x{level.height} level without re-encoding it.")
+    block_rows = max(1, (level.height + 3) // 4)
+    block_columns = max(1, (level.width + 3) // 4)
+    blocks = data.reshape(level.depth, block_rows, block_columns, header.block_size)
+    blocks = blocks[:, ::-1] if vert else blocks[:, :, ::-1]
+    blocks = np.ascontiguousarray(blocks).reshape(-1, header.block_size)
+    rows = _get_permutation(level.height, vert)
+    columns = _get_permutation(level.width, not vert)
+    for permute, start in _BLOCK_PERMUTERS[header.format]:
+        permute(blocks, start, rows, columns)
+    return blocks
+
+
+def _flip_pixel_level(header: DdsHeader, level: DdsLevel, data: np.ndarray, vert: bool) -> np.ndarray:
+    pixels = data.reshape(level.depth, level.height, level.width, header.bytes_per_pixel)
+    pixels = pixels[:, ::-1] if vert else pixels[:, :, ::-1]
+    return np.ascontiguousarray(pixels)
+
+
+def can_flip(header: DdsHeader) -> bool:
+    return header.format in FLIPPABLE_BLOCK_FORMATS or (
+            not header.is_block_compressed and header.bytes_per_pixel is not None)
+
+
+def flip_dds(data: bytes, vert: bool = False) -> bytes:
+    """
+    Mirrors every mip level of every surface of a DDS, without decompressing it.
+
+    :param data: The DDS, header included.
+    :param vert: Flip vertically (top to bottom) rather than horizontally (left to right).
+    :return: The flipped DDS.
+    :raises NotImplementedError: raised when the format (or a level's size) cannot be flipped losslessly.
+    """
+    header = DdsHeader.parse(data)
+    if not can_flip(header):
+        raise NotImplementedError(f"Not Supported ~ {header.format}")
+    result = np.frombuffer(data, dtype=np.uint8).copy()
+    for level in header.levels():
+        end = level.offset + level.size
+        if end > len(result):
+            raise ValueError(f"DDS is truncated; expected at least {end} bytes, got {len(result)}")
+        level_data = result[level.offset:end]
+        if header.is_block_compressed:
+            flipped = _flip_block_level(header, level, level_data, vert)
+        else:
+            flipped = _flip_pixel_level(header, level, level_data, vert)
+        result[level.offset:end] = flipped.reshape(-1)
+    return result.tobytes()
@@ -0,0 +1,175 @@
+from dataclasses import dataclass, astuple, fields
+from os import stat
+from typing import List, Dict, BinaryIO, Iterable, Callable, Optional
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.mio import PackIO
+from asura.common.models.archive import FolderArchive, open_folder
+from asura.common.models.chunks import SparseChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.texture.dds import DdsHeader, DDS_DX10_HEADER_SIZE, is_dds
+
+CURRENT_TEXTURE_INDEX_VERSION = 1
+
+
+@dataclass
+class TextureRecord:
+    archive: str = None
+    name: str = None
+    # Index of the ResourceChunk within the (decompressed) archive
+    chunk: int = None
+    # Position of the DDS within the (decompressed) archive
+    offset: int = None
+    # Size of the DDS, header included
+    size: int = None
+    format: str = None
+    width: int = None
+    height: int = None
+    depth: int = None
+    mip_count: int = None
+    array_size: int = None
+    is_cubemap: bool = None
+    # Size of every level of every surface; None if the format's size is unknown
+    memory_size: int = None
+
+
+def _create_record(archive: str, chunk: int, offset: int, size: int, name: str, header: DdsHeader) -> TextureRecord:
+    try:
+        memory_size = header.payload_size
+    except NotImplementedError:
+        memory_size = None
+    return TextureRecord(archive, name, chunk, offset, size, header.format, header.width, header.height,
+                         header.depth, header.mip_count, header.array_size, header.is_cubemap, memory_size)
+
+
+class TextureIndex:
+    """
+    A table of every DDS texture in a set of archives, built from each ResourceChunk's name and DDS header alone.
+
+    Texture payloads are skipped, not read; compressed archives still have to be decompressed (to a temporary file).
+    """
+
+    def __init__(self):
+        self.records: List[TextureRecord] = []
+        # path -> size, mtime
+        self.archives: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterable[TextureRecord]:
+        return iter(self.records)
+
+    def remove_archive(self, path: str) -> bool:
+        if self.archives.pop(path, None) is None:
+            return False
+        self.records = [record for record in self.records if record.archive != path]
+        return True
+
+    def add_archive(self, path: str, force: bool = False) -> int:
+        """
+        Indexes every texture in an archive, replacing any previous records for it.
+
+        :param path: The path to the archive.
+        :param force: Re-index the archive even if its size and modification time haven't changed.
+        :return: The number of textures indexed; 0 if the archive was unchanged.
+        """
+        info = stat(path)
+        fingerprint = [info.st_size, info.st_mtime_ns]
+        if not force and self.archives.get(path) == fingerprint:
+            return 0
+        with open_folder(path) as (_, stream):
+            records = list(self.scan(stream, FolderArchive.read(stream, ArchiveType.Folder), path))
+        self.remove_archive(path)
+        self.records.extend(records)
+        self.archives[path] = fingerprint
+        return len(records)
+
+    @staticmethod
+    def scan(stream: BinaryIO, archive: FolderArchive, path: str) -> Iterable[TextureRecord]:
+        """
+        Reads the DDS header of every texture in a (sparse) archive.
+
+        :param stream: The archive's stream.
+        :param archive: The archive, as read from the stream.
+        :param path: The path recorded for each texture.
+        """
+        if not isinstance(archive, FolderArchive):
+            raise NotImplementedError(f"Not Supported ~ {archive.type if archive else None}")
+        for i, chunk in enumerate(archive.chunks):
+            if not isinstance(chunk, SparseChunk) or chunk.header.type != ChunkType.RESOURCE:
+                continue
+            stream.seek(chunk.data_start)
+            span = ResourceChunk.scan(stream, chunk.header, DDS_DX10_HEADER_SIZE)
+            if span.id != DDS_FILE or not is_dds(span.prefix):
+                continue
+            try:
+                header = DdsHeader.parse(span.prefix)
+            except ParsingError:
+                continue
+            yield _create_record(path, i, span.offset, span.size, span.name, header)
+
+    def query(self, predicate: Callable[[TextureRecord], bool] = None, *, format: str = None,
+              archive: str = None, min_memory_size: int = None, name: str = None) -> List[TextureRecord]:
+        """
+        Filters the table; every given filter must match.
+
+        :param predicate: An arbitrary filter.
+        :param format: The texture's format, i.e. 'BC1'.
+        :param archive: The path of the archive the texture is in.
+        :param min_memory_size: The minimum size (in bytes) of the texture in memory.
+        :param name: A substring of the texture's name, case insensitive.
+        """
+        name = name.lower() if name is not None else None
+        results = []
+        for record in self.records:
+            if format is not None and record.format != format:
+                continue
+            if archive is not None and record.archive != archive:
+                continue
+            if min_memory_size is not None and (record.memory_size or 0) < min_memory_size:
+                continue
+            if name is not None and name not in record.name.lower():
+                continue
+            if predicate is not None and not predicate(record):
+                continue
+            results.append(record)
+        return results
+
+    def memory_by(self, key: Callable[[TextureRecord], str] = None) -> Dict[Optional[str], int]:
+        """
+        Sums the memory size of the textures in each group; by format unless a key is given.
+        """
+        key = key or (lambda record: record.format)
+        totals = {}
+        for record in self.records:
+            group = key(record)
+            totals[group] = totals.get(group, 0) + (record.memory_size or 0)
+        return totals
+
+    def save(self, path: str, overwrite: bool = True) -> bool:
+        meta = {
+            'version': CURRENT_TEXTURE_INDEX_VERSION,
+            'archives': self.archives,
+            'fields': [field.name for field in fields(TextureRecord)],
+            'records': [astuple(record) for record in self.records],
+        }
+        return PackIO.write_json(path, meta, overwrite)
+
+    @classmethod
+    def load(cls, path: str) -> 'TextureIndex':
+        meta = PackIO.read_json(path)
+        if meta['version'] != CURRENT_TEXTURE_INDEX_VERSION:
+            raise ValueError(f"Unsupported texture index version ~ {meta['version']}")
+        index = TextureIndex()
+        index.archives = meta['archives']
+        index.records = [TextureRecord(**dict(zip(meta['fields'], record))) for record in meta['records']]
+        return index
+
+
+def build_texture_index(paths: Iterable[str]) -> TextureIndex:
+    index = TextureIndex()
+    for path in paths:
+        index.add_archive(path)
+    return index
@@ -0,0 +1,33 @@
+import zlib
+from struct import pack
+
+import numpy as np
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+# 8 bits per channel, truecolor with alpha
+_COLOR_TYPE_RGBA = 6
+
+
+def _png_chunk(type: bytes, data: bytes) -> bytes:
+    return pack(">I", len(data)) + type + data + pack(">I", zlib.crc32(type + data) & 0xffffffff)
+
+
+def encode_png(pixels: np.ndarray, level: int = 6) -> bytes:
+    """
+    Encodes RGBA pixels as a PNG; this is only meant for previews, so no filtering is done.
+
+    :param pixels: (height, width, 4) uint8 RGBA pixels.
+    :param level: The zlib compression level.
+    :return: The PNG.
+    """
+    height, width, channels = pixels.shape
+    if channels != 4:
+        raise ValueError(f"Expected RGBA pixels, got {channels} channels.")
+    # Every row starts with its filter type; 0 (None)
+    rows = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, width * 4)
+    header = pack(">I I B B B B B", width, height, 8, _COLOR_TYPE_RGBA, 0, 0, 0)
+    return PNG_MAGIC + \
+        _png_chunk(b"IHDR", header) + \
+        _png_chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + \
+        _png_chunk(b"IEND", b"")
@@ -0,0 +1,15 @@
+from struct import pack
+
+from asura.texture.dds import DDPF_FOURCC, DDPF_RGB
+
+
+def create_dds_header(width: int, height: int, mip_count: int = 1, fourcc: bytes = None,
+                      bit_count: int = 32) -> bytes:
+    if fourcc is not None:
+        pixel_format = pack("< I I 4s I I I I I", 32, DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0)
+    else:
+        pixel_format = pack("< I I 4s I I I I I", 32, DDPF_RGB, bytes(4), bit_count,
+                            0xff0000, 0xff00, 0xff, 0xff000000)
+    header = pack("< 4s I I I I I I I 44x", b"DDS ", 124, 0, height, width, 0, 1, mip_count)
+    caps = pack("< I I I I 4x", 0x1000, 0, 0, 0)
+    return header + pixel_format + caps
@@ -0,0 +1,96 @@
+import zlib
+from os.path import join, exists
+from struct import pack
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.models.archive import FolderArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk
+from asura.common.models.chunks.formats import ResourceChunk
+from asura.common.models.chunks.formats.rscf import DDS_FILE
+from asura.texture.bcn import decode_dds
+from asura.texture.png import PNG_MAGIC
+from asura.texture.tests.dds_helpers import create_dds_header
+from asura.texture.thumbnails import generate_thumbnails, make_thumbnail, get_thumbnail_path
+
+RED = 0xf800
+BLUE = 0x001f
+
+
+def bc1_block(c0: int, c1: int, indices: list) -> bytes:
+    packed = sum(index << (2 * i) for i, index in enumerate(indices))
+    return pack("< H H I", c0, c1, packed)
+
+
+def bc3_alpha_block(a0: int, a1: int, indices: list) -> bytes:
+    packed = sum(index << (3 * i) for i, index in enumerate(indices))
+    return bytes([a0, a1]) + packed.to_bytes(6, "little")
+
+
+def test_decode_bc1():
+    indices = [0, 1, 2, 3] * 4
+    dds = create_dds_header(4, 4, fourcc=b"DXT1") + bc1_block(RED, BLUE, indices)
+    pixels = decode_dds(dds)
+    assert pixels.shape == (4, 4, 4)
+    assert tuple(pixels[0, 0]) == (255, 0, 0, 255)
+    assert tuple(pixels[0, 1]) == (0, 0, 255, 255)
+    assert tuple(pixels[0, 2]) == (170, 0, 85, 255)
+    assert tuple(pixels[3, 3]) == (85, 0, 170, 255)
+
+    # color0 <= color1 selects the 3 color + transparent mode
+    dds = create_dds_header(4, 4, fourcc=b"DXT1") + bc1_block(BLUE, RED, indices)
+    pixels = decode_dds(dds)
+    assert tuple(pixels[0, 2]) == (127, 0, 127, 255)
+    assert tuple(pixels[0, 3]) == (0, 0, 0, 0)
+
+
+def test_decode_bc3_block_order():
+    # 8x4; the left block is opaque red, the right block is transparent blue
+    left = bc3_alpha_block(255, 0, [0] * 16) + bc1_block(RED, BLUE, [0] * 16)
+    right = bc3_alpha_block(255, 0, [1] * 16) + bc1_block(RED, BLUE, [1] * 16)
+    pixels = decode_dds(create_dds_header(8, 4, fourcc=b"DXT5") + left + right)
+    assert pixels.shape == (4, 8, 4)
+    assert (pixels[:, :4] == [255, 0, 0, 255]).all()
+    assert (pixels[:, 4:] == [0, 0, 255, 0]).all()
+
+
+def test_decode_bgra():
+    pixels = decode_dds(create_dds_header(2, 1) + bytes([1, 2, 3, 4, 5, 6, 7, 8]))
+    assert pixels.tolist() == [[[3, 2, 1, 4], [7, 6, 5, 8]]]
+
+
+def create_texture(size: int) -> bytes:
+    header = create_dds_header(size, size, mip_count=size.bit_length(), fourcc=b"DXT1")
+    blocks = []
+    while size > 0:
+        blocks.append(bc1_block(RED, BLUE, [0] * 16) * max(1, (size // 4) ** 2))
+        size //= 2
+    return header + b"".join(blocks)
+
+
+def test_make_thumbnail():
+    png = make_thumbnail(create_texture(64), 16)
+    assert png.startswith(PNG_MAGIC)
+    # IHDR; width, height
+    assert png[16:24] == pack(">I I", 16, 16)
+    idat_size = int.from_bytes(png[33:37], "big")
+    rows = zlib.decompress(png[41:41 + idat_size])
+    assert rows[1:5] == bytes([255, 0, 0, 255])
+
+
+def test_generate_thumbnails():
+    with TemporaryDirectory() as root:
+        path = join(root, "textures.asr")
+        header = ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4))
+        archive = FolderArchive(ArchiveType.Folder, [
+            ResourceChunk(header, DDS_FILE, 0, "textures\\red.dds", None, create_texture(32)),
+            ResourceChunk(header, DDS_FILE, 0, "textures\\broken.dds", None, b"DDS " + bytes(8)),
+            EofChunk(ChunkHeader(ChunkType.EOF)),
+        ])
+        with open(path, "wb") as stream:
+            archive.write(stream)
+        out_dir = join(root, "thumbnails")
+        written, failed = generate_thumbnails(path, out_dir, 8, workers=2)
+        assert written == 1
+        assert len(failed) == 1
+        assert exists(get_thumbnail_path(out_dir, "textures\\red.dds"))
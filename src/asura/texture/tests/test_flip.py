@@ -0,0 +1,61 @@
+import random
+
+from asura.texture import DdsHeader, flip_dds
+from asura.texture.tests.dds_helpers import create_dds_header
+
+
+def get_bc1_index(data: bytes, width: int, x: int, y: int, offset: int = 128) -> int:
+    block = offset + ((y // 4) * max(1, (width + 3) // 4) + x // 4) * 8
+    row = data[block + 4 + y % 4]
+    return (row >> (2 * (x % 4))) & 0x3
+
+
+def get_bc3_alpha_index(data: bytes, width: int, x: int, y: int, offset: int = 128) -> int:
+    block = offset + ((y // 4) * max(1, (width + 3) // 4) + x // 4) * 16
+    bits = int.from_bytes(data[block + 2:block + 8], "little")
+    return (bits >> (3 * ((y % 4) * 4 + x % 4))) & 0x7
+
+
+def random_bytes(size: int) -> bytes:
+    return bytes(random.getrandbits(8) for _ in range(size))
+
+
+def test_bc1_flip():
+    random.seed(1)
+    width, height = 16, 8
+    dds = create_dds_header(width, height, fourcc=b"DXT1") + random_bytes(4 * 2 * 8)
+    horizontal = flip_dds(dds)
+    vertical = flip_dds(dds, vert=True)
+    for y in range(height):
+        for x in range(width):
+            assert get_bc1_index(horizontal, width, x, y) == get_bc1_index(dds, width, width - 1 - x, y)
+            assert get_bc1_index(vertical, width, x, y) == get_bc1_index(dds, width, x, height - 1 - y)
+    assert flip_dds(horizontal) == dds
+    assert flip_dds(vertical, vert=True) == dds
+
+
+def test_bc3_flip_mips():
+    random.seed(2)
+    width, height = 8, 8
+    header = create_dds_header(width, height, mip_count=4, fourcc=b"DXT5")
+    levels = DdsHeader.parse(header).levels()
+    dds = header + random_bytes(sum(level.size for level in levels))
+    vertical = flip_dds(dds, vert=True)
+    for level in DdsHeader.parse(dds).levels():
+        for y in range(level.height):
+            for x in range(level.width):
+                expected = get_bc3_alpha_index(dds, level.width, x, level.height - 1 - y, level.offset)
+                assert get_bc3_alpha_index(vertical, level.width, x, y, level.offset) == expected
+    assert flip_dds(vertical, vert=True) == dds
+
+
+def test_uncompressed_flip():
+    width, height = 3, 2
+    pixels = bytes(range(width * height * 4))
+    dds = create_dds_header(width, height) + pixels
+    flipped = flip_dds(dds)[128:]
+    for y in range(height):
+        for x in range(width):
+            src = (y * width + (width - 1 - x)) * 4
+            dst = (y * width + x) * 4
+            assert flipped[dst:dst + 4] == pixels[src:src + 4]
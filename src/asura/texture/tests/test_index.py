@@ -0,0 +1,51 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.models.archive import FolderArchive, ZbbArchive
+from asura.common.models.chunks import ChunkHeader, EofChunk, RawChunk
+from asura.common.models.chunks.formats import ResourceChunk
+from asura.common.models.chunks.formats.rscf import DDS_FILE, RAW_FILE_ID
+from asura.texture import TextureIndex, build_texture_index
+from asura.texture.tests.dds_helpers import create_dds_header
+
+
+def write_archive(path: str, compress: bool = False):
+    header = ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4))
+    archive = FolderArchive(ArchiveType.Folder, [
+        ResourceChunk(header, DDS_FILE, 0, "large.dds", None,
+                      create_dds_header(64, 32, 7, b"DXT5") + bytes(2768)),
+        RawChunk(ChunkHeader(ChunkType.HSKE, 0, 0, bytes(4)), bytes(4)),
+        ResourceChunk(header, DDS_FILE, 0, "small.dds", None, create_dds_header(4, 4) + bytes(64)),
+        ResourceChunk(header, RAW_FILE_ID, 0, "notes.txt", None, b"not a texture"),
+        EofChunk(ChunkHeader(ChunkType.EOF)),
+    ])
+    with open(path, "wb") as stream:
+        if compress:
+            ZbbArchive.compress(archive, stream)
+        else:
+            archive.write(stream)
+
+
+def test_index():
+    with TemporaryDirectory() as root:
+        folder_path = join(root, "folder.asr")
+        zbb_path = join(root, "zbb.asr")
+        write_archive(folder_path)
+        write_archive(zbb_path, compress=True)
+        index = build_texture_index([folder_path, zbb_path])
+        assert len(index) == 4
+
+        (large,) = index.query(format="BC3", archive=zbb_path)
+        assert (large.name, large.width, large.height, large.mip_count) == ("large.dds", 64, 32, 7)
+        assert large.chunk == 0
+        assert large.memory_size == 2768
+        assert [record.name for record in index.query(name="SMALL")] == ["small.dds", "small.dds"]
+        assert index.memory_by() == {"BC3": 2768 * 2, "B8G8R8A8": 64 * 2}
+
+        assert index.add_archive(folder_path) == 0
+        index_path = join(root, "textures.json")
+        index.save(index_path)
+        loaded = TextureIndex.load(index_path)
+        assert loaded.records == index.records
+        assert loaded.add_archive(zbb_path) == 0
@@ -0,0 +1,149 @@
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from os import cpu_count
+from os.path import join
+from struct import error as StructError
+from typing import List, Tuple, Optional, BinaryIO, Iterable
+
+import numpy as np
+
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.mio import PackIO
+from asura.common.models.archive import FolderArchive, open_folder
+from asura.common.models.chunks import SparseChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.texture.bcn import decode_level, DECODABLE_FORMATS
+from asura.texture.dds import DdsHeader, DdsLevel, is_dds
+from asura.texture.png import encode_png
+
+DEFAULT_THUMBNAIL_SIZE = 128
+THUMBNAIL_EXT = ".png"
+
+
+def select_level(header: DdsHeader, size: int) -> DdsLevel:
+    """
+    Selects the smallest mip level (of the first surface) which is at least as large as the thumbnail.
+
+    :param header: The DDS's header.
+    :param size: The size of the thumbnail's largest side.
+    :return: The level; the largest level if none are large enough.
+    """
+    levels = [level for level in header.levels() if level.surface == 0]
+    selected = levels[0]
+    for level in levels:
+        if max(level.width, level.height) >= size:
+            selected = level
+    return selected
+
+
+def downscale(pixels: np.ndarray, size: int) -> np.ndarray:
+    """
+    Shrinks an image so its largest side is at most 'size'; box filtered when the scale is a whole number.
+    """
+    height, width = pixels.shape[:2]
+    largest = max(width, height)
+    if largest <= size:
+        return pixels
+    target_width = max(1, width * size // largest)
+    target_height = max(1, height * size // largest)
+    if width % target_width == 0 and height % target_height == 0:
+        x_factor = width // target_width
+        y_factor = height // target_height
+        boxes = pixels.reshape(target_height, y_factor, target_width, x_factor, 4).astype(np.uint32)
+        return (boxes.sum(axis=(1, 3)) // (x_factor * y_factor)).astype(np.uint8)
+    rows = np.arange(target_height) * height // target_height
+    columns = np.arange(target_width) * width // target_width
+    return pixels[rows][:, columns]
+
+
+def make_thumbnail(data: bytes, size: int = DEFAULT_THUMBNAIL_SIZE) -> bytes:
+    """
+    Renders a PNG thumbnail of a DDS.
+
+    :param data: The DDS, header included.
+    :param size: The size of the thumbnail's largest side.
+    :return: The PNG.
+    """
+    header = DdsHeader.parse(data)
+    level = select_level(header, size)
+    pixels = decode_level(header, level, data[level.offset:level.offset + level.size])
+    return encode_png(downscale(pixels, size))
+
+
+def _thumbnail_job(path: str, header: DdsHeader, level: DdsLevel, data: bytes, size: int) -> Optional[str]:
+    try:
+        pixels = decode_level(header, level, data)
+        PackIO.write_bytes(path, encode_png(downscale(pixels, size)), overwrite=True)
+        return None
+    except (ParsingError, NotImplementedError, ValueError, StructError, OSError) as error:
+        return f"{path}: {error!r}"
+
+
+def get_thumbnail_path(out_dir: str, name: str) -> str:
+    return join(out_dir, *name.replace("\\", "/").lstrip("/").split("/")) + THUMBNAIL_EXT
+
+
+def _iter_textures(stream: BinaryIO, archive: FolderArchive) -> Iterable[ResourceChunk]:
+    for chunk in archive.chunks:
+        if isinstance(chunk, SparseChunk) and chunk.header.type == ChunkType.RESOURCE:
+            chunk = chunk.load(stream)
+        if isinstance(chunk, ResourceChunk) and chunk.id == DDS_FILE and is_dds(chunk.data):
+            yield chunk
+
+
+def generate_thumbnails(archive_path: str, out_dir: str, size: int = DEFAULT_THUMBNAIL_SIZE,
+                        workers: int = None) -> Tuple[int, List[str]]:
+    """
+    Renders a thumbnail of every DDS texture in an archive, across a pool of worker processes.
+
+    Only the mip level used for each thumbnail is sent to the workers; compressed archives are decompressed to a
+    temporary file first.
+
+    :param archive_path: The path to the archive.
+    :param out_dir: The directory to write the thumbnails to; they are named after the texture's in-game path.
+    :param size: The size of each thumbnail's largest side.
+    :param workers: The number of worker processes, None will use one per core.
+    :return: The number of thumbnails written, and a description of each texture which failed.
+    """
+    with open_folder(archive_path) as (_, stream):
+        return _generate_thumbnails(stream, FolderArchive.read(stream, ArchiveType.Folder), out_dir, size, workers)
+
+
+def _generate_thumbnails(stream: BinaryIO, archive: FolderArchive, out_dir: str, size: int,
+                         workers: int = None) -> Tuple[int, List[str]]:
+    if not isinstance(archive, FolderArchive):
+        raise NotImplementedError(f"Not Supported ~ {archive.type if archive else None}")
+    workers = workers or cpu_count() or 1
+    written = 0
+    failed = []
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+
+        def collect(futures):
+            nonlocal written
+            for future in futures:
+                error = future.result()
+                if error is None:
+                    written += 1
+                else:
+                    failed.append(error)
+
+        for chunk in _iter_textures(stream, archive):
+            path = get_thumbnail_path(out_dir, chunk.name)
+            try:
+                header = DdsHeader.parse(chunk.data)
+            except (ParsingError, StructError) as error:
+                failed.append(f"{path}: {error!r}")
+                continue
+            if header.format not in DECODABLE_FORMATS:
+                failed.append(f"{path}: Not Supported ~ {header.format}")
+                continue
+            level = select_level(header, size)
+            data = chunk.data[level.offset:level.offset + level.size]
+            pending.add(pool.submit(_thumbnail_job, path, header, level, data, size))
+            # Bound the number of textures held in memory
+            if len(pending) >= workers * 4:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(pending)
+    return written, failed
@@ -0,0 +1,13 @@
+__all__ = [
+    "AsuraFS",
+    "ArchiveFile",
+    "FileEntry",
+    "FileStat",
+    "normalize_path",
+    "AssetServer",
+    "parse_range",
+    "serve_assets",
+]
+
+from asura.vfs.fs import AsuraFS, ArchiveFile, FileEntry, FileStat, normalize_path
+from asura.vfs.server import AssetServer, parse_range, serve_assets
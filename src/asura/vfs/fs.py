@@ -0,0 +1,355 @@
+import io
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, List, Optional, BinaryIO, Iterable, Tuple
+
+from asura.common.cache import BlockCache
+from asura.common.enums import ArchiveType, ChunkType
+from asura.common.error import ParsingError
+from asura.common.factories.chunk_parser import ChunkReader
+from asura.common.item_kind import RESOURCE, SOUND
+from asura.common.models.archive import ZbbArchive, ChunkTable
+from asura.common.models.chunks import BaseChunk
+from asura.common.models.chunks.formats.asts import SoundChunk
+from asura.common.models.chunks.formats.rscf import ResourceChunk
+
+_MOUNTED_TYPES = [ChunkType.RESOURCE, ChunkType.SOUND]
+_SCAN_BUFFER_SIZE = 64 * 1024
+
+
+def normalize_path(path: str) -> str:
+    """
+    Converts an in-game path (i.e. 'Textures\\Props\\Chair.dds') to the form AsuraFS looks paths up by; '/'
+    separated, without leading or trailing separators, and lower case.
+    """
+    return "/".join(part for part in path.replace("\\", "/").split("/") if part).lower()
+
+
+class _Source:
+    """
+    Reads byte ranges of a mounted archive; shared by every file opened from it.
+    """
+
+    def __init__(self, path: str, cache: BlockCache):
+        self.path = path
+        self.stream = open(path, "rb")
+        self._lock = Lock()
+        self._cache = cache
+        try:
+            type = ArchiveType.read(self.stream)
+        except ParsingError:
+            type = None
+        self.type = type
+        self.compressed: Optional[ZbbArchive] = None
+        if type == ArchiveType.Zbb:
+            self.compressed = ZbbArchive.read(self.stream, type)
+            self.size = self.compressed.size
+        else:
+            self.size = self.stream.seek(0, io.SEEK_END)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            if self.compressed is not None:
+                return self.compressed.read_range(self.stream, offset, size, self._cache, self.path)
+            self.stream.seek(offset)
+            return self.stream.read(size)
+
+    def close(self):
+        with self._lock:
+            self.stream.close()
+        if self.compressed is not None:
+            self._cache.discard(lambda key: key[0] == self.path)
+
+
+class ArchiveFile(io.RawIOBase):
+    """
+    A read only, seekable view of a byte range in a mounted archive; compressed archives are decompressed a block at
+    a time, as the range is read.
+    """
+
+    def __init__(self, source: _Source, offset: int, size: int):
+        super().__init__()
+        self._source = source
+        self._offset = offset
+        self._size = size
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._size - self._position)
+        if size <= 0:
+            return 0
+        data = self._source.read_at(self._offset + self._position, size)
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def readall(self) -> bytes:
+        size = max(self._size - self._position, 0)
+        data = self._source.read_at(self._offset + self._position, size) if size > 0 else b""
+        self._position += len(data)
+        return data
+
+
+@dataclass
+class FileEntry:
+    # The in-game path, as stored in the chunk
+    name: str = None
+    archive: str = None
+    # Index of the chunk holding the file
+    chunk: int = None
+    kind: str = None
+    # Position of the file in the (decompressed) archive
+    offset: int = None
+    size: int = None
+
+
+@dataclass
+class FileStat:
+    path: str = None
+    is_dir: bool = None
+    # The remaining fields are None for directories
+    size: int = None
+    archive: str = None
+    chunk: int = None
+    kind: str = None
+
+
+class AsuraFS:
+    """
+    A read only file system over the resources and sound clips of mounted archives, by their in-game paths.
+
+    Paths are looked up case insensitively, with either separator. Archives mounted later shadow files with the same
+    path in earlier archives. Compressed (Zbb) archives aren't decompressed up front; blocks are decompressed as files
+    are read, and kept in a cache shared by every mounted archive.
+    """
+
+    def __init__(self, cache: BlockCache = None):
+        """
+        :param cache: The cache of decompressed blocks; by default, a new one (see BlockCache).
+        """
+        self.cache = BlockCache() if cache is None else cache
+        self._sources: Dict[str, _Source] = {}
+        self._tables: Dict[str, ChunkTable] = {}
+        # Mount order; later archives shadow earlier ones
+        self._mounts: List[Tuple[str, Dict[str, FileEntry]]] = []
+        self._files: Dict[str, FileEntry] = {}
+        # directory -> normalized child name -> child name
+        self._dirs: Dict[str, Dict[str, str]] = {}
+
+    def __enter__(self) -> 'AsuraFS':
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def close(self):
+        for source in self._sources.values():
+            source.close()
+        self._sources.clear()
+        self._tables.clear()
+        self._mounts.clear()
+        self._rebuild()
+
+    @property
+    def mounts(self) -> List[str]:
+        return [path for path, _ in self._mounts]
+
+    def mount(self, path: str) -> int:
+        """
+        Mounts an archive; only its chunk headers and the headers of its resources and sound clips are read.
+
+        :param path: The path to the archive (Folder or Zbb).
+        :return: The number of files the archive holds.
+        :raises NotImplementedError: raised when the file isn't a supported archive.
+        """
+        if path in self._sources:
+            self.unmount(path)
+        source = _Source(path, self.cache)
+        if source.type not in [ArchiveType.Folder, ArchiveType.Zbb]:
+            source.close()
+            raise NotImplementedError(f"Not Supported ~ {source.type}")
+        try:
+            table = self._read_table(source)
+            files = {normalize_path(entry.name): entry for entry in self._scan(source, table)}
+        except Exception:
+            source.close()
+            raise
+        self._sources[path] = source
+        self._tables[path] = table
+        self._mounts.append((path, files))
+        self._rebuild()
+        return len(files)
+
+    def unmount(self, path: str) -> bool:
+        source = self._sources.pop(path, None)
+        if source is None:
+            return False
+        source.close()
+        del self._tables[path]
+        self._mounts = [(mounted, files) for mounted, files in self._mounts if mounted != path]
+        self._rebuild()
+        return True
+
+    @staticmethod
+    def _open_scan(source: _Source) -> BinaryIO:
+        if source.compressed is not None:
+            return io.BufferedReader(ArchiveFile(source, 0, source.size), _SCAN_BUFFER_SIZE)
+        return source.stream
+
+    @staticmethod
+    def _read_table(source: _Source) -> ChunkTable:
+        stream = AsuraFS._open_scan(source)
+        stream.seek(0)
+        if ArchiveType.read(stream) != ArchiveType.Folder:
+            raise NotImplementedError(f"Not Supported ~ {source.path}")
+        return ChunkTable.read(stream)
+
+    @staticmethod
+    def _scan(source: _Source, table: ChunkTable) -> Iterable[FileEntry]:
+        stream = AsuraFS._open_scan(source)
+        for i in table.select(types=_MOUNTED_TYPES):
+            chunk = table.chunk(i)
+            stream.seek(chunk.data_start)
+            if chunk.header.type == ChunkType.RESOURCE:
+                span = ResourceChunk.scan(stream, chunk.header)
+                yield FileEntry(span.name, source.path, int(i), RESOURCE, span.offset, span.size)
+            else:
+                _, spans = SoundChunk.scan(stream)
+                for span in spans:
+                    if not span.is_sparse:
+                        yield FileEntry(span.name, source.path, int(i), SOUND, span.offset, span.size)
+
+    def table(self, archive: str) -> ChunkTable:
+        """
+        Gets the chunk headers of a mounted archive; offsets are positions in the (decompressed) archive.
+
+        :raises KeyError: raised when the archive isn't mounted.
+        """
+        return self._tables[archive]
+
+    def read_chunk(self, archive: str, index: int) -> BaseChunk:
+        """
+        Reads and parses a chunk of a mounted archive; i.e. an HTextChunk, which isn't mounted as a file.
+
+        :param archive: The path the archive was mounted from.
+        :param index: The index of the chunk in the archive.
+        :return: The chunk.
+        :raises KeyError: raised when the archive isn't mounted.
+        """
+        header = self._tables[archive].header(index)
+        offset = int(self._tables[archive].offsets[index])
+        data = self._sources[archive].read_at(offset, header.chunk_size)
+        if len(data) != header.chunk_size:
+            raise ParsingError(offset + len(data))
+        chunk = ChunkReader.read_buffer(header, data)
+        chunk.header = header
+        return chunk
+
+    def _rebuild(self):
+        self._files = {}
+        for _, files in self._mounts:
+            self._files.update(files)
+        self._dirs = {"": {}}
+        for path, entry in self._files.items():
+            parts = path.split("/")
+            names = entry.name.replace("\\", "/").split("/")
+            names = [name for name in names if name]
+            for depth in range(len(parts)):
+                parent = "/".join(parts[:depth])
+                self._dirs.setdefault(parent, {}).setdefault(parts[depth], names[depth])
+
+    def entry(self, path: str) -> FileEntry:
+        """
+        Gets where a file is.
+
+        :raises FileNotFoundError: raised when the path isn't a file.
+        """
+        entry = self._files.get(normalize_path(path))
+        if entry is None:
+            raise FileNotFoundError(path)
+        return entry
+
+    def exists(self, path: str) -> bool:
+        path = normalize_path(path)
+        return path in self._files or path in self._dirs
+
+    def isfile(self, path: str) -> bool:
+        return normalize_path(path) in self._files
+
+    def isdir(self, path: str) -> bool:
+        return normalize_path(path) in self._dirs
+
+    def listdir(self, path: str = "") -> List[str]:
+        """
+        Lists the files and directories in a directory, by name.
+
+        :raises NotADirectoryError: raised when the path is a file.
+        :raises FileNotFoundError: raised when the path doesn't exist.
+        """
+        normalized = normalize_path(path)
+        children = self._dirs.get(normalized)
+        if children is None:
+            if normalized in self._files:
+                raise NotADirectoryError(path)
+            raise FileNotFoundError(path)
+        return sorted(children.values(), key=str.lower)
+
+    def stat(self, path: str) -> FileStat:
+        normalized = normalize_path(path)
+        entry = self._files.get(normalized)
+        if entry is not None:
+            return FileStat(entry.name, False, entry.size, entry.archive, entry.chunk, entry.kind)
+        if normalized in self._dirs:
+            return FileStat(path, True)
+        raise FileNotFoundError(path)
+
+    def walk(self, path: str = "") -> Iterable[FileEntry]:
+        """
+        Finds every file in a directory, and its subdirectories.
+        """
+        prefix = normalize_path(path)
+        for normalized, entry in sorted(self._files.items()):
+            if prefix == "" or normalized.startswith(prefix + "/"):
+                yield entry
+
+    def open(self, path: str, buffering: int = io.DEFAULT_BUFFER_SIZE) -> BinaryIO:
+        """
+        Opens a file for reading.
+
+        :param path: The file's in-game path.
+        :param buffering: The size of the read buffer; 0 returns the unbuffered ArchiveFile.
+        :return: A seekable, binary file object.
+        :raises FileNotFoundError: raised when the path isn't a file.
+        """
+        entry = self.entry(path)
+        file = ArchiveFile(self._sources[entry.archive], entry.offset, entry.size)
+        if buffering == 0:
+            return file
+        return io.BufferedReader(file, buffering)
+
+    def read(self, path: str) -> bytes:
+        with self.open(path, 0) as file:
+            return file.readall()
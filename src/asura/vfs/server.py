@@ -0,0 +1,337 @@
+import hashlib
+import json
+import mimetypes
+import os
+import zlib
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from asura.common.cache import BlockCache
+from asura.common.config import MEBI_BYTE
+from asura.common.enums import ChunkType, LangCode
+from asura.common.error import ParsingError
+from asura.common.models.chunks import BaseChunk
+from asura.common.models.chunks.formats.htxt import HString, HTextChunk
+from asura.vfs.fs import AsuraFS, FileEntry
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8023
+# The total (header) size of the parsed chunks kept; decompressed blocks are kept by the AsuraFS' cache
+DEFAULT_CHUNK_CACHE_SIZE = 32 * MEBI_BYTE
+_COPY_SIZE = 64 * 1024
+
+# Route prefixes
+FILES = "/files/"
+STRINGS = "/strings/"
+
+# (archive path, chunk index, part index)
+StringLocation = Tuple[str, int, int]
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a Range header ('bytes=0-499', 'bytes=500-' or 'bytes=-500') against a file's size.
+
+    Only single ranges are supported; anything else is ignored, and the whole file is served (as RFC 7233 allows).
+
+    :param value: The header's value.
+    :param size: The size of the file.
+    :return: The range as (start, end); end is exclusive. None when the header should be ignored.
+    :raises ValueError: raised when the range is valid, but can't be satisfied.
+    """
+    unit, _, ranges = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, separator, last = ranges.strip().partition("-")
+    if separator != "-" or not (first + last).isdigit():
+        return None
+    if first == "":
+        # Suffix range; the last n bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(value)
+        return max(size - length, 0), size
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if last and end <= start:
+        return None
+    if start >= size:
+        raise ValueError(value)
+    return start, min(end, size)
+
+
+def parse_language(value: str) -> Optional[LangCode]:
+    """
+    Parses a language by name (i.e. 'english') or value (i.e. '0').
+    """
+    if value.isdigit():
+        try:
+            return LangCode(int(value))
+        except ValueError:
+            return None
+    return LangCode.__members__.get(value.upper())
+
+
+class AssetServer:
+    """
+    Serves the files and strings of an AsuraFS over HTTP:
+        GET /files/<path>               A resource or sound clip; Range requests are supported. A directory is listed
+                                        as JSON.
+        GET /strings/<language>/<key>   A localized string, as text.
+        GET /strings/<language>/        The keys of a language, as JSON.
+
+    ETags are derived from the archive (its size and modification time) and where the file is in it, so they change
+    when a patch replaces the archive, but not otherwise; conditional requests (If-None-Match and If-Range) are
+    supported.
+
+    Parsed HTextChunks are kept in a cache bounded by their size; decompressed Zbb blocks are kept by the file system's
+    cache.
+    """
+
+    def __init__(self, fs: AsuraFS, chunk_cache: BlockCache = None):
+        """
+        :param fs: The file system to serve; archives may be mounted, and unmounted, while serving.
+        :param chunk_cache: The cache of parsed chunks; by default, a new one of DEFAULT_CHUNK_CACHE_SIZE.
+        """
+        self.fs = fs
+        if chunk_cache is None:
+            chunk_cache = BlockCache(DEFAULT_CHUNK_CACHE_SIZE, lambda chunk: chunk.header.length)
+        self.chunk_cache = chunk_cache
+        self._lock = Lock()
+        # The mounts the strings were indexed from; re-indexed when they change
+        self._indexed: Optional[List[str]] = None
+        self._strings: Dict[LangCode, Dict[str, StringLocation]] = {}
+
+    def load_chunk(self, archive: str, index: int) -> BaseChunk:
+        """
+        Reads and parses a chunk of a mounted archive, or gets it from the cache.
+        """
+        return self.chunk_cache.get((archive, index), lambda: self.fs.read_chunk(archive, index))
+
+    def _index_strings(self) -> Dict[LangCode, Dict[str, StringLocation]]:
+        with self._lock:
+            mounts = self.fs.mounts
+            if mounts == self._indexed:
+                return self._strings
+            self.chunk_cache.discard(lambda key: key[0] not in mounts)
+            strings = {}
+            # Later mounts shadow earlier ones
+            for archive in mounts:
+                for index in self.fs.table(archive).select(types=[ChunkType.H_TEXT]):
+                    chunk = self.load_chunk(archive, int(index))
+                    if not isinstance(chunk, HTextChunk):
+                        continue
+                    locations = strings.setdefault(chunk.language, {})
+                    for part_index, part in enumerate(chunk.parts):
+                        locations[part.key.lower()] = (archive, int(index), part_index)
+            self._strings = strings
+            self._indexed = mounts
+            return strings
+
+    def keys(self, lang: LangCode) -> List[str]:
+        locations = self._index_strings().get(lang, {})
+        return sorted(self._load_string(location).key for location in locations.values())
+
+    def _load_string(self, location: StringLocation) -> HString:
+        archive, index, part_index = location
+        return self.load_chunk(archive, index).parts[part_index]
+
+    def locate_string(self, key: str, lang: LangCode) -> Optional[StringLocation]:
+        return self._index_strings().get(lang, {}).get(key.lower())
+
+    def get_string(self, key: str, lang: LangCode) -> Optional[HString]:
+        """
+        Gets a localized string; keys are looked up case insensitively.
+
+        :return: The string, or None if the key isn't in any mounted archive for that language.
+        """
+        location = self.locate_string(key, lang)
+        if location is None:
+            return None
+        return self._load_string(location)
+
+    def etag(self, archive: str, *location) -> str:
+        """
+        Creates the (strong) ETag of something in an archive.
+
+        :param archive: The archive's path.
+        :param location: Where it is in the archive; i.e. a file's offset and size.
+        :return: The quoted ETag.
+        """
+        info = os.stat(archive)
+        key = f"{archive}\0{info.st_size}\0{info.st_mtime_ns}\0" + "\0".join(str(part) for part in location)
+        return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+    def file_etag(self, entry: FileEntry) -> str:
+        return self.etag(entry.archive, entry.chunk, entry.offset, entry.size)
+
+    def create_server(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+        """
+        Creates the HTTP server; each request is handled on its own thread. Call serve_forever to start serving.
+
+        :param host: The address to listen on; by default, only local connections are accepted.
+        :param port: The port to listen on; 0 picks a free port (see server.server_address).
+        """
+        server = ThreadingHTTPServer((host, port), _AssetRequestHandler)
+        server.daemon_threads = True
+        server.assets = self
+        return server
+
+
+class _AssetRequestHandler(BaseHTTPRequestHandler):
+    server_version = "AsuraAssetServer/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def assets(self) -> AssetServer:
+        return self.server.assets
+
+    def log_message(self, format: str, *args):
+        # Requests aren't logged; errors are still reported by send_error
+        pass
+
+    def do_HEAD(self):
+        self._handle(False)
+
+    def do_GET(self):
+        self._handle(True)
+
+    def _handle(self, send_body: bool):
+        path = unquote(urlsplit(self.path).path)
+        try:
+            if path.startswith(FILES):
+                self._send_file(path[len(FILES):], send_body)
+            elif path.startswith(STRINGS):
+                self._send_string(path[len(STRINGS):], send_body)
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+        except (FileNotFoundError, KeyError):
+            # KeyError; the archive was unmounted during the request
+            self.send_error(HTTPStatus.NOT_FOUND)
+        except (ParsingError, zlib.error):
+            # A block of the archive is corrupt, or it was truncated after it was mounted
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def _not_modified(self, etag: str) -> bool:
+        match = self.headers.get("If-None-Match")
+        if match is None:
+            return False
+        if match.strip() != "*" and etag not in [tag.strip() for tag in match.split(",")]:
+            return False
+        self.send_response(HTTPStatus.NOT_MODIFIED)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def _send_bytes(self, data: bytes, content_type: str, send_body: bool, etag: str = None):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    def _send_json(self, value, send_body: bool):
+        self._send_bytes(json.dumps(value).encode(), "application/json", send_body)
+
+    def _send_file(self, path: str, send_body: bool):
+        fs = self.assets.fs
+        if fs.isdir(path):
+            entries = [{"name": name, "is_dir": fs.isdir(f"{path}/{name}")} for name in fs.listdir(path)]
+            self._send_json(entries, send_body)
+            return
+        entry = fs.entry(path)
+        etag = self.assets.file_etag(entry)
+        if self._not_modified(etag):
+            return
+        start, end = 0, entry.size
+        status = HTTPStatus.OK
+        requested = self.headers.get("Range")
+        if_range = self.headers.get("If-Range")
+        if requested is not None and (if_range is None or if_range.strip() == etag):
+            try:
+                span = parse_range(requested, entry.size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{entry.size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if span is not None:
+                start, end = span
+                status = HTTPStatus.PARTIAL_CONTENT
+        content_type, _ = mimetypes.guess_type(entry.name.replace("\\", "/"))
+        with fs.open(path, 0) as file:
+            file.seek(start)
+            remaining = end - start
+            # The first piece is read before the headers are sent; an archive which can't be read gets an error status
+            data = file.read(min(remaining, _COPY_SIZE)) if send_body and remaining > 0 else b""
+            self.send_response(status)
+            self.send_header("Content-Type", content_type or "application/octet-stream")
+            self.send_header("Content-Length", str(end - start))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", etag)
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{end - 1}/{entry.size}")
+            self.end_headers()
+            try:
+                while data:
+                    self.wfile.write(data)
+                    remaining -= len(data)
+                    data = file.read(min(remaining, _COPY_SIZE)) if remaining > 0 else b""
+            except (ParsingError, zlib.error):
+                # Too late for an error status; closing the connection early tells the client the body is short
+                self.close_connection = True
+
+    def _send_string(self, path: str, send_body: bool):
+        lang_name, _, key = path.partition("/")
+        lang = parse_language(lang_name)
+        if lang is None:
+            self.send_error(HTTPStatus.NOT_FOUND, f"Unknown language ~ {lang_name}")
+            return
+        if key == "":
+            self._send_json(self.assets.keys(lang), send_body)
+            return
+        location = self.assets.locate_string(key, lang)
+        if location is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        etag = self.assets.etag(*location, lang.value)
+        if self._not_modified(etag):
+            return
+        text = self.assets.get_string(key, lang).raw_text
+        self._send_bytes(text.encode("utf-8"), "text/plain; charset=utf-8", send_body, etag)
+
+
+def serve_assets(paths: Iterable[str], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 background: bool = False) -> ThreadingHTTPServer:
+    """
+    Mounts archives (in order; later archives shadow earlier ones) and serves them.
+
+    :param paths: The archives to mount.
+    :param host: The address to listen on.
+    :param port: The port to listen on.
+    :param background: Serve on a daemon thread and return; otherwise serve until interrupted.
+    :return: The server; shut it down (and close its file system, server.assets.fs) when done.
+    """
+    fs = AsuraFS()
+    for path in paths:
+        fs.mount(path)
+    server = AssetServer(fs).create_server(host, port)
+    if background:
+        Thread(target=server.serve_forever, daemon=True).start()
+        return server
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        fs.close()
+    return server
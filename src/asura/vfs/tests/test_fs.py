@@ -0,0 +1,71 @@
+import io
+from os.path import join
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from asura.common.cache import BlockCache
+from asura.common.enums import ChunkType
+from asura.common.factories import initialize_factories
+from asura.common.models.archive import ZbbArchive
+from asura.common.models.chunks import ChunkHeader
+from asura.common.models.chunks.formats.rscf import ResourceChunk, DDS_FILE
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE, CLIP
+from asura.vfs import AsuraFS
+
+PATCHED = [ResourceChunk(ChunkHeader(ChunkType.RESOURCE, 0, 0, bytes(4)), DDS_FILE, 0, "Textures\\Props\\Chair.dds",
+                         data=bytes(range(256)) * 40)]
+
+
+def create_archives(root: str):
+    base = join(root, "base.asr")
+    write_archive(base, "base", PATCHED)
+    folder = join(root, "patch.asr")
+    write_archive(folder, "patch")
+    packed = join(root, "patch.zbb")
+    with open(folder, "rb") as stream:
+        with open(packed, "wb") as out:
+            ZbbArchive.compress_to_stream(stream, out)
+    return base, folder, packed
+
+
+def test_listdir_and_stat():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        base, folder, _ = create_archives(root)
+        with AsuraFS() as fs:
+            assert fs.mount(base) == 4
+            assert fs.listdir() == ["shared.wav", "textures", "unique.dds"]
+            assert fs.listdir("TEXTURES") == ["Props", "shared.dds"]
+            assert fs.isdir("textures/props")
+            assert fs.stat("textures\\props\\chair.dds").size == len(PATCHED[0].data)
+            assert fs.stat("textures").is_dir
+            with pytest.raises(FileNotFoundError):
+                fs.stat("missing.dds")
+            with pytest.raises(NotADirectoryError):
+                fs.listdir("unique.dds")
+            assert fs.read("shared.wav") == CLIP
+            # Later mounts shadow earlier ones
+            fs.mount(folder)
+            assert fs.read("unique.dds") == b"patch"
+            assert fs.stat("unique.dds").archive == folder
+            fs.unmount(folder)
+            assert fs.read("unique.dds") == b"base"
+
+
+def test_open_compressed():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        _, _, packed = create_archives(root)
+        cache = BlockCache()
+        with AsuraFS(cache) as fs:
+            fs.mount(packed)
+            assert fs.read("textures/shared.dds") == TEXTURE
+            with fs.open("textures/shared.dds") as file:
+                file.seek(-10, io.SEEK_END)
+                assert file.read() == TEXTURE[-10:]
+                file.seek(3)
+                assert file.read(4) == TEXTURE[3:7]
+            assert len(cache) == 1
+            assert cache.stats.hits > 0
+        assert len(cache) == 0
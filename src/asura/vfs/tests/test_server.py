@@ -0,0 +1,126 @@
+import json
+from http.client import HTTPConnection
+from os.path import join
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+import pytest
+
+from asura.common.enums import LangCode
+from asura.common.factories import initialize_factories
+from asura.common.models.archive import ZbbArchive
+from asura.localization.tests.htext_helpers import create_htext_chunk, english, french
+from asura.packer.tests.archive_helpers import write_archive, TEXTURE
+from asura.vfs import AsuraFS, AssetServer, parse_range
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=50-500", 100) == (50, 100)
+    assert parse_range("bytes=-500", 100) == (0, 100)
+    # Ignored
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    assert parse_range("bytes=9-0", 100) is None
+    assert parse_range("bytes=a-b", 100) is None
+    # Unsatisfiable
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 100)
+
+
+def request(server, path: str, headers: dict = None, method: str = "GET"):
+    connection = HTTPConnection(*server.server_address)
+    try:
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), response.read()
+    finally:
+        connection.close()
+
+
+def test_serve():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        path = join(root, "base.asr")
+        write_archive(path, "base", [create_htext_chunk(LangCode.ENGLISH, english),
+                                     create_htext_chunk(LangCode.FRENCH, french)])
+        with AsuraFS() as fs:
+            fs.mount(path)
+            assets = AssetServer(fs)
+            server = assets.create_server(port=0)
+            Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                status, headers, body = request(server, "/files/Textures/Shared.dds")
+                assert status == 200 and body == TEXTURE
+                assert headers["Accept-Ranges"] == "bytes"
+                etag = headers["ETag"]
+
+                status, headers, body = request(server, "/files/textures/shared.dds", {"Range": "bytes=4-9"})
+                assert status == 206 and body == TEXTURE[4:10]
+                assert headers["Content-Range"] == f"bytes 4-9/{len(TEXTURE)}"
+                status, _, body = request(server, "/files/textures/shared.dds", {"Range": "bytes=-3"})
+                assert status == 206 and body == TEXTURE[-3:]
+                # A stale If-Range serves the whole file
+                status, _, body = request(server, "/files/textures/shared.dds",
+                                          {"Range": "bytes=4-9", "If-Range": '"stale"'})
+                assert status == 200 and body == TEXTURE
+                status, headers, _ = request(server, "/files/textures/shared.dds", {"Range": f"bytes={len(TEXTURE)}-"})
+                assert status == 416 and headers["Content-Range"] == f"bytes */{len(TEXTURE)}"
+
+                status, _, body = request(server, "/files/textures/shared.dds", {"If-None-Match": etag})
+                assert status == 304 and body == b""
+                status, headers, body = request(server, "/files/textures/shared.dds", method="HEAD")
+                assert status == 200 and body == b"" and headers["Content-Length"] == str(len(TEXTURE))
+
+                status, _, body = request(server, "/files/")
+                assert status == 200
+                assert json.loads(body) == [{"name": "shared.wav", "is_dir": False},
+                                            {"name": "textures", "is_dir": True},
+                                            {"name": "unique.dds", "is_dir": False}]
+                assert request(server, "/files/missing.dds")[0] == 404
+                assert request(server, "/missing")[0] == 404
+
+                status, headers, body = request(server, "/strings/english/GREETING")
+                assert status == 200 and body.decode() == english["greeting"]
+                assert request(server, "/strings/1/farewell")[2].decode() == french["farewell"]
+                assert request(server, "/strings/english/greeting", {"If-None-Match": headers["ETag"]})[0] == 304
+                assert json.loads(request(server, "/strings/french/")[2]) == sorted(french)
+                assert request(server, "/strings/german/greeting")[0] == 404
+                assert request(server, "/strings/klingon/greeting")[0] == 404
+                # Both HTextChunks are parsed once
+                assert len(assets.chunk_cache) == 2
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+def test_corrupt_archive():
+    initialize_factories()
+    with TemporaryDirectory() as root:
+        folder = join(root, "base.asr")
+        write_archive(folder, "base")
+        packed = join(root, "base.zbb")
+        with open(folder, "rb") as stream:
+            with open(packed, "wb") as out:
+                ZbbArchive.compress_to_stream(stream, out)
+        with AsuraFS() as fs:
+            fs.mount(packed)
+            fs.cache.clear()
+            # Corrupts the block after it was mounted
+            with open(packed, "r+b") as stream:
+                stream.seek(64)
+                stream.write(bytes(range(256)))
+            server = AssetServer(fs).create_server(port=0)
+            Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                status, _, _ = request(server, "/files/textures/shared.dds")
+                assert status == 500
+                # The server keeps serving
+                assert request(server, "/files/missing.dds")[0] == 404
+            finally:
+                server.shutdown()
+                server.server_close()